@@ -0,0 +1,328 @@
+"""
+Server-side list endpoints for the large tables.
+
+A ``ListEndpoint`` view loads and renders one page of a list at a time. It
+answers the requests DataTables sends in server-processing mode (``draw``,
+``start``, ``length``, ``search[value]``, ``order[i][column]``/``[dir]``,
+``columns[i][data]`` and ``columns[i][search][value]``) with::
+
+    {"draw", "recordsTotal", "recordsFiltered", "estimated", "data", "next"}
+
+Other clients can send ``search``, ``sort`` (``-date,teacher``), ``length``
+and ``cursor`` instead.
+
+Pages are read by keyset where possible. ``next`` is a signed cursor
+holding the sort values of the page's last row; sent back as ``cursor``
+for the following page (``static/js/server-table.js`` does this) it
+becomes ``WHERE (sort columns, pk) > (last values)``, which walks the index
+from where the previous page stopped. ``OFFSET`` reads and throws away
+every earlier row instead, and is only used for jumps to another page or
+when the cursor was made for a different ordering, filter or start.
+
+NULL never compares greater or less than anything, and backends disagree
+on where it sorts, so nullable sort columns are ordered ``NULLS LAST`` in
+both directions and the keyset condition matches their NULLs explicitly.
+
+Counts are cached for ``LIST_COUNT_CACHE_SECONDS`` per query, so paging
+through a list counts its rows once; a list may show a count that is that
+many seconds old. On PostgreSQL, queries the planner expects to return more
+than ``LIST_COUNT_ESTIMATE_THRESHOLD`` rows are not counted at all: the
+estimate is reported with ``estimated: true``.
+"""
+import datetime
+import hashlib
+import json
+import uuid
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core import signing
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet, FieldDoesNotExist, ValidationError
+from django.db import DatabaseError, connections
+from django.db.models import F, Q
+from django.http import JsonResponse
+from django.views.generic import View
+
+from .replicas import use_replica
+
+CURSOR_SALT = 'corecode.datatables.cursor'
+CURSOR_MAX_AGE = 3600
+MAX_SEARCH_WORDS = 5
+
+
+class Column:
+    """
+    A sortable, searchable or filterable column of a ``ListEndpoint``.
+
+    ``name`` is the column's key in each row (DataTables' ``columns[i][data]``).
+    ``sort`` is the field, or tuple of fields, it orders by. ``search`` holds
+    the lookups tried for each word typed in the search box. ``filter`` is the
+    lookup its own search value is matched with, or a callable
+    ``filter(queryset, value)``. Columns that are only displayed need not be
+    declared.
+    """
+
+    def __init__(self, name, sort=None, search=(), filter=None):
+        self.name = name
+        self.sort = (sort,) if isinstance(sort, str) else tuple(sort or ())
+        self.search = tuple(search)
+        self.filter = filter
+
+    def __repr__(self):
+        return f"<Column {self.name}>"
+
+    def apply_filter(self, queryset, value):
+        try:
+            if callable(self.filter):
+                return self.filter(queryset, value)
+            return queryset.filter(**{self.filter: value})
+        except (ValueError, ValidationError):
+            # A value the field cannot hold (e.g. text for an id) matches nothing
+            return queryset.none()
+
+
+def _fingerprint(queryset):
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        sql, params = 'empty', ()
+    return hashlib.md5(repr((queryset.model._meta.label, sql, params)).encode()).hexdigest()
+
+
+def _estimate(queryset):
+    """The planner's row estimate on PostgreSQL, when over the threshold"""
+    if connections[queryset.db].vendor != 'postgresql':
+        return None
+    try:
+        plan = json.loads(queryset.order_by().explain(format='json'))
+        rows = int(plan[0]['Plan']['Plan Rows'])
+    except (DatabaseError, ValueError, LookupError, TypeError):
+        return None
+    return rows if rows > getattr(settings, 'LIST_COUNT_ESTIMATE_THRESHOLD', 50000) else None
+
+
+def count_rows(queryset):
+    """(rows, estimated) for ``queryset``, cached briefly"""
+    key = f"list-count:{_fingerprint(queryset)}"
+    hit = cache.get(key)
+    if hit is not None:
+        return tuple(hit)
+    estimate = _estimate(queryset)
+    result = (estimate, True) if estimate is not None else (queryset.count(), False)
+    cache.set(key, result, getattr(settings, 'LIST_COUNT_CACHE_SECONDS', 60))
+    return result
+
+
+def _value(obj, path):
+    """``path`` (an ORM field path) read from a model instance or a values() dict"""
+    if isinstance(obj, dict):
+        return obj[path]
+    for part in path.split('__'):
+        obj = getattr(obj, part)
+        if obj is None:
+            break
+    return obj
+
+
+def _plain(value):
+    """A sort value as JSON: dates, times and decimals as the strings lookups accept"""
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (Decimal, uuid.UUID)):
+        return str(value)
+    return value
+
+
+def _nullable(queryset, path):
+    """Whether the field path ``path`` of ``queryset`` can read as NULL"""
+    if path in queryset.query.annotations:
+        return True
+    model = queryset.model
+    for part in path.split('__'):
+        try:
+            field = model._meta.pk if part == 'pk' else model._meta.get_field(part)
+        except FieldDoesNotExist:
+            return True
+        # A nullable foreign key is a LEFT JOIN: every column behind it can be NULL
+        if field.null:
+            return True
+        model = field.related_model
+        if model is None:
+            break
+    return False
+
+
+def _order_by(order, nullable):
+    """ORDER BY terms for ``order``, with NULLs last in the ``nullable`` fields"""
+    terms = []
+    for field, descending in order:
+        if field in nullable:
+            expression = F(field)
+            terms.append(expression.desc(nulls_last=True) if descending else expression.asc(nulls_last=True))
+        else:
+            terms.append(f"-{field}" if descending else field)
+    return terms
+
+
+def _after(order, values, nullable=()):
+    """
+    Rows that sort after ``values`` in ``order`` ([(field, descending)]),
+    NULLs being last in the ``nullable`` fields
+    """
+    condition, equal = Q(), Q()
+    for (field, descending), value in zip(order, values):
+        if value is None:
+            # Nothing sorts after NULL in this column, only alongside it
+            equal &= Q(**{f"{field}__isnull": True})
+            continue
+        after = Q(**{f"{field}__{'lt' if descending else 'gt'}": value})
+        if field in nullable:
+            after |= Q(**{f"{field}__isnull": True})
+        condition |= equal & after
+        equal &= Q(**{field: value})
+    return condition
+
+
+def _int(value, default):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+class ListEndpoint(LoginRequiredMixin, View):
+    """
+    JSON pages of ``get_queryset()``, one dict per row from ``row()``.
+
+    ``default_order`` lists the fields (``-`` for descending) used when the
+    request asks for no known column. ``key`` is the unique field appended
+    to every ordering so keyset pages never skip or repeat rows.
+    """
+    columns = ()
+    default_order = ()
+    key = 'pk'
+    page_size = 25
+    http_method_names = ['get']
+
+    def get_queryset(self):
+        raise NotImplementedError
+
+    def row(self, obj):
+        raise NotImplementedError
+
+    def rows(self, objects):
+        """The page's rows; override to load extra data for the page in bulk"""
+        return [self.row(obj) for obj in objects]
+
+    def _params(self):
+        """(search, {column: filter value}, [(column, descending)]) from the request"""
+        params = self.request.GET
+        search = params.get('search[value]', params.get('search', '')).strip()
+        names, filters = [], {}
+        i = 0
+        while f'columns[{i}][data]' in params:
+            name = params[f'columns[{i}][data]']
+            names.append(name)
+            value = params.get(f'columns[{i}][search][value]', '').strip()
+            if value:
+                filters[name] = value
+            i += 1
+
+        requested = []
+        i = 0
+        while f'order[{i}][column]' in params:
+            index = _int(params[f'order[{i}][column]'], -1)
+            if 0 <= index < len(names):
+                requested.append((names[index], params.get(f'order[{i}][dir]') == 'desc'))
+            i += 1
+        for name in filter(None, params.get('sort', '').split(',')):
+            requested.append((name.lstrip('-'), name.startswith('-')))
+        return search, filters, requested
+
+    def _ordering(self, requested):
+        columns = {column.name: column for column in self.columns}
+        order = [
+            (field, descending)
+            for name, descending in requested if name in columns
+            for field in columns[name].sort
+        ]
+        if not order:
+            order = [(field.lstrip('-'), field.startswith('-')) for field in self.default_order]
+        unique, seen = [], set()
+        for field, descending in order + [(self.key, False)]:
+            if field not in seen:
+                seen.add(field)
+                unique.append((field, descending))
+        return unique
+
+    def filter_queryset(self, queryset, search, filters):
+        columns = {column.name: column for column in self.columns}
+        for name, value in filters.items():
+            column = columns.get(name)
+            if column is not None and column.filter:
+                queryset = column.apply_filter(queryset, value)
+        lookups = [lookup for column in self.columns for lookup in column.search]
+        if lookups:
+            for word in search.split()[:MAX_SEARCH_WORDS]:
+                condition = Q()
+                for lookup in lookups:
+                    condition |= Q(**{lookup: word})
+                queryset = queryset.filter(condition)
+        return queryset
+
+    def get(self, request, *args, **kwargs):
+        with use_replica():
+            return self._page()
+
+    def _page(self):
+        params = self.request.GET
+        search, filters, requested = self._params()
+        start = max(_int(params.get('start'), 0), 0)
+        length = _int(params.get('length'), self.page_size)
+        max_length = getattr(settings, 'LIST_MAX_PAGE_SIZE', 100)
+        length = max_length if length < 1 else min(length, max_length)
+
+        queryset = self.get_queryset()
+        filtered = self.filter_queryset(queryset, search, filters)
+        order = self._ordering(requested)
+        nullable = {field for field, _ in order if _nullable(filtered, field)}
+        ordered = filtered.order_by(*_order_by(order, nullable))
+        state = _fingerprint(ordered)
+
+        values = None
+        if params.get('cursor'):
+            try:
+                token = signing.loads(params['cursor'], salt=CURSOR_SALT, max_age=CURSOR_MAX_AGE)
+            except signing.BadSignature:
+                token = None
+            if token and token['state'] == state and token['start'] == start:
+                values = token['values']
+        if values is not None:
+            page = list(ordered.filter(_after(order, values, nullable))[:length])
+        else:
+            page = list(ordered[start:start + length])
+
+        total, estimated = count_rows(queryset)
+        if filtered is queryset:
+            matched = total
+        else:
+            matched, filtered_estimate = count_rows(filtered)
+            estimated = estimated or filtered_estimate
+
+        cursor = None
+        if len(page) == length:
+            last = [_plain(_value(page[-1], field)) for field, _ in order]
+            cursor = signing.dumps(
+                {'state': state, 'start': start + length, 'values': last}, salt=CURSOR_SALT
+            )
+
+        return JsonResponse({
+            'draw': _int(params.get('draw'), 0),
+            'recordsTotal': total,
+            'recordsFiltered': matched,
+            'estimated': estimated,
+            'data': self.rows(page),
+            'next': cursor,
+        })
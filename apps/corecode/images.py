@@ -0,0 +1,246 @@
+"""
+Resized copies of uploaded photos.
+
+Passports, staff photos, avatars and portfolio images are uploaded straight
+from phones, several MB each, and lists, ID cards and PDFs only ever show
+them a few hundred pixels wide. Each image gets a derivative per size in
+``SIZES`` and per format in ``FORMATS`` (WebP for pages, JPEG for PDF
+renderers), stored under ``IMAGE_DERIVATIVE_DIR`` and named after a hash of
+the source's content: a replaced photo gets new URLs, and a photo uploaded
+twice is resized once.
+
+Derivatives are made:
+
+* in the background after an upload (``corecode.image_derivatives`` job,
+  queued by ``signals``);
+* on first request otherwise: ``url()`` never reads or resizes anything, and
+  points at the ``corecode:image-derivative`` view until the file exists;
+* in bulk by ``manage.py backfill_image_derivatives``, which like the job
+  resizes batches in a process pool (``IMAGE_DERIVATIVE_WORKERS``).
+
+The digest of each source is kept in the shared cache and in this process,
+so rendering a page of thumbnails costs a dict lookup per image.
+"""
+import hashlib
+import logging
+import posixpath
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.urls import reverse
+
+logger = logging.getLogger(__name__)
+
+# Longest side in pixels; about twice the largest size each is shown at
+SIZES = {'xs': 64, 'sm': 160, 'md': 320, 'lg': 800}
+# format -> (Pillow format, file extension)
+FORMATS = {'webp': ('WEBP', 'webp'), 'jpeg': ('JPEG', 'jpg')}
+
+# Image fields that get derivatives: (model label, field name, upload_to)
+IMAGE_FIELDS = [
+    ('students.Student', 'passport', 'students/passports/'),
+    ('staffs.Staff', 'image', 'staffs/'),
+    ('corecode.Profile', 'avatar', 'avatars/'),
+    ('student_portfolio.PortfolioItem', 'image_file', 'portfolio/images/'),
+]
+FIELD_BY_MODEL = {label: field for label, field, _ in IMAGE_FIELDS}
+
+# Fewer images than this are resized in-process
+POOL_THRESHOLD = 8
+# Sources read into memory at once by generate()
+BATCH_SIZE = 32
+
+_digests = {}
+_present = set()
+
+
+def _directory():
+    return getattr(settings, 'IMAGE_DERIVATIVE_DIR', 'derivatives')
+
+
+def is_source(name):
+    """Whether ``name`` is a stored upload of one of ``IMAGE_FIELDS``"""
+    return (
+        bool(name) and '..' not in name.split('/')
+        and name.startswith(tuple(upload_to for _, _, upload_to in IMAGE_FIELDS))
+    )
+
+
+def derivative_path(digest, size, fmt):
+    return posixpath.join(_directory(), digest[:2], f"{digest}-{size}.{FORMATS[fmt][1]}")
+
+
+def _cache_key(name):
+    return f"image-digest:{hashlib.md5(name.encode()).hexdigest()}"
+
+
+def _remember(name, digest):
+    if len(_digests) > 10000:
+        _digests.clear()
+    _digests[name] = digest
+    cache.set(_cache_key(name), digest, None)
+
+
+def known_digest(name):
+    """The content digest of ``name`` if it has been hashed before, else None"""
+    digest = _digests.get(name)
+    if digest is None:
+        digest = cache.get(_cache_key(name))
+        if digest is not None:
+            _digests[name] = digest
+    return digest
+
+
+def _exists(path):
+    if path in _present:
+        return True
+    if default_storage.exists(path):
+        _present.add(path)
+        return True
+    return False
+
+
+def render(data):
+    """
+    Every derivative of the image in ``data``: {(size, format): bytes}.
+    Runs in pool workers, so it touches neither the database nor storage.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(BytesIO(data)) as image:
+        largest = max(SIZES.values())
+        # JPEG sources are decoded at the smallest scale still larger than we need
+        image.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'PA') else 'RGB')
+
+        quality = getattr(settings, 'IMAGE_DERIVATIVE_QUALITY', 80)
+        rendered = {}
+        # Largest first, each size resized from the one before
+        for size, pixels in sorted(SIZES.items(), key=lambda item: -item[1]):
+            image = image.copy()
+            image.thumbnail((pixels, pixels), Image.LANCZOS)
+            for fmt, (pil_format, _) in FORMATS.items():
+                out = image
+                if pil_format == 'JPEG' and image.mode == 'RGBA':
+                    out = Image.new('RGB', image.size, 'white')
+                    out.paste(image, mask=image.getchannel('A'))
+                buffer = BytesIO()
+                out.save(buffer, pil_format, quality=quality, optimize=pil_format == 'JPEG')
+                rendered[(size, fmt)] = buffer.getvalue()
+    return rendered
+
+
+def _safe_render(data):
+    try:
+        return render(data)
+    except Exception as exc:  # not an image, truncated, or a decompression bomb
+        return exc
+
+
+def _write(digest, rendered, replace=False):
+    for (size, fmt), content in rendered.items():
+        path = derivative_path(digest, size, fmt)
+        if _exists(path):
+            if not replace:
+                continue
+            default_storage.delete(path)
+        default_storage.save(path, ContentFile(content))
+        _present.add(path)
+
+
+def _missing(digest):
+    return [
+        (size, fmt) for size in SIZES for fmt in FORMATS
+        if not _exists(derivative_path(digest, size, fmt))
+    ]
+
+
+def generate(names, workers=None, force=False):
+    """
+    Make the derivatives of the stored images ``names`` that do not exist
+    yet (all of them with ``force``). Returns how many sources were resized.
+    """
+    names = list(dict.fromkeys(name for name in names if name))
+    workers = workers or getattr(settings, 'IMAGE_DERIVATIVE_WORKERS', None)
+    pool = None
+    if len(names) >= POOL_THRESHOLD and workers != 1:
+        pool = ProcessPoolExecutor(max_workers=workers)
+    resized, queued = 0, set()
+    try:
+        for start in range(0, len(names), BATCH_SIZE):
+            jobs = []
+            for name in names[start:start + BATCH_SIZE]:
+                try:
+                    with default_storage.open(name, 'rb') as source:
+                        data = source.read()
+                except OSError:
+                    logger.warning("Image %s is missing from storage", name)
+                    continue
+                digest = hashlib.sha256(data).hexdigest()[:24]
+                _remember(name, digest)
+                if digest not in queued and (force or _missing(digest)):
+                    queued.add(digest)
+                    jobs.append((name, digest, data))
+            if not jobs:
+                continue
+
+            sources = [data for _, _, data in jobs]
+            results = pool.map(_safe_render, sources) if pool else map(_safe_render, sources)
+            for (name, digest, _), rendered in zip(jobs, results):
+                if isinstance(rendered, Exception):
+                    logger.warning("Could not resize image %s: %s", name, rendered)
+                    continue
+                _write(digest, rendered, replace=force)
+                resized += 1
+    finally:
+        if pool:
+            pool.shutdown()
+    return resized
+
+
+def ensure(name, size, fmt):
+    """The path of one derivative of ``name``, made now if needed; None if it cannot be"""
+    if not is_source(name) or size not in SIZES or fmt not in FORMATS:
+        return None
+    digest = known_digest(name)
+    if digest is None or not _exists(derivative_path(digest, size, fmt)):
+        generate([name], workers=1)
+        digest = known_digest(name)
+    if digest is None:
+        return None
+    path = derivative_path(digest, size, fmt)
+    return path if _exists(path) else None
+
+
+def url(image, size='sm', fmt='webp'):
+    """
+    URL of a derivative of ``image`` (a FieldFile or stored name): the file
+    itself once it exists, else the view that makes it. '' without an image.
+    """
+    name = getattr(image, 'name', image)
+    if not name:
+        return ''
+    digest = known_digest(name)
+    if digest is not None:
+        path = derivative_path(digest, size, fmt)
+        if _exists(path):
+            return default_storage.url(path)
+    return reverse('corecode:image-derivative', args=[size, fmt, name])
+
+
+def stored_names(labels=None):
+    """Stored image names of every ``IMAGE_FIELDS`` field (or of models ``labels``)"""
+    from django.apps import apps
+
+    for label, field, _ in IMAGE_FIELDS:
+        if labels and label not in labels:
+            continue
+        model = apps.get_model(label)
+        names = model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+        yield from names.values_list(field, flat=True).iterator()
@@ -0,0 +1,272 @@
+"""
+Opt-in per-request performance instrumentation.
+
+With ``INSTRUMENTATION_ENABLED`` set, ``RequestInstrumentation`` middleware
+records for every request:
+
+* SQL query count and time, through a connection execute wrapper;
+* template render time, by timing the Django template backend;
+* time in PDF rendering, SMS and payment calls, via ``timed()``;
+* cache hits and misses on the default cache;
+* connections in use and waiting requests of pooled databases.
+
+It adds them to the response as a ``Server-Timing`` header, writes one
+structured log line per request and feeds a rolling per-process table of
+the slowest endpoints (``slow_endpoints.top()``) shown to admins.
+
+When the setting is off the middleware removes itself and nothing is
+patched, so ``timed()`` is reduced to a context variable lookup.
+"""
+import functools
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+logger = logging.getLogger('school_app.performance')
+
+_current = ContextVar('request_metrics', default=None)
+_installed = False
+
+
+class RequestMetrics:
+    """Counters for one request; times are in milliseconds"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_ms = 0.0
+        self.timings = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def add(self, category, ms):
+        self.timings[category] = self.timings.get(category, 0.0) + ms
+
+    @property
+    def total_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+
+def current():
+    """The metrics of the request being handled, or None when disabled"""
+    return _current.get()
+
+
+@contextmanager
+def timed(category):
+    """Add the time spent in the block to ``category`` for this request"""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add(category, (time.perf_counter() - started) * 1000)
+
+
+def instrumented(category):
+    """Decorator form of ``timed``"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(category):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_query(execute, sql, params, many, context):
+    """Connection execute wrapper counting queries and their time"""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.sql_ms += (time.perf_counter() - started) * 1000
+
+
+_MISSING = object()
+
+
+def _install():
+    """Patch template rendering and cache reads once per process"""
+    global _installed
+    if _installed:
+        return
+    _installed = True
+
+    from django.core.cache import caches
+    from django.template.backends.django import Template
+
+    render = Template.render
+
+    @functools.wraps(render)
+    def timed_render(self, *args, **kwargs):
+        with timed('template'):
+            return render(self, *args, **kwargs)
+
+    Template.render = timed_render
+
+    backend = type(caches['default'])
+    get = backend.get
+
+    @functools.wraps(get)
+    def counted_get(self, key, default=None, version=None):
+        value = get(self, key, _MISSING, version)
+        metrics = _current.get()
+        if metrics is not None:
+            if value is _MISSING:
+                metrics.cache_misses += 1
+            else:
+                metrics.cache_hits += 1
+        return default if value is _MISSING else value
+
+    backend.get = counted_get
+
+
+class SlowEndpoints:
+    """
+    Rolling per-process stats for the slowest endpoints.
+
+    Keeps the last ``samples`` durations for up to ``size`` endpoints,
+    evicting the least recently seen endpoint when full.
+    """
+
+    def __init__(self, size=200, samples=100):
+        self.size = size
+        self.samples = samples
+        self._lock = threading.Lock()
+        self._endpoints = OrderedDict()
+
+    def record(self, endpoint, metrics):
+        with self._lock:
+            entry = self._endpoints.pop(endpoint, None)
+            if entry is None:
+                entry = {'durations': deque(maxlen=self.samples), 'queries': deque(maxlen=self.samples)}
+            entry['durations'].append(metrics.total_ms)
+            entry['queries'].append(metrics.queries)
+            self._endpoints[endpoint] = entry
+            while len(self._endpoints) > self.size:
+                self._endpoints.popitem(last=False)
+
+    def top(self, limit=20):
+        with self._lock:
+            items = [(endpoint, list(e['durations']), list(e['queries']))
+                     for endpoint, e in self._endpoints.items()]
+        rows = []
+        for endpoint, durations, queries in items:
+            ordered = sorted(durations)
+            rows.append({
+                'endpoint': endpoint,
+                'requests': len(durations),
+                'avg_ms': round(sum(durations) / len(durations), 1),
+                'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 1),
+                'max_ms': round(ordered[-1], 1),
+                'avg_queries': round(sum(queries) / len(queries), 1),
+                'max_queries': max(queries),
+            })
+        rows.sort(key=lambda row: row['p95_ms'], reverse=True)
+        return rows[:limit]
+
+    def clear(self):
+        with self._lock:
+            self._endpoints.clear()
+
+
+slow_endpoints = SlowEndpoints()
+
+
+# psycopg_pool counters reported by pool_stats()
+POOL_STATS = (
+    'pool_min', 'pool_max', 'pool_size', 'pool_available', 'requests_waiting',
+    'requests_num', 'requests_queued', 'requests_wait_ms', 'requests_errors',
+    'connections_num', 'connections_lost', 'usage_ms',
+)
+
+
+def pool_stats():
+    """Connection pool counters per database alias that pools (PostgreSQL)"""
+    from django.db import connections
+
+    stats = {}
+    for alias in connections:
+        connection = connections[alias]
+        if not connection.settings_dict.get('OPTIONS', {}).get('pool'):
+            continue
+        pool = connection.pool
+        if pool is not None:
+            counters = pool.get_stats()
+            stats[alias] = {key: counters.get(key, 0) for key in POOL_STATS}
+            stats[alias]['in_use'] = counters.get('pool_size', 0) - counters.get('pool_available', 0)
+    return stats
+
+
+def server_timing(metrics, pools=None):
+    """Format metrics as a Server-Timing header value"""
+    parts = [f'db;dur={metrics.sql_ms:.1f};desc="{metrics.queries} queries"']
+    for category, ms in sorted(metrics.timings.items()):
+        parts.append(f'{category};dur={ms:.1f}')
+    if metrics.cache_hits or metrics.cache_misses:
+        parts.append(f'cache;desc="{metrics.cache_hits} hits, {metrics.cache_misses} misses"')
+    for alias, pool in (pools or {}).items():
+        parts.append(
+            f'pool-{alias};desc="{pool["in_use"]}/{pool["pool_max"]} in use, '
+            f'{pool["requests_waiting"]} waiting"'
+        )
+    parts.append(f'total;dur={metrics.total_ms:.1f}')
+    return ', '.join(parts)
+
+
+def endpoint_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    return match.view_name or match._func_path
+
+
+def start():
+    """Begin collecting metrics for the current request"""
+    _install()
+    return _current.set(RequestMetrics())
+
+
+def stop(token):
+    _current.reset(token)
+
+
+def finish(request, response, metrics):
+    """Emit the header, log line and slow-endpoint sample for a request"""
+    endpoint = endpoint_name(request)
+    pools = pool_stats()
+    response['Server-Timing'] = server_timing(metrics, pools)
+    slow_endpoints.record(endpoint, metrics)
+
+    total_ms = metrics.total_ms
+    record = {
+        'method': request.method,
+        'path': request.path,
+        'endpoint': endpoint,
+        'status': response.status_code,
+        'total_ms': round(total_ms, 1),
+        'queries': metrics.queries,
+        'sql_ms': round(metrics.sql_ms, 1),
+        'cache_hits': metrics.cache_hits,
+        'cache_misses': metrics.cache_misses,
+        **{f'{category}_ms': round(ms, 1) for category, ms in metrics.timings.items()},
+    }
+    for alias, pool in pools.items():
+        record[f'pool_{alias}_in_use'] = pool['in_use']
+        record[f'pool_{alias}_waiting'] = pool['requests_waiting']
+    slow = total_ms >= getattr(settings, 'INSTRUMENTATION_SLOW_MS', 1000)
+    logger.log(logging.WARNING if slow else logging.INFO, json.dumps(record), extra={'metrics': record})
@@ -0,0 +1,41 @@
+"""
+Deferred imports for heavy optional dependencies.
+
+pandas, NumPy, Playwright and the SMS/M-Pesa SDKs each add tens to hundreds
+of milliseconds to process start when imported at module level, and every
+gunicorn worker pays that before serving its first request. Modules that
+need them bind a ``lazy_import()`` proxy instead::
+
+    pd = lazy_import('pandas')
+
+The real module is imported on first attribute access and cached on the
+proxy, so later use costs one attribute lookup. ``python manage.py
+profile_imports`` shows which imports still run at startup.
+"""
+import importlib
+
+
+class LazyModule:
+    """Stand-in for a module that imports it on first attribute access"""
+
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            module = importlib.import_module(self.__dict__['_name'])
+            self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = 'loaded' if self.__dict__['_module'] is not None else 'not loaded'
+        return f"<lazy module '{self.__dict__['_name']}' ({state})>"
+
+
+def lazy_import(name):
+    return LazyModule(name)
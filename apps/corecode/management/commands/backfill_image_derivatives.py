@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.corecode import images
+
+MODELS = [label for label, _, _ in images.IMAGE_FIELDS]
+
+
+class Command(BaseCommand):
+    help = 'Make the resized copies of uploaded photos that do not exist yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'models', nargs='*',
+            help=f"Models whose images to resize (default: all of {', '.join(MODELS)})"
+        )
+        parser.add_argument(
+            '--workers', type=int,
+            help='Resizing processes (default: IMAGE_DERIVATIVE_WORKERS, else one per CPU)'
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Resize every image again, e.g. after changing sizes or quality'
+        )
+
+    def handle(self, *args, **options):
+        models = options['models'] or MODELS
+        unknown = set(models) - set(MODELS)
+        if unknown:
+            raise CommandError(f"Unknown models: {', '.join(sorted(unknown))}")
+
+        names = list(images.stored_names(models))
+        self.stdout.write(f'{len(names)} image(s) found')
+        resized = images.generate(names, workers=options['workers'], force=options['force'])
+        self.stdout.write(self.style.SUCCESS(f'Resized {resized} image(s)'))
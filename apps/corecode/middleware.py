@@ -1,3 +1,10 @@
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from . import instrumentation, replicas
 from .models import AcademicSession, AcademicTerm
 
 
@@ -15,3 +22,55 @@ class SiteWideConfigs:
         response = self.get_response(request)
 
         return response
+
+
+class RequestInstrumentation:
+    """
+    Server-Timing headers, structured logs and slow-endpoint stats for each
+    request; see ``apps.corecode.instrumentation``. Removed from the stack
+    unless INSTRUMENTATION_ENABLED is set.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'INSTRUMENTATION_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = instrumentation.start()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(instrumentation.record_query))
+                response = self.get_response(request)
+            instrumentation.finish(request, response, instrumentation.current())
+            return response
+        finally:
+            instrumentation.stop(token)
+
+
+class ReplicaRouting:
+    """
+    Keep a client on the primary for REPLICA_STICKY_SECONDS after one of its
+    requests writes; see ``apps.corecode.replicas``. Removed from the stack
+    unless a replica is configured.
+    """
+
+    def __init__(self, get_response):
+        if not replicas.replica_alias():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        tokens = replicas.begin_request(replicas.STICKY_COOKIE in request.COOKIES)
+        try:
+            response = self.get_response(request)
+            if replicas.request_wrote():
+                response.set_cookie(
+                    replicas.STICKY_COOKIE, '1',
+                    max_age=getattr(settings, 'REPLICA_STICKY_SECONDS', 15),
+                    secure=request.is_secure(), httponly=True, samesite='Lax',
+                )
+            return response
+        finally:
+            replicas.end_request(tokens)
@@ -0,0 +1,187 @@
+"""
+Routing of heavy reads to a read replica.
+
+When ``DATABASE_REPLICA_URL`` is set, settings add a ``replica`` database
+and ``ReplicaRouter`` may send reads there. Nothing goes to the replica by
+default. Reads are routed there only inside code marked as read-only:
+
+* views decorated with ``@read_from_replica``;
+* blocks under ``with use_replica():``, e.g. in management commands;
+* querysets passed through ``on_replica(queryset)``.
+
+All writes go to the primary. Reads fall back to the primary:
+
+* inside ``with use_primary():``;
+* after the current request wrote anything;
+* for ``REPLICA_STICKY_SECONDS`` after a request from the same client wrote
+  (``ReplicaRouting`` middleware sets a cookie for this), so a user sees
+  their own changes despite replication lag;
+* while the replica lags more than ``REPLICA_MAX_LAG_SECONDS``. The lag is
+  checked at most every ``REPLICA_LAG_CHECK_SECONDS`` per process, on
+  PostgreSQL only.
+
+To try it locally with two SQLite files, copy the database and point the
+replica at the copy::
+
+    cp db.sqlite3 replica.sqlite3
+    DATABASE_REPLICA_URL=sqlite:///replica.sqlite3 python manage.py runserver
+"""
+import functools
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+STICKY_COOKIE = 'db_primary'
+
+# Writes that do not pin a client to the primary: session saves happen on
+# most requests and are never read back through the replica
+UNTRACKED_WRITES = {'sessions.Session'}
+
+_replica = ContextVar('db_read_replica', default=False)
+_primary = ContextVar('db_force_primary', default=False)
+# A dict rather than a bool so writes made in a copied context still count
+_wrote = ContextVar('db_wrote', default=None)
+
+# Last lag check per process: (checked at, replica usable)
+_lag = {'checked': None, 'ok': True}
+
+LAG_SQL = """
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+"""
+
+
+def replica_alias():
+    """The configured replica alias, or None"""
+    alias = getattr(settings, 'DATABASE_REPLICA_ALIAS', None)
+    if alias is None or alias == DEFAULT_DB_ALIAS:
+        return alias
+    # Under test the replica mirrors the primary's test database, where a
+    # second connection would not see the test's uncommitted rows
+    replica = connections.settings.get(alias)
+    if replica is not None and replica['NAME'] == connections.settings[DEFAULT_DB_ALIAS]['NAME']:
+        return None
+    return alias
+
+
+@contextmanager
+def use_replica():
+    """Send reads in the block to the replica (writes still go to the primary)"""
+    token = _replica.set(True)
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+@contextmanager
+def use_primary():
+    """Send every read in the block to the primary"""
+    token = _primary.set(True)
+    try:
+        yield
+    finally:
+        _primary.reset(token)
+
+
+def read_from_replica(func):
+    """Decorator form of ``use_replica`` for read-only views and commands"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with use_replica():
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def _lag_ok(alias):
+    max_lag = getattr(settings, 'REPLICA_MAX_LAG_SECONDS', 30)
+    if not max_lag:
+        return True
+    now = time.monotonic()
+    checked = _lag['checked']
+    if checked is not None and now - checked < getattr(settings, 'REPLICA_LAG_CHECK_SECONDS', 5):
+        return _lag['ok']
+    ok = True
+    connection = connections[alias]
+    if connection.vendor == 'postgresql':
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(LAG_SQL)
+                (lag,) = cursor.fetchone()
+            ok = lag is not None and lag <= max_lag
+            if not ok:
+                logger.warning("Replica %s lags %ss; reading from the primary", alias, lag)
+        except DatabaseError:
+            logger.exception("Replica %s lag check failed; reading from the primary", alias)
+            ok = False
+    _lag.update(checked=now, ok=ok)
+    return ok
+
+
+def read_alias(replica=None):
+    """
+    Alias reads should use right now; ``replica`` overrides whether the
+    caller marked them for the replica.
+    """
+    wanted = _replica.get() if replica is None else replica
+    alias = replica_alias()
+    if alias is None or not wanted or _primary.get():
+        return DEFAULT_DB_ALIAS
+    wrote = _wrote.get()
+    if wrote is not None and wrote['wrote']:
+        return DEFAULT_DB_ALIAS
+    return alias if _lag_ok(alias) else DEFAULT_DB_ALIAS
+
+
+def on_replica(queryset):
+    """``queryset`` read from the replica when that is currently safe"""
+    return queryset.using(read_alias(replica=True))
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return read_alias()
+
+    def db_for_write(self, model, **hints):
+        wrote = _wrote.get()
+        if wrote is not None and model._meta.label not in UNTRACKED_WRITES:
+            wrote['wrote'] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary
+        aliases = {DEFAULT_DB_ALIAS, replica_alias()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema from the primary
+        if db == replica_alias():
+            return False
+        return None
+
+
+def begin_request(sticky):
+    """Track writes for a request; ``sticky`` pins its reads to the primary"""
+    return _wrote.set({'wrote': False}), _primary.set(True) if sticky else None
+
+
+def request_wrote():
+    wrote = _wrote.get()
+    return wrote is not None and wrote['wrote']
+
+
+def end_request(tokens):
+    wrote_token, primary_token = tokens
+    if primary_token is not None:
+        _primary.reset(primary_token)
+    _wrote.reset(wrote_token)
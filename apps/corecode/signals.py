@@ -1,7 +1,11 @@
+from django.db import transaction
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.contrib.auth.models import User
 
+from apps.jobs.queue import enqueue
+
+from . import images
 from .models import AcademicSession, AcademicTerm, Profile
 
 
@@ -23,3 +27,19 @@ def after_saving_term(sender, created, instance, *args, **kwargs):
     """Change all academic terms to false if this is true."""
     if instance.current is True:
         AcademicTerm.objects.exclude(pk=instance.id).update(current=False)
+
+
+def queue_image_derivatives(sender, instance, update_fields=None, **kwargs):
+    """Resize a newly uploaded photo in the background (see ``images``)"""
+    field = images.FIELD_BY_MODEL[sender._meta.label]
+    if update_fields is not None and field not in update_fields:
+        return
+    name = getattr(instance, field).name
+    if name and images.known_digest(name) is None:
+        transaction.on_commit(
+            lambda: enqueue('corecode.image_derivatives', {'names': [name]}, unique=True)
+        )
+
+
+for _label, _field, _ in images.IMAGE_FIELDS:
+    post_save.connect(queue_image_derivatives, sender=_label, dispatch_uid=f'image-derivatives-{_label}')
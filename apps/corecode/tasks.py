@@ -0,0 +1,10 @@
+from apps.jobs.queue import task
+
+from . import images
+
+
+@task('corecode.image_derivatives', queue='maintenance', max_attempts=2)
+def image_derivatives(job, names):
+    """Resized copies of freshly uploaded photos (see ``images``)"""
+    resized = images.generate(names)
+    job.report_progress(len(names), len(names), f"Resized {resized} of {len(names)} images")
@@ -0,0 +1,11 @@
+from django import template
+
+from apps.corecode import images
+
+register = template.Library()
+
+
+@register.simple_tag
+def thumbnail(image, size='sm', fmt='webp'):
+    """URL of a resized copy of ``image``: {% thumbnail student.passport 'md' %}"""
+    return images.url(image, size, fmt)
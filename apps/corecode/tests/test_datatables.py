@@ -0,0 +1,117 @@
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.corecode.models import StudentClass
+from apps.staffs.models import Staff, TeacherAttendance
+from apps.students.models import Student
+
+# The columns the student table sends, as DataTables numbers them
+COLUMNS = ["", "name", "registration_number", "current_class", "gender", "mobile", "status"]
+
+
+class ListEndpointTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(get_user_model().objects.create_user("list-clerk", password="pw"))
+        self.form1 = StudentClass.objects.create(name="Form 1")
+        self.form2 = StudentClass.objects.create(name="Form 2")
+        for i in range(7):
+            Student.objects.create(
+                registration_number=f"ADM{i:03d}", surname=f"Otieno{i % 3}", firstname=f"Pupil{i}",
+                current_class=self.form1 if i % 2 else self.form2,
+                current_status="inactive" if i == 6 else "active",
+            )
+
+    def page(self, start=0, length=3, order=(1, "asc"), search="", filters=None, cursor="", draw=1):
+        params = {"draw": draw, "start": start, "length": length, "search[value]": search, "cursor": cursor}
+        for i, name in enumerate(COLUMNS):
+            params[f"columns[{i}][data]"] = name
+            params[f"columns[{i}][search][value]"] = (filters or {}).get(name, "")
+        params["order[0][column]"], params["order[0][dir]"] = order
+        response = self.client.get(reverse("students:student-list-data"), params, secure=True)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_keyset_pages_match_offset_pages(self):
+        first = self.page(draw=4)
+        self.assertEqual((first["draw"], first["recordsTotal"], first["recordsFiltered"]), (4, 7, 7))
+        self.assertFalse(first["estimated"])
+        self.assertEqual(
+            [row["name"] for row in first["data"]], ["Otieno0 Pupil0", "Otieno0 Pupil3", "Otieno0 Pupil6"]
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            second = self.page(start=3, cursor=first["next"])
+        reads = [query["sql"] for query in queries.captured_queries if '"students_student"' in query["sql"]]
+        self.assertEqual(len(reads), 1)  # the counts come from the cache while paging
+        self.assertNotIn("OFFSET", reads[0])
+        self.assertEqual(second["data"], self.page(start=3)["data"])
+
+        last = self.page(start=6, cursor=second["next"])
+        self.assertEqual([row["name"] for row in last["data"]], ["Otieno2 Pupil5"])
+        self.assertIsNone(last["next"])
+
+        # A cursor made for another ordering is ignored
+        descending = self.page(start=3, order=(1, "desc"), cursor=first["next"])
+        self.assertEqual(descending["data"], self.page(start=3, order=(1, "desc"))["data"])
+
+    def test_search_and_column_filters(self):
+        found = self.page(search="otieno1 pupil4", length=10)
+        self.assertEqual([row["registration_number"] for row in found["data"]], ["ADM004"])
+        self.assertEqual((found["recordsTotal"], found["recordsFiltered"]), (7, 1))
+
+        form1 = self.page(filters={"current_class": str(self.form1.pk), "status": "active"}, length=10)
+        self.assertEqual(
+            sorted(row["registration_number"] for row in form1["data"]), ["ADM001", "ADM003", "ADM005"]
+        )
+        self.assertEqual(self.page(filters={"current_class": "form one"})["recordsFiltered"], 0)
+
+    def test_page_size_is_capped(self):
+        with self.settings(LIST_MAX_PAGE_SIZE=5):
+            self.assertEqual(len(self.page(length=-1)["data"]), 5)
+
+
+class NullSortTest(TestCase):
+    """Keyset pages must not skip rows whose sort column is NULL"""
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(get_user_model().objects.create_user("records-clerk", password="pw"))
+        teacher = Staff.objects.create(surname="Wanjiru", firstname="Grace")
+        for day in range(10):
+            TeacherAttendance.objects.create(
+                teacher=teacher, date=datetime.date(2026, 9, 1 + day),
+                time_in=datetime.time(7, day) if day % 2 else None,
+            )
+
+    def walk(self, sort):
+        url = reverse("staffs:attendance-records-data")
+        params = {"sort": sort, "length": 3}
+        page = self.client.get(url, params, secure=True).json()
+        ids = [row["id"] for row in page["data"]]
+        while page["next"]:
+            params.update(start=params.get("start", 0) + 3, cursor=page["next"])
+            page = self.client.get(url, params, secure=True).json()
+            ids += [row["id"] for row in page["data"]]
+        return page["recordsTotal"], ids
+
+    def test_null_sort_values_are_paged(self):
+        for sort in ("-time_in", "time_in", "time_out,-date"):
+            with self.subTest(sort):
+                total, ids = self.walk(sort)
+                self.assertEqual((total, len(ids)), (10, 10))
+                offset = self.client.get(
+                    reverse("staffs:attendance-records-data"), {"sort": sort, "length": 10}, secure=True
+                ).json()
+                self.assertEqual(ids, [row["id"] for row in offset["data"]])
+
+        # NULLs come last whichever way the column is sorted
+        _, ids = self.walk("-time_in")
+        nulls = set(TeacherAttendance.objects.filter(time_in__isnull=True).values_list("pk", flat=True))
+        self.assertEqual(set(ids[5:]), nulls)
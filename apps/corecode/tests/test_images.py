@@ -0,0 +1,76 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from apps.corecode import images
+from apps.staffs.models import Staff
+from apps.students.models import Student
+
+
+def photo(name, colour="red", size=(1200, 900)):
+    buffer = BytesIO()
+    Image.new("RGB", size, colour).save(buffer, "JPEG")
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/jpeg")
+
+
+class ImageDerivativeTest(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        overrides = override_settings(MEDIA_ROOT=media, JOBS_EAGER=True)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        cache.clear()
+        images._digests.clear()
+        images._present.clear()
+
+    def test_upload_is_resized_once_per_content(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first = Student.objects.create(
+                registration_number="IMG001", surname="Achieng", firstname="Mary", passport=photo("mary.jpg")
+            )
+        digest = images.known_digest(first.passport.name)
+        self.assertIsNotNone(digest)
+        self.assertEqual(images.url(first.passport, "sm"), default_storage.url(images.derivative_path(digest, "sm", "webp")))
+
+        with default_storage.open(images.derivative_path(digest, "sm", "webp")) as stored, Image.open(stored) as small:
+            self.assertEqual((small.format, small.size), ("WEBP", (160, 120)))
+        with default_storage.open(images.derivative_path(digest, "md", "jpeg")) as stored, Image.open(stored) as medium:
+            self.assertEqual((medium.format, medium.size), ("JPEG", (320, 240)))
+
+        # The same photo uploaded again reuses the files already made
+        with self.captureOnCommitCallbacks(execute=True):
+            second = Student.objects.create(
+                registration_number="IMG002", surname="Achieng", firstname="Jane", passport=photo("jane.jpg")
+            )
+        self.assertNotEqual(first.passport.name, second.passport.name)
+        self.assertEqual(images.url(second.passport, "lg"), images.url(first.passport, "lg"))
+        self.assertEqual(images.generate([first.passport.name, second.passport.name]), 0)
+
+    def test_unknown_photo_is_resized_on_first_request(self):
+        staff = Staff.objects.create(surname="Kamau", firstname="John", image=photo("john.png", "blue"))
+        cache.clear()
+        images._digests.clear()
+
+        lazy = images.url(staff.image, "md")
+        self.assertTrue(lazy.startswith("/core/images/md/webp/staffs/"))
+        self.assertTrue(self.client.get(lazy, secure=True)["Location"].startswith(settings.LOGIN_URL))
+        self.assertIsNone(images.known_digest(staff.image.name))  # nothing was read for the visitor
+
+        self.client.force_login(get_user_model().objects.create_user("photo-clerk", password="pw"))
+        response = self.client.get(lazy, secure=True)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response["Location"], images.url(staff.image, "md"))
+        self.assertNotEqual(response["Location"], lazy)
+
+        self.assertEqual(self.client.get("/core/images/huge/webp/" + staff.image.name, secure=True).status_code, 404)
+        self.assertEqual(self.client.get("/core/images/md/webp/students/bulkupload/x.csv", secure=True).status_code, 404)
+        self.assertEqual(images.url(Staff(surname="No", firstname="Photo").image), "")
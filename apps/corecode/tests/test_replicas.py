@@ -0,0 +1,64 @@
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from apps.corecode import replicas
+from apps.corecode.models import Subject
+
+
+# An alias outside DATABASES: routing decisions never open a connection
+@override_settings(DATABASE_REPLICA_ALIAS="reports", REPLICA_MAX_LAG_SECONDS=0)
+class ReplicaRouterTest(SimpleTestCase):
+    router = replicas.ReplicaRouter()
+
+    def test_reads_use_replica_only_when_marked(self):
+        self.assertEqual(self.router.db_for_read(Subject), "default")
+        with replicas.use_replica():
+            self.assertEqual(self.router.db_for_read(Subject), "reports")
+            with replicas.use_primary():
+                self.assertEqual(self.router.db_for_read(Subject), "default")
+        self.assertEqual(replicas.on_replica(Subject.objects.all()).db, "reports")
+
+    def test_request_sticks_to_primary_after_write(self):
+        tokens = replicas.begin_request(sticky=False)
+        try:
+            with replicas.use_replica():
+                self.assertEqual(self.router.db_for_read(Subject), "reports")
+                self.assertEqual(self.router.db_for_write(Subject), "default")
+                self.assertEqual(self.router.db_for_read(Subject), "default")
+        finally:
+            replicas.end_request(tokens)
+
+        tokens = replicas.begin_request(sticky=True)
+        try:
+            with replicas.use_replica():
+                self.assertEqual(self.router.db_for_read(Subject), "default")
+        finally:
+            replicas.end_request(tokens)
+
+    def test_replica_is_not_migrated(self):
+        self.assertFalse(self.router.allow_migrate("reports", "corecode"))
+        self.assertIsNone(self.router.allow_migrate("default", "corecode"))
+
+    @override_settings(DATABASE_REPLICA_ALIAS=None)
+    def test_without_replica(self):
+        with replicas.use_replica():
+            self.assertEqual(self.router.db_for_read(Subject), "default")
+
+
+# The primary stands in for the replica so requests can run
+@override_settings(DATABASE_REPLICA_ALIAS="default", REPLICA_MAX_LAG_SECONDS=0)
+class ReplicaStickyCookieTest(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user("replica-admin", password="pw", is_staff=True)
+        self.client.force_login(user)
+
+    def test_write_sets_sticky_cookie(self):
+        response = self.client.get(reverse("corecode:subjects"), secure=True)
+        self.assertNotIn(replicas.STICKY_COOKIE, response.cookies)
+
+        response = self.client.post(
+            reverse("corecode:subject-create"), {"Subject-name": "Replica Studies"}, secure=True
+        )
+        self.assertTrue(Subject.objects.filter(name="Replica Studies").exists())
+        self.assertEqual(response.cookies[replicas.STICKY_COOKIE]["httponly"], True)
@@ -0,0 +1,45 @@
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from apps.corecode.instrumentation import RequestMetrics, server_timing, slow_endpoints
+
+
+class RequestInstrumentationTest(TestCase):
+    def setUp(self):
+        slow_endpoints.clear()
+        self.admin = get_user_model().objects.create_user("perf-admin", password="pw", is_staff=True)
+        self.client.force_login(self.admin)
+
+    @override_settings(INSTRUMENTATION_ENABLED=True)
+    def test_server_timing_and_slow_endpoint_table(self):
+        with self.assertLogs("school_app.performance") as logs:
+            response = self.client.get(reverse("corecode:subjects"), secure=True)
+        timing = response["Server-Timing"]
+        self.assertIn("queries", timing)
+        self.assertIn("template;dur=", timing)
+        self.assertIn('"endpoint": "corecode:subjects"', logs.output[0])
+
+        table = self.client.get(
+            reverse("corecode:slow-endpoints"), {"format": "json"}, secure=True
+        ).json()
+        (row,) = [r for r in table["endpoints"] if r["endpoint"] == "corecode:subjects"]
+        self.assertEqual(row["requests"], 1)
+        self.assertGreater(row["max_queries"], 0)
+
+    def test_disabled_by_default(self):
+        response = self.client.get(reverse("corecode:subjects"), secure=True)
+        self.assertNotIn("Server-Timing", response)
+        self.assertEqual(slow_endpoints.top(), [])
+
+    def test_table_is_staff_only(self):
+        self.client.force_login(get_user_model().objects.create_user("perf-teacher", password="pw"))
+        response = self.client.get(reverse("corecode:slow-endpoints"), secure=True)
+        self.assertEqual(response.status_code, 302)
+
+
+class PoolTimingTest(SimpleTestCase):
+    def test_pool_gauge_in_server_timing(self):
+        pools = {"default": {"in_use": 3, "pool_max": 8, "requests_waiting": 1}}
+        timing = server_timing(RequestMetrics(), pools)
+        self.assertIn('pool-default;desc="3/8 in use, 1 waiting"', timing)
@@ -1,7 +1,7 @@
 from django.urls import path
 from django.views.generic import TemplateView
 from .views_class_management import teacher_class_list, class_detail
-from .views import global_search, notifications_feed, send_notice
+from .views import global_search, image_derivative, notifications_feed, send_notice, slow_endpoints
 
 from .views import (
     ClassCreateView,
@@ -94,4 +94,6 @@ urlpatterns = [
     # Utility APIs
     path('search/', global_search, name='global-search'),
     path('notifications/', notifications_feed, name='notifications-feed'),
+    path('performance/', slow_endpoints, name='slow-endpoints'),
+    path('images/<str:size>/<str:fmt>/<path:name>', image_derivative, name='image-derivative'),
 ]
\ No newline at end of file
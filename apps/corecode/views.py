@@ -1,4 +1,5 @@
 from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.messages.views import SuccessMessageMixin
@@ -8,11 +9,12 @@ from django.views.generic import ListView, TemplateView, View
 from django.views.generic.edit import CreateView, DeleteView, UpdateView
 from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
-from django.http import JsonResponse, HttpResponse
-from django.db.models import Q
+from django.core.files.storage import default_storage
+from django.http import Http404, JsonResponse, HttpResponse
 from django.utils import timezone
 from django.contrib.auth.models import User
 
+from . import images
 from .forms import (
     AcademicSessionForm,
     AcademicTermForm,
@@ -464,39 +466,79 @@ def logout_view(request):
     return redirect('corecode:login')
 
 
+# Search index kind -> key in the global search response
+SEARCH_SECTIONS = {
+    'student': 'students',
+    'staff': 'staffs',
+    'invoice': 'invoices',
+    'class': 'classes',
+    'lessonplan': 'lessonplans',
+}
+
+
+# Most lesson plan hits read before the visibility filter
+MAX_LESSONPLAN_CANDIDATES = 400
+
+
+def _visible_lessonplan_hits(user, term, limit):
+    """
+    The best ``limit`` lesson plan hits ``user`` may open. Hidden plans are
+    filtered out before the limit applies, reading more hits while they
+    crowd out visible ones.
+    """
+    from apps.search.backends import search
+    from lessonplans.views import visible_lessonplans
+
+    fetch = limit
+    while True:
+        hits = search(term, kinds=['lessonplan'], limit=fetch)
+        allowed = set(
+            visible_lessonplans(user)
+            .filter(pk__in=[hit.object_id for hit in hits]).values_list('pk', flat=True)
+        )
+        visible = [hit for hit in hits if hit.object_id in allowed]
+        if len(visible) >= limit or len(hits) < fetch or fetch >= MAX_LESSONPLAN_CANDIDATES:
+            return visible[:limit]
+        fetch *= 4
+
+
 @login_required
 def global_search(request):
+    """
+    Ranked lookup over the search index for the navbar and lesson plans.
+
+    ``kind`` narrows the search to a comma-separated list of index kinds
+    (e.g. ``?kind=lessonplan``) and ``limit`` caps results per kind.
+    """
+    # Lazy imports to avoid circulars
+    from apps.search.backends import search
+    from apps.search.documents import get_url
+
     term = request.GET.get('q', '').strip()
-    results = { 'students': [], 'staffs': [], 'invoices': [], 'classes': [] }
+    kinds = [k for k in request.GET.get('kind', '').split(',') if k in SEARCH_SECTIONS]
+    kinds = kinds or list(SEARCH_SECTIONS)
+    try:
+        per_kind = min(max(int(request.GET.get('limit', 5)), 1), 50)
+    except ValueError:
+        per_kind = 5
+
+    results = {SEARCH_SECTIONS[kind]: [] for kind in kinds}
     if term:
-        # Lazy imports to avoid circulars
-        from apps.students.models import Student
-        from apps.staffs.models import Staff
-        from apps.finance.models import Invoice
-
-        students = Student.objects.filter(
-            Q(first_name__icontains=term) | Q(last_name__icontains=term) | Q(current_class__name__icontains=term)
-        ).values('id', 'first_name', 'last_name')[:5]
-        staffs = Staff.objects.filter(
-            Q(first_name__icontains=term) | Q(last_name__icontains=term)
-        ).values('id', 'first_name', 'last_name')[:5]
-        invoices = Invoice.objects.filter(
-            Q(number__icontains=term) | Q(student__first_name__icontains=term) | Q(student__last_name__icontains=term)
-        ).values('id', 'number')[:5]
-        classes = StudentClass.objects.filter(Q(name__icontains=term)).values('id', 'name')[:5]
-
-        results['students'] = [
-            { 'id': s['id'], 'label': f"{s['first_name']} {s['last_name']}", 'url': f"/students/{s['id']}/" } for s in students
-        ]
-        results['staffs'] = [
-            { 'id': s['id'], 'label': f"{s['first_name']} {s['last_name']}", 'url': f"/staffs/{s['id']}/" } for s in staffs
-        ]
-        results['invoices'] = [
-            { 'id': i['id'], 'label': f"Invoice {i['number']}", 'url': f"/finance/invoice/{i['id']}/" } for i in invoices
-        ]
-        results['classes'] = [
-            { 'id': c['id'], 'label': c['name'], 'url': f"/class/{c['id']}/" } for c in classes
-        ]
+        for kind in kinds:
+            # Searched one kind at a time so no kind can fill another's slots
+            if kind == 'lessonplan':
+                hits = _visible_lessonplan_hits(request.user, term, per_kind)
+            else:
+                hits = search(term, kinds=[kind], limit=per_kind)
+            results[SEARCH_SECTIONS[kind]] = [
+                {
+                    'id': hit.object_id,
+                    'label': hit.title,
+                    'detail': hit.keywords if kind in ('student', 'invoice') else '',
+                    'url': get_url(kind, hit.object_id),
+                }
+                for hit in hits
+            ]
 
     return JsonResponse(results)
 
@@ -601,4 +643,35 @@ def send_notice(request):
         messages.success(request, f"Notice sent. Emails: {sent_email}, SMS: {sent_sms}.")
         return render(request, 'notices/create.html', context)
 
-    return render(request, 'notices/create.html', context)
\ No newline at end of file
+    return render(request, 'notices/create.html', context)
+
+
+@staff_member_required
+def slow_endpoints(request):
+    """Slowest endpoints seen by this process (needs INSTRUMENTATION_ENABLED)."""
+    from django.conf import settings
+    from .instrumentation import pool_stats, slow_endpoints as table
+
+    if request.method == 'POST':
+        table.clear()
+        messages.success(request, 'Endpoint timings reset.')
+        return redirect('corecode:slow-endpoints')
+
+    rows = table.top(int(request.GET.get('limit', 20)))
+    pools = pool_stats()
+    if request.GET.get('format') == 'json':
+        return JsonResponse({'endpoints': rows, 'pools': pools})
+    return render(request, 'corecode/slow_endpoints.html', {
+        'rows': rows,
+        'pools': pools,
+        'enabled': getattr(settings, 'INSTRUMENTATION_ENABLED', False),
+    })
+
+
+@login_required
+def image_derivative(request, size, fmt, name):
+    """A resized copy of an uploaded photo, made on first request (see ``images``)."""
+    path = images.ensure(name, size, fmt)
+    if path is None:
+        raise Http404("No such image")
+    return redirect(default_storage.url(path))
@@ -1,6 +1,10 @@
 import logging
 from django.conf import settings
-from lipana import Lipana
+
+from apps.corecode.instrumentation import timed
+from apps.corecode.lazy import lazy_import
+
+lipana = lazy_import('lipana')
 
 logger = logging.getLogger(__name__)
 
@@ -9,7 +13,7 @@ class LipanaMpesa:
         self.api_key = settings.LIPANA_PRODUCTION_KEY
         # Assuming production environment for now, or we can add a setting
         self.environment = "production" 
-        self.client = Lipana(api_key=self.api_key, environment=self.environment)
+        self.client = lipana.Lipana(api_key=self.api_key, environment=self.environment)
 
     def initiate_stk_push(self, phone_number, amount, account_reference, transaction_desc, callback_url=None):
         """
@@ -20,12 +24,13 @@ class LipanaMpesa:
             # Let's try common ones or check the Lipana SDK documentation
             
             # Try to initiate STK push with available parameters
-            response = self.client.transactions.initiate_stk_push(
-                phone=phone_number,
-                amount=amount,
-                account_reference=account_reference,
-                transaction_desc=transaction_desc
-            )
+            with timed('mpesa'):
+                response = self.client.transactions.initiate_stk_push(
+                    phone=phone_number,
+                    amount=amount,
+                    account_reference=account_reference,
+                    transaction_desc=transaction_desc
+                )
             
             return {"success": True, "data": response}
             
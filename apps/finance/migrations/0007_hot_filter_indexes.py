@@ -0,0 +1,45 @@
+# Generated by Django 5.2.7 on 2026-10-19 06:57
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('corecode', '0007_profile'),
+        ('finance', '0006_fix_duplicate_invoice_numbers'),
+        ('students', '0004_student_device_id_student_last_modified_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['student', 'session', 'term'], name='invoice_student_term_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['last_modified'], name='invoice_modified_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(condition=models.Q(('sync_status', 'synced'), _negated=True), fields=['sync_status'], name='invoice_pending_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invoiceitem',
+            index=models.Index(fields=['last_modified'], name='invoiceitem_modified_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invoiceitem',
+            index=models.Index(condition=models.Q(('sync_status', 'synced'), _negated=True), fields=['sync_status'], name='invoiceitem_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='receipt',
+            index=models.Index(fields=['last_modified'], name='receipt_modified_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='receipt',
+            index=models.Index(condition=models.Q(('sync_status', 'synced'), _negated=True), fields=['sync_status'], name='receipt_pending_sync_idx'),
+        ),
+    ]
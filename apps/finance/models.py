@@ -1,5 +1,7 @@
 import uuid
 from django.db import models
+from django.db.models import OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from django.urls import reverse
 from django.utils import timezone
 from django.contrib.auth import get_user_model
@@ -8,6 +10,33 @@ from apps.corecode.models import AcademicSession, AcademicTerm, StudentClass
 from apps.students.models import Student
 
 
+def _related_sum(model, field):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(invoice=OuterRef('pk'))
+            .values('invoice')
+            .annotate(total=Sum(field))
+            .values('total'),
+            output_field=models.IntegerField(),
+        ),
+        Value(0),
+    )
+
+
+class InvoiceQuerySet(models.QuerySet):
+    def with_totals(self):
+        """
+        Annotate ``payable``, ``paid`` and ``due`` (payable minus paid) in
+        SQL, so totals for many invoices cost one query instead of two per
+        invoice.
+        """
+        payable = models.F('balance_from_previous_term') + _related_sum(InvoiceItem, 'amount')
+        return self.annotate(
+            payable=payable,
+            paid=_related_sum(Receipt, 'amount_paid'),
+        ).annotate(due=models.F('payable') - models.F('paid'))
+
+
 class Invoice(models.Model):
     student = models.ForeignKey(Student, on_delete=models.CASCADE)
     session = models.ForeignKey(AcademicSession, on_delete=models.CASCADE)
@@ -34,8 +63,18 @@ class Invoice(models.Model):
     last_modified = models.DateTimeField(auto_now=True)
     device_id = models.CharField(max_length=100, blank=True, null=True)
 
+    objects = InvoiceQuerySet.as_manager()
+
     class Meta:
         ordering = ["student", "term"]
+        indexes = [
+            models.Index(fields=['student', 'session', 'term'], name='invoice_student_term_idx'),
+            models.Index(fields=['last_modified'], name='invoice_modified_idx'),
+            models.Index(
+                fields=['sync_status'], name='invoice_pending_sync_idx',
+                condition=~models.Q(sync_status='synced'),
+            ),
+        ]
 
     def save(self, *args, **kwargs):
         # Generate sync_id if it doesn't exist
@@ -99,6 +138,15 @@ class InvoiceItem(models.Model):
     last_modified = models.DateTimeField(auto_now=True)
     device_id = models.CharField(max_length=100, blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['last_modified'], name='invoiceitem_modified_idx'),
+            models.Index(
+                fields=['sync_status'], name='invoiceitem_pending_idx',
+                condition=~models.Q(sync_status='synced'),
+            ),
+        ]
+
     def save(self, *args, **kwargs):
         # Generate sync_id if it doesn't exist
         if not self.sync_id:
@@ -136,6 +184,15 @@ class Receipt(models.Model):
     last_modified = models.DateTimeField(auto_now=True)
     device_id = models.CharField(max_length=100, blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['last_modified'], name='receipt_modified_idx'),
+            models.Index(
+                fields=['sync_status'], name='receipt_pending_sync_idx',
+                condition=~models.Q(sync_status='synced'),
+            ),
+        ]
+
     def save(self, *args, **kwargs):
         # Generate sync_id if it doesn't exist
         if not self.sync_id:
@@ -4,6 +4,7 @@ from .views import (
     InvoiceCreateView,
     InvoiceDeleteView,
     InvoiceDetailView,
+    InvoiceListData,
     InvoiceListView,
     InvoiceUpdateView,
     ReceiptCreateView,
@@ -16,6 +17,7 @@ from .views import (
 
 urlpatterns = [
     path("list/", InvoiceListView.as_view(), name="invoice-list"),
+    path("list/data/", InvoiceListData.as_view(), name="invoice-list-data"),
     path("create/", InvoiceCreateView.as_view(), name="invoice-create"),
     path("<int:pk>/detail/", InvoiceDetailView.as_view(), name="invoice-detail"),
     path("<int:pk>/update/", InvoiceUpdateView.as_view(), name="invoice-update"),
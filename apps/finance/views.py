@@ -1,13 +1,15 @@
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.shortcuts import redirect, render
-from django.urls import reverse_lazy
-from django.views.generic import DetailView, ListView
+from django.urls import reverse, reverse_lazy
+from django.views.generic import DetailView, TemplateView
 from django.views.generic.edit import CreateView, DeleteView, UpdateView
+from apps.corecode.datatables import Column, ListEndpoint
 from apps.students.models import Student
 from .forms import InvoiceItemFormset, InvoiceReceiptFormSet, Invoices
 from .models import Invoice, InvoiceItem, Receipt
 from django.db import IntegrityError
+from django.db.models import Q
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
@@ -20,25 +22,57 @@ from .lipana import LipanaMpesa
 logger = logging.getLogger(__name__)
 
 
-class InvoiceListView(LoginRequiredMixin, ListView):
-    model = Invoice
-    paginate_by = 25
+class InvoiceListView(LoginRequiredMixin, TemplateView):
+    """
+    The invoice table; rows come a page at a time from InvoiceListData,
+    which gets this page's query string (``student``, ``status``, ``term``,
+    ``session``).
+    """
+    template_name = "finance/invoice_list.html"
+
+
+class InvoiceListData(ListEndpoint):
+    columns = [
+        Column('invoice', sort='invoice_number', search=(
+            'invoice_number__icontains', 'student__surname__icontains',
+            'student__firstname__icontains', 'student__registration_number__icontains',
+        )),
+        Column('session_term', sort=('session__name', 'term__name')),
+        Column('payable', sort='payable'),
+        Column('paid', sort='paid'),
+        Column('balance', sort='due'),
+        Column('status', sort='status', filter='status'),
+    ]
+    default_order = ('-last_modified',)
 
     def get_queryset(self):
-        qs = super().get_queryset().select_related('student', 'session', 'term', 'class_for')
+        qs = Invoice.objects.with_totals().select_related('student', 'session', 'term')
         student = self.request.GET.get('student')
         status = self.request.GET.get('status')
         term = self.request.GET.get('term')
         session = self.request.GET.get('session')
         if student:
-            qs = qs.filter(student__surname__icontains=student) | qs.filter(student__firstname__icontains=student)
+            qs = qs.filter(Q(student__surname__icontains=student) | Q(student__firstname__icontains=student))
         if status:
             qs = qs.filter(status=status)
         if term:
             qs = qs.filter(term_id=term)
         if session:
             qs = qs.filter(session_id=session)
-        return qs.order_by('-last_modified')
+        return qs
+
+    def row(self, invoice):
+        return {
+            'id': invoice.pk,
+            'url': reverse('invoice-detail', args=[invoice.pk]),
+            'receipt_url': f"{reverse('receipt-create')}?invoice={invoice.pk}",
+            'invoice': str(invoice),
+            'session_term': f"{invoice.session}-{invoice.term}",
+            'payable': invoice.payable,
+            'paid': invoice.paid,
+            'balance': invoice.due,
+            'status': invoice.status,
+        }
 
 
 class InvoiceCreateView(LoginRequiredMixin, CreateView):
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-19 06:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('idcards', '0003_studentidcard_device_id_studentidcard_last_modified_and_more'),
+        ('staffs', '0006_hot_filter_indexes'),
+        ('students', '0004_student_device_id_student_last_modified_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='studentidcard',
+            index=models.Index(fields=['last_modified'], name='student_card_modified_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentidcard',
+            index=models.Index(condition=models.Q(('sync_status', 'synced'), _negated=True), fields=['sync_status'], name='student_card_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teacheridcard',
+            index=models.Index(fields=['last_modified'], name='teacher_card_modified_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teacheridcard',
+            index=models.Index(condition=models.Q(('sync_status', 'synced'), _negated=True), fields=['sync_status'], name='teacher_card_pending_idx'),
+        ),
+    ]
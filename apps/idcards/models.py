@@ -28,6 +28,13 @@ class StudentIDCard(models.Model):
     class Meta:
         verbose_name = "Student ID Card"
         verbose_name_plural = "Student ID Cards"
+        indexes = [
+            models.Index(fields=['last_modified'], name='student_card_modified_idx'),
+            models.Index(
+                fields=['sync_status'], name='student_card_pending_idx',
+                condition=~models.Q(sync_status='synced'),
+            ),
+        ]
     
     def save(self, *args, **kwargs):
         # Generate sync_id if it doesn't exist
@@ -77,6 +84,13 @@ class TeacherIDCard(models.Model):
     class Meta:
         verbose_name = "Teacher ID Card"
         verbose_name_plural = "Teacher ID Cards"
+        indexes = [
+            models.Index(fields=['last_modified'], name='teacher_card_modified_idx'),
+            models.Index(
+                fields=['sync_status'], name='teacher_card_pending_idx',
+                condition=~models.Q(sync_status='synced'),
+            ),
+        ]
     
     def save(self, *args, **kwargs):
         # Generate sync_id if it doesn't exist
@@ -0,0 +1,27 @@
+from apps.jobs.queue import task
+
+from .exports import bulk_cards, render_id_card_sheets, render_id_card_zip
+from .utils import generate_codes
+
+
+# Chromium is memory hungry: one export at a time per worker pool
+@task('idcards.bulk_id_cards', queue='reports', priority=5, concurrency=1)
+def bulk_id_cards(job, kind, output, per_page, base_url, class_id=None):
+    id_cards = list(bulk_cards(kind, class_id))
+    # Cards created before codes were generated get them now, in one batch
+    generate_codes([card for card in id_cards if not card.qr_code])
+
+    if output == 'zip':
+        content = render_id_card_zip(
+            id_cards, base_url,
+            progress=lambda done, total: job.report_progress(done, total, f"Rendered {done} of {total} cards"),
+        )
+        filename = f"{kind}_id_cards.zip"
+    else:
+        job.report_progress(0, message=f"Rendering {len(id_cards)} cards")
+        content = render_id_card_sheets(id_cards, base_url, per_page)
+        filename = f"{kind}_id_card_sheets.pdf"
+
+    job.save_artifact(filename, content)
+    job.report_progress(100, message=f"{len(id_cards)} ID card(s) ready")
+    return {'id_cards': len(id_cards)}
@@ -1,3 +1,90 @@
-from django.test import TestCase
+import tempfile
+import zipfile
+from io import BytesIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from apps.jobs.models import Job
+from apps.staffs.models import Staff
+from apps.students.models import Student
+
+from .models import StudentIDCard, TeacherIDCard
+from .utils import (
+    create_missing_student_cards,
+    create_missing_teacher_cards,
+    generate_unique_id_numbers,
+)
+
+
+class BulkIDCardCreationTest(TestCase):
+    def setUp(self):
+        for i in range(5):
+            Student.objects.create(
+                registration_number=f"REG{i}", surname="Doe", firstname=f"Pupil{i}"
+            )
+
+    def test_creates_only_missing_cards(self):
+        first = create_missing_student_cards(Student.objects.all())
+        self.assertEqual(len(first), 5)
+
+        Student.objects.create(registration_number="REG9", surname="Doe", firstname="Late")
+        with self.assertNumQueries(3):
+            second = create_missing_student_cards(Student.objects.all())
+
+        self.assertEqual([card.student.registration_number for card in second], ["REG9"])
+        self.assertEqual(StudentIDCard.objects.count(), 6)
+        self.assertEqual(
+            StudentIDCard.objects.values("id_number").distinct().count(), 6
+        )
+        self.assertFalse(StudentIDCard.objects.filter(sync_id__isnull=True).exists())
+
+    def test_teacher_cards(self):
+        Staff.objects.create(surname="Mwangi", firstname="Jane")
+        cards = create_missing_teacher_cards(Staff.objects.all())
+        self.assertEqual(len(cards), 1)
+        self.assertTrue(cards[0].id_number.startswith("TEA"))
+        self.assertEqual(create_missing_teacher_cards(Staff.objects.all()), [])
+        self.assertEqual(TeacherIDCard.objects.count(), 1)
+
+    def test_unique_id_numbers_avoid_existing(self):
+        numbers = generate_unique_id_numbers(StudentIDCard, 10, prefix="GB1999", digits=1)
+        self.assertEqual(sorted(numbers), [f"GB1999{n}" for n in range(10)])
+        with self.assertRaises(ValueError):
+            generate_unique_id_numbers(StudentIDCard, 11, prefix="GB1999", digits=1)
+
+
+class BulkIDCardExportTest(TestCase):
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        media = override_settings(MEDIA_ROOT=self.media.name, JOBS_EAGER=True)
+        media.enable()
+        self.addCleanup(media.disable)
+        for i in range(3):
+            Student.objects.create(registration_number=f"CARD{i}", surname="Doe", firstname=f"Pupil{i}")
+        create_missing_student_cards(Student.objects.all())
+        self.client.force_login(get_user_model().objects.create_user("card-clerk", password="pw"))
+
+    @mock.patch("apps.idcards.exports.PdfRenderer")
+    def test_zip_export_runs_as_job(self, renderer):
+        renderer.return_value.__enter__.return_value.render.return_value = b"%PDF-stub"
+        response = self.client.get(reverse("idcards:download-bulk"), {"format": "zip"}, secure=True)
+        job = Job.objects.get(name="idcards.bulk_id_cards")
+        self.assertRedirects(response, job.get_absolute_url(), fetch_redirect_response=False)
+        self.assertEqual((job.status, job.result), (Job.SUCCEEDED, {"id_cards": 3}))
+        self.assertEqual(job.kwargs["base_url"], "https://testserver")
+        with zipfile.ZipFile(BytesIO(job.artifact.read())) as archive:
+            self.assertEqual(
+                sorted(archive.namelist()), [f"id_card_CARD{i}.pdf" for i in range(3)]
+            )
+        self.assertFalse(StudentIDCard.objects.filter(qr_code="").exists())
+
+    def test_nothing_to_export(self):
+        response = self.client.get(
+            reverse("idcards:download-bulk"), {"kind": "teachers"}, secure=True
+        )
+        self.assertRedirects(response, reverse("idcards:teacher-idcard-list"), fetch_redirect_response=False)
+        self.assertFalse(Job.objects.exists())
@@ -13,12 +13,14 @@ urlpatterns = [
     path('download/bulk/', views.download_bulk_id_cards, name='download-bulk'),
     path('templates/', views.manage_templates, name='manage-templates'),
     path('list/', views.idcard_list, name='idcard-list'),
+    path('list/data/', views.StudentIDCardData.as_view(), name='idcard-list-data'),
     path('renew/<int:student_id>/', views.renew_id_card, name='renew-idcard'),
     
     # Teacher ID Cards
     path('teachers/generate/', views.bulk_generate_teacher_id_cards, name='bulk-generate-teachers'),
     path('teachers/generate/<int:teacher_id>/', views.generate_teacher_id_card, name='generate-teacher-idcard'),
     path('teachers/list/', views.teacher_idcard_list, name='teacher-idcard-list'),
+    path('teachers/list/data/', views.TeacherIDCardData.as_view(), name='teacher-idcard-list-data'),
     path('teachers/download/<int:teacher_id>/', views.download_teacher_id_card_pdf, name='download-teacher-idcard-pdf'),
     path('teachers/renew/<int:teacher_id>/', views.renew_teacher_id_card, name='renew-teacher-idcard'),
 ]
\ No newline at end of file
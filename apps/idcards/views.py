@@ -1,18 +1,32 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponse, JsonResponse
+from django.http import JsonResponse
 from django.utils import timezone
-from django.core.paginator import Paginator
 from datetime import timedelta
+import logging
 import os
 from apps.students.models import Student
 from apps.corecode.models import StudentClass
 from apps.staffs.models import Staff 
 from .models import StudentIDCard, IDCardTemplate, TeacherIDCard
-from .utils import generate_student_id, generate_barcode
+from .exports import MAX_CARDS_PER_PAGE, bulk_cards, prepare_photos
+from .utils import (
+    create_missing_student_cards,
+    create_missing_teacher_cards,
+    generate_barcode,
+    generate_codes,
+    generate_student_id,
+)
+from django.urls import reverse
 from django.views.generic import View
 
+from apps.corecode import images
+from apps.corecode.datatables import Column, ListEndpoint
+from apps.jobs.queue import enqueue
+
+logger = logging.getLogger(__name__)
+
 @login_required
 def idcard_dashboard(request):
     """ID Card Management Dashboard"""
@@ -72,20 +86,9 @@ def bulk_generate_id_cards(request):
         else:
             students = Student.objects.filter(current_status='active')
         
-        generated_count = 0
-        for student in students:
-            # Check if student already has an ID card
-            if not StudentIDCard.objects.filter(student=student).exists():
-                id_card, created = StudentIDCard.objects.get_or_create(
-                    student=student,
-                    defaults={
-                        'id_number': generate_student_id(),
-                        'expiry_date': timezone.now().date() + timedelta(days=365),
-                        'template_used': 'default'
-                    }
-                )
-                if created:
-                    generated_count += 1
+        generated_cards = create_missing_student_cards(students)
+        generate_codes(generated_cards)
+        generated_count = len(generated_cards)
         
         if generated_count > 0:
             messages.success(request, f'Successfully generated {generated_count} new ID cards')
@@ -120,19 +123,8 @@ def bulk_generate_class_id_cards(request, class_id):
     student_class = get_object_or_404(StudentClass, id=class_id)
     students = Student.objects.filter(current_class=student_class, current_status='active')
     
-    generated_cards = []
-    for student in students:
-        id_card, created = StudentIDCard.objects.get_or_create(
-            student=student,
-            defaults={
-                'id_number': generate_student_id(),
-                'expiry_date': timezone.now().date() + timedelta(days=365),
-                'template_used': 'default'
-            }
-        )
-        
-        if created:
-            generated_cards.append(id_card)
+    generated_cards = create_missing_student_cards(students)
+    generate_codes(generated_cards)
     
     messages.success(request, f'Generated ID cards for {len(generated_cards)} students in {student_class.name}')
     
@@ -162,7 +154,9 @@ def download_id_card_pdf(request, student_id):
         'school_name': 'GREEN BELLS ACADEMY',
         'school_motto': 'IN PURSUIT OF EXCELLENCE',
         'today': timezone.now().date(),
+        'base_url': request.build_absolute_uri('/')[:-1],
     }
+    prepare_photos([id_card])
     
     response = render_to_pdf(request, 'idcards/id_card_pdf.html', context)
     if response:
@@ -175,10 +169,32 @@ def download_id_card_pdf(request, student_id):
 
 @login_required
 def download_bulk_id_cards(request):
-    """Download multiple ID cards as ZIP"""
-    # This is a placeholder - you can implement ZIP generation later
-    messages.info(request, 'Bulk download feature coming soon!')
-    return redirect('idcards:idcard-list')
+    """Queue ID cards as printable A4 sheets or a ZIP of individual PDFs; the job page offers the file"""
+    kind = 'teachers' if request.GET.get('kind') == 'teachers' else 'students'
+    output = 'zip' if request.GET.get('format') == 'zip' else 'sheet'
+    try:
+        per_page = int(request.GET.get('per_page', MAX_CARDS_PER_PAGE))
+    except ValueError:
+        per_page = MAX_CARDS_PER_PAGE
+    class_id = request.GET.get('class_id')
+    class_id = int(class_id) if kind == 'students' and class_id and class_id.isdigit() else None
+    redirect_to = 'idcards:teacher-idcard-list' if kind == 'teachers' else 'idcards:idcard-list'
+    
+    if not bulk_cards(kind, class_id).exists():
+        messages.info(request, 'There are no ID cards to download.')
+        return redirect(redirect_to)
+    
+    job = enqueue(
+        'idcards.bulk_id_cards',
+        {
+            'kind': kind, 'output': output, 'per_page': per_page, 'class_id': class_id,
+            'base_url': request.build_absolute_uri('/')[:-1],
+        },
+        user=request.user,
+        label=f"{kind.title()} ID cards",
+        unique=True,
+    )
+    return redirect(job)
 
 @login_required
 def manage_templates(request):
@@ -192,23 +208,72 @@ def manage_templates(request):
 
 @login_required
 def idcard_list(request):
-    """List all ID cards"""
-    idcards_list = StudentIDCard.objects.select_related('student').all()
-    
-    # Pagination
-    paginator = Paginator(idcards_list, 12)  # 12 cards per page
-    page_number = request.GET.get('page')
-    idcards = paginator.get_page(page_number)
-    
-    classes = StudentClass.objects.all()
-    
+    """List all ID cards; rows come a page at a time from StudentIDCardData"""
     context = {
-        'idcards': idcards,
-        'classes': classes,
-        'today': timezone.now().date(),
+        'card_count': StudentIDCard.objects.count(),
+        'classes': StudentClass.objects.all(),
     }
     return render(request, 'idcards/idcard_list.html', context)
 
+
+def _card_status(cards, value):
+    """Filter cards by 'active', 'expired' or 'inactive'"""
+    today = timezone.now().date()
+    if value == 'inactive':
+        return cards.filter(is_active=False)
+    if value == 'expired':
+        return cards.filter(is_active=True, expiry_date__lt=today)
+    if value == 'active':
+        return cards.filter(is_active=True, expiry_date__gte=today)
+    return cards.none()
+
+
+def _card_fields(card, today):
+    return {
+        'id_number': card.id_number,
+        'issue_date': card.issue_date.isoformat() if card.issue_date else None,
+        'expiry_date': card.expiry_date.isoformat(),
+        'status': 'inactive' if not card.is_active else 'expired' if card.expiry_date < today else 'active',
+        'expiring_soon': card.is_active and today <= card.expiry_date <= today + timedelta(days=30),
+    }
+
+
+class StudentIDCardData(ListEndpoint):
+    columns = [
+        Column('student', sort=('student__surname', 'student__firstname'), search=(
+            'student__surname__icontains', 'student__firstname__icontains',
+            'student__registration_number__icontains', 'id_number__icontains',
+        )),
+        Column('current_class', sort='student__current_class__name', filter='student__current_class_id'),
+        Column('id_number', sort='id_number'),
+        Column('issue_date', sort='issue_date'),
+        Column('expiry_date', sort='expiry_date'),
+        Column('status', sort=('is_active', 'expiry_date'), filter=_card_status),
+    ]
+    default_order = ('student__surname', 'student__firstname')
+
+    def get_queryset(self):
+        return StudentIDCard.objects.select_related('student__current_class')
+
+    def rows(self, cards):
+        today = timezone.now().date()
+        return [
+            {
+                'id': card.pk,
+                'student': card.student.get_full_name(),
+                'registration_number': card.student.registration_number,
+                'current_class': str(card.student.current_class or ''),
+                'passport': images.url(card.student.passport, 'xs'),
+                'view_url': reverse('idcards:generate-idcard', args=[card.student_id]),
+                'download_url': reverse('idcards:download-idcard', args=[card.student_id]),
+                'renew_url': reverse('idcards:renew-idcard', args=[card.student_id]),
+                'student_url': reverse('students:student-detail', args=[card.student_id]),
+                **_card_fields(card, today),
+            }
+            for card in cards
+        ]
+
+
 @login_required
 def renew_id_card(request, student_id):
     """Renew an expired ID card"""
@@ -280,20 +345,9 @@ def bulk_generate_teacher_id_cards(request):
         # Get active teachers - FIXED: Use current_status instead of is_active
         teachers = Staff.objects.filter(current_status='active')
         
-        generated_count = 0
-        for teacher in teachers:
-            # Check if teacher already has an ID card
-            if not TeacherIDCard.objects.filter(teacher=teacher).exists():
-                id_card, created = TeacherIDCard.objects.get_or_create(
-                    teacher=teacher,
-                    defaults={
-                        'id_number': f"TEA{generate_student_id()[3:]}",
-                        'expiry_date': timezone.now().date() + timedelta(days=365),
-                        'template_used': 'default'
-                    }
-                )
-                if created:
-                    generated_count += 1
+        generated_cards = create_missing_teacher_cards(teachers)
+        generate_codes(generated_cards)
+        generated_count = len(generated_cards)
         
         if generated_count > 0:
             messages.success(request, f'Successfully generated {generated_count} new teacher ID cards')
@@ -319,19 +373,42 @@ def bulk_generate_teacher_id_cards(request):
 
 @login_required
 def teacher_idcard_list(request):
-    """List all teacher ID cards"""
-    idcards_list = TeacherIDCard.objects.select_related('teacher').all()
-    
-    # Pagination
-    paginator = Paginator(idcards_list, 12)
-    page_number = request.GET.get('page')
-    idcards = paginator.get_page(page_number)
-    
+    """List all teacher ID cards; rows come a page at a time from TeacherIDCardData"""
     context = {
-        'idcards': idcards,
-        'today': timezone.now().date(),
+        'has_cards': TeacherIDCard.objects.exists(),
     }
-    return render(request, 'idcards/teacher_idcard_list.html', context) 
+    return render(request, 'idcards/teacher_idcard_list.html', context)
+
+
+class TeacherIDCardData(ListEndpoint):
+    columns = [
+        Column('teacher', sort=('teacher__firstname', 'teacher__surname'), search=(
+            'teacher__surname__icontains', 'teacher__firstname__icontains', 'id_number__icontains',
+        )),
+        Column('id_number', sort='id_number'),
+        Column('status', sort=('is_active', 'expiry_date'), filter=_card_status),
+        Column('expiry_date', sort='expiry_date'),
+    ]
+    default_order = ('teacher__firstname', 'teacher__surname')
+
+    def get_queryset(self):
+        return TeacherIDCard.objects.select_related('teacher')
+
+    def rows(self, cards):
+        today = timezone.now().date()
+        return [
+            {
+                'id': card.pk,
+                'teacher': f"{card.teacher.firstname} {card.teacher.surname}",
+                'other_name': card.teacher.other_name,
+                'image': images.url(card.teacher.image, 'xs'),
+                'view_url': reverse('idcards:generate-teacher-idcard', args=[card.teacher_id]),
+                'download_url': reverse('idcards:download-teacher-idcard-pdf', args=[card.teacher_id]),
+                'renew_url': reverse('idcards:renew-teacher-idcard', args=[card.teacher_id]),
+                **_card_fields(card, today),
+            }
+            for card in cards
+        ] 
 
 @login_required
 def download_teacher_id_card_pdf(request, teacher_id):
@@ -356,6 +433,7 @@ def download_teacher_id_card_pdf(request, teacher_id):
         'today': timezone.now().date(),
         'base_url': base_url,  # Add base URL for absolute image paths
     }
+    prepare_photos([id_card])
     
     response = render_to_pdf(request, 'idcards/teacher_id_card_pdf.html', context)
     if response:
@@ -0,0 +1,51 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Job, Lease, Schedule
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['label', 'name', 'queue', 'status', 'progress', 'attempts', 'created_by', 'created_at']
+    list_filter = ['status', 'queue', 'name']
+    search_fields = ['label', 'name', 'message', 'error']
+    readonly_fields = [
+        'id', 'name', 'label', 'queue', 'kwargs', 'attempts', 'progress', 'message', 'result',
+        'artifact', 'error', 'worker', 'heartbeat_at', 'created_by', 'created_at', 'started_at',
+        'finished_at',
+    ]
+    actions = ['retry']
+
+    def has_add_permission(self, request):
+        return False  # Jobs are created by enqueue()
+
+    @admin.action(description="Run again")
+    def retry(self, request, queryset):
+        count = queryset.filter(status=Job.FAILED).update(
+            status=Job.QUEUED, attempts=0, error='', worker='', finished_at=None
+        )
+        self.message_user(request, f"Requeued {count} failed job(s)")
+
+
+@admin.register(Schedule)
+class ScheduleAdmin(admin.ModelAdmin):
+    list_display = ['name', 'task', 'cron', 'enabled', 'off_peak', 'next_run_at', 'last_run_at']
+    list_filter = ['enabled', 'off_peak']
+    readonly_fields = ['next_run_at', 'last_run_at', 'last_job']
+    actions = ['run_now']
+
+    def save_model(self, request, obj, form, change):
+        # The scheduler works out the next run from the new timing
+        if {'cron', 'jitter', 'enabled'} & set(form.changed_data):
+            obj.next_run_at = None
+        super().save_model(request, obj, form, change)
+
+    @admin.action(description="Run at the next scheduler tick")
+    def run_now(self, request, queryset):
+        count = queryset.filter(enabled=True).update(next_run_at=timezone.now())
+        self.message_user(request, f"{count} schedule(s) will run at the next tick")
+
+
+@admin.register(Lease)
+class LeaseAdmin(admin.ModelAdmin):
+    list_display = ['name', 'holder', 'expires_at']
@@ -0,0 +1,81 @@
+"""
+Five-field cron expressions for the job scheduler.
+
+``minute hour day-of-month month day-of-week``, each field ``*``, a number,
+a range ``a-b``, a step ``*/n`` or ``a-b/n``, or a comma-separated list of
+those. Day of week runs 0-6 from Sunday (7 is Sunday too). As in cron,
+when both day fields are restricted a day matching either one matches.
+"""
+import datetime
+
+FIELDS = (
+    ('minute', 0, 59),
+    ('hour', 0, 23),
+    ('day', 1, 31),
+    ('month', 1, 12),
+    ('weekday', 0, 7),
+)
+
+
+def _parse_field(text, name, low, high):
+    values = set()
+    for part in text.split(','):
+        spec, _, step = part.partition('/')
+        step = int(step) if step else 1
+        if spec == '*':
+            start, end = low, high
+        elif '-' in spec:
+            start, end = (int(bound) for bound in spec.split('-', 1))
+        else:
+            start = end = int(spec)
+            if step > 1:
+                end = high
+        if not low <= start <= end <= high or step < 1:
+            raise ValueError(f"Invalid {name} field {text!r}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class Cron:
+    def __init__(self, expression):
+        parts = expression.split()
+        if len(parts) != len(FIELDS):
+            raise ValueError(f"Cron expression {expression!r} needs {len(FIELDS)} fields")
+        try:
+            fields = [
+                _parse_field(text, name, low, high) for text, (name, low, high) in zip(parts, FIELDS)
+            ]
+        except ValueError as exc:
+            raise ValueError(f"Cron expression {expression!r}: {exc}") from None
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, weekdays = (sorted(f) for f in fields)
+        self.weekdays = {day % 7 for day in weekdays}
+        self.any_day = parts[2] == '*'
+        self.any_weekday = parts[4] == '*'
+
+    def __repr__(self):
+        return f"Cron({self.expression!r})"
+
+    def _day_matches(self, day):
+        in_month = day.day in self.days
+        # isoweekday: Monday 1 .. Sunday 7, so % 7 gives cron's Sunday 0
+        in_week = day.isoweekday() % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return in_month and in_week
+        return in_month or in_week
+
+    def next_after(self, moment, tz):
+        """First time strictly after the aware datetime ``moment``, read in ``tz``"""
+        local = moment.astimezone(tz).replace(tzinfo=None, second=0, microsecond=0)
+        earliest = local + datetime.timedelta(minutes=1)
+        day = earliest.date()
+        # Four years and a day covers every February 29th
+        for _ in range(4 * 366 + 1):
+            if day.month in self.months and self._day_matches(day):
+                for hour in self.hours:
+                    for minute in self.minutes:
+                        candidate = datetime.datetime.combine(day, datetime.time(hour, minute))
+                        if candidate >= earliest:
+                            return candidate.replace(tzinfo=tz)
+            day += datetime.timedelta(days=1)
+        raise ValueError(f"Cron expression {self.expression!r} never matches")
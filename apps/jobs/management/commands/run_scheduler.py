@@ -0,0 +1,45 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from apps.jobs import scheduler
+from apps.jobs.models import Schedule
+
+
+class Command(BaseCommand):
+    help = 'Enqueue scheduled maintenance jobs (backups, registers, summaries, cache warming)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run a single tick and exit')
+        parser.add_argument('--list', action='store_true', help='List schedules and exit')
+        parser.add_argument(
+            '--no-defaults', action='store_true',
+            help='Do not create missing schedules from scheduler.DEFAULT_SCHEDULES'
+        )
+
+    def handle(self, *args, **options):
+        if not options['no_defaults']:
+            for name in scheduler.sync_defaults():
+                self.stdout.write(f'Added default schedule {name}')
+
+        if options['list']:
+            tz = scheduler.schedule_tz()
+            for schedule in Schedule.objects.all():
+                next_run = schedule.next_run_at.astimezone(tz).strftime('%Y-%m-%d %H:%M') if schedule.next_run_at else '-'
+                state = '' if schedule.enabled else ' (disabled)'
+                self.stdout.write(f'{schedule.name:<24} {schedule.cron:<16} next {next_run}  {schedule.task}{state}')
+            return
+
+        runner = scheduler.Scheduler()
+        if options['once']:
+            enqueued = runner.run_once()
+            if not runner.leader:
+                self.stdout.write(self.style.WARNING('Another scheduler holds the lease; nothing enqueued'))
+            for schedule in enqueued:
+                self.stdout.write(f'Enqueued {schedule.name}')
+            return
+
+        signal.signal(signal.SIGINT, runner.stop)
+        signal.signal(signal.SIGTERM, runner.stop)
+        self.stdout.write(f'Scheduler {runner.name} ticking every {runner.interval}s')
+        runner.run()
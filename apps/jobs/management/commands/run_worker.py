@@ -0,0 +1,70 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from apps.jobs import queue, scheduler
+from apps.jobs.worker import Worker
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs (PDFs, SMS, exports, backups, imports)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--queue', action='append', dest='queues',
+            help='Only run jobs from this queue (repeatable; default: all queues)'
+        )
+        parser.add_argument(
+            '--concurrency', type=int,
+            help='Jobs to run at once (default: JOBS_CONCURRENCY)'
+        )
+        parser.add_argument('--poll', type=float, help='Seconds between polls when idle')
+        parser.add_argument(
+            '--burst', action='store_true', help='Exit once no job is due instead of waiting'
+        )
+        parser.add_argument(
+            '--scheduler', action='store_true',
+            help='Also run the periodic scheduler in this process (one node leads at a time)'
+        )
+        parser.add_argument('--list', action='store_true', help='List registered tasks and exit')
+
+    def handle(self, *args, **options):
+        if options['list']:
+            for name, spec in sorted(queue.REGISTRY.items()):
+                limit = spec.concurrency or '-'
+                self.stdout.write(
+                    f'{name:<32} queue={spec.queue} priority={spec.priority} '
+                    f'attempts={spec.max_attempts} concurrency={limit}'
+                )
+            return
+
+        worker = Worker(
+            queues=options['queues'],
+            concurrency=options['concurrency'],
+            poll=options['poll'],
+            burst=options['burst'],
+        )
+        runner = None
+        if options['scheduler']:
+            scheduler.sync_defaults()
+            runner = scheduler.Scheduler()
+            thread = threading.Thread(target=runner.run, name='scheduler', daemon=True)
+
+        def stop(*args):
+            worker.stop()
+            if runner is not None:
+                runner.stop()
+
+        # Finish the jobs in hand on Ctrl-C or a deploy's SIGTERM
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGTERM, stop)
+
+        self.stdout.write(f'Worker {worker.name} running {worker.concurrency} job(s) at a time')
+        if runner is not None:
+            thread.start()
+        processed = worker.run()
+        if runner is not None:
+            runner.stop()
+            thread.join()
+        self.stdout.write(self.style.SUCCESS(f'Worker {worker.name} stopped after {processed} job(s)'))
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Lease',
+            fields=[
+                ('name', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('holder', models.CharField(max_length=100)),
+                ('expires_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Schedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.SlugField(max_length=100, unique=True)),
+                ('task', models.CharField(max_length=100)),
+                ('kwargs', models.JSONField(blank=True, default=dict)),
+                ('cron', models.CharField(help_text='minute hour day month weekday, in SCHEDULE_TIME_ZONE', max_length=100)),
+                ('enabled', models.BooleanField(default=True)),
+                ('jitter', models.PositiveIntegerField(default=0, help_text='Up to this many seconds of random delay, to spread load')),
+                ('catch_up', models.BooleanField(default=True, help_text='Run once when the scheduler was down at the scheduled time')),
+                ('off_peak', models.BooleanField(default=False, help_text='Hold catch-up runs until JOBS_PEAK_HOURS are over')),
+                ('next_run_at', models.DateTimeField(blank=True, null=True)),
+                ('last_run_at', models.DateTimeField(blank=True, null=True)),
+                ('last_job', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='jobs.job')),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+    ]
@@ -0,0 +1,152 @@
+import uuid
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.db import models
+from django.urls import reverse
+from django.utils import timezone
+
+
+def artifact_path(instance, filename):
+    return f'jobs/{instance.pk}/{filename}'
+
+
+class Job(models.Model):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    name = models.CharField(max_length=100)
+    label = models.CharField(max_length=200, blank=True)
+    queue = models.CharField(max_length=50, default='default')
+    kwargs = models.JSONField(default=dict, blank=True)
+    priority = models.SmallIntegerField(default=0, help_text="Higher runs first")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=QUEUED)
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=1)
+    progress = models.PositiveSmallIntegerField(default=0, help_text="Percent done")
+    message = models.CharField(max_length=255, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    artifact = models.FileField(upload_to=artifact_path, blank=True)
+    error = models.TextField(blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, related_name='+'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # The worker's claim query only ever looks at queued jobs
+            models.Index(
+                fields=['queue', '-priority', 'run_at'],
+                name='job_claim_idx',
+                condition=models.Q(status='queued'),
+            ),
+            # Concurrency limits and stale-job recovery
+            models.Index(
+                fields=['name', 'heartbeat_at'],
+                name='job_running_idx',
+                condition=models.Q(status='running'),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.label or self.name} ({self.get_status_display()})"
+
+    def get_absolute_url(self):
+        return reverse('jobs:job-detail', args=[self.pk])
+
+    @property
+    def finished(self):
+        return self.status in (self.SUCCEEDED, self.FAILED)
+
+    def can_view(self, user):
+        return user.is_staff or user.is_superuser or self.created_by_id == user.pk
+
+    def report_progress(self, done, total=None, message=None):
+        """
+        Record progress from inside a task: ``done`` of ``total`` steps, or a
+        percentage when ``total`` is None. Only writes when something changed.
+        """
+        percent = done if total is None else (100 * done // total if total else 100)
+        percent = max(0, min(100, int(percent)))
+        fields = {}
+        if percent != self.progress:
+            fields['progress'] = self.progress = percent
+        if message is not None and message != self.message:
+            fields['message'] = self.message = message[:255]
+        if fields:
+            Job.objects.filter(pk=self.pk).update(heartbeat_at=timezone.now(), **fields)
+
+    def save_artifact(self, filename, content):
+        """Store ``content`` (bytes) as the job's downloadable result file"""
+        self.artifact.save(filename, ContentFile(content), save=False)
+        Job.objects.filter(pk=self.pk).update(artifact=self.artifact.name)
+
+
+class Schedule(models.Model):
+    """A task the scheduler enqueues at the times a cron expression gives"""
+
+    name = models.SlugField(max_length=100, unique=True)
+    task = models.CharField(max_length=100)
+    kwargs = models.JSONField(default=dict, blank=True)
+    cron = models.CharField(
+        max_length=100, help_text="minute hour day month weekday, in SCHEDULE_TIME_ZONE"
+    )
+    enabled = models.BooleanField(default=True)
+    jitter = models.PositiveIntegerField(
+        default=0, help_text="Up to this many seconds of random delay, to spread load"
+    )
+    catch_up = models.BooleanField(
+        default=True, help_text="Run once when the scheduler was down at the scheduled time"
+    )
+    off_peak = models.BooleanField(
+        default=False, help_text="Hold catch-up runs until JOBS_PEAK_HOURS are over"
+    )
+    next_run_at = models.DateTimeField(null=True, blank=True)
+    last_run_at = models.DateTimeField(null=True, blank=True)
+    last_job = models.ForeignKey(Job, null=True, blank=True, on_delete=models.SET_NULL, related_name='+')
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+    def clean(self):
+        from .cron import Cron
+        from .queue import REGISTRY
+
+        try:
+            Cron(self.cron)
+        except ValueError as exc:
+            raise ValidationError({'cron': str(exc)})
+        if self.task not in REGISTRY:
+            raise ValidationError({'task': f"Unknown task {self.task!r}"})
+
+
+class Lease(models.Model):
+    """A named lock held until ``expires_at``; the scheduler's leader holds one"""
+
+    name = models.CharField(max_length=100, primary_key=True)
+    holder = models.CharField(max_length=100)
+    expires_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name} held by {self.holder}"
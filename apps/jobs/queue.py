@@ -0,0 +1,219 @@
+"""
+A background job queue kept in the database, with no broker to run.
+
+Work that is too slow for a request is a task: a function registered with
+``@task`` in an app's ``tasks.py`` (found at startup by ``JobsConfig``).
+It is called with the ``Job`` row and the keyword arguments it was enqueued
+with, reports progress through ``job.report_progress()``, may store a file
+with ``job.save_artifact()``, and returns a JSON-serialisable result::
+
+    @task('backup.export', max_attempts=2, concurrency=1)
+    def export(job, kind):
+        ...
+
+Views call ``enqueue()`` and return at once; the page at
+``job.get_absolute_url()`` polls the job's status. ``manage.py run_worker``
+claims queued jobs, highest ``priority`` first, and runs them:
+
+* a failed job is retried with exponential backoff until it has run
+  ``max_attempts`` times;
+* at most ``concurrency`` jobs of one task run at a time across all workers
+  (checked when claiming, so a limit can be overshot by workers racing);
+* a running job whose worker stops sending heartbeats for
+  ``JOBS_STALE_SECONDS`` is requeued (or failed, when out of attempts);
+* finished jobs and their files are purged after ``JOBS_RETENTION_DAYS``.
+
+With ``JOBS_EAGER`` set, ``enqueue()`` runs the job straight away in the
+calling process, which needs no worker in development and tests.
+"""
+import datetime
+import logging
+import traceback
+from collections import namedtuple
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from apps.corecode.replicas import use_replica
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+Task = namedtuple('Task', 'name func queue priority max_attempts retry_delay concurrency replica')
+
+REGISTRY = {}
+
+
+def task(name, queue='default', priority=0, max_attempts=1, retry_delay=30, concurrency=None,
+         replica=False):
+    """
+    Register a task. ``retry_delay`` is the wait in seconds before the first
+    retry, doubled for each later one; ``replica`` sends the task's reads to
+    the read replica, like ``@read_from_replica`` on a view.
+    """
+    def decorator(func):
+        REGISTRY[name] = Task(name, func, queue, priority, max_attempts, retry_delay, concurrency, replica)
+        return func
+    return decorator
+
+
+def enqueue(name, kwargs=None, *, user=None, label='', priority=None, delay=None, unique=False):
+    """
+    Queue task ``name`` with ``kwargs`` and return its Job. With ``unique``,
+    an unfinished job of the same task, arguments and user is returned
+    instead of a new one, so repeated clicks do not pile up work.
+    """
+    spec = REGISTRY[name]
+    kwargs = kwargs or {}
+    if user is not None and not user.is_authenticated:
+        user = None
+    if unique:
+        existing = Job.objects.filter(
+            name=name, kwargs=kwargs, created_by=user, status__in=(Job.QUEUED, Job.RUNNING)
+        ).first()
+        if existing is not None:
+            return existing
+    job = Job.objects.create(
+        name=name,
+        label=label,
+        queue=spec.queue,
+        kwargs=kwargs,
+        priority=spec.priority if priority is None else priority,
+        max_attempts=spec.max_attempts,
+        run_at=timezone.now() + datetime.timedelta(seconds=delay or 0),
+        created_by=user,
+    )
+    if getattr(settings, 'JOBS_EAGER', False) and _start(job, 'eager'):
+        execute(job)
+    return job
+
+
+def _saturated():
+    """Tasks already running as many jobs as their concurrency allows"""
+    limited = {name: spec.concurrency for name, spec in REGISTRY.items() if spec.concurrency}
+    if not limited:
+        return []
+    running = (
+        Job.objects.filter(status=Job.RUNNING, name__in=limited)
+        .values('name').annotate(count=Count('pk')).order_by()
+    )
+    return [row['name'] for row in running if row['count'] >= limited[row['name']]]
+
+
+def _start(job, worker):
+    """Mark ``job`` running for ``worker``; False if someone else got it first"""
+    now = timezone.now()
+    started = Job.objects.filter(pk=job.pk, status=Job.QUEUED).update(
+        status=Job.RUNNING, worker=worker, attempts=job.attempts + 1,
+        started_at=now, heartbeat_at=now, progress=0, error='',
+    )
+    if started:
+        job.status, job.worker, job.attempts = Job.RUNNING, worker, job.attempts + 1
+        job.started_at = job.heartbeat_at = now
+        job.progress, job.error = 0, ''
+    return bool(started)
+
+
+def claim(worker, queues=None):
+    """The next due job for ``worker``, already marked running, or None"""
+    while True:
+        candidates = Job.objects.filter(status=Job.QUEUED, run_at__lte=timezone.now())
+        if queues:
+            candidates = candidates.filter(queue__in=queues)
+        saturated = _saturated()
+        if saturated:
+            candidates = candidates.exclude(name__in=saturated)
+        candidates = candidates.order_by('-priority', 'run_at')
+        with transaction.atomic():
+            if connection.features.has_select_for_update_skip_locked:
+                # Workers on PostgreSQL skip each other's rows instead of queueing on them
+                candidates = candidates.select_for_update(skip_locked=True)
+            job = candidates.first()
+            if job is None:
+                return None
+            if _start(job, worker):
+                return job
+        # Another worker started it between the read and the update
+
+
+def _finish(job, rows=None, **fields):
+    fields['finished_at'] = timezone.now()
+    rows = Job.objects.filter(pk=job.pk) if rows is None else rows
+    if not rows.update(**fields):
+        return False
+    for field, value in fields.items():
+        setattr(job, field, value)
+    return True
+
+
+def _retry_or_fail(job, error, rows=None, lost=False):
+    """
+    Requeue ``job`` with backoff, or fail it once out of attempts, in one
+    UPDATE of ``rows`` (just the job by default); False if it matched nothing.
+    A ``lost`` job's worker is gone, so a failed one is not left attributed to it.
+    """
+    rows = Job.objects.filter(pk=job.pk) if rows is None else rows
+    spec = REGISTRY.get(job.name)
+    if spec is not None and job.attempts < job.max_attempts:
+        delay = spec.retry_delay * 2 ** (job.attempts - 1)
+        if not rows.update(
+            status=Job.QUEUED, error=error, worker='',
+            run_at=timezone.now() + datetime.timedelta(seconds=delay),
+        ):
+            return False
+        job.status, job.error, job.worker = Job.QUEUED, error, ''
+        logger.warning("Job %s (%s) failed; retrying in %ss", job.pk, job.name, delay)
+    else:
+        released = {'worker': ''} if lost else {}
+        if not _finish(job, rows, status=Job.FAILED, error=error, message='Failed', **released):
+            return False
+        logger.error("Job %s (%s) failed: %s", job.pk, job.name, error.strip().splitlines()[-1])
+    return True
+
+
+def execute(job):
+    """Run a job already marked running and record how it ended"""
+    spec = REGISTRY.get(job.name)
+    if spec is None:
+        _finish(job, status=Job.FAILED, error=f"Unknown task {job.name!r}")
+        return
+    try:
+        with use_replica() if spec.replica else nullcontext():
+            result = spec.func(job, **job.kwargs)
+    except Exception:
+        _retry_or_fail(job, traceback.format_exc())
+    else:
+        _finish(job, status=Job.SUCCEEDED, progress=100, result=result)
+
+
+def heartbeat(worker):
+    Job.objects.filter(status=Job.RUNNING, worker=worker).update(heartbeat_at=timezone.now())
+
+
+def recover_stale():
+    """Requeue (or fail) running jobs whose worker stopped sending heartbeats"""
+    cutoff = timezone.now() - datetime.timedelta(seconds=getattr(settings, 'JOBS_STALE_SECONDS', 300))
+    stale = Job.objects.filter(status=Job.RUNNING, heartbeat_at__lt=cutoff)
+    recovered = 0
+    for job in stale:
+        # Only if it is still stale, in case its worker wrote meanwhile; the job
+        # goes straight from running to requeued or failed, never claimable between
+        still_stale = Job.objects.filter(pk=job.pk, status=Job.RUNNING, heartbeat_at__lt=cutoff)
+        if _retry_or_fail(job, f"Worker {job.worker} stopped responding", still_stale, lost=True):
+            recovered += 1
+    return recovered
+
+
+def purge(days=None):
+    """Delete finished jobs older than ``days`` and their files"""
+    days = getattr(settings, 'JOBS_RETENTION_DAYS', 7) if days is None else days
+    cutoff = timezone.now() - datetime.timedelta(days=days)
+    old = Job.objects.filter(status__in=(Job.SUCCEEDED, Job.FAILED), finished_at__lt=cutoff)
+    for job in old.exclude(artifact=''):
+        job.artifact.delete(save=False)
+    return old.delete()[0]
+
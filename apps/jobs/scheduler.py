@@ -0,0 +1,223 @@
+"""
+Periodic jobs: the ``Schedule`` table says which task to enqueue when.
+
+``manage.py run_scheduler`` (or ``run_worker --scheduler``, which runs it in
+a thread of the worker) wakes every ``JOBS_SCHEDULER_INTERVAL`` seconds.
+Any number of nodes can run it:
+
+* only the holder of the ``scheduler`` lease (a row in ``Lease``, renewed on
+  every tick and taken over once it expires) enqueues anything;
+* a due schedule is advanced with a compare-and-set on ``next_run_at``
+  before its job is enqueued, in one transaction, so even two nodes that
+  both believe they lead enqueue each run once.
+
+Times come from the cron expression in ``SCHEDULE_TIME_ZONE`` plus up to
+``jitter`` random seconds. A run missed by more than
+``JOBS_SCHEDULE_GRACE_SECONDS`` (the scheduler was down) runs once late when
+``catch_up`` is set and is skipped otherwise; for ``off_peak`` schedules the
+late run waits until ``JOBS_PEAK_HOURS`` are over.
+
+``DEFAULT_SCHEDULES`` puts the heavy maintenance in the small hours;
+``sync_defaults()`` adds any that are missing and leaves edited ones alone.
+"""
+import datetime
+import logging
+import os
+import random
+import socket
+import threading
+import zoneinfo
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .cron import Cron
+from .models import Lease, Schedule
+from .queue import REGISTRY, enqueue
+
+logger = logging.getLogger(__name__)
+
+LEASE_NAME = 'scheduler'
+
+DEFAULT_SCHEDULES = (
+    {
+        'name': 'attendance-summaries',
+        'task': 'attendance.rebuild_summaries',
+        'cron': '0 1 * * *',
+        'jitter': 600,
+        'off_peak': True,
+    },
+    {
+        'name': 'nightly-backup',
+        'task': 'backup.create',
+        'kwargs': {'backup_type': 'auto'},
+        'cron': '0 2 * * *',
+        'jitter': 900,
+        'off_peak': True,
+    },
+    # Before the first lesson, and caught up at once if missed
+    {
+        'name': 'daily-registers',
+        'task': 'attendance.create_daily_registers',
+        'cron': '30 5 * * 1-5',
+        'jitter': 300,
+    },
+    # Picks up absence alerts whose texts failed earlier in the day
+    {
+        'name': 'absence-alerts',
+        'task': 'attendance.send_absence_alerts',
+        'cron': '0 16 * * 1-5',
+        'jitter': 300,
+        'catch_up': False,
+    },
+    {
+        'name': 'warm-analytics',
+        'task': 'result.warm_analytics',
+        'kwargs': {'timeout': 12 * 60 * 60},
+        'cron': '0 6 * * 1-5',
+        'jitter': 300,
+        'catch_up': False,
+    },
+)
+
+
+def schedule_tz():
+    return zoneinfo.ZoneInfo(getattr(settings, 'SCHEDULE_TIME_ZONE', settings.TIME_ZONE))
+
+
+def peak_window(moment):
+    """(start, end) of the school-day peak on ``moment``'s day, or None"""
+    hours = getattr(settings, 'JOBS_PEAK_HOURS', '')
+    if not hours:
+        return None
+    local = moment.astimezone(schedule_tz())
+    if local.weekday() >= 5:
+        return None
+    start, end = (int(hour) for hour in hours.split('-'))
+    day = local.replace(minute=0, second=0, microsecond=0)
+    return day.replace(hour=start), day.replace(hour=end)
+
+
+def in_peak(moment):
+    window = peak_window(moment)
+    return window is not None and window[0] <= moment < window[1]
+
+
+def next_run(schedule, after):
+    """When ``schedule`` should next run after ``after``, jitter included"""
+    moment = Cron(schedule.cron).next_after(after, schedule_tz())
+    if schedule.jitter:
+        moment += datetime.timedelta(seconds=random.uniform(0, schedule.jitter))
+    return moment
+
+
+def sync_defaults():
+    """Create the default schedules that do not exist yet; returns their names"""
+    created = []
+    for spec in DEFAULT_SCHEDULES:
+        _, was_created = Schedule.objects.get_or_create(
+            name=spec['name'], defaults={key: value for key, value in spec.items() if key != 'name'}
+        )
+        if was_created:
+            created.append(spec['name'])
+    return created
+
+
+def acquire_lease(name, holder, seconds):
+    """Take or renew lease ``name`` for ``seconds``; False if someone else holds it"""
+    now = timezone.now()
+    expires_at = now + datetime.timedelta(seconds=seconds)
+    if Lease.objects.filter(Q(holder=holder) | Q(expires_at__lt=now), name=name).update(
+        holder=holder, expires_at=expires_at
+    ):
+        return True
+    try:
+        with transaction.atomic():
+            Lease.objects.create(name=name, holder=holder, expires_at=expires_at)
+    except IntegrityError:
+        return False
+    return True
+
+
+def release_lease(name, holder):
+    Lease.objects.filter(name=name, holder=holder).delete()
+
+
+def tick(now=None):
+    """
+    Enqueue every due schedule once and move it to its next run.
+    Returns the schedules enqueued; callers must hold the lease.
+    """
+    now = now or timezone.now()
+    grace = datetime.timedelta(seconds=getattr(settings, 'JOBS_SCHEDULE_GRACE_SECONDS', 300))
+
+    for schedule in Schedule.objects.filter(enabled=True, next_run_at__isnull=True):
+        Schedule.objects.filter(pk=schedule.pk, next_run_at__isnull=True).update(
+            next_run_at=next_run(schedule, now)
+        )
+
+    enqueued = []
+    for schedule in Schedule.objects.filter(enabled=True, next_run_at__lte=now):
+        due = schedule.next_run_at
+        late = now - due > grace
+        following = next_run(schedule, now)
+        run = True
+        if late and not schedule.catch_up:
+            run = False
+            logger.warning("Skipping missed run of %s due at %s", schedule.name, due)
+        elif late and schedule.off_peak and in_peak(now):
+            # Hold the catch-up run until the peak is over
+            following = peak_window(now)[1] + datetime.timedelta(seconds=random.uniform(0, schedule.jitter))
+            run = False
+        if schedule.task not in REGISTRY:
+            logger.error("Schedule %s names unknown task %s", schedule.name, schedule.task)
+            run = False
+
+        with transaction.atomic():
+            fields = {'next_run_at': following}
+            if run:
+                fields['last_run_at'] = now
+            # Compare-and-set: whoever moves next_run_at on first owns this run
+            if not Schedule.objects.filter(pk=schedule.pk, next_run_at=due).update(**fields):
+                continue
+            if run:
+                job = enqueue(schedule.task, schedule.kwargs, label=f"Scheduled: {schedule.name}")
+                Schedule.objects.filter(pk=schedule.pk).update(last_job=job)
+                enqueued.append(schedule)
+                logger.info("Enqueued %s (job %s)", schedule.name, job.pk)
+    return enqueued
+
+
+class Scheduler:
+    def __init__(self, interval=None):
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self.interval = interval or getattr(settings, 'JOBS_SCHEDULER_INTERVAL', 30)
+        self._stop = threading.Event()
+        self.leader = False
+
+    def stop(self, *args):
+        self._stop.set()
+
+    def run_once(self):
+        close_old_connections()
+        # The lease outlives a few missed ticks, so a busy leader keeps it
+        leader = acquire_lease(LEASE_NAME, self.name, self.interval * 3)
+        if leader != self.leader:
+            logger.info("Scheduler %s %s", self.name, "is now the leader" if leader else "lost the lead")
+            self.leader = leader
+        return tick() if leader else []
+
+    def run(self):
+        try:
+            while not self._stop.is_set():
+                try:
+                    self.run_once()
+                except Exception:
+                    logger.exception("Scheduler tick failed")
+                self._stop.wait(self.interval)
+        finally:
+            if self.leader:
+                release_lease(LEASE_NAME, self.name)
+            connections.close_all()
@@ -0,0 +1,287 @@
+import datetime
+import tempfile
+import zoneinfo
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.students.models import Student, StudentBulkUpload
+
+from . import queue, scheduler
+from .cron import Cron
+from .models import Job, Lease, Schedule
+from .worker import Worker
+
+calls = []
+
+
+@queue.task('tests.record', priority=1)
+def record(job, value):
+    calls.append(value)
+    job.report_progress(1, 2, 'halfway')
+    job.save_artifact('value.txt', value.encode())
+    return {'value': value}
+
+
+@queue.task('tests.flaky', max_attempts=2, retry_delay=60)
+def flaky(job):
+    raise ValueError("boom")
+
+
+@queue.task('tests.limited', concurrency=1)
+def limited(job):
+    return None
+
+
+class JobQueueTest(TestCase):
+    def setUp(self):
+        calls.clear()
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        media = override_settings(MEDIA_ROOT=self.media.name)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def test_claim_order_and_result(self):
+        low = queue.enqueue('tests.record', {'value': 'low'}, priority=0)
+        high = queue.enqueue('tests.record', {'value': 'high'})
+        queue.enqueue('tests.record', {'value': 'later'}, delay=60)
+
+        self.assertEqual(queue.claim('w1'), high)
+        self.assertEqual(queue.claim('w1'), low)
+        self.assertIsNone(queue.claim('w1'))  # the delayed job is not due yet
+
+        queue.execute(high)
+        high.refresh_from_db()
+        self.assertEqual(high.status, Job.SUCCEEDED)
+        self.assertEqual(high.result, {'value': 'high'})
+        self.assertEqual(high.progress, 100)
+        self.assertEqual(high.artifact.read(), b'high')
+
+    def test_failed_job_is_retried_with_backoff_then_fails(self):
+        job = queue.enqueue('tests.flaky')
+        queue.execute(queue.claim('w1'))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertGreater(job.run_at, timezone.now() + datetime.timedelta(seconds=50))
+        self.assertIn('ValueError: boom', job.error)
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        queue.execute(queue.claim('w1'))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+
+    def test_concurrency_limit(self):
+        queue.enqueue('tests.limited')
+        queue.enqueue('tests.limited')
+        self.assertIsNotNone(queue.claim('w1'))
+        self.assertIsNone(queue.claim('w2'))
+
+    def test_stale_job_is_requeued(self):
+        job = queue.enqueue('tests.limited')
+        queue.claim('gone')
+        Job.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - datetime.timedelta(hours=1))
+        self.assertEqual(queue.recover_stale(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.worker), (Job.FAILED, ''))  # limited allows one attempt
+
+    def test_stale_job_goes_straight_to_its_retry(self):
+        job = queue.enqueue('tests.flaky')
+        queue.claim('gone')
+        Job.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - datetime.timedelta(hours=1))
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(queue.recover_stale(), 1)
+        # Straight from running to its retry, never queued and due in between
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.worker, job.attempts), (Job.QUEUED, '', 1))
+        self.assertIn('stopped responding', job.error)
+        self.assertIsNone(queue.claim('w1'))  # not before its backoff
+
+    def test_stale_job_that_heartbeats_meanwhile_is_left_running(self):
+        job = queue.enqueue('tests.limited')
+        queue.claim('slow')
+        Job.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - datetime.timedelta(hours=1))
+        real_retry_or_fail = queue._retry_or_fail
+
+        def retry_or_fail(job, error, rows=None, lost=False):
+            queue.heartbeat('slow')
+            return real_retry_or_fail(job, error, rows, lost)
+
+        with mock.patch.object(queue, '_retry_or_fail', side_effect=retry_or_fail):
+            self.assertEqual(queue.recover_stale(), 0)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.worker), (Job.RUNNING, 'slow'))
+
+    def test_concurrent_claims_take_different_jobs(self):
+        first = queue.enqueue('tests.record', {'value': 'a'})
+        second = queue.enqueue('tests.record', {'value': 'b'}, priority=0)
+        real_start = queue._start
+        rival = []
+
+        def start(job, worker):
+            # Another worker claims the same candidate between our read and update
+            if worker == 'w1' and not rival:
+                rival.append(queue.claim('w2'))
+            return real_start(job, worker)
+
+        with mock.patch.object(queue, '_start', side_effect=start):
+            mine = queue.claim('w1')
+        self.assertEqual((rival, mine), ([first], second))
+        self.assertEqual(
+            sorted(Job.objects.values_list('worker', 'status', 'attempts')),
+            [('w1', Job.RUNNING, 1), ('w2', Job.RUNNING, 1)],
+        )
+        self.assertIsNone(queue.claim('w3'))
+
+    def test_unique_returns_unfinished_job(self):
+        first = queue.enqueue('tests.record', {'value': 'x'}, unique=True)
+        self.assertEqual(queue.enqueue('tests.record', {'value': 'x'}, unique=True), first)
+        self.assertNotEqual(queue.enqueue('tests.record', {'value': 'y'}, unique=True), first)
+
+    def test_status_and_download_are_private(self):
+        User = get_user_model()
+        owner = User.objects.create_user('job-owner', password='pw')
+        other = User.objects.create_user('job-other', password='pw')
+        with override_settings(JOBS_EAGER=True):
+            job = queue.enqueue('tests.record', {'value': 'mine'}, user=owner)
+
+        self.client.force_login(owner)
+        state = self.client.get(reverse('jobs:job-status', args=[job.pk]), secure=True).json()
+        self.assertEqual((state['status'], state['progress'], state['finished']), ('succeeded', 100, True))
+        response = self.client.get(state['download_url'], secure=True)
+        self.assertEqual(b''.join(response.streaming_content), b'mine')
+
+        self.client.force_login(other)
+        response = self.client.get(reverse('jobs:job-status', args=[job.pk]), secure=True)
+        self.assertEqual(response.status_code, 404)
+
+
+class WorkerTest(TransactionTestCase):
+    """
+    Committed rows, so the worker's threads see the jobs. One job at a time:
+    the in-memory SQLite test database locks tables against concurrent writers.
+    """
+
+    def test_burst_worker_runs_everything(self):
+        for value in 'abc':
+            queue.enqueue('tests.limited' if value == 'c' else 'tests.flaky', {})
+        worker = Worker(concurrency=1, poll=0.01, burst=True)
+        self.assertEqual(worker.run(), 3)
+        self.assertEqual(
+            sorted(Job.objects.values_list('name', 'status')),
+            [('tests.flaky', Job.QUEUED), ('tests.flaky', Job.QUEUED), ('tests.limited', Job.SUCCEEDED)],
+        )
+
+
+@override_settings(JOBS_EAGER=True)
+class QueuedViewsTest(TestCase):
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        media = override_settings(MEDIA_ROOT=self.media.name)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.user = get_user_model().objects.create_superuser('jobs-admin', 'a@example.com', 'pw')
+        self.client.force_login(self.user)
+
+    def test_student_csv_import_runs_as_job(self):
+        csv_file = SimpleUploadedFile(
+            'students.csv',
+            b'registration_number,surname,firstname,gender,current_class\n'
+            b'JOB-001,Otieno,Amina,Female,Job Class\n'
+            b'JOB-002,Kamau,Brian,male,Job Class\n',
+            content_type='text/csv',
+        )
+        response = self.client.post(reverse('students:student-upload'), {'csv_file': csv_file}, secure=True)
+        job = Job.objects.get(name='students.import_csv')
+        self.assertRedirects(response, job.get_absolute_url(), fetch_redirect_response=False)
+        self.assertEqual(job.status, Job.SUCCEEDED)
+        self.assertEqual(job.result['imported'], 2)
+        self.assertEqual(Student.objects.filter(registration_number__startswith='JOB-').count(), 2)
+        self.assertFalse(StudentBulkUpload.objects.exists())
+
+    def test_excel_export_returns_job_page(self):
+        response = self.client.get(reverse('export_results_excel'), secure=True)
+        job = Job.objects.get(name='backup.export_excel')
+        self.assertRedirects(response, job.get_absolute_url(), fetch_redirect_response=False)
+        self.assertEqual(job.status, Job.SUCCEEDED, job.error)
+        self.assertTrue(job.artifact.name.endswith('results_data.xlsx'))
+
+        response = self.client.get(job.get_absolute_url(), secure=True)
+        self.assertContains(response, reverse('jobs:job-download', args=[job.pk]))
+
+
+class CronTest(TestCase):
+    tz = zoneinfo.ZoneInfo('Africa/Nairobi')
+
+    def at(self, *args):
+        return datetime.datetime(*args, tzinfo=self.tz)
+
+    def test_next_after(self):
+        friday_morning = self.at(2026, 10, 16, 6, 0)
+        self.assertEqual(Cron('30 5 * * 1-5').next_after(friday_morning, self.tz), self.at(2026, 10, 19, 5, 30))
+        quarter = Cron('*/15 * * * *').next_after(self.at(2026, 10, 16, 6, 7), self.tz)
+        self.assertEqual(quarter, self.at(2026, 10, 16, 6, 15))
+        # Both day fields restricted: either one matches (the 1st, or a Sunday)
+        self.assertEqual(Cron('0 0 1 * 0').next_after(friday_morning, self.tz), self.at(2026, 10, 18, 0, 0))
+        self.assertEqual(Cron('0 0 29 2 *').next_after(friday_morning, self.tz), self.at(2028, 2, 29, 0, 0))
+
+    def test_invalid(self):
+        for expression in ('* * * *', '60 * * * *', '5-1 * * * *', '0 0 31 2 *'):
+            with self.subTest(expression), self.assertRaises(ValueError):
+                Cron(expression).next_after(self.at(2026, 1, 1, 0, 0), self.tz)
+
+
+@override_settings(SCHEDULE_TIME_ZONE='Africa/Nairobi', JOBS_PEAK_HOURS='7-17', JOBS_SCHEDULE_GRACE_SECONDS=300)
+class SchedulerTest(TestCase):
+    tz = zoneinfo.ZoneInfo('Africa/Nairobi')
+
+    def at(self, *args):
+        return datetime.datetime(*args, tzinfo=self.tz)
+
+    def schedule(self, due, **fields):
+        return Schedule.objects.create(
+            name=fields.pop('name', 'limited'), task='tests.limited', cron='0 2 * * *', next_run_at=due, **fields
+        )
+
+    def test_due_schedule_runs_once(self):
+        schedule = self.schedule(self.at(2026, 10, 19, 2, 0))
+        now = self.at(2026, 10, 19, 2, 0, 20)
+        self.assertEqual(scheduler.tick(now), [schedule])
+        self.assertEqual(scheduler.tick(now), [])
+        schedule.refresh_from_db()
+        self.assertEqual(schedule.next_run_at, self.at(2026, 10, 20, 2, 0))
+        self.assertEqual(schedule.last_job.name, 'tests.limited')
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_missed_runs(self):
+        self.schedule(self.at(2026, 10, 19, 2, 0), name='skipped', catch_up=False)
+        held = self.schedule(self.at(2026, 10, 19, 2, 0), name='held', off_peak=True)
+        caught_up = self.schedule(self.at(2026, 10, 19, 2, 0), name='caught-up')
+
+        # Monday 09:00: the scheduler was down overnight
+        self.assertEqual(scheduler.tick(self.at(2026, 10, 19, 9, 0)), [caught_up])
+        held.refresh_from_db()
+        self.assertEqual(held.next_run_at, self.at(2026, 10, 19, 17, 0))
+        self.assertEqual(scheduler.tick(self.at(2026, 10, 19, 17, 0, 30)), [held])
+
+    def test_one_leader(self):
+        self.assertTrue(scheduler.acquire_lease('scheduler', 'node-a', 60))
+        self.assertFalse(scheduler.acquire_lease('scheduler', 'node-b', 60))
+        self.assertTrue(scheduler.acquire_lease('scheduler', 'node-a', 60))
+        Lease.objects.filter(name='scheduler').update(expires_at=timezone.now() - datetime.timedelta(seconds=1))
+        self.assertTrue(scheduler.acquire_lease('scheduler', 'node-b', 60))
+
+    def test_default_schedules_name_real_tasks(self):
+        scheduler.sync_defaults()
+        for schedule in Schedule.objects.all():
+            with self.subTest(schedule.name):
+                schedule.full_clean()
@@ -0,0 +1,11 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'jobs'
+
+urlpatterns = [
+    path('<uuid:pk>/', views.job_detail, name='job-detail'),
+    path('<uuid:pk>/status/', views.job_status, name='job-status'),
+    path('<uuid:pk>/download/', views.job_download, name='job-download'),
+]
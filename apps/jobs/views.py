@@ -0,0 +1,61 @@
+import os
+
+from django.contrib.auth.decorators import login_required
+from django.http import FileResponse, Http404, JsonResponse
+from django.shortcuts import get_object_or_404, render
+from django.urls import reverse
+
+from .models import Job
+
+
+def _job_for(request, pk):
+    job = get_object_or_404(Job, pk=pk)
+    if not job.can_view(request.user):
+        raise Http404("No such job")
+    return job
+
+
+def job_state(job):
+    """What the status endpoint and page show about ``job``"""
+    result = job.result if isinstance(job.result, dict) else {}
+    return {
+        'id': str(job.pk),
+        'name': job.name,
+        'label': job.label or job.name,
+        'status': job.status,
+        'finished': job.finished,
+        'progress': job.progress,
+        'message': job.message,
+        'errors': result.get('errors', []),
+        'result': job.result,
+        'attempts': job.attempts,
+        'download_url': reverse('jobs:job-download', args=[job.pk]) if job.artifact else None,
+        'created_at': job.created_at.isoformat(),
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+@login_required
+def job_detail(request, pk):
+    job = _job_for(request, pk)
+    return render(request, 'jobs/job_detail.html', {
+        'job': job,
+        'state': job_state(job),
+        'status_url': reverse('jobs:job-status', args=[job.pk]),
+    })
+
+
+@login_required
+def job_status(request, pk):
+    """Polled by the job page (and any script) until ``finished`` is true"""
+    response = JsonResponse(job_state(_job_for(request, pk)))
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+@login_required
+def job_download(request, pk):
+    job = _job_for(request, pk)
+    if job.status != Job.SUCCEEDED or not job.artifact:
+        raise Http404("No file for this job")
+    return FileResponse(job.artifact.open('rb'), as_attachment=True, filename=os.path.basename(job.artifact.name))
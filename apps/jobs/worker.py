@@ -0,0 +1,82 @@
+"""
+The process behind ``manage.py run_worker``.
+
+A ``Worker`` runs up to ``concurrency`` jobs at once, each in a thread with
+its own database connection. Between claims it sends heartbeats for the
+jobs it holds, requeues jobs abandoned by dead workers and purges old ones.
+``stop()`` lets running jobs finish and claims nothing more.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+from . import queue
+
+logger = logging.getLogger(__name__)
+
+# Seconds between housekeeping passes (stale jobs, purging)
+HOUSEKEEPING_INTERVAL = 60
+
+
+class Worker:
+    def __init__(self, queues=None, concurrency=None, poll=None, burst=False):
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self.queues = queues or None
+        self.concurrency = concurrency or getattr(settings, 'JOBS_CONCURRENCY', 2)
+        self.poll = poll or getattr(settings, 'JOBS_POLL_SECONDS', 1.0)
+        self.burst = burst
+        self.processed = 0
+        self._stop = threading.Event()
+
+    def stop(self, *args):
+        self._stop.set()
+
+    def _run(self, job):
+        close_old_connections()
+        try:
+            logger.info("Running job %s (%s)", job.pk, job.name)
+            queue.execute(job)
+        except Exception:
+            # execute() records task failures itself; this is the database failing under it
+            logger.exception("Could not record the outcome of job %s", job.pk)
+        finally:
+            connections.close_all()
+
+    def _housekeeping(self):
+        recovered = queue.recover_stale()
+        if recovered:
+            logger.warning("Requeued %s stale job(s)", recovered)
+        queue.purge()
+
+    def run(self):
+        heartbeat_interval = getattr(settings, 'JOBS_STALE_SECONDS', 300) / 5
+        last_heartbeat = last_housekeeping = 0.0
+        running = set()
+        with ThreadPoolExecutor(self.concurrency, thread_name_prefix='job') as pool:
+            while not self._stop.is_set():
+                now = time.monotonic()
+                if now - last_housekeeping >= HOUSEKEEPING_INTERVAL:
+                    self._housekeeping()
+                    last_housekeeping = now
+                if running and now - last_heartbeat >= heartbeat_interval:
+                    queue.heartbeat(self.name)
+                    last_heartbeat = now
+
+                running = {future for future in running if not future.done()}
+                if len(running) < self.concurrency:
+                    job = queue.claim(self.name, self.queues)
+                    if job is not None:
+                        running.add(pool.submit(self._run, job))
+                        self.processed += 1
+                        continue
+                    if self.burst and not running:
+                        break
+                self._stop.wait(self.poll)
+        connections.close_all()
+        return self.processed
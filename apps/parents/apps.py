@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class ParentsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.parents'
+    label = 'parents'
+
+    def ready(self):
+        # Import signals so receivers are registered
+        from . import signals  # noqa: F401
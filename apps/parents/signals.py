@@ -0,0 +1,33 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.finance.models import Invoice, InvoiceItem, Receipt
+from apps.result.models import Result
+from apps.students.models import Student
+
+from .snapshot import invalidate_snapshots
+
+
+@receiver(post_save, sender=Result, dispatch_uid='parents-snapshot-result-save')
+@receiver(post_delete, sender=Result, dispatch_uid='parents-snapshot-result-delete')
+@receiver(post_save, sender=Invoice, dispatch_uid='parents-snapshot-invoice-save')
+@receiver(post_delete, sender=Invoice, dispatch_uid='parents-snapshot-invoice-delete')
+def invalidate_for_student_row(sender, instance, **kwargs):
+    invalidate_snapshots(instance.student_id)
+
+
+@receiver(post_save, sender=Receipt, dispatch_uid='parents-snapshot-receipt-save')
+@receiver(post_delete, sender=Receipt, dispatch_uid='parents-snapshot-receipt-delete')
+@receiver(post_save, sender=InvoiceItem, dispatch_uid='parents-snapshot-item-save')
+@receiver(post_delete, sender=InvoiceItem, dispatch_uid='parents-snapshot-item-delete')
+def invalidate_for_invoice_row(sender, instance, **kwargs):
+    student_id = (
+        Invoice.objects.filter(pk=instance.invoice_id)
+        .values_list('student_id', flat=True).first()
+    )
+    invalidate_snapshots(student_id)
+
+
+@receiver(post_save, sender=Student, dispatch_uid='parents-snapshot-student-save')
+def invalidate_for_student(sender, instance, **kwargs):
+    invalidate_snapshots(instance.pk)
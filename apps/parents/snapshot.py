@@ -0,0 +1,125 @@
+"""
+Cached fees and performance summary for the public parent portal.
+
+A snapshot is built with two aggregate queries (invoices with their item
+and receipt totals, then the student's results) and stored as plain data
+per student. Signals in ``apps.parents.signals`` drop it whenever a result,
+invoice, invoice item or receipt for that student changes, and the
+timeout bounds staleness for writes that bypass signals.
+
+Snapshots are always built from the primary, even in views that read from
+the replica: a rebuild right after a signal dropped one must see the write
+that caused it, or a lagging replica's data would be cached for the whole
+timeout.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+
+from apps.corecode.replicas import use_primary
+from apps.finance.models import Invoice
+from apps.result.models import Result
+from apps.result.utils import score_grade
+
+RECENT_INVOICES = 5
+
+
+def cache_key(student_id):
+    return f"parents:snapshot:{student_id}"
+
+
+def _fees(student):
+    invoices = (
+        Invoice.objects.filter(student=student)
+        .select_related('session', 'term', 'class_for')
+        .with_totals()
+        .order_by('-session__name', '-term__name')
+    )
+    rows = [
+        {
+            'id': invoice.id,
+            'invoice_number': invoice.invoice_number,
+            'session': str(invoice.session),
+            'term': str(invoice.term),
+            'class_for': str(invoice.class_for),
+            'payable': invoice.payable,
+            'paid': invoice.paid,
+            'balance': invoice.due,
+        }
+        for invoice in invoices
+    ]
+    total_payable = sum(row['payable'] for row in rows)
+    total_paid = sum(row['paid'] for row in rows)
+    return {
+        'latest_invoice': rows[0] if rows else None,
+        'invoices': rows[:RECENT_INVOICES],
+        'fees_summary': {
+            'total_payable': total_payable,
+            'total_paid': total_paid,
+            'balance': total_payable - total_paid,
+        },
+    }
+
+
+def _performance(student):
+    results = (
+        Result.objects.filter(student=student)
+        .order_by('-session__name', '-term__name', 'subject__name')
+        .values_list(
+            'session__name', 'term__name', 'subject__name', 'test_score', 'exam_score',
+            'current_class_id',
+        )
+    )
+    performance = {}
+    for session, term, subject, ca, exam, class_id in results:
+        total = (ca or 0) + (exam or 0)
+        entry = performance.setdefault(
+            f"{session or ''} - {term or ''}",
+            {'total': 0, 'count': 0, 'avg': 0, 'subjects': []},
+        )
+        entry['total'] += total
+        entry['count'] += 1
+        entry['subjects'].append({
+            'subject': subject or '',
+            'ca': ca,
+            'exam': exam,
+            'total': total,
+            'grade': score_grade(total, class_id),
+        })
+    for entry in performance.values():
+        if entry['count']:
+            entry['avg'] = round(entry['total'] / entry['count'], 2)
+    return performance
+
+
+def build_snapshot(student):
+    snapshot = {
+        'student': {
+            'id': student.id,
+            'name': student.get_full_name(),
+            'registration_number': student.registration_number,
+            'current_class': str(student.current_class or ''),
+        },
+        **_fees(student),
+        'performance': _performance(student),
+    }
+    payload = json.dumps(snapshot, sort_keys=True, default=str).encode()
+    snapshot['etag'] = hashlib.sha1(payload).hexdigest()
+    return snapshot
+
+
+def get_snapshot(student):
+    """Return the cached snapshot for ``student``, building it if needed."""
+    key = cache_key(student.id)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        with use_primary():
+            snapshot = build_snapshot(student)
+        cache.set(key, snapshot, getattr(settings, 'PARENT_SNAPSHOT_TIMEOUT', 300))
+    return snapshot
+
+
+def invalidate_snapshots(*student_ids):
+    cache.delete_many([cache_key(student_id) for student_id in student_ids if student_id])
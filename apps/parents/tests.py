@@ -0,0 +1,98 @@
+from django.core.cache import cache
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+
+from apps.corecode import replicas
+from apps.corecode.models import AcademicSession, AcademicTerm, StudentClass, Subject
+from apps.finance.models import Invoice, InvoiceItem, Receipt
+from apps.result import grading
+from apps.result.models import Result
+from apps.students.models import Student
+
+from . import snapshot as snapshots
+from .snapshot import build_snapshot, cache_key
+
+
+class ParentSnapshotTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        grading.get_scale()  # grade scales are cached per process
+        session = AcademicSession.objects.get(current=True)
+        term = AcademicTerm.objects.get(current=True)
+        student_class = StudentClass.objects.create(name="Grade 4")
+        self.student = Student.objects.create(
+            registration_number="P001", surname="Njeri", firstname="Amani",
+            current_class=student_class,
+        )
+        self.invoice = Invoice.objects.create(
+            student=self.student, session=session, term=term, class_for=student_class
+        )
+        for amount in (3000, 2000):
+            InvoiceItem.objects.create(invoice=self.invoice, description="Fees", amount=amount)
+        Receipt.objects.create(invoice=self.invoice, amount_paid=1500)
+        for name, score in (("Maths", 30), ("English", 20)):
+            Result.objects.create(
+                student=self.student, session=session, term=term,
+                current_class=student_class, subject=Subject.objects.get_or_create(name=name)[0],
+                test_score=score, exam_score=50,
+            )
+
+    def test_snapshot_uses_fixed_queries(self):
+        with self.assertNumQueries(2):
+            snapshot = build_snapshot(self.student)
+        self.assertEqual(snapshot['fees_summary'], {
+            'total_payable': 5000, 'total_paid': 1500, 'balance': 3500,
+        })
+        (term,) = snapshot['performance'].values()
+        self.assertEqual(term['avg'], 75)
+        self.assertEqual([s['subject'] for s in term['subjects']], ["English", "Maths"])
+
+    def test_receipt_invalidates_and_etag_revalidates(self):
+        response = self.client.post(reverse('parent-access'), {'registration_number': 'p001'}, secure=True)
+        url = reverse('parent-summary')
+        self.assertRedirects(response, url, fetch_redirect_response=False)
+        response = self.client.get(url, secure=True)
+        etag = response['ETag']
+        self.assertIsNotNone(cache.get(cache_key(self.student.id)))
+
+        cached = self.client.get(url, secure=True, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cached.status_code, 304)
+
+        Receipt.objects.create(invoice=self.invoice, amount_paid=500)
+        self.assertIsNone(cache.get(cache_key(self.student.id)))
+        response = self.client.get(url, secure=True, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.context['fees_summary']['total_paid'], 2000)
+
+    def test_registration_number_stays_out_of_urls(self):
+        # A GET with the number only shows the form
+        response = self.client.get(reverse('parent-access'), {'registration_number': 'p001'}, secure=True)
+        self.assertTemplateUsed(response, 'parents/parent_access.html')
+        self.assertNotIn('ETag', response)
+        # The summary needs a lookup made in this session
+        response = self.client.get(reverse('parent-summary'), secure=True)
+        self.assertRedirects(response, reverse('parent-access'), fetch_redirect_response=False)
+
+        response = self.client.post(
+            reverse('parent-access'), {'registration_number': 'P001'}, secure=True, follow=True
+        )
+        self.assertEqual(response.context['student']['registration_number'], 'P001')
+        self.assertNotIn('P001', response.redirect_chain[-1][0])
+
+    def test_snapshot_is_built_from_the_primary(self):
+        aliases = []
+
+        def build(student):
+            aliases.append(replicas.read_alias())
+            return build_snapshot(student)
+
+        with self.settings(REPLICA_MAX_LAG_SECONDS=0), \
+                mock.patch.object(replicas, "replica_alias", return_value="reports"), \
+                mock.patch.object(snapshots, "build_snapshot", side_effect=build), \
+                replicas.use_replica():
+            self.assertEqual(replicas.read_alias(), "reports")
+            snapshots.get_snapshot(self.student)
+        self.assertEqual(aliases, ["default"])
@@ -1,6 +1,7 @@
 from django.urls import path
-from .views import parent_access
+from .views import parent_access, parent_summary
 
 urlpatterns = [
     path('access/', parent_access, name='parent-access'),
+    path('access/summary/', parent_summary, name='parent-summary'),
 ]
@@ -0,0 +1,298 @@
+"""
+Benchmarks for the core request paths, run against synthetic data.
+
+Each benchmark is a function registered with ``@benchmark`` that makes one
+request through the Django test client, using the fixtures returned by
+``fixtures()``. ``run()`` executes each benchmark a few times and records
+the wall time and SQL query count of every run. Benchmarks that write are
+rolled back after each run. ``compare()`` flags regressions against an
+earlier run, so results stored as JSON by ``run_benchmarks`` can be
+compared across commits.
+"""
+import datetime
+import json
+import re
+import statistics
+import tempfile
+import time
+from collections import namedtuple
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connections, transaction
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.corecode.models import AcademicSession, AcademicTerm, StudentClass
+from apps.students.models import Student
+from attendance.models import AttendanceEntry, AttendanceRegister
+from chatroom.models import ChatRoom
+
+from .synthetic import BENCHMARK_USER, CLASS_PREFIX
+
+Benchmark = namedtuple('Benchmark', 'name func tags setup writes')
+Fixtures = namedtuple(
+    'Fixtures', 'client session term student_class student register room attendance_form'
+)
+
+REGISTRY = {}
+
+# Tags of benchmarks that are skipped unless asked for (they need Chromium)
+OPT_IN_TAGS = {'pdf'}
+
+# Transaction control is not counted as a query
+TRANSACTION_SQL = re.compile(r'^\s*(BEGIN|COMMIT|ROLLBACK|SAVEPOINT|RELEASE SAVEPOINT)\b', re.I)
+
+
+def benchmark(name, tags=(), setup=None, writes=False):
+    """Register a benchmark; ``setup`` runs untimed before every run"""
+    def decorator(func):
+        REGISTRY[name] = Benchmark(name, func, frozenset(tags), setup, writes)
+        return func
+    return decorator
+
+
+def _host():
+    for host in settings.ALLOWED_HOSTS:
+        if not host.startswith(('.', '*')):
+            return host
+    return 'localhost'
+
+
+def fixtures():
+    """Client and objects the benchmarks request, taken from synthetic data"""
+    student_class = (
+        StudentClass.objects.filter(name__startswith=CLASS_PREFIX)
+        .annotate(size=Count('student'))
+        .order_by('-size', 'pk')
+        .first()
+    )
+    if student_class is None:
+        raise LookupError("No synthetic data found; run 'manage.py seed_school' first.")
+    session = AcademicSession.objects.get(current=True)
+    term = AcademicTerm.objects.get(current=True)
+
+    client = Client(HTTP_HOST=_host())
+    client.force_login(get_user_model().objects.get(username=BENCHMARK_USER))
+    students = Student.objects.filter(current_class=student_class, current_status='active')
+    return Fixtures(
+        client=client,
+        session=session,
+        term=term,
+        student_class=student_class,
+        student=Student.objects.filter(current_class=student_class).order_by('pk').first(),
+        register=AttendanceRegister.objects.filter(
+            student_class=student_class, session=session, term=term
+        ).order_by('-date').first(),
+        room=ChatRoom.objects.filter(name=f"{student_class.name} chat").first(),
+        attendance_form={
+            f'status_{pk}': AttendanceEntry.STATUS_PRESENT
+            for pk in students.values_list('pk', flat=True)
+        },
+    )
+
+
+def _get(fx, name, *args, query=None):
+    return fx.client.get(reverse(name, args=args), query or {}, secure=True)
+
+
+def _run_job(fx, name, *args):
+    """
+    GET a view that queues a background job, running the job in the request
+    as a worker would; the job's file goes to a scratch directory.
+    """
+    with tempfile.TemporaryDirectory() as media, override_settings(JOBS_EAGER=True, MEDIA_ROOT=media):
+        return _get(fx, name, *args)
+
+
+@benchmark('dashboard', tags={'core'})
+def dashboard(fx):
+    return _get(fx, 'dashboard')
+
+
+def _drop_analytics(fx):
+    from apps.result.analytics import invalidate
+    invalidate(fx.student_class.pk, fx.session.pk, fx.term.pk)
+
+
+@benchmark('analytics_dashboard', tags={'result'}, setup=_drop_analytics)
+def analytics_dashboard(fx):
+    return _get(fx, 'analytics-dashboard', query={'class': fx.student_class.pk})
+
+
+@benchmark('report_card', tags={'result'})
+def report_card(fx):
+    return _get(fx, 'report-card', fx.student.pk)
+
+
+@benchmark('class_report_sheet', tags={'result'})
+def class_report_sheet(fx):
+    return _get(fx, 'class-report-sheet', fx.student_class.pk)
+
+
+@benchmark('class_report_cards_pdf', tags={'result', 'pdf'}, writes=True)
+def class_report_cards_pdf(fx):
+    return _run_job(fx, 'class-report-pdf', fx.student_class.pk)
+
+
+def _look_up_student(fx):
+    """Find the student as a parent would; the summary is then bound to the session"""
+    from apps.parents.snapshot import invalidate_snapshots
+    fx.client.post(
+        reverse('parent-access'), {'registration_number': fx.student.registration_number}, secure=True
+    )
+    invalidate_snapshots(fx.student.pk)
+
+
+@benchmark('parent_access', tags={'parents'}, setup=_look_up_student)
+def parent_access(fx):
+    return _get(fx, 'parent-summary')
+
+
+@benchmark('take_attendance', tags={'attendance'}, writes=True)
+def take_attendance(fx):
+    return fx.client.post(
+        reverse('attendance:take_attendance', args=[fx.register.pk]), fx.attendance_form, secure=True
+    )
+
+
+@benchmark('attendance_summary_data', tags={'attendance'})
+def attendance_summary_data(fx):
+    return _get(fx, 'attendance:attendance_summary_data', query={
+        'class': fx.student_class.pk, 'session': fx.session.pk, 'term': fx.term.pk,
+    })
+
+
+def _drop_matrix(fx):
+    from attendance.matrix import bump
+    bump(fx.student_class.pk, fx.term.pk, fx.session.pk)
+
+
+@benchmark('class_matrix', tags={'attendance'}, setup=_drop_matrix)
+def class_matrix(fx):
+    return _get(fx, 'attendance:class_matrix', query={
+        'class': fx.student_class.pk, 'session': fx.session.pk, 'term': fx.term.pk,
+    })
+
+
+@benchmark('student_list_data', tags={'core'})
+def student_list_data(fx):
+    return _get(fx, 'students:student-list-data', query={'length': 100, 'search[value]': 'a'})
+
+
+@benchmark('result_list_data', tags={'result'})
+def result_list_data(fx):
+    return _get(fx, 'view-results-data', query={'length': 100})
+
+
+@benchmark('sync_data', tags={'sync'}, writes=True)
+def sync_data(fx):
+    last_sync = timezone.now() - datetime.timedelta(days=7)
+    payload = {'device_id': 'benchmark', 'changes': [], 'last_sync': last_sync.isoformat()}
+    return fx.client.post(
+        reverse('sync:sync_data'), json.dumps(payload), content_type='application/json', secure=True
+    )
+
+
+@benchmark('chat_messages', tags={'chat'})
+def chat_messages(fx):
+    return fx.client.post(reverse('chatroom:get_messages', args=[fx.room.pk]), secure=True)
+
+
+@benchmark('export_students_csv', tags={'export'})
+def export_students_csv(fx):
+    return _get(fx, 'students:download-csv')
+
+
+@benchmark('export_results_excel', tags={'export'}, writes=True)
+def export_results_excel(fx):
+    return _run_job(fx, 'export_results_excel')
+
+
+@benchmark('export_attendance_excel', tags={'export'}, writes=True)
+def export_attendance_excel(fx):
+    return _run_job(fx, 'export_attendance_excel')
+
+
+def select(names=None, tags=None):
+    """Benchmarks by name, or by tag (opt-in tags only when named)"""
+    if names:
+        unknown = set(names) - set(REGISTRY)
+        if unknown:
+            raise KeyError(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+        return [REGISTRY[name] for name in names]
+    tags = set(tags or ())
+    return [
+        bench for bench in REGISTRY.values()
+        if (not tags or bench.tags & tags) and not (bench.tags & OPT_IN_TAGS - tags)
+    ]
+
+
+def _measure(bench, fx):
+    if bench.setup:
+        bench.setup(fx)
+    with ExitStack() as stack:
+        # Every alias, so reads sent to a replica are counted too
+        captured = [
+            stack.enter_context(CaptureQueriesContext(connection)) for connection in connections.all()
+        ]
+        started = time.perf_counter()
+        if bench.writes:
+            with transaction.atomic():
+                response = bench.func(fx)
+                transaction.set_rollback(True)
+        else:
+            response = bench.func(fx)
+        elapsed = (time.perf_counter() - started) * 1000
+    queries = sum(
+        1 for context in captured for query in context.captured_queries
+        if not TRANSACTION_SQL.match(query['sql'])
+    )
+    return response.status_code, elapsed, queries
+
+
+def run(benchmarks, repeat=5, warmup=1, fx=None):
+    """Run ``benchmarks`` and return {name: stats}"""
+    fx = fx or fixtures()
+    results = {}
+    for bench in benchmarks:
+        durations, queries, status = [], [], None
+        for i in range(warmup + repeat):
+            status, elapsed, count = _measure(bench, fx)
+            if i >= warmup:
+                durations.append(elapsed)
+                queries.append(count)
+        results[bench.name] = {
+            'status': status,
+            'median_ms': round(statistics.median(durations), 2),
+            'min_ms': round(min(durations), 2),
+            'max_ms': round(max(durations), 2),
+            'queries': max(queries),
+            'runs': repeat,
+        }
+    return results
+
+
+def compare(current, baseline, tolerance=0.25, noise_ms=5.0):
+    """
+    Regressions of ``current`` against ``baseline`` (both ``run`` output):
+    any increase in query count, or a median time more than ``tolerance``
+    (and ``noise_ms``) above the baseline.
+    """
+    regressions = []
+    for name, stats in current.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if stats['queries'] > before['queries']:
+            regressions.append(f"{name}: queries {before['queries']} -> {stats['queries']}")
+        limit = before['median_ms'] * (1 + tolerance) + noise_ms
+        if stats['median_ms'] > limit:
+            regressions.append(
+                f"{name}: median {before['median_ms']}ms -> {stats['median_ms']}ms"
+            )
+    return regressions
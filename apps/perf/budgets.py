@@ -0,0 +1,42 @@
+"""
+Query and time budgets for the hot views.
+
+Every entry names a benchmark from ``apps.perf.benchmarks``. The budget
+tests in ``apps.perf.tests`` run each one against synthetic schools of two
+sizes. They fail if the view issues more queries on the larger school, or
+if it goes over its budget there. Time budgets are generous ceilings that
+catch gross regressions; use ``run_benchmarks --compare`` for finer timing.
+
+When a view legitimately needs another query, raise its budget here in the
+same change.
+
+``STARTUP_MAX_MS`` bounds a cold worker boot (``apps.perf.startup``); the
+startup test also fails if a heavy module is imported at boot.
+"""
+from collections import namedtuple
+
+Budget = namedtuple('Budget', 'max_queries max_ms')
+
+BUDGETS = {
+    'dashboard': Budget(max_queries=12, max_ms=2000),
+    'analytics_dashboard': Budget(max_queries=11, max_ms=2000),
+    'report_card': Budget(max_queries=14, max_ms=2000),
+    'class_report_sheet': Budget(max_queries=13, max_ms=2000),
+    # Includes reading and saving the session the lookup is bound to
+    'parent_access': Budget(max_queries=12, max_ms=2000),
+    # Includes the absence streak update: read streaks, class config, one write
+    'take_attendance': Budget(max_queries=13, max_ms=2000),
+    'attendance_summary_data': Budget(max_queries=8, max_ms=2000),
+    'class_matrix': Budget(max_queries=15, max_ms=2000),
+    'student_list_data': Budget(max_queries=8, max_ms=2000),
+    'result_list_data': Budget(max_queries=9, max_ms=2000),
+    'sync_data': Budget(max_queries=5, max_ms=2000),
+    'chat_messages': Budget(max_queries=8, max_ms=2000),
+    'export_students_csv': Budget(max_queries=5, max_ms=5000),
+    # Exports run as background jobs: the benchmark counts the job's own
+    # bookkeeping (queueing, claiming, progress, artifact, finishing) too
+    'export_results_excel': Budget(max_queries=13, max_ms=5000),
+    'export_attendance_excel': Budget(max_queries=14, max_ms=5000),
+}
+
+STARTUP_MAX_MS = 3000
@@ -0,0 +1,111 @@
+"""
+Database connection counts during a load test.
+
+``ConnectionMonitor`` is a context manager that tracks every connection
+Django opens, from any thread, through the ``connection_created`` signal.
+A background thread samples at a short interval:
+
+* connections Django currently holds, i.e. wrappers with an open (or, when
+  pooled, checked-out) connection;
+* on PostgreSQL, server-side backends for the database, from
+  ``pg_stat_activity`` (excluding the sampler's own);
+* pool counters from ``instrumentation.pool_stats()``.
+
+``report()`` returns the peaks. ``bound()`` is the most connections the
+configured pools allow one process to open, or None without pooling.
+"""
+import threading
+import weakref
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.signals import connection_created
+
+from apps.corecode.instrumentation import pool_stats
+
+SERVER_CONNECTIONS_SQL = """
+    SELECT count(*) FROM pg_stat_activity
+    WHERE datname = current_database() AND pid <> pg_backend_pid()
+"""
+
+
+def bound():
+    pools = pool_stats()
+    if not pools:
+        return None
+    return sum(pool['pool_max'] for pool in pools.values())
+
+
+class ConnectionMonitor:
+    def __init__(self, interval=0.05, alias=DEFAULT_DB_ALIAS):
+        self.interval = interval
+        self.alias = alias
+        self._lock = threading.Lock()
+        self._wrappers = weakref.WeakSet()
+        self._stop = threading.Event()
+        self._sampler = None
+        self.created = 0
+        self.peak_held = 0
+        self.peak_server = None
+        self.peak_pool = None
+
+    def _on_created(self, sender, connection, **kwargs):
+        if threading.current_thread() is self._sampler:
+            return
+        with self._lock:
+            self._wrappers.add(connection)
+            self.created += 1
+        self.sample()
+
+    def held(self):
+        with self._lock:
+            wrappers = list(self._wrappers)
+        return sum(1 for wrapper in wrappers if wrapper.connection is not None)
+
+    def _server_connections(self):
+        connection = connections[self.alias]
+        if connection.vendor != 'postgresql':
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(SERVER_CONNECTIONS_SQL)
+            return cursor.fetchone()[0]
+
+    def sample(self):
+        held = self.held()
+        pools = pool_stats()
+        with self._lock:
+            self.peak_held = max(self.peak_held, held)
+            if pools:
+                opened = sum(pool['pool_size'] for pool in pools.values())
+                self.peak_pool = max(self.peak_pool or 0, opened)
+
+    def _run(self):
+        try:
+            while not self._stop.wait(self.interval):
+                self.sample()
+                server = self._server_connections()
+                if server is not None:
+                    with self._lock:
+                        self.peak_server = max(self.peak_server or 0, server)
+        finally:
+            connections.close_all()
+
+    def __enter__(self):
+        connection_created.connect(self._on_created, weak=False)
+        self._sampler = threading.Thread(target=self._run, name='connection-monitor', daemon=True)
+        self._sampler.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._sampler.join()
+        connection_created.disconnect(self._on_created)
+        self.sample()
+
+    def report(self):
+        return {
+            'created': self.created,
+            'peak_held': self.peak_held,
+            'peak_pool': self.peak_pool,
+            'peak_server': self.peak_server,
+            'bound': bound(),
+        }
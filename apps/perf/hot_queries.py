@@ -0,0 +1,147 @@
+"""
+The filters the hot views run most, checked against the query planner.
+
+Each function registered with ``@hot_query`` returns the queryset a view
+builds (with placeholder ids). ``explain()`` runs ``EXPLAIN`` on it and
+``full_scans()`` picks out the plan lines that read a whole table: SQLite
+``SCAN <table>`` without an index and PostgreSQL ``Seq Scan on <table>``. The
+``explain_hot_queries`` command reports them for every registered query.
+
+PostgreSQL prefers a sequential scan on small tables even when an index
+fits, so ``explain(force_index=True)`` turns ``enable_seqscan`` off for the
+statement: a ``Seq Scan`` that survives that has no usable index.
+"""
+import datetime
+import re
+from collections import namedtuple
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.finance.models import Invoice, InvoiceItem, Receipt
+from apps.idcards.models import StudentIDCard, TeacherIDCard
+from apps.jobs.models import Job
+from apps.result.models import Result
+from apps.staffs.models import Staff, TeacherAttendance
+from apps.students.models import Student
+from attendance.models import AttendanceEntry, AttendanceRegister
+
+HotQuery = namedtuple('HotQuery', 'name func')
+
+REGISTRY = {}
+
+# Placeholder ids; the plan does not depend on whether they exist
+PK = 1
+
+FULL_SCAN = {
+    # A SCAN ... USING INDEX walks an index, e.g. a partial one, not the table
+    'sqlite': re.compile(r'\bSCAN (?!CONSTANT ROW)(\w+)\b(?! USING)'),
+    'postgresql': re.compile(r'\bSeq Scan on (\w+)'),
+}
+
+
+def hot_query(name):
+    def decorator(func):
+        REGISTRY[name] = HotQuery(name, func)
+        return func
+    return decorator
+
+
+@hot_query('result_student_term')
+def result_student_term():
+    # Report cards and parent snapshots
+    return Result.objects.filter(student_id=PK, session_id=PK, term_id=PK)
+
+
+@hot_query('result_class_term')
+def result_class_term():
+    # Class analytics and report sheets
+    return Result.objects.filter(current_class_id=PK, session_id=PK, term_id=PK)
+
+
+@hot_query('result_class_subject')
+def result_class_subject():
+    # Score entry for one subject
+    return Result.objects.filter(current_class_id=PK, session_id=PK, term_id=PK, subject_id=PK)
+
+
+@hot_query('attendance_entry_student')
+def attendance_entry_student():
+    # A student's attendance for a term
+    return AttendanceEntry.objects.filter(
+        student_id=PK, register__session_id=PK, register__term_id=PK
+    )
+
+
+@hot_query('attendance_register_class')
+def attendance_register_class():
+    return AttendanceRegister.objects.filter(student_class_id=PK, session_id=PK, term_id=PK)
+
+
+@hot_query('invoice_student')
+def invoice_student():
+    return Invoice.objects.filter(student_id=PK)
+
+
+@hot_query('student_registration_number')
+def student_registration_number():
+    return Student.objects.by_registration_number('syn-00001')
+
+
+@hot_query('job_claim')
+def job_claim():
+    # What each background worker polls for
+    return Job.objects.filter(
+        status=Job.QUEUED, queue__in=['default'], run_at__lte=timezone.now()
+    ).order_by('-priority', 'run_at')
+
+
+SYNC_MODELS = (
+    Student, Staff, TeacherAttendance, Result, Invoice, InvoiceItem, Receipt,
+    StudentIDCard, TeacherIDCard,
+)
+
+
+def _sync_queries(model):
+    label = model._meta.model_name
+
+    def changed_since():
+        since = timezone.now() - datetime.timedelta(days=1)
+        return model.objects.filter(last_modified__gt=since)
+
+    def unsynced():
+        return model.objects.filter(~Q(sync_status='synced'))
+
+    hot_query(f'sync_{label}_changed')(changed_since)
+    hot_query(f'sync_{label}_unsynced')(unsynced)
+
+
+for _model in SYNC_MODELS:
+    _sync_queries(_model)
+
+
+def explain(queryset, analyze=False, force_index=False):
+    """The plan of ``queryset`` as text"""
+    options = {'analyze': True} if analyze and connection.vendor == 'postgresql' else {}
+    if force_index and connection.vendor == 'postgresql':
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+            return queryset.explain(**options)
+    return queryset.explain(**options)
+
+
+def full_scans(plan, vendor=None):
+    """Tables read in full according to ``plan``"""
+    pattern = FULL_SCAN.get(vendor or connection.vendor)
+    if pattern is None:
+        return []
+    return [match.group(1) for match in pattern.finditer(plan)]
+
+
+def check(names=None, analyze=False, force_index=False):
+    """Yield (name, plan, full scans) for the registered hot queries"""
+    for name in names or REGISTRY:
+        plan = explain(REGISTRY[name].func(), analyze=analyze, force_index=force_index)
+        yield name, plan, full_scans(plan)
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from apps.perf import hot_queries
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the registered hot queries and report full table scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help='Hot queries to explain (default: all)')
+        parser.add_argument('--plans', action='store_true', help='Print every plan, not only scans')
+        parser.add_argument('--analyze', action='store_true', help='EXPLAIN ANALYZE (PostgreSQL)')
+        parser.add_argument(
+            '--force-index', action='store_true',
+            help='Disable sequential scans while planning (PostgreSQL), so only '
+                 'queries without a usable index are reported',
+        )
+        parser.add_argument('--fail', action='store_true', help='Exit with an error if any query scans')
+        parser.add_argument('--list', action='store_true', help='List hot queries and exit')
+
+    def handle(self, *args, **options):
+        if options['list']:
+            for name in hot_queries.REGISTRY:
+                self.stdout.write(name)
+            return
+        unknown = set(options['names']) - set(hot_queries.REGISTRY)
+        if unknown:
+            raise CommandError(f"Unknown hot queries: {', '.join(sorted(unknown))}")
+        if connection.vendor not in hot_queries.FULL_SCAN:
+            self.stderr.write(f'Scan detection is not supported on {connection.vendor}')
+
+        scanning = []
+        for name, plan, scans in hot_queries.check(
+            options['names'], analyze=options['analyze'], force_index=options['force_index']
+        ):
+            if scans:
+                scanning.append(name)
+                self.stdout.write(self.style.WARNING(f"{name:<36} full scan of {', '.join(scans)}"))
+            else:
+                self.stdout.write(f'{name:<36} ok')
+            if scans or options['plans']:
+                for line in plan.splitlines():
+                    self.stdout.write(f'    {line}')
+
+        if scanning and options['fail']:
+            raise CommandError(f'{len(scanning)} hot query(ies) scan a whole table')
+        if not scanning:
+            self.stdout.write(self.style.SUCCESS(f'No full scans ({connection.vendor})'))
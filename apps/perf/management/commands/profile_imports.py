@@ -0,0 +1,58 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.perf import startup
+
+
+class Command(BaseCommand):
+    help = 'Profile worker start: import time per package (python -X importtime) and cold boot time'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=20, help='Packages to list (default: 20)')
+        parser.add_argument('--why', metavar='MODULE', help='Show which imports pulled in MODULE')
+        parser.add_argument(
+            '--repeat', type=int, default=5, help='Cold boots to time (0 to skip timing)'
+        )
+        parser.add_argument('--json', action='store_true', help='Print the summary as JSON')
+        parser.add_argument(
+            '--fail-on-heavy', action='store_true',
+            help='Exit with an error if a module in startup.HEAVY_MODULES is imported at boot'
+        )
+
+    def handle(self, *args, **options):
+        rows = startup.profile()
+        packages = startup.by_package(rows).most_common(options['limit'])
+        timing = startup.measure(options['repeat']) if options['repeat'] else None
+        heavy = [name for name in startup.HEAVY_MODULES if any(row.module == name for row in rows)]
+
+        if options['json']:
+            self.stdout.write(json.dumps({
+                'import_ms': round(sum(row.self_us for row in rows) / 1000, 1),
+                'packages': {name: round(us / 1000, 1) for name, us in packages},
+                'heavy_modules': heavy,
+                'boot': timing,
+            }, indent=2))
+        else:
+            self.stdout.write(f"{'package':<32} {'self ms':>9}")
+            for name, us in packages:
+                self.stdout.write(f'{name:<32} {us / 1000:>9.1f}')
+            self.stdout.write(f"{'total':<32} {sum(row.self_us for row in rows) / 1000:>9.1f}")
+            if timing:
+                self.stdout.write(
+                    f"\nCold boot: median {timing['median_ms']} ms "
+                    f"(min {timing['min_ms']}, max {timing['max_ms']}, {timing['runs']} runs)"
+                )
+            for name in heavy:
+                chain = ' <- '.join([name, *startup.importers(rows, name)])
+                self.stdout.write(self.style.WARNING(f'Heavy import at boot: {chain}'))
+
+        if options['why']:
+            chain = startup.importers(rows, options['why'])
+            if chain is None:
+                self.stdout.write(f"{options['why']} is not imported at boot")
+            else:
+                self.stdout.write(' <- '.join([options['why'], *chain]))
+
+        if heavy and options['fail_on_heavy']:
+            raise CommandError(f"Heavy modules imported at boot: {', '.join(heavy)}")
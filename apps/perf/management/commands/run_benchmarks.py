@@ -0,0 +1,81 @@
+import json
+import platform
+import subprocess
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from apps.perf import benchmarks
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+class Command(BaseCommand):
+    help = 'Time and query-count the core request paths against synthetic data'
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help='Benchmarks to run (default: all)')
+        parser.add_argument('--tag', action='append', dest='tags', help='Only run benchmarks with this tag')
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--warmup', type=int, default=1)
+        parser.add_argument(
+            '--output', help='JSON file to write (default: BENCHMARK_DIR/<timestamp>.json)'
+        )
+        parser.add_argument('--compare', help='Earlier JSON run to check for regressions')
+        parser.add_argument(
+            '--tolerance', type=float, default=0.25,
+            help='Allowed relative slowdown of the median before it counts as a regression'
+        )
+        parser.add_argument('--list', action='store_true', help='List benchmarks and exit')
+
+    def handle(self, *args, **options):
+        if options['list']:
+            for bench in benchmarks.REGISTRY.values():
+                self.stdout.write(f"{bench.name} [{', '.join(sorted(bench.tags))}]")
+            return
+        try:
+            selected = benchmarks.select(options['names'], options['tags'])
+            results = benchmarks.run(selected, repeat=options['repeat'], warmup=options['warmup'])
+        except (KeyError, LookupError) as exc:
+            raise CommandError(exc.args[0])
+
+        for name, stats in results.items():
+            self.stdout.write(
+                f"{name:<28} {stats['median_ms']:>9.1f} ms {stats['queries']:>6} queries"
+                f"  (HTTP {stats['status']})"
+            )
+
+        run = {
+            'created': timezone.now().isoformat(),
+            'revision': _git_revision(),
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'results': results,
+        }
+        output = options['output']
+        if not output:
+            directory = Path(getattr(settings, 'BENCHMARK_DIR', Path(settings.BASE_DIR) / 'benchmarks'))
+            directory.mkdir(parents=True, exist_ok=True)
+            output = directory / f"{timezone.now():%Y%m%d-%H%M%S}.json"
+        Path(output).write_text(json.dumps(run, indent=2))
+        self.stdout.write(f'Wrote {output}')
+
+        if options['compare']:
+            baseline = json.loads(Path(options['compare']).read_text())['results']
+            regressions = benchmarks.compare(results, baseline, tolerance=options['tolerance'])
+            if regressions:
+                for regression in regressions:
+                    self.stderr.write(regression)
+                raise CommandError(f'{len(regressions)} regression(s) against {options["compare"]}')
+            self.stdout.write(self.style.SUCCESS('No regressions'))
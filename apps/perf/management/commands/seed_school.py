@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.perf import synthetic
+
+
+class Command(BaseCommand):
+    help = 'Fill the database with a synthetic school for benchmarking'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--size', choices=list(synthetic.SIZES), default='small',
+            help='Preset to start from (default: small)'
+        )
+        for field in synthetic.Spec._fields:
+            parser.add_argument(f"--{field.replace('_', '-')}", type=int, help=f'Override {field}')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed')
+        parser.add_argument(
+            '--clear', action='store_true',
+            help='Delete previously generated synthetic data first'
+        )
+        parser.add_argument(
+            '--index', action='store_true',
+            help='Add the new rows to the global search index'
+        )
+
+    def handle(self, *args, **options):
+        spec = synthetic.SIZES[options['size']]._replace(**{
+            field: options[field] for field in synthetic.Spec._fields if options[field] is not None
+        })
+        if options['clear']:
+            synthetic.clear()
+        elif synthetic.Student.objects.filter(device_id=synthetic.DEVICE_ID).exists():
+            raise CommandError('Synthetic data already exists; pass --clear to replace it.')
+
+        self.stdout.write(f'Seeding {spec}')
+        counts = synthetic.seed(spec, random_seed=options['seed'])
+        for name, count in counts.items():
+            self.stdout.write(f'{name}: {count}')
+
+        if options['index']:
+            from apps.search.index import index_missing
+            for kind in ('student', 'staff', 'invoice', 'class'):
+                index_missing(kind)
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded a synthetic school; log in as '{synthetic.BENCHMARK_USER}' "
+            "(set a password with changepassword) to browse it."
+        ))
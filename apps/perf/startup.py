@@ -0,0 +1,105 @@
+"""
+Cold-start cost of a worker process.
+
+Each measurement runs a fresh interpreter that does what a gunicorn worker
+does before its first response: ``django.setup()`` and loading the URLconf,
+which imports every view module. ``measure()`` times that boot. ``profile()``
+runs it under ``python -X importtime`` and sums the import time per
+top-level package.
+
+``HEAVY_MODULES`` must stay out of the boot path. They are imported lazily
+through ``apps.corecode.lazy`` at first use.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter, namedtuple
+
+from django.conf import settings
+
+HEAVY_MODULES = ('pandas', 'numpy', 'openpyxl', 'playwright', 'africastalking', 'lipana', 'requests')
+
+ImportTime = namedtuple('ImportTime', 'module self_us cumulative_us depth')
+
+BOOT = """
+import json, sys
+import django
+django.setup()
+from django.urls import get_resolver
+get_resolver().url_patterns
+heavy = [name for name in json.loads(sys.argv[1]) if name in sys.modules]
+print(json.dumps(heavy))
+"""
+
+
+def _boot(*python_options):
+    env = {
+        **os.environ,
+        'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'school_app.settings'),
+        'PYTHONPATH': os.pathsep.join(filter(None, [str(settings.BASE_DIR), os.environ.get('PYTHONPATH')])),
+    }
+    return subprocess.run(
+        [sys.executable, *python_options, '-c', BOOT, json.dumps(HEAVY_MODULES)],
+        cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+
+
+def measure(repeat=5):
+    """Wall time of a cold boot in ms, and heavy modules it imported"""
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        completed = _boot()
+        durations.append((time.perf_counter() - started) * 1000)
+    return {
+        'median_ms': round(statistics.median(durations), 1),
+        'min_ms': round(min(durations), 1),
+        'max_ms': round(max(durations), 1),
+        'runs': repeat,
+        'heavy_modules': json.loads(completed.stdout.strip().splitlines()[-1]),
+    }
+
+
+def parse_importtime(output):
+    """ImportTime rows from ``-X importtime`` stderr, in the order printed"""
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        if not self_us.strip().isdigit():
+            continue  # the header
+        module = name.rstrip()
+        rows.append(ImportTime(
+            module.strip(), int(self_us), int(cumulative_us), (len(module) - len(module.lstrip())) // 2,
+        ))
+    return rows
+
+
+def by_package(rows):
+    """Self import time per top-level package, in microseconds"""
+    totals = Counter()
+    for row in rows:
+        totals[row.module.split('.')[0]] += row.self_us
+    return totals
+
+
+def importers(rows, module):
+    """Chain of modules that led to ``module`` being imported first"""
+    for i, row in enumerate(rows):
+        if row.module == module:
+            chain, depth = [], row.depth
+            # -X importtime prints a module after everything it imported
+            for parent in rows[i + 1:]:
+                if parent.depth < depth:
+                    chain.append(parent.module)
+                    depth = parent.depth
+            return chain
+    return None
+
+
+def profile():
+    return parse_importtime(_boot('-X', 'importtime').stderr)
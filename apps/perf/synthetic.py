@@ -0,0 +1,307 @@
+"""
+Synthetic school data for benchmarks and query-budget tests.
+
+``seed(spec)`` fills the database with a school shaped by ``spec``:
+classes, students, staff and user accounts, several years of termly
+results and invoices with items and receipts, daily class and staff
+attendance for the latest session, and chat rooms with messages.
+Everything is written with ``bulk_create`` and is reproducible for a given
+``random_seed``.
+
+Generated rows are tagged so ``clear()`` can remove them again:
+
+* classes are named ``SYN ...``;
+* students and staff have ``device_id = 'synthetic'``;
+* users are named ``syn-...``.
+"""
+import datetime
+import random
+import uuid
+from collections import namedtuple
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from apps.corecode.models import AcademicSession, AcademicTerm, StudentClass, Subject
+from apps.finance.models import Invoice, InvoiceItem, Receipt
+from apps.result.models import Result
+from apps.staffs.models import Staff, TeacherAttendance
+from apps.students.models import Student
+from attendance.models import AttendanceEntry, AttendanceRegister
+from chatroom.models import ChatRoom, Message
+
+DEVICE_ID = 'synthetic'
+CLASS_PREFIX = 'SYN '
+USER_PREFIX = 'syn-'
+BENCHMARK_USER = 'syn-benchmark'
+BATCH_SIZE = 2000
+
+Spec = namedtuple('Spec', [
+    'classes', 'students_per_class', 'staff', 'subjects', 'years',
+    'terms', 'school_days', 'messages',
+])
+
+SIZES = {
+    'tiny': Spec(classes=2, students_per_class=5, staff=3, subjects=3, years=1,
+                 terms=1, school_days=3, messages=20),
+    'small': Spec(classes=4, students_per_class=25, staff=10, subjects=6, years=2,
+                  terms=3, school_days=10, messages=500),
+    'medium': Spec(classes=12, students_per_class=40, staff=40, subjects=8, years=3,
+                   terms=3, school_days=40, messages=5000),
+    'large': Spec(classes=30, students_per_class=70, staff=120, subjects=10, years=4,
+                  terms=3, school_days=60, messages=50000),
+}
+
+SUBJECTS = [
+    'Mathematics', 'English', 'Kiswahili', 'Science', 'Social Studies',
+    'CRE', 'Agriculture', 'Home Science', 'Art and Craft', 'Music',
+    'Physical Education', 'Computer Studies',
+]
+TERMS = ['First Term', 'Second Term', 'Third Term']
+SURNAMES = [
+    'Achieng', 'Barasa', 'Chebet', 'Kamau', 'Kiprono', 'Mwangi', 'Njoroge',
+    'Odhiambo', 'Otieno', 'Wafula', 'Wanjiku', 'Mutua', 'Kariuki', 'Omondi',
+]
+FIRSTNAMES = [
+    'Amani', 'Baraka', 'Faith', 'Grace', 'Imani', 'Joy', 'Kevin', 'Mercy',
+    'Brian', 'Neema', 'Peter', 'Zawadi', 'Ian', 'Wambui', 'Tabitha', 'Collins',
+]
+FEE_ITEMS = [('Tuition', 15000), ('Lunch', 4500), ('Activity', 1500)]
+PHRASES = [
+    'Homework is due on Friday', 'Please bring the signed forms',
+    'Meeting moved to 2pm', 'Well done on the test', 'See you at assembly',
+    'Reminder: games kit tomorrow', 'Any questions about the project?',
+]
+
+
+def _school_days(count, end=None):
+    """The last ``count`` weekdays up to ``end`` (today), oldest first"""
+    day = end or timezone.localdate()
+    days = []
+    while len(days) < count:
+        if day.weekday() < 5:
+            days.append(day)
+        day -= datetime.timedelta(days=1)
+    return days[::-1]
+
+
+def _phone(rng):
+    return f"07{rng.randrange(10 ** 8):08d}"
+
+
+def clear():
+    """Delete everything a previous ``seed`` created"""
+    with transaction.atomic():
+        Student.objects.filter(device_id=DEVICE_ID).delete()
+        Staff.objects.filter(device_id=DEVICE_ID).delete()
+        StudentClass.objects.filter(name__startswith=CLASS_PREFIX).delete()
+        get_user_model().objects.filter(username__startswith=USER_PREFIX).delete()
+
+
+def _sessions(spec):
+    year = timezone.localdate().year
+    sessions = [
+        AcademicSession.objects.get_or_create(name=f"{y - 1}-{y}", defaults={'current': False})[0]
+        for y in range(year - spec.years + 1, year + 1)
+    ]
+    terms = [
+        AcademicTerm.objects.get_or_create(name=name, defaults={'current': False})[0]
+        for name in TERMS[:spec.terms]
+    ]
+    # The latest seeded session and term become current so views see the data
+    AcademicSession.objects.update(current=False)
+    AcademicSession.objects.filter(pk=sessions[-1].pk).update(current=True)
+    AcademicTerm.objects.update(current=False)
+    AcademicTerm.objects.filter(pk=terms[-1].pk).update(current=True)
+    return sessions, terms
+
+
+def _people(spec, rng):
+    classes = StudentClass.objects.bulk_create([
+        StudentClass(name=f"{CLASS_PREFIX}Grade {i + 1}") for i in range(spec.classes)
+    ])
+    students = Student.objects.bulk_create([
+        Student(
+            registration_number=f"SYN-{c + 1:02d}-{i + 1:05d}",
+            surname=rng.choice(SURNAMES),
+            firstname=rng.choice(FIRSTNAMES),
+            gender=rng.choice(('male', 'female')),
+            current_class=student_class,
+            parent_mobile_number=_phone(rng),
+            device_id=DEVICE_ID,
+            sync_id=uuid.uuid4(),
+        )
+        for c, student_class in enumerate(classes)
+        for i in range(spec.students_per_class)
+    ], batch_size=BATCH_SIZE)
+    staff = Staff.objects.bulk_create([
+        Staff(
+            surname=rng.choice(SURNAMES),
+            firstname=rng.choice(FIRSTNAMES),
+            gender=rng.choice(('male', 'female')),
+            mobile_number=_phone(rng),
+            device_id=DEVICE_ID,
+            sync_id=uuid.uuid4(),
+        )
+        for _ in range(spec.staff)
+    ], batch_size=BATCH_SIZE)
+
+    User = get_user_model()
+    password = make_password(None)
+    users = User.objects.bulk_create([
+        User(username=f"{USER_PREFIX}staff-{i + 1}", password=password, is_staff=True)
+        for i in range(spec.staff)
+    ], batch_size=BATCH_SIZE)
+    User.objects.create_superuser(BENCHMARK_USER, f"{BENCHMARK_USER}@example.com", None)
+    return classes, students, staff, users
+
+
+def _results(rng, students, subjects, sessions, terms):
+    # Each student has an ability that their scores scatter around
+    ability = {student.id: rng.gauss(0.6, 0.15) for student in students}
+    rows = []
+    for session in sessions:
+        for term in terms:
+            for student in students:
+                for subject in subjects:
+                    level = min(max(rng.gauss(ability[student.id], 0.1), 0.05), 1.0)
+                    exam_level = min(max(level + rng.uniform(-0.1, 0.1), 0.0), 1.0)
+                    rows.append(Result(
+                        student=student, session=session, term=term,
+                        current_class_id=student.current_class_id, subject=subject,
+                        test_score=round(40 * level), exam_score=round(60 * exam_level),
+                        sync_id=uuid.uuid4(),
+                    ))
+    Result.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+    return len(rows)
+
+
+def _finance(rng, students, sessions, terms):
+    invoices = [
+        Invoice(
+            student=student, session=session, term=term,
+            class_for_id=student.current_class_id, sync_id=uuid.uuid4(),
+        )
+        for session in sessions
+        for term in terms
+        for student in students
+    ]
+    # Invoice.save() numbers invoices one query at a time; bulk rows get theirs here
+    for n, invoice in enumerate(invoices, start=1):
+        invoice.invoice_number = f"SYN-{n:08d}"
+    Invoice.objects.bulk_create(invoices, batch_size=BATCH_SIZE)
+    items = InvoiceItem.objects.bulk_create([
+        InvoiceItem(invoice=invoice, description=description, amount=amount, sync_id=uuid.uuid4())
+        for invoice in invoices
+        for description, amount in FEE_ITEMS
+    ], batch_size=BATCH_SIZE)
+    total = sum(amount for _, amount in FEE_ITEMS)
+    receipts = []
+    for invoice in invoices:
+        for _ in range(rng.choice((0, 1, 1, 2))):
+            receipts.append(Receipt(
+                invoice=invoice,
+                amount_paid=rng.randrange(total // 4, total // 2),
+                payment_method=rng.choice(('cash', 'mpesa', 'bank_transfer')),
+                receipt_number=f"SYN-{len(receipts):08d}",
+                sync_id=uuid.uuid4(),
+            ))
+    Receipt.objects.bulk_create(receipts, batch_size=BATCH_SIZE)
+    return len(invoices), len(items), len(receipts)
+
+
+def _attendance(spec, rng, classes, students, staff, session, terms):
+    days = _school_days(spec.school_days * len(terms))
+    per_term = spec.school_days
+    registers = AttendanceRegister.objects.bulk_create([
+        AttendanceRegister(
+            date=day, student_class=student_class,
+            term=terms[min(i // per_term, len(terms) - 1)], session=session,
+        )
+        for student_class in classes
+        for i, day in enumerate(days)
+    ], batch_size=BATCH_SIZE)
+
+    by_class = {}
+    for student in students:
+        by_class.setdefault(student.current_class_id, []).append(student)
+    statuses = [AttendanceEntry.STATUS_PRESENT] * 17 + [
+        AttendanceEntry.STATUS_ABSENT, AttendanceEntry.STATUS_LATE, AttendanceEntry.STATUS_EXCUSED,
+    ]
+    entries = [
+        AttendanceEntry(register=register, student=student, status=rng.choice(statuses))
+        for register in registers
+        for student in by_class.get(register.student_class_id, [])
+    ]
+    AttendanceEntry.objects.bulk_create(entries, batch_size=BATCH_SIZE)
+
+    teacher_statuses = ['present'] * 12 + ['late', 'absent', 'leave']
+    teacher_rows = TeacherAttendance.objects.bulk_create([
+        TeacherAttendance(
+            teacher=member, date=day, status=rng.choice(teacher_statuses),
+            time_in=datetime.time(7, rng.randrange(60)), time_out=datetime.time(16, rng.randrange(60)),
+            sync_id=uuid.uuid4(),
+        )
+        for member in staff
+        for day in days
+    ], batch_size=BATCH_SIZE)
+    return len(registers), len(entries), len(teacher_rows)
+
+
+def _chat(spec, rng, classes, users):
+    if not users:
+        return 0, 0
+    rooms = ChatRoom.objects.bulk_create(
+        [ChatRoom(name=f"{CLASS_PREFIX}Staff room", room_type='staff', created_by=users[0])]
+        + [ChatRoom(name=f"{student_class.name} chat", room_type='class', created_by=users[0])
+           for student_class in classes]
+    )
+    Membership = ChatRoom.participants.through
+    Membership.objects.bulk_create([
+        Membership(chatroom_id=room.id, user_id=user.id) for room in rooms for user in users
+    ], batch_size=BATCH_SIZE)
+
+    start = timezone.now() - datetime.timedelta(days=30)
+    step = datetime.timedelta(days=30) / max(spec.messages, 1)
+    Message.objects.bulk_create([
+        Message(
+            room=rng.choice(rooms), sender=rng.choice(users), content=rng.choice(PHRASES),
+            timestamp=start + step * i, is_read=rng.random() < 0.8,
+        )
+        for i in range(spec.messages)
+    ], batch_size=BATCH_SIZE)
+    return len(rooms), spec.messages
+
+
+def seed(spec, random_seed=0):
+    """Create a synthetic school described by ``spec``; returns row counts"""
+    rng = random.Random(random_seed)
+    with transaction.atomic():
+        subjects = [
+            Subject.objects.get_or_create(name=name)[0] for name in SUBJECTS[:spec.subjects]
+        ]
+        sessions, terms = _sessions(spec)
+        classes, students, staff, users = _people(spec, rng)
+        results = _results(rng, students, subjects, sessions, terms)
+        invoices, items, receipts = _finance(rng, students, sessions, terms)
+        registers, entries, teacher_days = _attendance(
+            spec, rng, classes, students, staff, sessions[-1], terms
+        )
+        rooms, messages = _chat(spec, rng, classes, users)
+    return {
+        'classes': len(classes),
+        'students': len(students),
+        'staff': len(staff),
+        'users': len(users) + 1,
+        'results': results,
+        'invoices': invoices,
+        'invoice_items': items,
+        'receipts': receipts,
+        'attendance_registers': registers,
+        'attendance_entries': entries,
+        'teacher_attendance': teacher_days,
+        'chat_rooms': rooms,
+        'chat_messages': messages,
+    }
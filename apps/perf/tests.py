@@ -0,0 +1,92 @@
+from django.test import SimpleTestCase, TestCase
+
+from . import benchmarks, hot_queries, startup, synthetic
+from .budgets import BUDGETS, STARTUP_MAX_MS
+
+
+class SyntheticSchoolTest(TestCase):
+    def test_seed_and_benchmark(self):
+        counts = synthetic.seed(synthetic.SIZES['tiny'])
+        self.assertEqual(counts['students'], 10)
+        self.assertEqual(counts['results'], 10 * 3)
+        self.assertEqual(counts['attendance_entries'], 10 * 3)
+
+        selected = benchmarks.select(['report_card', 'parent_access', 'take_attendance'])
+        results = benchmarks.run(selected, repeat=1, warmup=0)
+        self.assertEqual(
+            {name: stats['status'] for name, stats in results.items()},
+            {'report_card': 200, 'parent_access': 200, 'take_attendance': 302},
+        )
+        self.assertEqual(benchmarks.compare(results, results), [])
+
+        synthetic.clear()
+        self.assertFalse(synthetic.Student.objects.filter(device_id=synthetic.DEVICE_ID).exists())
+
+    def test_pdf_benchmarks_are_opt_in(self):
+        names = {bench.name for bench in benchmarks.select()}
+        self.assertNotIn('class_report_cards_pdf', names)
+        self.assertIn('class_report_cards_pdf', {b.name for b in benchmarks.select(tags=['pdf'])})
+
+
+class QueryBudgetTest(TestCase):
+    """Hot views must stay within budget and not add queries as data grows"""
+
+    SIZES = (
+        synthetic.SIZES['tiny'],
+        synthetic.SIZES['tiny']._replace(
+            students_per_class=15, staff=6, subjects=5, school_days=6, messages=80
+        ),
+    )
+
+    def measure(self, spec):
+        synthetic.seed(spec)
+        try:
+            return benchmarks.run(benchmarks.select(list(BUDGETS)), repeat=1, warmup=1)
+        finally:
+            synthetic.clear()
+
+    def test_budgets(self):
+        small, large = (self.measure(spec) for spec in self.SIZES)
+        for name, budget in BUDGETS.items():
+            with self.subTest(name):
+                self.assertLess(large[name]['status'], 400)
+                self.assertEqual(
+                    large[name]['queries'], small[name]['queries'],
+                    "query count grows with the amount of data",
+                )
+                self.assertLessEqual(large[name]['queries'], budget.max_queries)
+                self.assertLessEqual(large[name]['median_ms'], budget.max_ms)
+
+
+class HotQueryPlanTest(TestCase):
+    def test_hot_queries_use_indexes(self):
+        for name, plan, scans in hot_queries.check():
+            with self.subTest(name):
+                self.assertEqual(scans, [], plan)
+
+    def test_full_scan_detection(self):
+        self.assertEqual(
+            hot_queries.full_scans('SCAN result_result\nSCAN finance_receipt USING INDEX x', 'sqlite'),
+            ['result_result'],
+        )
+        self.assertEqual(
+            hot_queries.full_scans('Seq Scan on result_result  (cost=0.00..1.01 rows=1)', 'postgresql'),
+            ['result_result'],
+        )
+
+
+class StartupTest(SimpleTestCase):
+    def test_cold_boot_skips_heavy_imports(self):
+        timing = startup.measure(repeat=1)
+        self.assertEqual(timing['heavy_modules'], [])
+        self.assertLessEqual(timing['median_ms'], STARTUP_MAX_MS)
+
+    def test_parse_importtime(self):
+        rows = startup.parse_importtime(
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |     numpy.core\n"
+            "import time:       300 |        420 |   numpy\n"
+            "import time:        50 |        470 | apps.result.trends\n"
+        )
+        self.assertEqual(startup.by_package(rows), {'numpy': 420, 'apps': 50})
+        self.assertEqual(startup.importers(rows, 'numpy'), ['apps.result.trends'])
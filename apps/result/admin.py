@@ -1,3 +1,15 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import GradeBand, GradeScale
+
+
+class GradeBandInline(admin.TabularInline):
+    model = GradeBand
+    extra = 1
+
+
+@admin.register(GradeScale)
+class GradeScaleAdmin(admin.ModelAdmin):
+    list_display = ("name", "is_default", "pass_mark")
+    filter_horizontal = ("classes",)
+    inlines = [GradeBandInline]
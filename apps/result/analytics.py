@@ -0,0 +1,236 @@
+"""
+Class/term analytics computed from a students x subjects score matrix.
+
+One query loads every result for a class, session and term. The totals are
+laid out as a matrix with NaN for subjects a student did not sit. Subject
+statistics, histograms, correlations, z-scores and rankings are then
+vectorised NumPy reductions over that matrix. Grades come from the class's
+grade scale through ``searchsorted`` on its band boundaries.
+
+The computed analytics are plain data cached per (class, session, term).
+``apps.result.signals`` drops them when a result is saved or deleted, and
+bumps a generation counter when a grade scale changes. They are always
+recomputed from the primary, even in views that read from the replica, so
+a lagging replica cannot put scores from before that change back in the
+cache.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from apps.corecode.lazy import lazy_import
+from apps.corecode.replicas import use_primary
+
+from . import grading
+from .models import Result
+from .utils import get_gpa_class, ranking_key
+
+np = lazy_import('numpy')
+
+HISTOGRAM_BINS = tuple(range(0, 101, 10))
+PERCENTILES = (25, 50, 75)
+GENERATION_KEY = 'result:analytics:generation'
+
+
+def cache_key(class_id, session_id, term_id):
+    generation = cache.get_or_set(GENERATION_KEY, 0, None)
+    return f"result:analytics:{generation}:{class_id}:{session_id}:{term_id}"
+
+
+def invalidate(class_id, session_id, term_id):
+    cache.delete(cache_key(class_id, session_id, term_id))
+
+
+def invalidate_all():
+    """Drop every cached analytics entry, e.g. after a grade scale edit"""
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 1, None)
+
+
+def _load(class_id, session_id, term_id):
+    return list(
+        Result.objects.filter(current_class_id=class_id, session_id=session_id, term_id=term_id)
+        .order_by('subject__name', 'student__surname', 'student__firstname')
+        .values_list(
+            'student_id', 'student__surname', 'student__firstname', 'student__other_name',
+            'student__registration_number', 'student__current_class_id',
+            'subject_id', 'subject__name', 'test_score', 'exam_score',
+        )
+    )
+
+
+def _round(values, digits=2):
+    """Round an array to a list, turning NaN into None"""
+    values = np.round(np.asarray(values, dtype=float), digits)
+    return [None if np.isnan(v) else float(v) for v in values.ravel()]
+
+
+def _grades(matrix, scale):
+    """Band index per cell (bands are ordered from the highest minimum down)"""
+    # Ascending boundaries: band i covers scores >= bounds[i]
+    bounds = np.array([band.min_score for band in reversed(scale.bands)], dtype=float)
+    ascending = np.searchsorted(bounds, np.nan_to_num(matrix, nan=-1), side='right') - 1
+    return len(scale.bands) - 1 - np.clip(ascending, 0, None)
+
+
+def _correlations(matrix):
+    """
+    Pearson correlation between subjects over students who sat both, as
+    pairwise sums from matrix products of the score and presence masks.
+    """
+    present = (~np.isnan(matrix)).astype(float)
+    scores = np.nan_to_num(matrix)
+    n = present.T @ present
+    sum_x = scores.T @ present  # [a, b]: sum of a's scores where b was also sat
+    sum_xx = (scores ** 2).T @ present
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = scores.T @ scores - sum_x * sum_x.T / n
+        var = sum_xx - sum_x ** 2 / n
+        corr = cov / np.sqrt(var * var.T)
+    corr[n < 2] = np.nan
+    return [_round(row) for row in np.clip(corr, -1, 1)]
+
+
+def compute_analytics(rows, scale, class_id):
+    """
+    Reduce result rows for one class and term to analytics.
+
+    ``rows`` are the tuples returned by ``_load``; ``scale`` is the grade
+    scale of ``class_id``. Students are ranked only if the class is still
+    their current class, matching ``calculate_class_rankings``.
+    """
+    if not rows:
+        return None
+    (student_ids, surnames, firstnames, other_names, reg_numbers, current_classes,
+     subject_ids, subject_names, ca, exam) = zip(*rows)
+
+    students = list(dict.fromkeys(student_ids))
+    subjects = list(dict.fromkeys(zip(subject_ids, subject_names)))
+    student_index = {student_id: i for i, student_id in enumerate(students)}
+    subject_index = {subject_id: j for j, (subject_id, _) in enumerate(subjects)}
+
+    matrix = np.full((len(students), len(subjects)), np.nan)
+    matrix[
+        [student_index[s] for s in student_ids],
+        [subject_index[s] for s in subject_ids],
+    ] = np.array(ca, dtype=float) + np.array(exam, dtype=float)
+    sat = ~np.isnan(matrix)
+
+    band_index = _grades(matrix, scale)
+    points = np.array([band.points for band in scale.bands])[band_index]
+    points[~sat] = np.nan
+    passed = (matrix >= scale.pass_mark) & sat
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        counts = sat.sum(axis=0)
+        means = np.nanmean(matrix, axis=0)
+        stds = np.nanstd(matrix, axis=0)
+        percentiles = np.nanpercentile(matrix, PERCENTILES, axis=0)
+        z_scores = (matrix - means) / np.where(stds > 0, stds, np.nan)
+        student_avg = np.nanmean(matrix, axis=1)
+        student_gpa = np.nanmean(points, axis=1)
+        student_z = np.nanmean(z_scores, axis=1)
+
+    subject_stats = []
+    for j, (subject_id, name) in enumerate(subjects):
+        column = matrix[sat[:, j], j]
+        histogram, _ = np.histogram(column, bins=HISTOGRAM_BINS)
+        subject_stats.append({
+            'subject_id': subject_id,
+            'subject': name,
+            'total_students': int(counts[j]),
+            'average': round(float(means[j]), 2),
+            'std_dev': round(float(stds[j]), 2),
+            'highest': int(column.max()),
+            'lowest': int(column.min()),
+            'percentiles': dict(zip(PERCENTILES, _round(percentiles[:, j]))),
+            'passing': int(passed[:, j].sum()),
+            'pass_rate': round(float(passed[:, j].sum() / counts[j] * 100), 2),
+            'histogram': histogram.tolist(),
+        })
+
+    # Rank by average score among students still in the class
+    names = {}
+    details = {}
+    for student_id, surname, firstname, other_name, reg_number, current_class in zip(
+        student_ids, surnames, firstnames, other_names, reg_numbers, current_classes
+    ):
+        names[student_id] = " ".join(filter(None, (surname, firstname, other_name)))
+        details[student_id] = (reg_number, current_class, surname, firstname)
+    ranked = [i for i, student_id in enumerate(students) if details[student_id][1] == class_id]
+    # Ties are broken as calculate_class_rankings breaks them
+    order = sorted(ranked, key=lambda i: ranking_key(
+        float(student_avg[i]), details[students[i]][2], details[students[i]][3], students[i]
+    ))
+    rankings = [
+        {
+            'student_id': students[i],
+            'name': names[students[i]],
+            'registration_number': details[students[i]][0],
+            'position': position,
+            'avg_score': round(float(student_avg[i]), 2),
+            'gpa': round(float(student_gpa[i]), 2),
+            'gpa_class': get_gpa_class(round(float(student_gpa[i]), 2)),
+            'z_score': _round([student_z[i]])[0],
+            'subjects_taken': int(sat[i].sum()),
+        }
+        for position, i in enumerate(order, start=1)
+    ]
+
+    all_scores = matrix[sat]
+    grade_counts = np.bincount(band_index[sat], minlength=len(scale.bands))
+    histogram, _ = np.histogram(all_scores, bins=HISTOGRAM_BINS)
+    return {
+        'class_stats': {
+            'total_students': len(rankings),
+            'total_results': int(sat.sum()),
+            'avg_class_score': round(float(all_scores.mean()), 2),
+            'std_dev': round(float(all_scores.std()), 2),
+            'median_score': round(float(np.median(all_scores)), 2),
+            'highest_score': int(all_scores.max()),
+            'lowest_score': int(all_scores.min()),
+            'pass_rate': round(float(passed.sum() / sat.sum() * 100), 2),
+        },
+        'grade_distribution': {
+            band.label: int(count) for band, count in zip(scale.bands, grade_counts)
+        },
+        'histogram': {
+            'bins': list(HISTOGRAM_BINS),
+            'counts': histogram.tolist(),
+        },
+        'subject_stats': subject_stats,
+        'correlations': {
+            'subjects': [name for _, name in subjects],
+            'matrix': _correlations(matrix),
+        },
+        'rankings': rankings,
+    }
+
+
+def get_class_analytics(student_class, session, term):
+    """
+    Cached analytics for a class and term, or None when it has no results.
+    """
+    class_id = getattr(student_class, 'pk', student_class)
+    session_id = getattr(session, 'pk', session)
+    term_id = getattr(term, 'pk', term)
+    analytics = cache.get(cache_key(class_id, session_id, term_id))
+    if analytics is None:
+        analytics = refresh(class_id, session_id, term_id)
+    return analytics or None
+
+
+def refresh(class_id, session_id, term_id, timeout=None):
+    """
+    Recompute and cache a class's analytics; ``timeout`` overrides
+    RESULT_ANALYTICS_TIMEOUT, e.g. to warm the cache for a whole school day.
+    """
+    with use_primary():
+        rows = _load(class_id, session_id, term_id)
+        scale = grading.get_scale(class_id)
+    analytics = compute_analytics(rows, scale, class_id) or {}
+    if timeout is None:
+        timeout = getattr(settings, 'RESULT_ANALYTICS_TIMEOUT', 600)
+    cache.set(cache_key(class_id, session_id, term_id), analytics, timeout)
+    return analytics
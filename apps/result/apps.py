@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class ResultConfig(AppConfig):
     name = "apps.result"
+
+    def ready(self):
+        # Import signals so receivers are registered
+        from . import signals  # noqa: F401
@@ -0,0 +1,127 @@
+"""
+Grade scales, cached in-process, and their SQL counterparts.
+
+Scales are read from GradeScale/GradeBand once and kept for
+GRADE_SCALE_CACHE_TIMEOUT seconds (or until a scale is edited in this
+process). ``score_grade``/``grade_to_points`` look bands up in that cache,
+and ``grade_case``/``points_case`` turn the same bands into ``Case/When``
+expressions so ``Result.objects.with_grades()`` can grade in SQL.
+"""
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.db.models import Case, FloatField, CharField, Q, Value, When
+
+Band = namedtuple('Band', 'min_score label points')
+Scale = namedtuple('Scale', 'name pass_mark bands')
+
+# Kenyan CBC bands, used until a default GradeScale is configured
+CBC_SCALE = Scale('CBC', 50, (
+    Band(80, 'Exceeding', 4.0),
+    Band(70, 'EE', 3.0),
+    Band(60, 'ME', 2.0),
+    Band(50, 'AE', 1.0),
+    Band(0, 'BE', 0.0),
+))
+
+_cache = {}
+
+
+def _load():
+    from .models import GradeScale
+
+    default = CBC_SCALE
+    by_class = {}
+    for grade_scale in GradeScale.objects.prefetch_related('bands', 'classes'):
+        scale = Scale(grade_scale.name, grade_scale.pass_mark, tuple(
+            Band(band.min_score, band.label, band.points)
+            for band in sorted(grade_scale.bands.all(), key=lambda b: -b.min_score)
+        ))
+        if not scale.bands:
+            continue
+        if grade_scale.is_default:
+            default = scale
+        for student_class in grade_scale.classes.all():
+            by_class[student_class.id] = scale
+    return default, by_class
+
+
+def _scales():
+    timeout = getattr(settings, 'GRADE_SCALE_CACHE_TIMEOUT', 300)
+    if not _cache or _cache['expires'] < time.monotonic():
+        default, by_class = _load()
+        _cache.update(default=default, by_class=by_class, expires=time.monotonic() + timeout)
+    return _cache['default'], _cache['by_class']
+
+
+def invalidate():
+    _cache.clear()
+
+
+def get_scale(class_id=None):
+    """The scale for a class (falling back to the default scale)"""
+    default, by_class = _scales()
+    return by_class.get(class_id, default)
+
+
+def score_grade(score, class_id=None):
+    try:
+        score = float(score)
+    except (TypeError, ValueError):
+        return ""
+    bands = get_scale(class_id).bands
+    for band in bands:
+        if score >= band.min_score:
+            return band.label
+    return bands[-1].label
+
+
+def grade_to_points(grade, class_id=None):
+    for band in get_scale(class_id).bands:
+        if band.label == grade:
+            return band.points
+    return 0.0
+
+
+def _case(attr, output_field, default, total):
+    default_scale, by_class = _scales()
+    overrides = {}
+    for class_id, scale in by_class.items():
+        if scale is not default_scale:
+            overrides.setdefault(scale, []).append(class_id)
+
+    whens = []
+    for scale, class_ids in overrides.items():
+        whens += [
+            When(Q(current_class_id__in=class_ids, **{f'{total}__gte': band.min_score}),
+                 then=Value(getattr(band, attr)))
+            for band in scale.bands
+        ]
+    whens += [
+        When(**{f'{total}__gte': band.min_score}, then=Value(getattr(band, attr)))
+        for band in default_scale.bands
+    ]
+    return Case(*whens, default=Value(default), output_field=output_field)
+
+
+def grade_case(total='total'):
+    """SQL grade label for an annotated ``total`` column"""
+    return _case('label', CharField(), '', total)
+
+
+def points_case(total='total'):
+    """SQL grade points for an annotated ``total`` column"""
+    return _case('points', FloatField(), 0.0, total)
+
+
+def pass_case(total='total'):
+    """1 when ``total`` reaches the pass mark of the row's scale, else 0"""
+    default_scale, by_class = _scales()
+    whens = [
+        When(Q(current_class_id=class_id, **{f'{total}__gte': scale.pass_mark}), then=Value(1))
+        for class_id, scale in by_class.items()
+        if scale.pass_mark != default_scale.pass_mark
+    ]
+    whens.append(When(**{f'{total}__gte': default_scale.pass_mark}, then=Value(1)))
+    return Case(*whens, default=Value(0))
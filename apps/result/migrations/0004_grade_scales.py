@@ -0,0 +1,61 @@
+# Generated by Django 5.2.7 on 2026-10-19 06:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+CBC_BANDS = [
+    ('Exceeding', 80, 4.0),
+    ('EE', 70, 3.0),
+    ('ME', 60, 2.0),
+    ('AE', 50, 1.0),
+    ('BE', 0, 0.0),
+]
+
+
+def create_cbc_scale(apps, schema_editor):
+    GradeScale = apps.get_model('result', 'GradeScale')
+    GradeBand = apps.get_model('result', 'GradeBand')
+    scale = GradeScale.objects.create(name='CBC', is_default=True, pass_mark=50)
+    GradeBand.objects.bulk_create([
+        GradeBand(scale=scale, label=label, min_score=min_score, points=points)
+        for label, min_score, points in CBC_BANDS
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('corecode', '0007_profile'),
+        ('result', '0003_result_device_id_result_last_modified_result_sync_id_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GradeScale',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('is_default', models.BooleanField(default=False)),
+                ('pass_mark', models.PositiveSmallIntegerField(default=50)),
+                ('classes', models.ManyToManyField(blank=True, help_text='Classes graded on this scale instead of the default', related_name='grade_scales', to='corecode.studentclass')),
+            ],
+            options={
+                'ordering': ['-is_default', 'name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='GradeBand',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('label', models.CharField(max_length=20)),
+                ('min_score', models.PositiveSmallIntegerField(help_text='Lowest total score in this band')),
+                ('points', models.FloatField(default=0)),
+                ('scale', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bands', to='result.gradescale')),
+            ],
+            options={
+                'ordering': ['scale', '-min_score'],
+                'unique_together': {('scale', 'min_score')},
+            },
+        ),
+        migrations.RunPython(create_cbc_scale, migrations.RunPython.noop),
+    ]
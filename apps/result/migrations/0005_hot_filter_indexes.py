@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-19 06:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('corecode', '0007_profile'),
+        ('result', '0004_grade_scales'),
+        ('students', '0004_student_device_id_student_last_modified_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['student', 'session', 'term'], name='result_student_term_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['current_class', 'session', 'term', 'subject'], name='result_class_subject_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['last_modified'], name='result_modified_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(condition=models.Q(('sync_status', 'synced'), _negated=True), fields=['sync_status'], name='result_pending_sync_idx'),
+        ),
+    ]
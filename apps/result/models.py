@@ -13,6 +13,64 @@ from apps.students.models import Student
 from .utils import score_grade
 
 
+class GradeScale(models.Model):
+    """
+    A set of grade bands. One scale is the default; others can be assigned
+    to specific classes to override it for those levels.
+    """
+
+    name = models.CharField(max_length=50, unique=True)
+    is_default = models.BooleanField(default=False)
+    pass_mark = models.PositiveSmallIntegerField(default=50)
+    classes = models.ManyToManyField(
+        StudentClass, blank=True, related_name="grade_scales",
+        help_text="Classes graded on this scale instead of the default",
+    )
+
+    class Meta:
+        ordering = ["-is_default", "name"]
+
+    def __str__(self):
+        return self.name
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        if self.is_default:
+            GradeScale.objects.exclude(pk=self.pk).filter(is_default=True).update(is_default=False)
+
+
+class GradeBand(models.Model):
+    scale = models.ForeignKey(GradeScale, on_delete=models.CASCADE, related_name="bands")
+    label = models.CharField(max_length=20)
+    min_score = models.PositiveSmallIntegerField(help_text="Lowest total score in this band")
+    points = models.FloatField(default=0)
+
+    class Meta:
+        ordering = ["scale", "-min_score"]
+        unique_together = ("scale", "min_score")
+
+    def __str__(self):
+        return f"{self.label} (≥{self.min_score})"
+
+
+class ResultQuerySet(models.QuerySet):
+    def with_grades(self):
+        """
+        Annotate ``total``, ``grade_label``, ``points`` and ``passed`` in SQL
+        using the cached grade scales, so distributions, GPA and pass rates
+        can be aggregated without loading Result objects.
+        """
+        from .grading import grade_case, pass_case, points_case
+
+        return self.annotate(
+            total=models.F("test_score") + models.F("exam_score")
+        ).annotate(
+            grade_label=grade_case(),
+            points=points_case(),
+            passed=pass_case(),
+        )
+
+
 # Create your models here.
 class Result(models.Model):
     student = models.ForeignKey(Student, on_delete=models.CASCADE)
@@ -35,8 +93,21 @@ class Result(models.Model):
     last_modified = models.DateTimeField(auto_now=True)
     device_id = models.CharField(max_length=100, blank=True, null=True)
 
+    objects = ResultQuerySet.as_manager()
+
     class Meta:
         ordering = ["subject"]
+        indexes = [
+            models.Index(fields=['student', 'session', 'term'], name='result_student_term_idx'),
+            models.Index(
+                fields=['current_class', 'session', 'term', 'subject'], name='result_class_subject_idx'
+            ),
+            models.Index(fields=['last_modified'], name='result_modified_idx'),
+            models.Index(
+                fields=['sync_status'], name='result_pending_sync_idx',
+                condition=~models.Q(sync_status='synced'),
+            ),
+        ]
 
     def save(self, *args, **kwargs):
         # Generate sync_id if it doesn't exist
@@ -64,12 +135,12 @@ class Result(models.Model):
         return (self.test_score or 0) + (self.exam_score or 0)
 
     def grade(self):
-        return score_grade(self.total_score())
+        return score_grade(self.total_score(), self.current_class_id)
     
     def grade_points(self):
-        """Return grade points for this result (CBC system)."""
+        """Return grade points for this result on its class's grade scale."""
         from .utils import grade_to_points
-        return grade_to_points(self.grade())
+        return grade_to_points(self.grade(), self.current_class_id)
     
     @staticmethod
     def get_student_gpa(student, session, term):
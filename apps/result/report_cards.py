@@ -0,0 +1,122 @@
+"""
+Report card context shared by the HTML, PDF, class sheet and SMS outputs.
+
+``build_report_card_contexts`` takes any number of students and assembles
+every card with a fixed set of queries: the term's results are prefetched
+onto the students, attendance and fees come from grouped aggregates, and
+class positions are ranked once per class.
+"""
+from django.db.models import Count, Prefetch, prefetch_related_objects
+
+from apps.finance.models import Invoice
+from attendance.models import AttendanceEntry
+
+from .models import Result
+from .utils import calculate_class_rankings, calculate_gpa, get_gpa_class
+
+
+def _attendance_counts(student_ids, session, term):
+    """(student_id, class_id) -> {status: count} for the term's registers"""
+    rows = (
+        AttendanceEntry.objects.filter(
+            student_id__in=student_ids,
+            register__session=session,
+            register__term=term,
+        )
+        .values_list('student_id', 'register__student_class_id', 'status')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    counts = {}
+    for student_id, class_id, status, count in rows:
+        counts.setdefault((student_id, class_id), {})[status] = count
+    return counts
+
+
+def _fee_balances(student_ids, session, term):
+    """student_id -> outstanding balance on the term's invoices"""
+    balances = {}
+    invoices = (
+        Invoice.objects.filter(student_id__in=student_ids, session=session, term=term)
+        .with_totals()
+        .values_list('student_id', 'due')
+    )
+    for student_id, due in invoices:
+        balances[student_id] = balances.get(student_id, 0.0) + max(float(due), 0.0)
+    return balances
+
+
+def build_report_card_contexts(students, session, term, with_fees=True, with_positions=True):
+    """
+    Return one report card context per student, in the order given.
+
+    ``students`` may be a queryset or a list; results for the term are
+    prefetched onto each student as ``term_results``.
+    """
+    students = list(students)
+    if not students:
+        return []
+    student_ids = [student.id for student in students]
+
+    prefetch_related_objects(students, 'current_class', Prefetch(
+        'result_set',
+        queryset=Result.objects.filter(session=session, term=term)
+        .select_related('subject', 'current_class')
+        .order_by('subject__name'),
+        to_attr='term_results',
+    ))
+    attendance = _attendance_counts(student_ids, session, term)
+    fees = _fee_balances(student_ids, session, term) if with_fees else {}
+
+    rankings = {}
+    contexts = []
+    for student in students:
+        results = student.term_results
+        current_class = results[0].current_class if results else student.current_class
+        class_id = current_class.id if current_class else None
+
+        counts = attendance.get((student.id, class_id), {})
+        present = counts.get(AttendanceEntry.STATUS_PRESENT, 0)
+        absent = counts.get(AttendanceEntry.STATUS_ABSENT, 0)
+        late = counts.get(AttendanceEntry.STATUS_LATE, 0)
+        total_att = present + absent + late
+
+        avg = sum(r.total_score() for r in results) / len(results) if results else 0
+        gpa = calculate_gpa(results)
+
+        context = {
+            'student': student,
+            'current_class': current_class,
+            'session': session,
+            'term': term,
+            'results': results,
+            'average_total': round(avg, 2),
+            'attendance': {
+                'present': present,
+                'absent': absent,
+                'late': late,
+                'percent': round((present / total_att) * 100, 1) if total_att else 0,
+            },
+            'teacher_comment': next((r.teacher_comment for r in results if r.teacher_comment), ""),
+            'headteacher_comment': next(
+                (r.headteacher_comment for r in results if r.headteacher_comment), ""
+            ),
+            'gpa': gpa,
+            'gpa_class': get_gpa_class(gpa),
+        }
+        if with_fees:
+            context['fee_balance'] = round(fees.get(student.id, 0.0), 2)
+        if with_positions:
+            # Positions rank students within their current class
+            if student.current_class_id and student.current_class_id not in rankings:
+                rankings[student.current_class_id] = calculate_class_rankings(
+                    student.current_class_id, session, term
+                )
+            context['position_data'] = rankings.get(student.current_class_id, {}).get(student.id)
+        contexts.append(context)
+    return contexts
+
+
+def build_report_card_context(student, session, term, **options):
+    """Report card context for a single student"""
+    return build_report_card_contexts([student], session, term, **options)[0]
@@ -0,0 +1,21 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from . import analytics, grading
+from .models import GradeBand, GradeScale, Result
+
+
+@receiver(post_save, sender=GradeScale, dispatch_uid='grading-scale-save')
+@receiver(post_delete, sender=GradeScale, dispatch_uid='grading-scale-delete')
+@receiver(post_save, sender=GradeBand, dispatch_uid='grading-band-save')
+@receiver(post_delete, sender=GradeBand, dispatch_uid='grading-band-delete')
+@receiver(m2m_changed, sender=GradeScale.classes.through, dispatch_uid='grading-scale-classes')
+def invalidate_grade_scales(sender, **kwargs):
+    grading.invalidate()
+    analytics.invalidate_all()
+
+
+@receiver(post_save, sender=Result, dispatch_uid='analytics-result-save')
+@receiver(post_delete, sender=Result, dispatch_uid='analytics-result-delete')
+def invalidate_class_analytics(sender, instance, **kwargs):
+    analytics.invalidate(instance.current_class_id, instance.session_id, instance.term_id)
@@ -1,6 +1,10 @@
 import logging
 from django.conf import settings
-import africastalking
+
+from apps.corecode.instrumentation import timed
+from apps.corecode.lazy import lazy_import
+
+africastalking = lazy_import('africastalking')
 
 logger = logging.getLogger(__name__)
 
@@ -43,11 +47,12 @@ class AfricasTalkingSMS:
                 }
             
             # Send SMS
-            response = self.sms.send(
-                message=message,
-                recipients=[formatted_phone],
-                sender_id=self.sender_id
-            )
+            with timed('sms'):
+                response = self.sms.send(
+                    message=message,
+                    recipients=[formatted_phone],
+                    sender_id=self.sender_id
+                )
             
             logger.info(f"SMS sent to {formatted_phone}: {response}")
             
@@ -154,14 +159,15 @@ def format_result_message(student, results, session, term):
     
     Args:
         student: Student object
-        results: QuerySet of Result objects
+        results: List (or QuerySet) of Result objects
         session: AcademicSession object
         term: AcademicTerm object
         
     Returns:
         str: Formatted SMS message
     """
-    if not results.exists():
+    results = list(results)
+    if not results:
         return None
     
     # Header
@@ -172,7 +178,7 @@ def format_result_message(student, results, session, term):
     # Calculate totals
     total_score = 0
     max_score = 0
-    subject_count = results.count()
+    subject_count = len(results)
     
     # Add subject results (compact format for SMS)
     subject_lines = []
@@ -198,7 +204,7 @@ def format_result_message(student, results, session, term):
         message += f"Overall: {percentage}% ({overall_grade})\n"
     
     # Add comment if available
-    first_result = results.first()
+    first_result = results[0]
     if first_result.teacher_comment:
         comment = first_result.teacher_comment[:50]  # Limit comment length
         message += f"\n{comment}"
@@ -254,16 +260,13 @@ def send_result_sms(student, session, term):
     Returns:
         dict: {'success': bool, 'message': str}
     """
-    from .models import Result
-    
-    # Get student results
-    results = Result.objects.filter(
-        student=student,
-        session=session,
-        term=term
-    ).select_related('subject')
+    from .report_cards import build_report_card_context
+
+    results = build_report_card_context(
+        student, session, term, with_fees=False, with_positions=False
+    )['results']
     
-    if not results.exists():
+    if not results:
         return {
             'success': False,
             'message': f'No results found for {student.get_short_name()}'
@@ -294,7 +297,7 @@ def send_result_sms(student, session, term):
     return result
 
 
-def send_bulk_result_sms(students, session, term):
+def send_bulk_result_sms(students, session, term, progress=None):
     """
     Send result SMS to multiple students.
     
@@ -302,24 +305,25 @@ def send_bulk_result_sms(students, session, term):
         students: QuerySet of Student objects
         session: AcademicSession object
         term: AcademicTerm object
+        progress: optional callable(sent_so_far, total) called after each SMS
         
     Returns:
         dict: {'success': bool, 'sent': int, 'failed': int, 'details': list}
     """
-    from .models import Result
+    from .report_cards import build_report_card_contexts
     
     recipients = []
     details = []
     
-    for student in students:
-        # Get results
-        results = Result.objects.filter(
-            student=student,
-            session=session,
-            term=term
-        ).select_related('subject')
+    # Every student's results in one prefetch instead of a query each
+    contexts = build_report_card_contexts(
+        students, session, term, with_fees=False, with_positions=False
+    )
+    for context in contexts:
+        student = context['student']
+        results = context['results']
         
-        if not results.exists():
+        if not results:
             details.append({
                 'student': student.get_short_name(),
                 'success': False,
@@ -360,7 +364,7 @@ def send_bulk_result_sms(students, session, term):
         return {
             'success': False,
             'sent': 0,
-            'failed': len(students),
+            'failed': len(contexts),
             'details': details
         }
     
@@ -369,8 +373,10 @@ def send_bulk_result_sms(students, session, term):
     sent_count = 0
     failed_count = 0
     
-    for recipient in recipients:
+    for done, recipient in enumerate(recipients, start=1):
         result = sms_client.send_sms(recipient['phone'], recipient['message'])
+        if progress is not None:
+            progress(done, len(recipients))
         
         if result['success']:
             sent_count += 1
@@ -0,0 +1,102 @@
+import logging
+import zipfile
+from io import BytesIO
+
+from apps.corecode.models import AcademicSession, AcademicTerm, StudentClass
+from apps.jobs.queue import task
+from apps.students.models import Student
+
+from .models import Result
+from .report_cards import build_report_card_contexts
+
+logger = logging.getLogger(__name__)
+
+
+# Chromium is memory hungry: one class at a time per worker pool
+@task('result.class_report_cards', queue='reports', priority=10, concurrency=1, replica=True)
+def class_report_cards(job, class_id, session_id, term_id):
+    from .views import render_pdf
+
+    student_class = StudentClass.objects.get(pk=class_id)
+    session = AcademicSession.objects.get(pk=session_id)
+    term = AcademicTerm.objects.get(pk=term_id)
+    students = Student.objects.filter(current_class=student_class, current_status='active')
+
+    contexts = build_report_card_contexts(students, session, term)
+    pdf_buffers, errors = [], []
+    for done, context in enumerate(contexts, start=1):
+        context['pdf_mode'] = True
+        content = render_pdf('result/report_card_pdf.html', context)
+        if content:
+            pdf_buffers.append((context['student'], content))
+        else:
+            logger.warning(f"Failed to generate PDF for student {context['student'].id}, skipping...")
+            errors.append(f"{context['student'].get_short_name()}: PDF could not be generated")
+        job.report_progress(done, len(contexts), f"Rendered {done} of {len(contexts)} report cards")
+
+    basename = f"class_report_cards_{student_class.name}_{session}_{term}".replace(' ', '_')
+    # Merge PDFs into a single file (simple concatenation via PyPDF2 if available)
+    try:
+        from PyPDF2 import PdfMerger
+        merger = PdfMerger()
+        for _, content in pdf_buffers:
+            merger.append(BytesIO(content))
+        out = BytesIO()
+        merger.write(out)
+        merger.close()
+        filename = f"{basename}.pdf"
+    except Exception:
+        # Fallback: zip files
+        out = BytesIO()
+        with zipfile.ZipFile(out, 'w', zipfile.ZIP_DEFLATED) as zf:
+            for idx, (stu, content) in enumerate(pdf_buffers, start=1):
+                zf.writestr(f"{stu.registration_number or idx}_{stu.surname}.pdf", content)
+        filename = f"{basename}.zip"
+
+    job.save_artifact(filename, out.getvalue())
+    job.report_progress(100, message=f"{len(pdf_buffers)} report card(s) ready")
+    return {'report_cards': len(pdf_buffers), 'errors': errors}
+
+
+# Not retried: a second attempt would text parents who already got the first
+@task('result.send_result_sms', queue='sms', priority=5, concurrency=1)
+def send_result_sms(job, student_ids, session_id, term_id):
+    from .sms import send_bulk_result_sms
+
+    session = AcademicSession.objects.get(pk=session_id)
+    term = AcademicTerm.objects.get(pk=term_id)
+    students = Student.objects.filter(pk__in=student_ids)
+
+    result = send_bulk_result_sms(
+        students, session, term,
+        progress=lambda done, total: job.report_progress(done, total, f"Sent {done} of {total}"),
+    )
+    job.report_progress(100, message=f"SMS sent to {result['sent']} student(s). {result['failed']} failed.")
+    return {
+        'sent': result['sent'],
+        'failed': result['failed'],
+        'errors': [
+            f"{detail['student']}: {detail['error']}" for detail in result['details'] if not detail['success']
+        ],
+    }
+
+
+@task('result.warm_analytics', queue='maintenance', replica=True)
+def warm_analytics(job, timeout=None):
+    """
+    Compute the current term's class analytics before school starts. Only
+    useful with a cache shared between processes (REDIS_URL); result
+    writes still invalidate entries as usual.
+    """
+    from . import analytics
+
+    session = AcademicSession.objects.get(current=True)
+    term = AcademicTerm.objects.get(current=True)
+    class_ids = list(
+        Result.objects.filter(session=session, term=term)
+        .values_list('current_class_id', flat=True).distinct().order_by()
+    )
+    for done, class_id in enumerate(class_ids, start=1):
+        analytics.refresh(class_id, session.pk, term.pk, timeout=timeout)
+        job.report_progress(done, len(class_ids), f"Warmed {done} of {len(class_ids)} classes")
+    return {'classes': len(class_ids)}
@@ -1,3 +1,306 @@
-from django.test import TestCase
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from apps.corecode import replicas
+from apps.corecode.models import AcademicSession, AcademicTerm, StudentClass, Subject
+from apps.jobs.models import Job
+from apps.jobs.queue import enqueue
+from apps.students.models import Student
+
+from . import analytics as class_analytics
+from . import grading, utils_pdf
+from .analytics import get_class_analytics
+from .models import GradeBand, GradeScale, Result
+from .report_cards import build_report_card_contexts
+from .trends import class_trends, compute_trends, student_trend
+from .utils import calculate_class_rankings, grade_distribution
+
+
+class PerformanceTrendTest(TestCase):
+    def test_compute_trends_matches_term_averages(self):
+        rows = [
+            (1, "2023", "Term 1", 30, 40, 3.0),
+            (1, "2023", "Term 1", 20, 30, 1.0),
+            (2, "2023", "Term 1", 40, 50, 4.0),
+            (1, "2023", "Term 2", 35, 45, 4.0),
+            (1, "2024", "Term 1", 39, 50, 4.0),
+        ]
+        periods, class_average, trends = compute_trends(rows)
+
+        self.assertEqual(len(periods), 3)
+        self.assertEqual(class_average, [75.0, 80.0, 89.0])
+        trend = trends[1]
+        self.assertEqual(trend["totals"], [60.0, 80.0, 89.0])
+        # (EE 3.0 + AE 1.0) / 2, then Exceeding twice
+        self.assertEqual(trend["gpas"], [2.0, 4.0, 4.0])
+        self.assertEqual(trend["insights"]["trend"], "up")
+        self.assertEqual(trend["insights"]["streak"], 2)
+        self.assertEqual(trend["insights"]["best"]["label"], "2024 Term 1")
+        self.assertEqual(trends[2]["labels"], ["2023 Term 1"])
+
+    def test_class_trend_is_one_query(self):
+        grading.get_scale()  # grade scales are cached per process
+        session = AcademicSession.objects.get(current=True)
+        term = AcademicTerm.objects.get(current=True)
+        student_class = StudentClass.objects.create(name="Grade 6")
+        subject = Subject.objects.get_or_create(name="Maths")[0]
+        students = [
+            Student.objects.create(
+                registration_number=f"T{i}", surname="Pupil", firstname=str(i),
+                current_class=student_class,
+            )
+            for i in range(10)
+        ]
+        Result.objects.bulk_create([
+            Result(
+                student=student, session=session, term=term, current_class=student_class,
+                subject=subject, test_score=20 + i, exam_score=40,
+            )
+            for i, student in enumerate(students)
+        ])
+
+        with self.assertNumQueries(1):
+            trends = class_trends(student_class)
+        self.assertEqual(len(trends["students"]), 10)
+        self.assertEqual(trends["class_average"], [64.5])
+        with self.assertNumQueries(1):
+            self.assertEqual(student_trend(students[3])["totals"], [63.0])
+
+
+class ReportCardContextTest(TestCase):
+    def setUp(self):
+        self.session = AcademicSession.objects.get(current=True)
+        self.term = AcademicTerm.objects.get(current=True)
+        self.student_class = StudentClass.objects.create(name="Grade 7")
+        self.subjects = [Subject.objects.get_or_create(name=name)[0] for name in ("Maths", "Science")]
+        grading.get_scale()
+
+    def add_students(self, count):
+        for i in range(count):
+            student = Student.objects.create(
+                registration_number=f"RC{Student.objects.count()}", surname="Pupil",
+                firstname=str(i), current_class=self.student_class,
+            )
+            for subject in self.subjects:
+                Result.objects.create(
+                    student=student, session=self.session, term=self.term,
+                    current_class=self.student_class, subject=subject,
+                    test_score=30, exam_score=40 + i,
+                )
+
+    def build(self):
+        return build_report_card_contexts(
+            Student.objects.filter(current_class=self.student_class), self.session, self.term
+        )
+
+    def test_query_count_is_independent_of_class_size(self):
+        self.add_students(2)
+        with self.assertNumQueries(6):
+            self.build()
+        self.add_students(8)
+        with self.assertNumQueries(6):
+            contexts = self.build()
+
+        self.assertEqual(len(contexts), 10)
+        top = max(contexts, key=lambda c: c["average_total"])
+        self.assertEqual(top["position_data"]["position"], 1)
+        self.assertEqual(top["position_data"]["total_students"], 10)
+        self.assertEqual(len(top["results"]), 2)
+        self.assertEqual(top["fee_balance"], 0)
+
+    def test_result_list_pages_by_total(self):
+        self.add_students(5)
+        self.client.force_login(get_user_model().objects.create_user("results-clerk", password="pw"))
+        params = {
+            "columns[0][data]": "student", "columns[1][data]": "total_total",
+            "order[0][column]": 1, "order[0][dir]": "desc", "length": 2,
+        }
+        url = reverse("view-results-data")
+        first = self.client.get(url, params, secure=True).json()
+        self.assertEqual(first["recordsTotal"], 5)
+        self.assertEqual([row["total_total"] for row in first["data"]], [148, 146])
+        self.assertEqual(
+            [(s["subject"], s["total"]) for s in first["data"][0]["subjects"]], [("Maths", 74), ("Science", 74)]
+        )
+
+        # The next page is read after the last total (a HAVING clause)
+        second = self.client.get(url, {**params, "start": 2, "cursor": first["next"]}, secure=True).json()
+        self.assertEqual([row["student"] for row in second["data"]], ["Pupil 2", "Pupil 1"])
+
+
+    @mock.patch("apps.result.views.render_pdf", return_value=b"%PDF-stub")
+    def test_class_report_cards_job(self, render_pdf):
+        self.add_students(3)
+        with tempfile.TemporaryDirectory() as media, override_settings(MEDIA_ROOT=media, JOBS_EAGER=True):
+            job = enqueue(
+                "result.class_report_cards",
+                {"class_id": self.student_class.pk, "session_id": self.session.pk, "term_id": self.term.pk},
+            )
+            job.refresh_from_db()
+            self.assertEqual(job.status, Job.SUCCEEDED, job.error)
+            self.assertEqual(job.result, {"report_cards": 3, "errors": []})
+            self.assertTrue(job.artifact.name)
+        self.assertEqual(render_pdf.call_count, 3)
+        self.assertEqual(render_pdf.call_args.args[0], "result/report_card_pdf.html")
+
+
+class GradeScaleTest(TestCase):
+    def setUp(self):
+        self.session = AcademicSession.objects.get(current=True)
+        self.term = AcademicTerm.objects.get(current=True)
+        self.junior = StudentClass.objects.create(name="Grade 1")
+        self.senior = StudentClass.objects.create(name="Grade 8")
+        subject = Subject.objects.get_or_create(name="Maths")[0]
+        for i, (student_class, total) in enumerate([
+            (self.junior, 45), (self.junior, 85), (self.senior, 45), (self.senior, 72),
+        ]):
+            student = Student.objects.create(
+                registration_number=f"G{i}", surname="Pupil", firstname=str(i),
+                current_class=student_class,
+            )
+            Result.objects.create(
+                student=student, session=self.session, term=self.term,
+                current_class=student_class, subject=subject,
+                test_score=total - 40, exam_score=40,
+            )
+
+    def test_default_scale_is_seeded_cbc(self):
+        self.assertEqual(grading.get_scale().name, "CBC")
+        self.assertEqual(grading.score_grade(85), "Exceeding")
+        self.assertEqual(grading.grade_to_points("ME"), 2.0)
+
+    def test_class_override_in_python_and_sql(self):
+        scale = GradeScale.objects.create(name="Lower primary", pass_mark=40)
+        GradeBand.objects.create(scale=scale, label="Good", min_score=40, points=2)
+        GradeBand.objects.create(scale=scale, label="Try", min_score=0, points=0)
+        scale.classes.add(self.junior)
+
+        results = Result.objects.filter(session=self.session, term=self.term).with_grades()
+        for result in results:
+            self.assertEqual(result.grade_label, result.grade())
+            self.assertEqual(result.points, result.grade_points())
+
+        self.assertEqual(
+            grade_distribution(Result.objects.filter(current_class=self.junior)), {"Good": 2}
+        )
+        self.assertEqual(
+            grade_distribution(Result.objects.filter(current_class=self.senior)),
+            {"BE": 1, "EE": 1},
+        )
+        # 45 passes on the junior scale (pass mark 40) but not the default (50)
+        self.assertEqual(results.filter(passed=1).count(), 3)
+
+
+class ClassAnalyticsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        grading.get_scale()
+        self.session = AcademicSession.objects.get(current=True)
+        self.term = AcademicTerm.objects.get(current=True)
+        self.student_class = StudentClass.objects.create(name="Grade 6")
+        maths, english = (Subject.objects.get_or_create(name=name)[0] for name in ("Maths", "English"))
+        # (maths, english) totals; the last student skipped English
+        scores = [(90, 80), (70, 60), (50, 40), (30, None)]
+        for i, (maths_total, english_total) in enumerate(scores):
+            student = Student.objects.create(
+                registration_number=f"A{i}", surname="Pupil", firstname=str(i),
+                current_class=self.student_class,
+            )
+            for subject, total in ((maths, maths_total), (english, english_total)):
+                if total is not None:
+                    Result.objects.create(
+                        student=student, session=self.session, term=self.term,
+                        current_class=self.student_class, subject=subject,
+                        test_score=total - 30, exam_score=30,
+                    )
+        self.first = Student.objects.get(registration_number="A0")
+
+    def test_matrix_statistics_from_one_query(self):
+        with self.assertNumQueries(1):
+            analytics = get_class_analytics(self.student_class, self.session, self.term)
+        subjects = {s['subject']: s for s in analytics['subject_stats']}
+        self.assertEqual(subjects["Maths"]['average'], 60)
+        self.assertEqual(subjects["Maths"]['std_dev'], 22.36)
+        self.assertEqual(subjects["Maths"]['percentiles'][50], 60)
+        self.assertEqual(subjects["Maths"]['pass_rate'], 75)
+        self.assertEqual(subjects["English"]['total_students'], 3)
+        self.assertEqual(analytics['correlations']['matrix'][0][1], 1.0)
+        self.assertEqual(analytics['grade_distribution']['Exceeding'], 2)
+        self.assertEqual(
+            [r['registration_number'] for r in analytics['rankings']], ["A0", "A1", "A2", "A3"]
+        )
+        self.assertEqual(analytics['rankings'][0]['gpa'], 4.0)
+        self.assertEqual(analytics['class_stats']['total_results'], 7)
+
+    def test_cached_until_a_result_changes(self):
+        get_class_analytics(self.student_class, self.session, self.term)
+        with self.assertNumQueries(0):
+            get_class_analytics(self.student_class, self.session, self.term)
+
+        Result.objects.filter(student=self.first).delete()
+        analytics = get_class_analytics(self.student_class, self.session, self.term)
+        self.assertEqual(analytics['rankings'][0]['registration_number'], "A1")
+
+    def test_equal_averages_are_ranked_by_name_in_both_rankings(self):
+        maths, english = (Subject.objects.get(name=name) for name in ("Maths", "English"))
+        # Created in the opposite order to their names
+        for surname, reg in (("Zulu", "Z1"), ("Adams", "Z2")):
+            student = Student.objects.create(
+                registration_number=reg, surname=surname, firstname="Tie", current_class=self.student_class,
+            )
+            for subject in (maths, english):
+                Result.objects.create(
+                    student=student, session=self.session, term=self.term,
+                    current_class=self.student_class, subject=subject, test_score=30, exam_score=30,
+                )
+
+        analytics = get_class_analytics(self.student_class, self.session, self.term)
+        self.assertEqual(
+            [(r['registration_number'], r['position']) for r in analytics['rankings']][2:4], [("Z2", 3), ("Z1", 4)]
+        )
+        positions = calculate_class_rankings(self.student_class, self.session, self.term)
+        self.assertEqual(
+            {r['registration_number']: positions[r['student_id']]['position'] for r in analytics['rankings']},
+            {r['registration_number']: r['position'] for r in analytics['rankings']},
+        )
+
+    def test_analytics_are_computed_from_the_primary(self):
+        aliases, real_load = [], class_analytics._load
+
+        def load(*args):
+            aliases.append(replicas.read_alias())
+            return real_load(*args)
+
+        with self.settings(REPLICA_MAX_LAG_SECONDS=0), \
+                mock.patch.object(replicas, "replica_alias", return_value="reports"), \
+                mock.patch.object(class_analytics, "_load", side_effect=load), \
+                replicas.use_replica():
+            self.assertEqual(replicas.read_alias(), "reports")
+            get_class_analytics(self.student_class, self.session, self.term)
+        self.assertEqual(aliases, ["default"])
+
+
+class PdfRendererTest(TestCase):
+    @mock.patch.object(utils_pdf, "ensure_chromium")
+    @mock.patch.object(utils_pdf, "playwright")
+    def test_driver_is_stopped_when_the_browser_fails_to_start(self, playwright, ensure_chromium):
+        driver = playwright.sync_playwright.return_value.start.return_value
+        driver.chromium.launch.side_effect = RuntimeError("no browser")
+        with self.assertRaises(RuntimeError):
+            with utils_pdf.PdfRenderer():
+                pass
+        driver.stop.assert_called_once_with()
+
+        driver.chromium.launch.side_effect = None
+        browser = driver.chromium.launch.return_value
+        browser.new_page.side_effect = RuntimeError("no page")
+        with self.assertRaises(RuntimeError):
+            with utils_pdf.PdfRenderer():
+                pass
+        browser.close.assert_called_once_with()
+        self.assertEqual(driver.stop.call_count, 2)
@@ -0,0 +1,149 @@
+"""
+Performance trends computed from one query per student or per class.
+
+Results are loaded as flat (student, session, term, CA, exam, points) rows,
+with grade points worked out in SQL from the grade scale, and reduced with
+NumPy: per-term averages and GPA are ``bincount`` sums over a
+(student, term) group index, and best/worst term and the current streak
+come from vector ops on each student's series.
+"""
+from apps.corecode.lazy import lazy_import
+
+from .models import Result
+
+np = lazy_import('numpy')
+
+
+def _load(filters, subject=None):
+    results = Result.objects.filter(**filters)
+    if subject is not None:
+        results = results.filter(subject=subject)
+    return list(
+        results.with_grades()
+        .order_by('session__name', 'term__name')
+        .values_list(
+            'student_id', 'session__name', 'term__name', 'test_score', 'exam_score', 'points'
+        )
+    )
+
+
+def empty_trend():
+    return {
+        'labels': [],
+        'periods': [],
+        'totals': [],
+        'ca_averages': [],
+        'exam_averages': [],
+        'gpas': [],
+        'counts': [],
+        'insights': {
+            'overall_average': 0.0,
+            'best': None,
+            'worst': None,
+            'trend': 'flat',
+            'streak': 0,
+        },
+    }
+
+
+def _insights(labels, totals):
+    insights = empty_trend()['insights']
+    if not len(totals):
+        return insights
+    best, worst = int(np.argmax(totals)), int(np.argmin(totals))
+    insights['overall_average'] = round(float(totals.mean()), 2)
+    insights['best'] = {'label': labels[best], 'value': round(float(totals[best]), 2)}
+    insights['worst'] = {'label': labels[worst], 'value': round(float(totals[worst]), 2)}
+
+    if len(totals) >= 2:
+        # Direction of each term-on-term change, latest last
+        signs = np.sign(np.diff(np.round(totals, 2)))
+        direction = signs[-1]
+        insights['trend'] = {1: 'up', -1: 'down'}.get(int(direction), 'flat')
+        if direction:
+            broken = np.flatnonzero(signs[::-1] != direction)
+            insights['streak'] = int(broken[0]) if len(broken) else len(signs)
+    return insights
+
+
+def compute_trends(rows):
+    """
+    Reduce result rows to a trend per student.
+
+    ``rows`` are (student_id, session name, term name, CA, exam, grade
+    points) tuples
+    ordered by session and term. Returns ``(periods, period_averages,
+    {student_id: trend})`` where ``periods`` lists every (session, term)
+    seen across all students and ``period_averages`` is the mean of the
+    students' term averages for each of them.
+    """
+    if not rows:
+        return [], [], {}
+    student_ids, sessions, terms, ca, exam, points = zip(*rows)
+
+    periods = list(dict.fromkeys(zip(sessions, terms)))
+    period_index = {period: i for i, period in enumerate(periods)}
+    students = list(dict.fromkeys(student_ids))
+    student_index = {student_id: i for i, student_id in enumerate(students)}
+
+    ca = np.array(ca, dtype=float)
+    exam = np.array(exam, dtype=float)
+    total = ca + exam
+    points = np.array(points, dtype=float)
+
+    # One bucket per (student, period)
+    n_periods = len(periods)
+    size = len(students) * n_periods
+    group = (
+        np.array([student_index[s] for s in student_ids]) * n_periods
+        + np.array([period_index[p] for p in zip(sessions, terms)])
+    )
+    counts = np.bincount(group, minlength=size)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        averages = {
+            name: (np.bincount(group, weights=values, minlength=size) / counts).reshape(-1, n_periods)
+            for name, values in (('ca', ca), ('exam', exam), ('total', total), ('gpa', points))
+        }
+    counts = counts.reshape(-1, n_periods)
+
+    labels = [f"{session} {term}" for session, term in periods]
+    trends = {}
+    for i, student_id in enumerate(students):
+        present = counts[i] > 0
+        student_labels = [label for label, seen in zip(labels, present) if seen]
+        totals = averages['total'][i][present]
+        trends[student_id] = {
+            'labels': student_labels,
+            'periods': [period for period, seen in zip(periods, present) if seen],
+            'totals': np.round(totals, 2).tolist(),
+            'ca_averages': np.round(averages['ca'][i][present], 2).tolist(),
+            'exam_averages': np.round(averages['exam'][i][present], 2).tolist(),
+            'gpas': np.round(averages['gpa'][i][present], 2).tolist(),
+            'counts': counts[i][present].tolist(),
+            'insights': _insights(student_labels, totals),
+        }
+    period_averages = np.nanmean(
+        np.where(counts > 0, averages['total'], np.nan), axis=0
+    )
+    return periods, np.round(period_averages, 2).tolist(), trends
+
+
+def student_trend(student, subject=None):
+    """Trend for one student from a single query."""
+    _, _, trends = compute_trends(_load({'student': student}, subject))
+    return trends.get(student.id, empty_trend())
+
+
+def class_trends(student_class, subject=None):
+    """
+    Trends for every student with results in ``student_class``, plus the
+    class average per term, from a single query.
+    """
+    periods, class_average, trends = compute_trends(
+        _load({'current_class': student_class}, subject)
+    )
+    return {
+        'labels': [f"{session} {term}" for session, term in periods],
+        'class_average': class_average,
+        'students': trends,
+    }
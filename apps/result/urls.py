@@ -1,10 +1,12 @@
 from django.urls import path
 
 from .views import (
+    ResultListData,
     ResultListView,
     create_result,
     edit_results,
     student_performance,
+    class_performance_trend,
     report_card,
     class_report_sheet,
     report_card_pdf,
@@ -16,6 +18,7 @@ from .views import (
 )
 from .views_analytics import (
     analytics_dashboard,
+    analytics_data,
     bulk_upload_results,
     download_bulk_template,
 )
@@ -25,13 +28,16 @@ urlpatterns = [
     path("edit-results/", edit_results, name="edit-results"),
     path("access/", results_access, name="results-access"),
     path("view/all", ResultListView.as_view(), name="view-results"),
+    path("view/all/data/", ResultListData.as_view(), name="view-results-data"),
     path("performance/", student_performance, name="student-performance"),
+    path("performance/class/<int:class_id>/", class_performance_trend, name="class-performance-trend"),
     path("report-card/<int:student_id>/", report_card, name="report-card"),
     path("report-card/<int:student_id>/pdf/", report_card_pdf, name="report-card-pdf"),
     path("class-sheet/<int:class_id>/", class_report_sheet, name="class-report-sheet"),
     path("class-report/<int:class_id>/pdf/", class_report_cards_pdf, name="class-report-pdf"),
     # Analytics and bulk upload URLs
     path("analytics/", analytics_dashboard, name="analytics-dashboard"),
+    path("analytics/<int:class_id>/data/", analytics_data, name="analytics-data"),
     path("bulk-upload/", bulk_upload_results, name="bulk-upload-results"),
     path("bulk-upload/template/", download_bulk_template, name="bulk-template"),
     # SMS notification URLs
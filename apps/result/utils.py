@@ -1,34 +1,15 @@
-def score_grade(score):
-    """Return custom grade labels based on total score out of 100.
-    Kenyan CBC grading: Exceeding, EE, ME, AE, BE.
+def score_grade(score, class_id=None):
+    """Return the grade label for a total score out of 100.
+    Bands come from the class's (or the default) grade scale; see grading.py.
     """
-    try:
-        s = float(score)
-    except Exception:
-        return ""
-    if s >= 80:
-        return "Exceeding"
-    if 70 <= s < 80:
-        return "EE"
-    if 60 <= s < 70:
-        return "ME"
-    if 50 <= s < 60:
-        return "AE"
-    return "BE"
-
-
-def grade_to_points(grade):
-    """Convert CBC grade to grade points for GPA calculation.
-    Based on Kenyan CBC system.
-    """
-    grade_points = {
-        "Exceeding": 4.0,
-        "EE": 3.0,
-        "ME": 2.0,
-        "AE": 1.0,
-        "BE": 0.0,
-    }
-    return grade_points.get(grade, 0.0)
+    from .grading import score_grade as scale_grade
+    return scale_grade(score, class_id)
+
+
+def grade_to_points(grade, class_id=None):
+    """Convert a grade label to grade points for GPA calculation."""
+    from .grading import grade_to_points as scale_points
+    return scale_points(grade, class_id)
 
 
 def calculate_gpa(results):
@@ -39,7 +20,7 @@ def calculate_gpa(results):
     if not results:
         return 0.0
     
-    total_points = sum(grade_to_points(r.grade()) for r in results)
+    total_points = sum(r.grade_points() for r in results)
     return round(total_points / len(results), 2)
 
 
@@ -57,42 +38,47 @@ def get_gpa_class(gpa):
         return "Needs Improvement"
 
 
+def ranking_key(avg_score, surname, firstname, student_id):
+    """
+    Sort key for class positions: highest average first, ties by name and
+    then id, so equal averages keep the same order between requests.
+    """
+    return (-avg_score, surname or '', firstname or '', student_id)
+
+
 def calculate_class_rankings(student_class, session, term):
     """
     Calculate student rankings for a given class, session, and term.
     Returns a dictionary mapping student_id to position.
     """
-    from apps.students.models import Student
+    from django.db.models import Avg, Count, Sum
     from .models import Result
-    
-    students = Student.objects.filter(current_class=student_class)
-    rankings = []
-    
-    for student in students:
-        results = Result.objects.filter(
-            student=student,
+
+    # Totals and grade points are computed and averaged in SQL
+    rankings = list(
+        Result.objects.filter(
             current_class=student_class,
             session=session,
-            term=term
+            term=term,
+            student__current_class=student_class,
         )
-        
-        if results.exists():
-            # Calculate average score
-            total_score = sum(r.total_score() for r in results)
-            avg_score = total_score / results.count()
-            gpa = calculate_gpa(results)
-            
-            rankings.append({
-                'student_id': student.id,
-                'student': student,
-                'avg_score': avg_score,
-                'gpa': gpa,
-                'total_score': total_score,
-                'subject_count': results.count()
-            })
+        .with_grades()
+        .values('student_id', 'student__surname', 'student__firstname')
+        .annotate(
+            avg_score=Avg('total'),
+            gpa_points=Avg('points'),
+            total_score=Sum('total'),
+            subject_count=Count('id'),
+        )
+        .order_by()
+    )
+    for rank in rankings:
+        rank['gpa'] = round(rank['gpa_points'] or 0, 2)
     
     # Sort by average score (descending)
-    rankings.sort(key=lambda x: x['avg_score'], reverse=True)
+    rankings.sort(key=lambda x: ranking_key(
+        x['avg_score'], x['student__surname'], x['student__firstname'], x['student_id']
+    ))
     
     # Assign positions
     position_map = {}
@@ -121,71 +107,61 @@ def get_performance_trend(student, subject=None):
     Get performance trend over time for a student.
     Returns list of sessions/terms with scores.
     """
-    from .models import Result
-    
-    if subject:
-        results = Result.objects.filter(
-            student=student,
-            subject=subject
-        ).order_by('session__name', 'term__name')
-    else:
-        results = Result.objects.filter(
-            student=student
-        ).order_by('session__name', 'term__name')
-    
-    trend = []
-    current_key = None
-    current_scores = []
-    
-    for result in results:
-        key = f"{result.session.name} - {result.term.name}"
-        if key != current_key:
-            if current_scores:
-                avg = sum(current_scores) / len(current_scores)
-                trend.append({
-                    'period': current_key,
-                    'average': round(avg, 2),
-                    'count': len(current_scores)
-                })
-            current_key = key
-            current_scores = [result.total_score()]
-        else:
-            current_scores.append(result.total_score())
-    
-    # Add the last period
-    if current_scores:
-        avg = sum(current_scores) / len(current_scores)
-        trend.append({
-            'period': current_key,
-            'average': round(avg, 2),
-            'count': len(current_scores)
-        })
-    
-    return trend
+    from .trends import student_trend
+
+    trend = student_trend(student, subject)
+    return [
+        {
+            'period': f"{session} - {term}",
+            'average': average,
+            'count': count,
+        }
+        for (session, term), average, count in zip(
+            trend['periods'], trend['totals'], trend['counts']
+        )
+    ]
 
 
 def get_subject_analytics(student_class, session, term, subject):
     """Get analytics for a specific subject in a class."""
+    from django.db.models import Avg, Count, Max, Min, Sum
     from .models import Result
     
-    results = Result.objects.filter(
+    stats = Result.objects.filter(
         current_class=student_class,
         session=session,
         term=term,
         subject=subject
+    ).with_grades().aggregate(
+        average=Avg('total'),
+        highest=Max('total'),
+        lowest=Min('total'),
+        total_students=Count('id'),
+        passing=Sum('passed'),
     )
     
-    if not results.exists():
+    if not stats['total_students']:
         return None
     
-    scores = [r.total_score() for r in results]
-    
     return {
         'subject': subject.name,
-        'average': round(sum(scores) / len(scores), 2),
-        'highest': max(scores),
-        'lowest': min(scores),
-        'total_students': len(scores),
-        'passing': sum(1 for s in scores if s >= 50),  # 50% pass mark
-        'pass_rate': round((sum(1 for s in scores if s >= 50) / len(scores)) * 100, 2)
+        'average': round(stats['average'], 2),
+        'highest': stats['highest'],
+        'lowest': stats['lowest'],
+        'total_students': stats['total_students'],
+        'passing': stats['passing'],
+        'pass_rate': round(stats['passing'] / stats['total_students'] * 100, 2)
     }
+
+
+def grade_distribution(results):
+    """Return {grade label: count} for a Result queryset, counted in SQL."""
+    from django.db.models import Count
+
+    rows = (
+        results.with_grades()
+        .values('grade_label')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    return {row['grade_label']: row['count'] for row in rows}
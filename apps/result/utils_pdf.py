@@ -1,6 +1,10 @@
 import subprocess
 from pathlib import Path
-from playwright.sync_api import sync_playwright
+
+from apps.corecode.instrumentation import instrumented, timed
+from apps.corecode.lazy import lazy_import
+
+playwright = lazy_import('playwright.sync_api')
 
 def ensure_chromium():
     """
@@ -12,14 +16,61 @@ def ensure_chromium():
         print("Chromium not found. Installing Playwright Chromium...")
         subprocess.run(["playwright", "install", "chromium"], check=True)
 
+@instrumented('pdf')
 def generate_pdf_from_html_content(html_content, output_path):
     """
     Generate a PDF from raw HTML content using Playwright.
     """
     ensure_chromium()
-    with sync_playwright() as p:
+    with playwright.sync_playwright() as p:
         browser = p.chromium.launch()
         page = browser.new_page()
         page.set_content(html_content)
         page.pdf(path=output_path)
         browser.close()
+
+
+class PdfRenderer:
+    """
+    Keep one Chromium browser and page open while rendering many documents.
+
+    Launching the browser dominates the cost of a single PDF, so batch
+    exports should render everything inside one ``with PdfRenderer()``
+    block instead of calling ``generate_pdf_from_html_content`` per item.
+    """
+
+    def __init__(self, **pdf_options):
+        self.pdf_options = {'print_background': True, **pdf_options}
+
+    def __enter__(self):
+        with timed('pdf'):
+            ensure_chromium()
+            self._playwright = playwright.sync_playwright().start()
+            try:
+                self.browser = self._playwright.chromium.launch()
+                try:
+                    self.page = self.browser.new_page()
+                except Exception:
+                    self.browser.close()
+                    raise
+            except Exception:
+                # __exit__ does not run when __enter__ fails: stop the driver here
+                self._playwright.stop()
+                raise
+        return self
+
+    def render(self, html_content, **pdf_options):
+        """Return the PDF for ``html_content`` as bytes."""
+        with timed('pdf'):
+            self.page.set_content(html_content, wait_until='networkidle')
+            return self.page.pdf(**{**self.pdf_options, **pdf_options})
+
+    def __exit__(self, *exc_info):
+        self.browser.close()
+        self._playwright.stop()
+
+
+def generate_pdfs_from_html_contents(html_contents, **pdf_options):
+    """Render several HTML documents to PDF bytes with a single browser."""
+    with PdfRenderer(**pdf_options) as renderer:
+        return [renderer.render(html_content) for html_content in html_contents]
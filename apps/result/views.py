@@ -3,23 +3,32 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.shortcuts import get_object_or_404, redirect, render
 from django.views.generic import DetailView, ListView, View
-from django.template.loader import get_template
 from io import BytesIO
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse
 from django.conf import settings
 from django.template.loader import render_to_string
 import os
 import logging
+import tempfile
+from collections import defaultdict
 
 logger = logging.getLogger(__name__)
 
+from django.db.models import Count, F, Sum
+from django.urls import reverse
+
+from apps.corecode.datatables import Column, ListEndpoint
 from apps.corecode.models import StudentClass
+from apps.corecode.replicas import read_from_replica
+from apps.jobs.queue import enqueue
 from apps.students.models import Student
-from apps.finance.models import Invoice, Receipt
+from apps.parents.snapshot import invalidate_snapshots
 
-from attendance.models import AttendanceEntry, AttendanceRegister
+from .analytics import invalidate as invalidate_analytics
 from .forms import CreateResults, EditResults
 from .models import Result
+from .report_cards import build_report_card_context, build_report_card_contexts
+from .trends import class_trends, empty_trend, student_trend
 from .utils_pdf import generate_pdf_from_html_content
 
 
@@ -32,7 +41,7 @@ def results_access(request):
             messages.error(request, 'Please enter a Student ID (registration number).')
             return render(request, 'result/results_access.html')
 
-        student = Student.objects.filter(registration_number__iexact=reg_no).first()
+        student = Student.objects.by_registration_number(reg_no).first()
         if not student:
             messages.error(request, 'Student not found. Check the Student ID and try again.')
             return render(request, 'result/results_access.html')
@@ -79,127 +88,56 @@ def student_performance(request):
     """
     student = None
     reg = (request.GET.get("reg") or "").strip()
-
-    labels = []
-    totals = []
-    ca_averages = []
-    exam_averages = []
-    gpas = []
-
-    insights = {
-        "overall_average": 0.0,
-        "best": None,
-        "worst": None,
-        "trend": "flat",
-        "streak": 0,
-    }
+    trend = empty_trend()
 
     if reg:
-        student = Student.objects.filter(registration_number__iexact=reg).first()
+        student = Student.objects.by_registration_number(reg).first()
         if student:
-            from django.db.models import Avg, F
-
-            # Collect ordered (session, term) keys without duplicates
-            data = (
-                Result.objects.filter(student=student)
-                .values_list("session__name", "term__name")
-                .order_by("session__name", "term__name")
-            )
-            seen = set()
-            ordered_keys = []
-            for s, t in data:
-                key = f"{s} {t}"
-                if key not in seen:
-                    seen.add(key)
-                    ordered_keys.append((s, t))
-
-            if ordered_keys:
-                # Compute CA avg, Exam avg and Total avg per (session, term)
-                agg_qs = (
-                    Result.objects.filter(student=student)
-                    .values("session__name", "term__name")
-                    .annotate(
-                        ca_avg=Avg("test_score"),
-                        exam_avg=Avg("exam_score"),
-                        avg_total=Avg(F("test_score") + F("exam_score")),
-                    )
-                    .order_by("session__name", "term__name")
-                )
-                agg_map = {
-                    (row["session__name"], row["term__name"]): (
-                        float(row.get("ca_avg") or 0),
-                        float(row.get("exam_avg") or 0),
-                        float(row.get("avg_total") or 0),
-                    )
-                    for row in agg_qs
-                }
-
-                # Labels and series
-                labels = [f"{s} {t}" for (s, t) in ordered_keys]
-                for key in ordered_keys:
-                    ca, ex, tot = agg_map.get(key, (0.0, 0.0, 0.0))
-                    ca_averages.append(round(ca, 2))
-                    exam_averages.append(round(ex, 2))
-                    totals.append(round(tot, 2))
-
-                # Optional GPA per term if function available
-                try:
-                    from apps.corecode.models import AcademicSession, AcademicTerm
-                    for (s_name, t_name) in ordered_keys:
-                        sess = AcademicSession.objects.filter(name=s_name).first()
-                        term = AcademicTerm.objects.filter(name=t_name).first()
-                        if sess and term:
-                            gpa_val = Result.get_student_gpa(student, sess, term)
-                            gpas.append(round(float(gpa_val or 0), 2))
-                        else:
-                            gpas.append(0.0)
-                except Exception:
-                    gpas = [0.0 for _ in ordered_keys]
-
-                # Insights
-                if totals:
-                    insights["overall_average"] = round(sum(totals) / len(totals), 2)
-
-                    best_idx = max(range(len(totals)), key=lambda i: totals[i])
-                    worst_idx = min(range(len(totals)), key=lambda i: totals[i])
-                    insights["best"] = {"label": labels[best_idx], "value": totals[best_idx]}
-                    insights["worst"] = {"label": labels[worst_idx], "value": totals[worst_idx]}
-
-                    # Trend and streak
-                    if len(totals) >= 2:
-                        if totals[-1] > totals[-2]:
-                            insights["trend"] = "up"
-                        elif totals[-1] < totals[-2]:
-                            insights["trend"] = "down"
-                        else:
-                            insights["trend"] = "flat"
-
-                        direction = 1 if totals[-1] > totals[-2] else (-1 if totals[-1] < totals[-2] else 0)
-                        streak = 1 if direction != 0 else 0
-                        for i in range(len(totals) - 2, 0, -1):
-                            diff = totals[i] - totals[i - 1]
-                            if diff == 0:
-                                break
-                            d = 1 if diff > 0 else -1
-                            if d == direction:
-                                streak += 1
-                            else:
-                                break
-                        insights["streak"] = streak
+            # Whole history in one query; averages, GPA and streaks in NumPy
+            trend = student_trend(student)
 
     context = {
         "student": student,
-        "labels": labels,
-        "totals": totals,
-        "ca_averages": ca_averages,
-        "exam_averages": exam_averages,
-        "gpas": gpas,
-        "insights": insights,
+        "labels": trend["labels"],
+        "totals": trend["totals"],
+        "ca_averages": trend["ca_averages"],
+        "exam_averages": trend["exam_averages"],
+        "gpas": trend["gpas"],
+        "insights": trend["insights"],
         "reg": reg,
     }
     return render(request, "result/student_performance.html", context)
 
 
+@login_required
+def class_performance_trend(request, class_id):
+    """Per-term trend for every student in a class, for class-wide charts."""
+    student_class = get_object_or_404(StudentClass, pk=class_id)
+    trends = class_trends(student_class)
+    names = {
+        student.id: student.get_full_name()
+        for student in Student.objects.filter(pk__in=trends["students"]).only(
+            "surname", "firstname", "other_name"
+        )
+    }
+    return JsonResponse({
+        "class": student_class.name,
+        "labels": trends["labels"],
+        "class_average": trends["class_average"],
+        "students": [
+            {
+                "id": student_id,
+                "name": names.get(student_id, ""),
+                "labels": trend["labels"],
+                "totals": trend["totals"],
+                "gpas": trend["gpas"],
+                "insights": trend["insights"],
+            }
+            for student_id, trend in trends["students"].items()
+        ],
+    })
+
+
 @login_required
 def create_result(request):
     students = Student.objects.all()
@@ -244,6 +182,10 @@ def create_result(request):
                                 )
 
                 Result.objects.bulk_create(results)
+                # bulk_create sends no post_save, so drop cached summaries here
+                invalidate_snapshots(*{result.student_id for result in results})
+                for key in {(r.current_class_id, r.session_id, r.term_id) for r in results}:
+                    invalidate_analytics(*key)
                 return redirect("edit-results")
 
         # after choosing students
@@ -350,132 +292,106 @@ def edit_results(request):
 
 
 class ResultListView(LoginRequiredMixin, View):
-    def get(self, request, *args, **kwargs):
-        results = Result.objects.filter(
-            session=request.current_session, term=request.current_term
-        ).select_related('student', 'subject')
-        bulk = {}
-
-        for result in results:
-            if result.student.id not in bulk:
-                # Initialize student entry
-                bulk[result.student.id] = {
-                    "student": result.student,
-                    "subjects": [],
-                    "test_total": 0,
-                    "exam_total": 0,
-                    "total_total": 0,
-                }
-            
-            # Add this subject result
-            bulk[result.student.id]["subjects"].append(result)
-            bulk[result.student.id]["test_total"] += (result.test_score or 0)
-            bulk[result.student.id]["exam_total"] += (result.exam_score or 0)
-            bulk[result.student.id]["total_total"] += result.total_score()
+    """This term's results per student; rows come a page at a time from ResultListData"""
 
-        context = {"results": bulk}
+    def get(self, request, *args, **kwargs):
+        context = {"classes": StudentClass.objects.all()}
         return render(request, "result/all_results.html", context)
 
 
-@login_required
-def report_card(request, student_id):
-    student = get_object_or_404(Student, pk=student_id)
-    session = request.current_session
-    term = request.current_term
-    results = Result.objects.filter(student=student, session=session, term=term).select_related('subject', 'current_class')
-    teacher_comment = next((r.teacher_comment for r in results if r.teacher_comment), "")
-    headteacher_comment = next((r.headteacher_comment for r in results if r.headteacher_comment), "")
-    current_class = results.first().current_class if results.exists() else student.current_class
-
-    regs = AttendanceRegister.objects.filter(
-        session=session,
-        term=term,
-        student_class=current_class,
-    )
-    entries = AttendanceEntry.objects.filter(register__in=regs, student=student)
-    present = entries.filter(status=AttendanceEntry.STATUS_PRESENT).count()
-    absent = entries.filter(status=AttendanceEntry.STATUS_ABSENT).count()
-    late = entries.filter(status=AttendanceEntry.STATUS_LATE).count()
-
-    avg = sum(r.total_score() for r in results)/results.count() if results else 0
-
-    # Attendance percentage
-    total_att = present + absent + late
-    attendance_pct = round((present / total_att) * 100, 1) if total_att else 0
-
-    # Fee balance: sum per-invoice (invoice total/amount minus receipts or paid_amount)
-    invoices = Invoice.objects.filter(student=student)
-    if hasattr(Invoice, 'session'):
-        invoices = invoices.filter(session=session)
-    if hasattr(Invoice, 'term'):
-        invoices = invoices.filter(term=term)
-
-    fee_balance = 0.0
-    for inv in invoices:
-        base = getattr(inv, 'total', None)
-        if base is None:
-            base = getattr(inv, 'amount', 0) or 0
-        base = float(base or 0)
-
-        # Prefer explicit paid_amount/amount_paid on invoice if maintained
-        paid_amount = getattr(inv, 'paid_amount', None)
-        if paid_amount is None:
-            paid_amount = getattr(inv, 'amount_paid', None)
-
-        if paid_amount is not None:
-            paid = float(paid_amount or 0)
-        else:
-            # Sum receipts tied to this invoice
-            try:
-                inv_receipts = Receipt.objects.filter(invoice=inv)
-                paid = sum(float(getattr(rc, 'amount', 0) or 0) for rc in inv_receipts)
-            except Exception:
-                paid = 0.0
+class ResultListData(ListEndpoint):
+    """
+    One row per student with this term's totals, summed in SQL, and the
+    subject results of the page's students from one more query.
+    """
+    columns = [
+        Column("student", sort=("student__surname", "student__firstname"), search=(
+            "student__surname__icontains", "student__firstname__icontains",
+            "student__registration_number__icontains",
+        )),
+        Column("current_class", sort="student__current_class__name", filter="current_class_id"),
+        Column("subject_count", sort="subject_count"),
+        Column("test_total", sort="test_total"),
+        Column("exam_total", sort="exam_total"),
+        Column("total_total", sort="total_total"),
+    ]
+    default_order = ("student__surname", "student__firstname")
+    key = "student_id"
+
+    def _results(self):
+        return Result.objects.filter(session=self.request.current_session, term=self.request.current_term)
+
+    def get_queryset(self):
+        return (
+            self._results()
+            .values(
+                "student_id", "student__surname", "student__firstname", "student__other_name",
+                "student__registration_number", "student__current_class__name",
+            )
+            .annotate(
+                subject_count=Count("id"),
+                test_total=Sum("test_score"),
+                exam_total=Sum("exam_score"),
+                total_total=Sum(F("test_score") + F("exam_score")),
+            )
+        )
 
-        due = max(base - paid, 0.0)
-        fee_balance += due
+    def rows(self, groups):
+        subjects = defaultdict(list)
+        scores = (
+            self._results().filter(student_id__in=[group["student_id"] for group in groups])
+            .with_grades()
+            .order_by("subject__name")
+            .values_list("student_id", "subject__name", "test_score", "exam_score", "total", "grade_label")
+        )
+        for student_id, subject, test, exam, total, grade in scores:
+            subjects[student_id].append(
+                {"subject": subject, "test": test, "exam": exam, "total": total, "grade": grade}
+            )
+        return [
+            {
+                "student_id": group["student_id"],
+                "student": " ".join(filter(None, (
+                    group["student__surname"], group["student__firstname"], group["student__other_name"],
+                ))),
+                "registration_number": group["student__registration_number"],
+                "current_class": group["student__current_class__name"] or "",
+                "report_card_url": reverse("report-card", args=[group["student_id"]]),
+                "subject_count": group["subject_count"],
+                "test_total": group["test_total"],
+                "exam_total": group["exam_total"],
+                "total_total": group["total_total"],
+                "subjects": subjects[group["student_id"]],
+            }
+            for group in groups
+        ]
 
-    fee_balance = round(fee_balance, 2)
-    
-    # Calculate GPA and Position
-    from .utils import calculate_gpa, get_gpa_class, get_student_position
-    gpa = calculate_gpa(results) if results.exists() else 0.0
-    gpa_class = get_gpa_class(gpa)
-    position_data = get_student_position(student, session, term)
 
-    context = {
-        'student': student,
-        'current_class': current_class,
-        'session': session,
-        'term': term,
-        'results': results,
-        'average_total': round(avg, 2),
-        'attendance': {'present': present, 'absent': absent, 'late': late, 'percent': attendance_pct},
-        'teacher_comment': teacher_comment,
-        'headteacher_comment': headteacher_comment,
-        'fee_balance': fee_balance,
-        'gpa': gpa,
-        'gpa_class': gpa_class,
-        'position_data': position_data,
-    }
+@login_required
+@read_from_replica
+def report_card(request, student_id):
+    student = get_object_or_404(Student, pk=student_id)
+    context = build_report_card_context(student, request.current_session, request.current_term)
     return render(request, 'result/report_card.html', context)
 
 
-@login_required
-def render_to_pdf(request, template_src, context_dict={}):
+def render_pdf(template_src, context_dict):
     """
-    Render HTML template to PDF using our wrapper.
-    Falls back to xhtml2pdf if Playwright is not available.
+    Render HTML template to PDF bytes (None on failure) using our wrapper.
+    Falls back to xhtml2pdf if Playwright is not available. Needs no
+    request, so background jobs render with it too.
     """
     html = render_to_string(template_src, context_dict)
-    output_path = f"/tmp/temp_report.pdf"
 
     try:
-        # Generate PDF using Playwright wrapper
-        generate_pdf_from_html_content(html, output_path)
+        # Generate PDF using Playwright wrapper, into a file of its own since
+        # background jobs render several PDFs at once
+        with tempfile.TemporaryDirectory() as tmp:
+            output_path = os.path.join(tmp, 'report.pdf')
+            generate_pdf_from_html_content(html, output_path)
 
-        with open(output_path, "rb") as f:
-            return HttpResponse(f.read(), content_type="application/pdf")
+            with open(output_path, "rb") as f:
+                return f.read()
 
     except Exception as e:
         # Fallback to xhtml2pdf if Playwright fails
@@ -533,8 +449,7 @@ def render_to_pdf(request, template_src, context_dict={}):
             )
             
             if not pdf.err:
-                result.seek(0)
-                return HttpResponse(result.getvalue(), content_type='application/pdf')
+                return result.getvalue()
             else:
                 logger.error(f'xhtml2pdf error: {pdf.err}')
                 return None
@@ -549,70 +464,22 @@ def render_to_pdf(request, template_src, context_dict={}):
 
 
 @login_required
+def render_to_pdf(request, template_src, context_dict={}):
+    """``render_pdf`` as a PDF response, or None if it could not be rendered."""
+    content = render_pdf(template_src, context_dict)
+    if content is None:
+        return None
+    return HttpResponse(content, content_type='application/pdf')
+
+
+@login_required
+@read_from_replica
 def report_card_pdf(request, student_id):
     student = get_object_or_404(Student, pk=student_id)
     session = request.current_session
     term = request.current_term
-    # Assemble the same context as HTML view
-    results = Result.objects.filter(student=student, session=session, term=term).select_related('subject', 'current_class')
-    teacher_comment = next((r.teacher_comment for r in results if r.teacher_comment), "")
-    headteacher_comment = next((r.headteacher_comment for r in results if r.headteacher_comment), "")
-    current_class = results.first().current_class if results.exists() else student.current_class
-
-    regs = AttendanceRegister.objects.filter(session=session, term=term, student_class=current_class)
-    entries = AttendanceEntry.objects.filter(register__in=regs, student=student)
-    present = entries.filter(status=AttendanceEntry.STATUS_PRESENT).count()
-    absent = entries.filter(status=AttendanceEntry.STATUS_ABSENT).count()
-    late = entries.filter(status=AttendanceEntry.STATUS_LATE).count()
-    avg = sum(r.total_score() for r in results)/results.count() if results else 0
-
-    total_att = present + absent + late
-    attendance_pct = round((present / total_att) * 100, 1) if total_att else 0
-
-    invoices = Invoice.objects.filter(student=student)
-    if hasattr(Invoice, 'session'):
-        invoices = invoices.filter(session=session)
-    if hasattr(Invoice, 'term'):
-        invoices = invoices.filter(term=term)
-
-    fee_balance = 0.0
-    for inv in invoices:
-        base = getattr(inv, 'total', None)
-        if base is None:
-            base = getattr(inv, 'amount', 0) or 0
-        base = float(base or 0)
-
-        paid_amount = getattr(inv, 'paid_amount', None)
-        if paid_amount is None:
-            paid_amount = getattr(inv, 'amount_paid', None)
-
-        if paid_amount is not None:
-            paid = float(paid_amount or 0)
-        else:
-            try:
-                inv_receipts = Receipt.objects.filter(invoice=inv)
-                paid = sum(float(getattr(rc, 'amount', 0) or 0) for rc in inv_receipts)
-            except Exception:
-                paid = 0.0
-
-        due = max(base - paid, 0.0)
-        fee_balance += due
-
-    fee_balance = round(fee_balance, 2)
-
-    context = {
-        'student': student,
-        'current_class': current_class,
-        'session': session,
-        'term': term,
-        'results': results,
-        'average_total': round(avg, 2),
-        'attendance': {'present': present, 'absent': absent, 'late': late, 'percent': attendance_pct},
-        'teacher_comment': teacher_comment,
-        'headteacher_comment': headteacher_comment,
-        'pdf_mode': True,
-        'fee_balance': fee_balance,
-    }
+    context = build_report_card_context(student, session, term)
+    context['pdf_mode'] = True
 
     response = render_to_pdf(request, 'result/report_card_pdf.html', context)
     if response is None:
@@ -625,101 +492,51 @@ def report_card_pdf(request, student_id):
 
 @login_required
 def class_report_cards_pdf(request, class_id):
+    """Queue the class's report cards; the job page offers the file when done"""
     student_class = get_object_or_404(StudentClass, pk=class_id)
-    session = request.current_session
-    term = request.current_term
-    students = Student.objects.filter(current_class=student_class, current_status='active')
-
-    pdf_buffers = []
-    for student in students:
-        results = Result.objects.filter(student=student, session=session, term=term).select_related('subject', 'current_class')
-        teacher_comment = next((r.teacher_comment for r in results if r.teacher_comment), "")
-        headteacher_comment = next((r.headteacher_comment for r in results if r.headteacher_comment), "")
-        current_class = results.first().current_class if results.exists() else student.current_class
-
-        regs = AttendanceRegister.objects.filter(session=session, term=term, student_class=current_class)
-        entries = AttendanceEntry.objects.filter(register__in=regs, student=student)
-        present = entries.filter(status=AttendanceEntry.STATUS_PRESENT).count()
-        absent = entries.filter(status=AttendanceEntry.STATUS_ABSENT).count()
-        late = entries.filter(status=AttendanceEntry.STATUS_LATE).count()
-        avg = sum(r.total_score() for r in results)/results.count() if results else 0
-
-        context = {
-            'student': student,
-            'current_class': current_class,
-            'session': session,
-            'term': term,
-            'results': results,
-            'average_total': round(avg, 2),
-            'attendance': {'present': present, 'absent': absent, 'late': late},
-            'teacher_comment': teacher_comment,
-            'headteacher_comment': headteacher_comment,
-            'pdf_mode': True,
-        }
-        # Render each student's PDF HTML
-        template = get_template('result/report_card_pdf.html')
-        html_content = template.render(context=context, request=request)
-        
-        # Use render_to_pdf helper for consistency
-        pdf_response = render_to_pdf(request, 'result/report_card_pdf.html', context)
-        if pdf_response:
-            pdf_buffers.append(pdf_response.content)
-        else:
-            logger.warning(f'Failed to generate PDF for student {student.id}, skipping...')
-            continue
-
-    # Merge PDFs into a single file (simple concatenation via PyPDF2 if available)
-    try:
-        from PyPDF2 import PdfMerger
-        merger = PdfMerger()
-        for content in pdf_buffers:
-            bio = BytesIO(content)
-            merger.append(bio)
-        out = BytesIO()
-        merger.write(out)
-        merger.close()
-        resp = HttpResponse(out.getvalue(), content_type='application/pdf')
-        resp['Content-Disposition'] = f'attachment; filename="class_report_cards_{student_class.name}_{session}_{term}.pdf"'.replace(' ', '_')
-        return resp
-    except Exception:
-        # Fallback: zip files
-        import zipfile
-        out = BytesIO()
-        with zipfile.ZipFile(out, 'w', zipfile.ZIP_DEFLATED) as zf:
-            for idx, (stu, content) in enumerate(zip(students, pdf_buffers), start=1):
-                zf.writestr(f"{stu.registration_number or idx}_{stu.last_name}.pdf", content)
-        resp = HttpResponse(out.getvalue(), content_type='application/zip')
-        resp['Content-Disposition'] = f'attachment; filename="class_report_cards_{student_class.name}_{session}_{term}.zip"'.replace(' ', '_')
-        return resp
+    job = enqueue(
+        'result.class_report_cards',
+        {'class_id': student_class.pk, 'session_id': request.current_session.pk, 'term_id': request.current_term.pk},
+        user=request.user,
+        label=f"Report cards for {student_class.name}",
+        unique=True,
+    )
+    return redirect(job)
 
 
 @login_required
+@read_from_replica
 def class_report_sheet(request, class_id):
     student_class = get_object_or_404(StudentClass, pk=class_id)
     session = request.current_session
     term = request.current_term
     students = Student.objects.filter(current_class=student_class, current_status='active')
 
-    rows = []
-    regs = AttendanceRegister.objects.filter(session=session, term=term, student_class=student_class)
-    for stu in students:
-        results = Result.objects.filter(student=stu, session=session, term=term)
-        avg = round(sum(r.total_score() for r in results)/results.count(), 2) if results else 0
-        entries = AttendanceEntry.objects.filter(register__in=regs, student=stu)
-        present = entries.filter(status=AttendanceEntry.STATUS_PRESENT).count()
-        absent = entries.filter(status=AttendanceEntry.STATUS_ABSENT).count()
-        late = entries.filter(status=AttendanceEntry.STATUS_LATE).count()
-        rows.append({
-            'student': stu,
-            'average_total': avg,
-            'attendance': {'present': present, 'absent': absent, 'late': late}
-        })
+    rows = [
+        {
+            'student': context['student'],
+            'average_total': context['average_total'],
+            'attendance': context['attendance'],
+        }
+        for context in build_report_card_contexts(
+            students, session, term, with_fees=False, with_positions=False
+        )
+    ]
+
+    totals = {
+        status: sum(row['attendance'][status] for row in rows)
+        for status in ('present', 'absent', 'late')
+    }
+    totals['average'] = (
+        round(sum(row['average_total'] for row in rows) / len(rows), 2) if rows else 0
+    )
 
     context = {
         'student_class': student_class,
         'session': session,
         'term': term,
         'rows': rows,
+        'totals': totals,
     }
     return render(request, 'result/class_report_sheet.html', context)
 
@@ -748,7 +565,6 @@ def send_result_sms_view(request):
 def send_result_sms_action(request):
     """Process SMS sending for selected students"""
     from apps.corecode.models import AcademicSession, AcademicTerm
-    from .sms import send_bulk_result_sms
     
     if request.method != 'POST':
         return redirect('send-result-sms')
@@ -778,27 +594,19 @@ def send_result_sms_action(request):
         messages.error(request, 'No students found')
         return redirect('send-result-sms')
     
-    # Send SMS
-    result = send_bulk_result_sms(students, session, term)
-    
-    if result['success']:
-        messages.success(
-            request,
-            f"SMS sent successfully to {result['sent']} student(s). "
-            f"{result['failed']} failed."
-        )
-    else:
-        messages.error(request, f"Failed to send SMS. {result['failed']} failed.")
-    
-    # Show details
-    for detail in result['details']:
-        if not detail['success']:
-            messages.warning(
-                request,
-                f"{detail['student']}: {detail['error']}"
-            )
-    
-    return redirect('send-result-sms')
+    # Send SMS in the background; the job page shows progress and failures
+    job = enqueue(
+        'result.send_result_sms',
+        {
+            'student_ids': list(students.values_list('pk', flat=True)),
+            'session_id': session.pk,
+            'term_id': term.pk,
+        },
+        user=request.user,
+        label=f"Result SMS for {session} {term}",
+    )
+    messages.info(request, "Sending result SMS in the background.")
+    return redirect(job)
 
 
 @login_required
@@ -8,19 +8,19 @@ import csv
 from io import TextIOWrapper
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
 from django.shortcuts import redirect, render, get_object_or_404
-from django.db.models import Avg, Count, F, FloatField, ExpressionWrapper
-from apps.corecode.models import StudentClass, Subject, AcademicSession, AcademicTerm
+from apps.corecode.models import StudentClass, Subject
+from apps.corecode.replicas import read_from_replica
 from apps.students.models import Student
+from . import grading
+from .analytics import get_class_analytics
 from .models import Result
 from .forms import BulkUploadForm
-from .utils import (
-    calculate_gpa, get_gpa_class, calculate_class_rankings,
-    get_performance_trend, get_subject_analytics
-)
 
 
 @login_required
+@read_from_replica
 def analytics_dashboard(request):
     """
     Beautiful analytics dashboard with charts and insights.
@@ -50,66 +50,20 @@ def analytics_dashboard(request):
         messages.info(request, 'No classes found. Please create a class first.')
         return render(request, 'result/analytics_dashboard.html', context)
     
-    # Calculate class rankings
-    rankings = calculate_class_rankings(selected_class, session, term)
-    
-    # Get top 10 students
-    students_with_ranks = []
-    for student_id, rank_data in rankings.items():
-        student = Student.objects.get(pk=student_id)
-        results = Result.objects.filter(
-            student=student,
-            session=session,
-            term=term,
-            current_class=selected_class
-        )
-        gpa = calculate_gpa(results)
-        gpa_class = get_gpa_class(gpa)
-        
-        students_with_ranks.append({
-            'student': student,
-            'position': rank_data['position'],
-            'avg_score': rank_data['avg_score'],
-            'gpa': gpa,
-            'gpa_class': gpa_class,
-        })
-    
-    # Sort and get top 10
-    students_with_ranks.sort(key=lambda x: x['position'])
-    top_students = students_with_ranks[:10]
-    
-    # Subject analytics
-    subjects = Subject.objects.all()
-    subject_stats = []
-    for subject in subjects:
-        stats = get_subject_analytics(selected_class, session, term, subject)
-        if stats:
-            subject_stats.append(stats)
-    
-    # Class statistics
-    all_results = Result.objects.filter(
-        current_class=selected_class,
-        session=session,
-        term=term
+    analytics = get_class_analytics(selected_class, session, term) or {}
+    rankings = analytics.get('rankings', [])
+    subject_stats = analytics.get('subject_stats', [])
+    grade_distribution = analytics.get(
+        'grade_distribution', {band.label: 0 for band in grading.get_scale(selected_class.id).bands}
     )
-    
-    class_stats = {
-        'total_students': len(rankings),
-        'total_results': all_results.count(),
-        'avg_class_score': round(
-            sum(r.total_score() for r in all_results) / all_results.count(), 2
-        ) if all_results.exists() else 0,
-        'highest_score': max((r.total_score() for r in all_results), default=0),
-        'lowest_score': min((r.total_score() for r in all_results), default=0),
-    }
-    
-    # Performance distribution (for chart)
-    grade_distribution = {'Exceeding': 0, 'EE': 0, 'ME': 0, 'AE': 0, 'BE': 0}
-    for result in all_results:
-        grade = result.grade()
-        if grade in grade_distribution:
-            grade_distribution[grade] += 1
-    
+    class_stats = analytics.get('class_stats', {
+        'total_students': 0,
+        'total_results': 0,
+        'avg_class_score': 0,
+        'highest_score': 0,
+        'lowest_score': 0,
+    })
+
     # Prepare chart data
     chart_data = {
         'grade_labels': list(grade_distribution.keys()),
@@ -118,18 +72,31 @@ def analytics_dashboard(request):
         'subject_averages': [s['average'] for s in subject_stats],
         'subject_pass_rates': [s['pass_rate'] for s in subject_stats],
     }
-    
+
     context.update({
-        'top_students': top_students,
+        'top_students': rankings[:10],
         'subject_stats': subject_stats,
         'class_stats': class_stats,
         'chart_data': json.dumps(chart_data),
-        'all_rankings': students_with_ranks,
+        'all_rankings': rankings,
     })
-    
+
     return render(request, 'result/analytics_dashboard.html', context)
 
 
+@login_required
+@read_from_replica
+def analytics_data(request, class_id):
+    """Full class analytics (including correlations and z-scores) as JSON."""
+    student_class = get_object_or_404(StudentClass, pk=class_id)
+    analytics = get_class_analytics(
+        student_class, request.current_session, request.current_term
+    )
+    if analytics is None:
+        return JsonResponse({'error': 'No results for this class and term'}, status=404)
+    return JsonResponse(analytics)
+
+
 @login_required
 def bulk_upload_results(request):
     """
@@ -245,9 +212,7 @@ def save_bulk_results(data, session, term, student_class):
                 errors.append(f'Row {idx}: Missing registration number')
                 continue
                 
-            student = Student.objects.filter(
-                registration_number__iexact=reg_no
-            ).first()
+            student = Student.objects.by_registration_number(reg_no).first()
             
             if not student:
                 errors.append(f'Row {idx}: Student {reg_no} not found')
@@ -0,0 +1,151 @@
+"""
+Ranked queries against the search index.
+
+PostgreSQL matches prefix terms against the generated ``document`` tsvector
+and falls back on trigram word similarity for misspelt names. SQLite uses
+the FTS5 table with bm25 ranking; FTS5 has no fuzzy matching, so when the
+prefix query comes up short, candidates sharing each term's first two
+letters are re-scored with difflib. Other backends get a plain
+``icontains`` scan of the index table.
+"""
+import re
+from collections import namedtuple
+from difflib import SequenceMatcher
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+
+from .models import SearchEntry
+
+SearchHit = namedtuple('SearchHit', 'kind object_id title keywords rank')
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# Upper bound on rows re-scored by the SQLite fuzzy fallback
+FUZZY_CANDIDATES = 500
+
+
+def tokenize(query):
+    return TOKEN_RE.findall(query.lower())[:8]
+
+
+def search(query, kinds=None, limit=10):
+    """Return up to ``limit`` SearchHits for ``query`` (all with None), best first."""
+    tokens = tokenize(query)
+    if not tokens:
+        return []
+    kinds = list(kinds) if kinds else None
+    if connection.vendor == 'postgresql':
+        return _search_postgresql(query, tokens, kinds, limit)
+    if connection.vendor == 'sqlite':
+        hits = _search_sqlite(tokens, kinds, limit)
+        min_length = getattr(settings, 'SEARCH_FUZZY_MIN_LENGTH', 4)
+        short = limit is None or len(hits) < limit
+        if short and max(len(t) for t in tokens) >= min_length:
+            seen = {(hit.kind, hit.object_id) for hit in hits}
+            hits += [
+                hit for hit in _fuzzy_sqlite(tokens, kinds, limit)
+                if (hit.kind, hit.object_id) not in seen
+            ][:None if limit is None else limit - len(hits)]
+        return hits
+    return _search_fallback(tokens, kinds, limit)
+
+
+def _kind_filter(kinds, column='e.kind'):
+    if not kinds:
+        return '', []
+    return f" AND {column} IN ({', '.join(['%s'] * len(kinds))})", kinds
+
+
+def _limit(limit):
+    if limit is None:
+        return '', []
+    return ' LIMIT %s', [limit]
+
+
+def _search_postgresql(query, tokens, kinds, limit):
+    tsquery = ' & '.join(f"{token}:*" for token in tokens)
+    text = ' '.join(tokens)
+    kind_sql, kind_params = _kind_filter(kinds)
+    limit_sql, limit_params = _limit(limit)
+    sql = f"""
+        SELECT e.kind, e.object_id, e.title, e.keywords,
+               ts_rank(e.document, q.query)
+               + GREATEST(word_similarity(%s, e.title), word_similarity(%s, e.keywords)) AS rank
+        FROM search_searchentry e, to_tsquery('simple', %s) AS q(query)
+        WHERE (e.document @@ q.query OR %s <%% e.title OR %s <%% e.keywords){kind_sql}
+        ORDER BY rank DESC{limit_sql}
+    """
+    params = [text, text, tsquery, text, text, *kind_params, *limit_params]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [SearchHit(*row) for row in cursor.fetchall()]
+
+
+def _fts_match(tokens, operator=' '):
+    # Quoted so FTS5 query syntax in user input is treated as text
+    return operator.join(f'"{token}"*' for token in tokens)
+
+
+def _search_sqlite(tokens, kinds, limit):
+    kind_sql, kind_params = _kind_filter(kinds)
+    limit_sql, limit_params = _limit(limit)
+    # bm25 is lower-is-better; title and keywords outweigh body text
+    sql = f"""
+        SELECT e.kind, e.object_id, e.title, e.keywords,
+               -bm25(search_searchentry_fts, 10.0, 5.0, 1.0) AS rank
+        FROM search_searchentry_fts
+        JOIN search_searchentry e ON e.id = search_searchentry_fts.rowid
+        WHERE search_searchentry_fts MATCH %s{kind_sql}
+        ORDER BY rank DESC{limit_sql}
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [_fts_match(tokens), *kind_params, *limit_params])
+        return [SearchHit(*row) for row in cursor.fetchall()]
+
+
+def _similarity(token, words):
+    return max((SequenceMatcher(None, token, word).ratio() for word in words), default=0)
+
+
+def _fuzzy_sqlite(tokens, kinds, limit):
+    threshold = getattr(settings, 'SEARCH_FUZZY_THRESHOLD', 0.75)
+    prefixes = {token[:2] for token in tokens}
+    kind_sql, kind_params = _kind_filter(kinds)
+    sql = f"""
+        SELECT e.kind, e.object_id, e.title, e.keywords
+        FROM search_searchentry_fts
+        JOIN search_searchentry e ON e.id = search_searchentry_fts.rowid
+        WHERE search_searchentry_fts MATCH %s{kind_sql}
+        LIMIT %s
+    """
+    match = '{title keywords} : (' + _fts_match(prefixes, ' OR ') + ')'
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [match, *kind_params, FUZZY_CANDIDATES])
+        rows = cursor.fetchall()
+
+    hits = []
+    for kind, object_id, title, keywords in rows:
+        words = tokenize(f"{title} {keywords}")
+        scores = [_similarity(token, words) for token in tokens]
+        if min(scores) >= threshold:
+            hits.append(SearchHit(kind, object_id, title, keywords, sum(scores) / len(scores)))
+    hits.sort(key=lambda hit: hit.rank, reverse=True)
+    return hits[:limit]
+
+
+def _search_fallback(tokens, kinds, limit):
+    entries = SearchEntry.objects.all()
+    if kinds:
+        entries = entries.filter(kind__in=kinds)
+    for token in tokens:
+        entries = entries.filter(
+            Q(title__icontains=token) | Q(keywords__icontains=token) | Q(body__icontains=token)
+        )
+    return [
+        SearchHit(kind, object_id, title, keywords, 0)
+        for kind, object_id, title, keywords in entries.values_list(
+            'kind', 'object_id', 'title', 'keywords'
+        )[:limit]
+    ]
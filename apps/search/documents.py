@@ -0,0 +1,81 @@
+from collections import namedtuple
+
+from django.urls import reverse
+
+from apps.corecode.models import StudentClass
+from apps.finance.models import Invoice
+from apps.staffs.models import Staff
+from apps.students.models import Student
+from lessonplans.models import LessonPlan
+
+Document = namedtuple('Document', 'kind model url_name build queryset')
+
+# kind -> Document, in the order results are grouped in the navbar
+REGISTRY = {}
+
+
+def register(kind, model, url_name, queryset=None):
+    """Register ``build(instance) -> dict(title, keywords, body)`` for a model."""
+    def decorator(build):
+        REGISTRY[kind] = Document(
+            kind, model, url_name, build, queryset or model.objects.all
+        )
+        return build
+    return decorator
+
+
+def get_url(kind, object_id):
+    return reverse(REGISTRY[kind].url_name, args=[object_id])
+
+
+@register('student', Student, 'students:student-detail')
+def student_document(student):
+    return {
+        'title': student.get_full_name(),
+        'keywords': student.registration_number,
+    }
+
+
+@register('staff', Staff, 'staffs:staff-detail')
+def staff_document(staff):
+    return {
+        'title': staff.get_full_name(),
+        'keywords': staff.mobile_number,
+    }
+
+
+@register(
+    'invoice', Invoice, 'invoice-detail',
+    queryset=lambda: Invoice.objects.select_related('student'),
+)
+def invoice_document(invoice):
+    # Invoices are found by number or by the student they were issued to
+    return {
+        'title': f"Invoice {invoice.invoice_number or invoice.pk}",
+        'keywords': ' '.join(filter(None, [
+            invoice.invoice_number,
+            invoice.student.registration_number,
+            invoice.student.get_full_name(),
+        ])),
+    }
+
+
+@register('class', StudentClass, 'corecode:class-detail')
+def class_document(student_class):
+    return {'title': student_class.name}
+
+
+@register(
+    'lessonplan', LessonPlan, 'lessonplans:detail',
+    queryset=lambda: LessonPlan.objects.select_related('subject', 'class_level'),
+)
+def lessonplan_document(plan):
+    return {
+        'title': plan.title,
+        'keywords': ' '.join(filter(None, [
+            plan.tags,
+            plan.subject.name if plan.subject else '',
+            plan.class_level.name if plan.class_level else '',
+        ])),
+        'body': '\n'.join([plan.objectives, plan.content]),
+    }
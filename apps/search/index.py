@@ -0,0 +1,77 @@
+from django.db import transaction
+from django.utils import timezone
+
+from .documents import REGISTRY
+from .models import SearchEntry
+
+TITLE_LENGTH = SearchEntry._meta.get_field('title').max_length
+KEYWORDS_LENGTH = SearchEntry._meta.get_field('keywords').max_length
+
+
+def _entry_fields(kind, instance):
+    document = REGISTRY[kind].build(instance)
+    return {
+        'title': (document.get('title') or '')[:TITLE_LENGTH],
+        'keywords': (document.get('keywords') or '')[:KEYWORDS_LENGTH],
+        'body': document.get('body') or '',
+    }
+
+
+def index_instance(kind, instance):
+    SearchEntry.objects.update_or_create(
+        kind=kind, object_id=instance.pk, defaults=_entry_fields(kind, instance)
+    )
+
+
+def remove_instance(kind, object_id):
+    SearchEntry.objects.filter(kind=kind, object_id=object_id).delete()
+
+
+def index_queryset(kind, queryset, batch_size=500):
+    """(Re)index every object in ``queryset``; returns the number indexed."""
+    count = 0
+    batch = []
+    for instance in queryset.iterator(chunk_size=batch_size):
+        batch.append(instance)
+        if len(batch) >= batch_size:
+            count += _write_batch(kind, batch)
+            batch = []
+    if batch:
+        count += _write_batch(kind, batch)
+    return count
+
+
+def _write_batch(kind, instances):
+    now = timezone.now()
+    entries = [
+        SearchEntry(
+            kind=kind, object_id=instance.pk, updated_at=now,
+            **_entry_fields(kind, instance)
+        )
+        for instance in instances
+    ]
+    SearchEntry.objects.bulk_create(
+        entries,
+        update_conflicts=True,
+        unique_fields=['kind', 'object_id'],
+        update_fields=['title', 'keywords', 'body', 'updated_at'],
+    )
+    return len(entries)
+
+
+def index_missing(kind):
+    """Index objects that have no entry yet, e.g. after a ``bulk_create``."""
+    document = REGISTRY[kind]
+    indexed = SearchEntry.objects.filter(kind=kind).values('object_id')
+    return index_queryset(kind, document.queryset().exclude(pk__in=indexed))
+
+
+def rebuild(kinds=None, batch_size=500):
+    """Rebuild the index for ``kinds`` (default: all); returns counts per kind."""
+    counts = {}
+    for kind in kinds or REGISTRY:
+        document = REGISTRY[kind]
+        with transaction.atomic():
+            SearchEntry.objects.filter(kind=kind).delete()
+            counts[kind] = index_queryset(kind, document.queryset(), batch_size)
+    return counts
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.search.documents import REGISTRY
+from apps.search.index import index_missing, rebuild
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the global search index, or index only objects missing from it'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'kinds', nargs='*',
+            help=f"Kinds to index (default: all of {', '.join(REGISTRY)})"
+        )
+        parser.add_argument(
+            '--missing', action='store_true',
+            help='Only add objects that have no entry yet instead of rebuilding'
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        kinds = options['kinds'] or list(REGISTRY)
+        unknown = set(kinds) - set(REGISTRY)
+        if unknown:
+            raise CommandError(f"Unknown kinds: {', '.join(sorted(unknown))}")
+
+        if options['missing']:
+            counts = {kind: index_missing(kind) for kind in kinds}
+        else:
+            counts = rebuild(kinds, batch_size=options['batch_size'])
+        for kind, count in counts.items():
+            self.stdout.write(f'{kind}: {count} indexed')
+        self.stdout.write(self.style.SUCCESS('Search index is up to date'))
@@ -0,0 +1,94 @@
+from django.db import migrations
+
+POSTGRESQL_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    ALTER TABLE search_searchentry ADD COLUMN document tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A')
+        || setweight(to_tsvector('simple', coalesce(keywords, '')), 'B')
+        || setweight(to_tsvector('simple', coalesce(body, '')), 'D')
+    ) STORED
+    """,
+    "CREATE INDEX search_entry_document_gin ON search_searchentry USING gin (document)",
+    "CREATE INDEX search_entry_title_trgm ON search_searchentry USING gin (title gin_trgm_ops)",
+    "CREATE INDEX search_entry_keywords_trgm ON search_searchentry USING gin (keywords gin_trgm_ops)",
+]
+
+POSTGRESQL_REVERSE = [
+    "DROP INDEX IF EXISTS search_entry_keywords_trgm",
+    "DROP INDEX IF EXISTS search_entry_title_trgm",
+    "DROP INDEX IF EXISTS search_entry_document_gin",
+    "ALTER TABLE search_searchentry DROP COLUMN IF EXISTS document",
+]
+
+# External-content FTS5 table; the triggers keep it in step with the
+# search_searchentry rows, including bulk upserts.
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE search_searchentry_fts USING fts5(
+        title, keywords, body,
+        content='search_searchentry', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER search_searchentry_fts_ai AFTER INSERT ON search_searchentry BEGIN
+        INSERT INTO search_searchentry_fts(rowid, title, keywords, body)
+        VALUES (new.id, new.title, new.keywords, new.body);
+    END
+    """,
+    """
+    CREATE TRIGGER search_searchentry_fts_ad AFTER DELETE ON search_searchentry BEGIN
+        INSERT INTO search_searchentry_fts(search_searchentry_fts, rowid, title, keywords, body)
+        VALUES ('delete', old.id, old.title, old.keywords, old.body);
+    END
+    """,
+    """
+    CREATE TRIGGER search_searchentry_fts_au AFTER UPDATE ON search_searchentry BEGIN
+        INSERT INTO search_searchentry_fts(search_searchentry_fts, rowid, title, keywords, body)
+        VALUES ('delete', old.id, old.title, old.keywords, old.body);
+        INSERT INTO search_searchentry_fts(rowid, title, keywords, body)
+        VALUES (new.id, new.title, new.keywords, new.body);
+    END
+    """,
+    "INSERT INTO search_searchentry_fts(search_searchentry_fts) VALUES ('rebuild')",
+]
+
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS search_searchentry_fts_au",
+    "DROP TRIGGER IF EXISTS search_searchentry_fts_ad",
+    "DROP TRIGGER IF EXISTS search_searchentry_fts_ai",
+    "DROP TABLE IF EXISTS search_searchentry_fts",
+]
+
+STATEMENTS = {
+    'postgresql': (POSTGRESQL_FORWARD, POSTGRESQL_REVERSE),
+    'sqlite': (SQLITE_FORWARD, SQLITE_REVERSE),
+}
+
+
+def _run(schema_editor, reverse):
+    statements = STATEMENTS.get(schema_editor.connection.vendor)
+    if statements:
+        for sql in statements[reverse]:
+            schema_editor.execute(sql)
+
+
+def create_index(apps, schema_editor):
+    _run(schema_editor, reverse=False)
+
+
+def drop_index(apps, schema_editor):
+    _run(schema_editor, reverse=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,25 @@
+from django.db import models
+
+
+class SearchEntry(models.Model):
+    """
+    One searchable record, denormalised from the model it points at.
+
+    The backend-specific index (a generated ``tsvector`` column with GIN and
+    trigram indexes on PostgreSQL, an FTS5 table kept in step by triggers on
+    SQLite) is created by migration 0002 and is not a model field.
+    """
+
+    kind = models.CharField(max_length=20)
+    object_id = models.PositiveBigIntegerField()
+    title = models.CharField(max_length=255)
+    keywords = models.CharField(max_length=255, blank=True)
+    body = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('kind', 'object_id')
+        verbose_name_plural = 'search entries'
+
+    def __str__(self):
+        return f"{self.kind}: {self.title}"
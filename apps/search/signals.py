@@ -0,0 +1,51 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.students.models import Student, StudentBulkUpload
+from lessonplans.models import ClassLevel, Subject
+
+from .documents import REGISTRY
+from .index import index_instance, index_missing, index_queryset, remove_instance
+
+
+def _connect(kind, model):
+    def on_save(sender, instance, raw=False, **kwargs):
+        if not raw:
+            index_instance(kind, instance)
+
+    def on_delete(sender, instance, **kwargs):
+        remove_instance(kind, instance.pk)
+
+    post_save.connect(on_save, sender=model, weak=False, dispatch_uid=f'search-save-{kind}')
+    post_delete.connect(on_delete, sender=model, weak=False, dispatch_uid=f'search-delete-{kind}')
+
+
+for document in REGISTRY.values():
+    _connect(document.kind, document.model)
+
+
+@receiver(post_save, sender=Student, dispatch_uid='search-student-invoices')
+def reindex_student_invoices(sender, instance, created, raw=False, **kwargs):
+    # Invoice entries carry the student's name and registration number
+    if not created and not raw:
+        index_queryset('invoice', REGISTRY['invoice'].queryset().filter(student=instance))
+
+
+@receiver(post_delete, sender=StudentBulkUpload, dispatch_uid='search-student-bulk-upload')
+def index_uploaded_students(sender, **kwargs):
+    # The CSV import job uses bulk_create, which sends no post_save per
+    # student, and deletes the upload once the students exist
+    index_missing('student')
+
+
+@receiver(post_save, sender=Subject, dispatch_uid='search-lessonplan-subject')
+@receiver(post_save, sender=ClassLevel, dispatch_uid='search-lessonplan-class-level')
+def reindex_lessonplans(sender, instance, created, raw=False, **kwargs):
+    if created or raw:
+        return
+    plans = REGISTRY['lessonplan'].queryset()
+    if sender is Subject:
+        plans = plans.filter(subject=instance)
+    else:
+        plans = plans.filter(class_level=instance)
+    index_queryset('lessonplan', plans)
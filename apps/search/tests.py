@@ -0,0 +1,114 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from apps.students.models import Student
+from lessonplans.models import LessonPlan
+
+from .backends import search
+from .index import rebuild
+from .models import SearchEntry
+
+
+class SearchIndexTest(TestCase):
+    def setUp(self):
+        self.student = Student.objects.create(
+            registration_number="GB/2024/0042", surname="Wanjiku", firstname="Achieng"
+        )
+        Student.objects.create(registration_number="GB/2024/0043", surname="Otieno", firstname="Brian")
+
+    def test_signals_keep_index_in_step(self):
+        self.assertEqual(SearchEntry.objects.filter(kind='student').count(), 2)
+
+        self.student.surname = "Kamau"
+        self.student.save()
+        self.assertEqual([h.object_id for h in search("kamau")], [self.student.pk])
+        self.assertEqual(search("wanjiku"), [])
+
+        self.student.delete()
+        self.assertEqual(search("kamau"), [])
+
+    def test_prefix_registration_number_and_typo_matches(self):
+        self.assertEqual(search("wanj")[0].object_id, self.student.pk)
+        self.assertEqual(search("2024 0042")[0].object_id, self.student.pk)
+        self.assertEqual(search("wanjku")[0].object_id, self.student.pk)
+        self.assertEqual(search("zzzz"), [])
+
+    def test_rebuild_restores_entries(self):
+        SearchEntry.objects.all().delete()
+        self.assertEqual(rebuild(['student']), {'student': 2})
+        self.assertEqual(search("otieno")[0].title, "Otieno Brian")
+
+
+class GlobalSearchViewTest(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user('teacher', password='pass')
+        self.other = User.objects.create_user('other', password='pass')
+        LessonPlan.objects.create(
+            title="Photosynthesis basics", teacher=self.teacher, objectives="Leaves",
+            content="Chlorophyll and light", activities="Lab", visibility='private',
+        )
+        Student.objects.create(registration_number="REG1", surname="Photon", firstname="Ann")
+
+    def test_navbar_sections_and_lessonplan_visibility(self):
+        self.client.login(username='teacher', password='pass')
+        data = self.client.get(
+            reverse('corecode:global-search'), {'q': 'photo'}, secure=True
+        ).json()
+        self.assertEqual([s['label'] for s in data['students']], ["Photon Ann"])
+        self.assertEqual([p['label'] for p in data['lessonplans']], ["Photosynthesis basics"])
+
+        self.client.login(username='other', password='pass')
+        data = self.client.get(
+            reverse('corecode:global-search'), {'q': 'chlorophyll', 'kind': 'lessonplan'}, secure=True
+        ).json()
+        self.assertEqual(data, {'lessonplans': []})
+
+    def test_limit_applies_per_kind_after_visibility(self):
+        for i in range(3):
+            Student.objects.create(registration_number=f"REG{i + 2}", surname="Photon", firstname=f"Kid{i}")
+            LessonPlan.objects.create(
+                title=f"Photosynthesis part {i}", teacher=self.teacher, objectives="Leaves",
+                content="Light", activities="Lab", visibility='private',
+            )
+        LessonPlan.objects.create(
+            title="Photography club", teacher=self.teacher, objectives="Cameras",
+            content="Light", activities="Walk", visibility='teachers',
+        )
+
+        self.client.login(username='other', password='pass')
+        data = self.client.get(
+            reverse('corecode:global-search'), {'q': 'photo', 'limit': 2}, secure=True
+        ).json()
+        self.assertEqual(len(data['students']), 2)
+        self.assertEqual([p['label'] for p in data['lessonplans']], ["Photography club"])
+
+
+class LessonPlanListSearchTest(TestCase):
+    def test_filters_apply_before_results_are_paged(self):
+        teacher = User.objects.create_user('teacher', is_staff=True, password='pass')
+        # Better-ranked drafts than any published match
+        LessonPlan.objects.bulk_create([
+            LessonPlan(
+                title="Photosynthesis", teacher=teacher, objectives="Leaves",
+                content="Light", activities="Lab", status='draft',
+            )
+            for i in range(205)
+        ] + [
+            LessonPlan(
+                title=f"Photosynthesis and respiration in green plants, week {i}", teacher=teacher,
+                objectives="Leaves", content="Light", activities="Lab", status='published',
+            )
+            for i in range(12)
+        ])
+        rebuild()
+        published = set(LessonPlan.objects.filter(status='published').values_list('pk', flat=True))
+
+        self.client.login(username='teacher', password='pass')
+        url = reverse('lessonplans:list')
+        params = {'search': 'photosynthesis', 'status': 'published'}
+        first = self.client.get(url, params, secure=True)
+        self.assertEqual(first.context['paginator'].count, 12)
+        second = self.client.get(url, {**params, 'page': 2}, secure=True)
+        pages = [plan.pk for response in (first, second) for plan in response.context['lessonplans']]
+        self.assertEqual((len(pages), set(pages)), (12, published))
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-19 06:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('staffs', '0005_staff_device_id_staff_last_modified_staff_sync_id_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='staff',
+            index=models.Index(fields=['last_modified'], name='staff_modified_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='staff',
+            index=models.Index(condition=models.Q(('sync_status', 'synced'), _negated=True), fields=['sync_status'], name='staff_pending_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teacherattendance',
+            index=models.Index(fields=['last_modified'], name='teacher_att_modified_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teacherattendance',
+            index=models.Index(condition=models.Q(('sync_status', 'synced'), _negated=True), fields=['sync_status'], name='teacher_att_pending_idx'),
+        ),
+    ]
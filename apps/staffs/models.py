@@ -40,6 +40,15 @@ class Staff(models.Model):
     last_modified = models.DateTimeField(auto_now=True)
     device_id = models.CharField(max_length=100, blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['last_modified'], name='staff_modified_idx'),
+            models.Index(
+                fields=['sync_status'], name='staff_pending_sync_idx',
+                condition=~models.Q(sync_status='synced'),
+            ),
+        ]
+
     def save(self, *args, **kwargs):
         # Generate sync_id if it doesn't exist
         if not self.sync_id:
@@ -96,6 +105,13 @@ class TeacherAttendance(models.Model):
         verbose_name_plural = "Teacher Attendances"
         unique_together = ['teacher', 'date']  # One attendance per teacher per day
         ordering = ['-date', 'teacher']
+        indexes = [
+            models.Index(fields=['last_modified'], name='teacher_att_modified_idx'),
+            models.Index(
+                fields=['sync_status'], name='teacher_att_pending_idx',
+                condition=~models.Q(sync_status='synced'),
+            ),
+        ]
 
     def save(self, *args, **kwargs):
         # Generate sync_id if it doesn't exist
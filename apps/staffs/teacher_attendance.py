@@ -0,0 +1,149 @@
+"""
+Teacher attendance: marking a day in bulk, and the statistics behind the
+staff attendance dashboard and its JSON endpoint.
+
+``mark_day`` reads the day's existing rows once and writes the rest with
+one ``bulk_create`` and one ``bulk_update``. Rows whose values did not
+change are left alone so their ``last_modified`` does not send them to
+every syncing device again.
+
+``teacher_stats`` and ``monthly_stats`` aggregate in SQL: status counts,
+hours worked from ``time_out - time_in`` and the average arrival time,
+grouped per teacher or per month.
+"""
+import uuid
+
+from django.db import transaction
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import ExtractHour, ExtractMinute, TruncMonth
+from django.utils import timezone
+from django.utils.dateparse import parse_time
+
+from .models import TeacherAttendance
+
+MARK_FIELDS = ['status', 'time_in', 'time_out', 'notes']
+
+
+def mark_day(day, marks):
+    """
+    Save ``marks`` ({teacher_id: {'status', 'time_in', 'time_out', 'notes'}},
+    times as ``HH:MM`` strings or None) for ``day``.
+    Returns (created, updated).
+    """
+    existing = {
+        record.teacher_id: record
+        for record in TeacherAttendance.objects.filter(date=day, teacher_id__in=list(marks)).order_by()
+    }
+    now = timezone.now()
+    to_create, to_update = [], []
+    for teacher_id, mark in marks.items():
+        values = {
+            'status': mark.get('status') or 'absent',
+            'time_in': parse_time(mark['time_in']) if mark.get('time_in') else None,
+            'time_out': parse_time(mark['time_out']) if mark.get('time_out') else None,
+            'notes': mark.get('notes', ''),
+        }
+        record = existing.get(teacher_id)
+        if record is None:
+            to_create.append(TeacherAttendance(teacher_id=teacher_id, date=day, sync_id=uuid.uuid4(), **values))
+        elif any(getattr(record, field) != value for field, value in values.items()):
+            for field, value in values.items():
+                setattr(record, field, value)
+            record.last_modified = now
+            to_update.append(record)
+
+    with transaction.atomic():
+        TeacherAttendance.objects.bulk_create(to_create)
+        TeacherAttendance.objects.bulk_update(to_update, MARK_FIELDS + ['last_modified'])
+    return len(to_create), len(to_update)
+
+
+def _percent(part, whole):
+    return round(part / whole * 100, 1) if whole else None
+
+
+def _hours(duration):
+    return round(duration.total_seconds() / 3600, 2) if duration else 0.0
+
+
+def _clock(minutes):
+    """Minutes after midnight as HH:MM"""
+    if minutes is None:
+        return None
+    minutes = round(minutes)
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def _aggregates():
+    """Counts, hours and arrival time over a TeacherAttendance queryset"""
+    worked = ExpressionWrapper(F('time_out') - F('time_in'), output_field=DurationField())
+    both_times = Q(time_in__isnull=False, time_out__isnull=False, time_out__gt=F('time_in'))
+    return {
+        'days': Count('id'),
+        'present': Count('id', filter=Q(status='present')),
+        'late': Count('id', filter=Q(status='late')),
+        'absent': Count('id', filter=Q(status='absent')),
+        'half_day': Count('id', filter=Q(status='half_day')),
+        'leave': Count('id', filter=Q(status='leave')),
+        'timed_days': Count('id', filter=both_times),
+        'hours': Sum(worked, filter=both_times),
+        'arrival': Avg(ExtractHour('time_in') * 60 + ExtractMinute('time_in'), filter=Q(time_in__isnull=False)),
+    }
+
+
+def _summary(row):
+    """Rates from one aggregated row; leave days count neither way"""
+    attended = row['present'] + row['late'] + row['half_day']
+    return {
+        'days': row['days'],
+        'present': row['present'],
+        'late': row['late'],
+        'absent': row['absent'],
+        'half_day': row['half_day'],
+        'leave': row['leave'],
+        'attendance_rate': _percent(attended, row['days'] - row['leave']),
+        'punctuality_rate': _percent(row['present'], row['present'] + row['late']),
+        'hours_worked': _hours(row['hours']),
+        'average_hours': round(_hours(row['hours']) / row['timed_days'], 2) if row['timed_days'] else None,
+        'average_arrival': _clock(row['arrival']),
+    }
+
+
+def teacher_stats(records):
+    """
+    One row per teacher over ``records`` (a TeacherAttendance queryset),
+    ordered by name; a values queryset, so it can be paginated.
+    """
+    return (
+        records.values('teacher_id', 'teacher__surname', 'teacher__firstname')
+        .annotate(**_aggregates())
+        .order_by('teacher__surname', 'teacher__firstname', 'teacher_id')
+    )
+
+
+def teacher_row(row):
+    return {
+        'teacher_id': row['teacher_id'],
+        'name': f"{row['teacher__firstname']} {row['teacher__surname']}",
+        **_summary(row),
+    }
+
+
+def monthly_stats(records):
+    """One summary per month over ``records``, oldest first"""
+    rows = (
+        records.annotate(month=TruncMonth('date'))
+        .values('month')
+        .annotate(**_aggregates())
+        .order_by('month')
+    )
+    return [{'month': row['month'].strftime('%Y-%m'), **_summary(row)} for row in rows]
+
+
+def day_counts(day):
+    """{status: teachers} for ``day`` in one query"""
+    return TeacherAttendance.objects.filter(date=day).aggregate(
+        present=Count('id', filter=Q(status='present')),
+        absent=Count('id', filter=Q(status='absent')),
+        late=Count('id', filter=Q(status='late')),
+    )
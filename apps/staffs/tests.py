@@ -1,3 +1,91 @@
+import datetime
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.urls import reverse
+
+from . import teacher_attendance
+from .models import Staff, TeacherAttendance
+
+MONDAY = datetime.date(2026, 9, 28)
+
+
+class TeacherAttendanceTest(TestCase):
+    def setUp(self):
+        self.wanjiru = Staff.objects.create(surname='Wanjiru', firstname='Grace')
+        self.odhiambo = Staff.objects.create(surname='Odhiambo', firstname='Peter')
+        self.client.force_login(get_user_model().objects.create_user('staff-clerk', password='pw'))
+
+    def post_day(self, day, marks):
+        data = {'attendance_date': day.isoformat()}
+        for staff, (status, time_in, time_out) in marks.items():
+            data.update({
+                f'status_{staff.pk}': status,
+                f'time_in_{staff.pk}': time_in,
+                f'time_out_{staff.pk}': time_out,
+            })
+        return self.client.post(reverse('staffs:mark-attendance'), data, secure=True)
+
+    def test_bulk_marking(self):
+        marks = {self.wanjiru.pk: {'status': 'present', 'time_in': '07:30'}, self.odhiambo.pk: {'status': 'late'}}
+        with self.assertNumQueries(4):  # existing rows, then the insert inside a savepoint
+            self.assertEqual(teacher_attendance.mark_day(MONDAY, marks), (2, 0))
+        self.assertEqual(TeacherAttendance.objects.filter(sync_id__isnull=True).count(), 0)
+
+        unchanged = TeacherAttendance.objects.get(teacher=self.wanjiru)
+        marks[self.odhiambo.pk]['status'] = 'present'
+        self.assertEqual(teacher_attendance.mark_day(MONDAY, marks), (0, 1))
+        self.assertEqual(TeacherAttendance.objects.get(teacher=self.wanjiru).last_modified, unchanged.last_modified)
+
+        response = self.post_day(MONDAY, {self.wanjiru: ('absent', '', ''), self.odhiambo: ('present', '', '')})
+        self.assertRedirects(response, reverse('staffs:attendance-dashboard'), fetch_redirect_response=False)
+        self.assertEqual(TeacherAttendance.objects.get(teacher=self.wanjiru).status, 'absent')
+
+    def test_analytics(self):
+        self.post_day(MONDAY, {
+            self.wanjiru: ('present', '07:30', '16:00'), self.odhiambo: ('late', '08:30', '16:00'),
+        })
+        self.post_day(MONDAY + datetime.timedelta(days=1), {
+            self.wanjiru: ('present', '07:00', '15:30'), self.odhiambo: ('leave', '', ''),
+        })
+        self.post_day(datetime.date(2026, 10, 1), {
+            self.wanjiru: ('absent', '', ''), self.odhiambo: ('present', '07:45', '12:45'),
+        })
+
+        response = self.client.get(reverse('staffs:attendance-analytics'), {
+            'date_from': '2026-09-01', 'date_to': '2026-10-31', 'page_size': 1,
+        }, secure=True)
+        data = response.json()
+        self.assertEqual((data['count'], data['num_pages']), (2, 2))
+        [odhiambo] = data['teachers']
+        self.assertEqual(odhiambo['name'], 'Peter Odhiambo')
+        self.assertEqual((odhiambo['days'], odhiambo['leave']), (3, 1))
+        self.assertEqual(odhiambo['attendance_rate'], 100.0)
+        self.assertEqual(odhiambo['punctuality_rate'], 50.0)
+        self.assertEqual((odhiambo['hours_worked'], odhiambo['average_hours']), (12.5, 6.25))
+        self.assertEqual(odhiambo['average_arrival'], '08:08')
+        self.assertEqual(
+            [(month['month'], month['attendance_rate']) for month in data['months']],
+            [('2026-09', 100.0), ('2026-10', 50.0)],
+        )
+
+        wanjiru = self.client.get(reverse('staffs:attendance-analytics'), {
+            'date_from': '2026-09-01', 'date_to': '2026-10-31', 'page_size': 1, 'page': 2,
+        }, secure=True).json()['teachers'][0]
+        self.assertEqual(
+            (wanjiru['name'], wanjiru['attendance_rate'], wanjiru['hours_worked']), ('Grace Wanjiru', 66.7, 17.0)
+        )
+
+    def test_analytics_rejects_bad_parameters(self):
+        url = reverse('staffs:attendance-analytics')
+        self.post_day(MONDAY, {self.wanjiru: ('present', '07:30', '16:00')})
+        response = self.client.get(url, {'date_from': '2026-09-01', 'teacher': 'abc'}, secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 0)
 
-# Create your tests here.
+        for params in ({'date_from': 'yesterday'}, {'date_to': '2026-02-30'},
+                       {'date_from': '2026-10-01', 'date_to': '2026-09-01'}):
+            with self.subTest(**params):
+                response = self.client.get(url, params, secure=True)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.json())
@@ -4,6 +4,7 @@ from .views import (
     StaffCreateView,
     StaffDeleteView,
     StaffDetailView,
+    StaffListData,
     StaffListView,
     StaffUpdateView,
 )
@@ -12,6 +13,7 @@ app_name = 'staffs'
 
 urlpatterns = [
     path("list/", StaffListView.as_view(), name="staff-list"),
+    path("list/data/", StaffListData.as_view(), name="staff-list-data"),
     path("<int:pk>/", StaffDetailView.as_view(), name="staff-detail"),
     path("create/", StaffCreateView.as_view(), name="staff-create"),
     path("<int:pk>/update/", StaffUpdateView.as_view(), name="staff-update"),
@@ -19,4 +21,6 @@ urlpatterns = [
     path('attendance/', views.teacher_attendance_dashboard, name='attendance-dashboard'),
     path('attendance/mark/', views.mark_attendance, name='mark-attendance'),
     path('attendance/records/', views.attendance_records, name='attendance-records'),
+    path('attendance/records/data/', views.AttendanceRecordData.as_view(), name='attendance-records-data'),
+    path('attendance/analytics/', views.attendance_analytics, name='attendance-analytics'),
 ]
\ No newline at end of file
@@ -1,23 +1,56 @@
 from django.contrib.messages.views import SuccessMessageMixin
 from django.forms import widgets
 from django.shortcuts import render, redirect, get_object_or_404
-from django.urls import reverse_lazy
-from django.views.generic import DetailView, ListView
+from django.urls import reverse, reverse_lazy
+from django.views.generic import DetailView, TemplateView
 from django.views.generic.edit import CreateView, DeleteView, UpdateView
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.core.paginator import Paginator
 from django.utils import timezone
+from django.http import JsonResponse
+from django.utils.dateparse import parse_date
 from datetime import datetime, date
 
+from apps.corecode import images
+from apps.corecode.datatables import Column, ListEndpoint
+
+from . import teacher_attendance
 from .models import Staff, TeacherAttendance
 
 
-class StaffListView(ListView):
-    model = Staff
+class StaffListView(TemplateView):
+    """The staff table; rows come a page at a time from StaffListData"""
     template_name = "staffs/staff_list.html"
 
 
+class StaffListData(ListEndpoint):
+    columns = [
+        Column("name", sort=("surname", "firstname"), search=(
+            "surname__icontains", "firstname__icontains", "other_name__icontains",
+        )),
+        Column("gender", sort="gender", filter="gender"),
+        Column("mobile_number", sort="mobile_number", search=("mobile_number__icontains",)),
+        Column("status", sort="current_status", filter="current_status"),
+    ]
+    default_order = ("surname", "firstname")
+
+    def get_queryset(self):
+        return Staff.objects.all()
+
+    def row(self, staff):
+        return {
+            "id": staff.pk,
+            "url": reverse("staffs:staff-detail", args=[staff.pk]),
+            "name": " ".join(filter(None, (staff.surname, staff.firstname, staff.other_name))),
+            "gender": staff.get_gender_display(),
+            "mobile_number": staff.mobile_number,
+            "status": staff.current_status,
+            "status_display": staff.get_current_status_display(),
+            "image": images.url(staff.image, "xs"),
+        }
+
+
 class StaffDetailView(DetailView):
     model = Staff
     template_name = "staffs/staff_detail.html"
@@ -72,11 +105,9 @@ def teacher_attendance_dashboard(request):
     """Teacher Attendance Dashboard"""
     today = timezone.now().date()
     
-    # Get today's attendance stats
-    today_attendance = TeacherAttendance.objects.filter(date=today)
-    present_count = today_attendance.filter(status='present').count()
-    absent_count = today_attendance.filter(status='absent').count()
-    late_count = today_attendance.filter(status='late').count()
+    # Today's stats in one aggregate
+    counts = teacher_attendance.day_counts(today)
+    present_count, absent_count, late_count = counts['present'], counts['absent'], counts['late']
     total_teachers = Staff.objects.filter(current_status='active').count()
     
     context = {
@@ -100,23 +131,16 @@ def mark_attendance(request):
         date_str = request.POST.get('attendance_date', today.isoformat())
         attendance_date = datetime.strptime(date_str, '%Y-%m-%d').date()
         
-        for teacher in teachers:
-            status = request.POST.get(f'status_{teacher.id}', 'absent')
-            time_in = request.POST.get(f'time_in_{teacher.id}', '')
-            time_out = request.POST.get(f'time_out_{teacher.id}', '')
-            notes = request.POST.get(f'notes_{teacher.id}', '')
-            
-            # Create or update attendance record
-            attendance, created = TeacherAttendance.objects.update_or_create(
-                teacher=teacher,
-                date=attendance_date,
-                defaults={
-                    'status': status,
-                    'time_in': time_in if time_in else None,
-                    'time_out': time_out if time_out else None,
-                    'notes': notes,
-                }
-            )
+        # One read of the day's rows, then one insert and one update
+        teacher_attendance.mark_day(attendance_date, {
+            teacher.id: {
+                'status': request.POST.get(f'status_{teacher.id}', 'absent'),
+                'time_in': request.POST.get(f'time_in_{teacher.id}', ''),
+                'time_out': request.POST.get(f'time_out_{teacher.id}', ''),
+                'notes': request.POST.get(f'notes_{teacher.id}', ''),
+            }
+            for teacher in teachers
+        })
         
         messages.success(request, f'Attendance marked successfully for {attendance_date}')
         return redirect('staffs:attendance-dashboard')
@@ -127,7 +151,7 @@ def mark_attendance(request):
     
     # Get existing attendance records for the selected date
     existing_attendance = TeacherAttendance.objects.filter(date=attendance_date)
-    attendance_dict = {att.teacher.id: att for att in existing_attendance}
+    attendance_dict = {att.teacher_id: att for att in existing_attendance}
     
     context = {
         'teachers': teachers,
@@ -140,38 +164,102 @@ def mark_attendance(request):
 
 @login_required
 def attendance_records(request):
-    """View attendance records"""
-    records = TeacherAttendance.objects.select_related('teacher').all()
-    
-    # Filtering
-    teacher_id = request.GET.get('teacher')
-    month = request.GET.get('month')
-    status = request.GET.get('status')
-    
-    if teacher_id:
-        records = records.filter(teacher_id=teacher_id)
-    if month:
-        records = records.filter(date__month=month)
-    if status:
-        records = records.filter(status=status)
-    
-    # Pagination
-    paginator = Paginator(records, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    
-    teachers = Staff.objects.filter(current_status='active')
-    
+    """View attendance records; rows come a page at a time from AttendanceRecordData"""
     context = {
-        'page_obj': page_obj,
-        'teachers': teachers,
-        'selected_teacher': teacher_id,
-        'selected_month': month,
-        'selected_status': status,
+        'teachers': Staff.objects.filter(current_status='active').order_by('firstname', 'surname'),
+        'months': [(number, date(2000, number, 1).strftime('%B')) for number in range(1, 13)],
     }
     return render(request, 'staffs/attendance_records.html', context)
 
 
+def _month(records, value):
+    return records.filter(date__month=int(value))
+
+
+class AttendanceRecordData(ListEndpoint):
+    columns = [
+        Column('date', sort='date', filter=_month),
+        Column('teacher', sort=('teacher__firstname', 'teacher__surname'), filter='teacher_id', search=(
+            'teacher__surname__icontains', 'teacher__firstname__icontains',
+        )),
+        Column('status', sort='status', filter='status'),
+        Column('time_in', sort='time_in'),
+        Column('time_out', sort='time_out'),
+        Column('notes', search=('notes__icontains',)),
+    ]
+    default_order = ('-date', 'teacher__firstname', 'teacher__surname')
+
+    def get_queryset(self):
+        return TeacherAttendance.objects.select_related('teacher')
+
+    def row(self, record):
+        return {
+            'id': record.pk,
+            'date': record.date.isoformat(),
+            'teacher': f"{record.teacher.firstname} {record.teacher.surname}",
+            'other_name': record.teacher.other_name,
+            'status': record.status,
+            'status_display': record.get_status_display(),
+            'time_in': record.time_in.strftime('%H:%M') if record.time_in else None,
+            'time_out': record.time_out.strftime('%H:%M') if record.time_out else None,
+            'hours_worked': record.hours_worked,
+            'notes': record.notes,
+        }
+
+
+def _date_param(request, name, default):
+    """The YYYY-MM-DD date in ``request.GET[name]``, ``default`` if absent; ValueError if invalid"""
+    value = request.GET.get(name)
+    if not value:
+        return default
+    try:
+        parsed = parse_date(value)
+    except ValueError:  # well formed but impossible, e.g. 2026-02-30
+        parsed = None
+    if parsed is None:
+        raise ValueError(f"{name} must be a date as YYYY-MM-DD")
+    return parsed
+
+
+@login_required
+def attendance_analytics(request):
+    """
+    Staff attendance statistics as JSON: one page of per-teacher rows
+    (punctuality, hours worked, rates) and the monthly rates, over
+    ``date_from``..``date_to`` (default: this calendar year). Invalid or
+    reversed dates are a 400 with an ``error`` message.
+    """
+    today = timezone.now().date()
+    try:
+        date_from = _date_param(request, 'date_from', today.replace(month=1, day=1))
+        date_to = _date_param(request, 'date_to', today)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    if date_from > date_to:
+        return JsonResponse({'error': 'date_from is after date_to'}, status=400)
+    records = TeacherAttendance.objects.filter(date__range=(date_from, date_to))
+    teacher_id = request.GET.get('teacher')
+    if teacher_id:
+        # As ListEndpoint filters do: a value that is not an id matches nothing
+        records = records.filter(teacher_id=teacher_id) if teacher_id.isdigit() else records.none()
+
+    try:
+        page_size = min(max(int(request.GET.get('page_size', 25)), 1), 100)
+    except ValueError:
+        page_size = 25
+    page_obj = Paginator(teacher_attendance.teacher_stats(records), page_size).get_page(request.GET.get('page'))
+
+    return JsonResponse({
+        'date_from': date_from.isoformat(),
+        'date_to': date_to.isoformat(),
+        'teachers': [teacher_attendance.teacher_row(row) for row in page_obj],
+        'page': page_obj.number,
+        'num_pages': page_obj.paginator.num_pages,
+        'count': page_obj.paginator.count,
+        'months': teacher_attendance.monthly_stats(records),
+    })
+
+
 # Custom template filter for the mark_attendance template
 def get_item(dictionary, key):
     return dictionary.get(key)
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-19 06:57
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('corecode', '0007_profile'),
+        ('students', '0004_student_device_id_student_last_modified_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(django.db.models.functions.text.Upper('registration_number'), name='student_regno_upper_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['last_modified'], name='student_modified_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(condition=models.Q(('sync_status', 'synced'), _negated=True), fields=['sync_status'], name='student_pending_sync_idx'),
+        ),
+    ]
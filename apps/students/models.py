@@ -1,12 +1,26 @@
 import uuid
 from django.core.validators import RegexValidator
 from django.db import models
+from django.db.models import Value
+from django.db.models.functions import Upper
 from django.urls import reverse
 from django.utils import timezone
 
 from apps.corecode.models import StudentClass
 
 
+class StudentQuerySet(models.QuerySet):
+    def by_registration_number(self, registration_number):
+        """
+        Case-insensitive match on the registration number. Unlike
+        ``__iexact`` (a LIKE on SQLite) this compares UPPER() on both sides,
+        so it can use ``student_regno_upper_idx`` on every backend.
+        """
+        return self.alias(registration_upper=Upper('registration_number')).filter(
+            registration_upper=Upper(Value(registration_number))
+        )
+
+
 class Student(models.Model):
     STATUS_CHOICES = [("active", "Active"), ("inactive", "Inactive")]
     GENDER_CHOICES = [("male", "Male"), ("female", "Female")]
@@ -61,8 +75,19 @@ class Student(models.Model):
     last_modified = models.DateTimeField(auto_now=True)
     device_id = models.CharField(max_length=100, blank=True, null=True)
 
+    objects = StudentQuerySet.as_manager()
+
     class Meta:
         ordering = ["surname", "firstname", "other_name"]
+        indexes = [
+            # Serves by_registration_number() (and __iexact on PostgreSQL)
+            models.Index(Upper('registration_number'), name='student_regno_upper_idx'),
+            models.Index(fields=['last_modified'], name='student_modified_idx'),
+            models.Index(
+                fields=['sync_status'], name='student_pending_sync_idx',
+                condition=~models.Q(sync_status='synced'),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.surname} {self.firstname} {self.other_name} ({self.registration_number})"
@@ -0,0 +1,73 @@
+import csv
+from io import StringIO
+
+from apps.corecode.models import StudentClass
+from apps.jobs.queue import task
+
+from .models import Student, StudentBulkUpload
+
+
+@task("students.import_csv", queue="imports", priority=5)
+def import_csv(job, upload_id):
+    instance = StudentBulkUpload.objects.get(pk=upload_id)
+    with instance.csv_file.open("rb") as csv_file:
+        rows = list(csv.DictReader(StringIO(csv_file.read().decode()), delimiter=","))
+
+    existing = set(Student.objects.values_list("registration_number", flat=True))
+    students = []
+    skipped = []
+    for done, row in enumerate(rows, start=1):
+        if "registration_number" in row and row["registration_number"]:
+            reg = row["registration_number"]
+            surname = row["surname"] if "surname" in row and row["surname"] else ""
+            firstname = (
+                row["firstname"] if "firstname" in row and row["firstname"] else ""
+            )
+            other_names = (
+                row["other_names"]
+                if "other_names" in row and row["other_names"]
+                else ""
+            )
+            gender = (
+                (row["gender"]).lower() if "gender" in row and row["gender"] else ""
+            )
+            phone = (
+                row["parent_number"]
+                if "parent_number" in row and row["parent_number"]
+                else ""
+            )
+            address = row["address"] if "address" in row and row["address"] else ""
+            current_class = (
+                row["current_class"]
+                if "current_class" in row and row["current_class"]
+                else ""
+            )
+            theclass = None
+            if current_class:
+                theclass, kind = StudentClass.objects.get_or_create(
+                    name=current_class
+                )
+
+            if reg in existing:
+                skipped.append(f"{reg}: registration number already exists")
+            else:
+                existing.add(reg)
+                students.append(
+                    Student(
+                        registration_number=reg,
+                        surname=surname,
+                        firstname=firstname,
+                        other_name=other_names,
+                        gender=gender,
+                        current_class=theclass,
+                        parent_mobile_number=phone,
+                        address=address,
+                        current_status="active",
+                    )
+                )
+        job.report_progress(done, len(rows), f"Read {done} of {len(rows)} rows")
+
+    Student.objects.bulk_create(students)
+    instance.delete()
+    job.report_progress(100, message=f"Imported {len(students)} student(s)")
+    return {"imported": len(students), "errors": skipped}
@@ -8,6 +8,7 @@ from .views import (
     StudentCreateView,
     StudentDeleteView,
     StudentDetailView,
+    StudentListData,
     StudentListView,
     StudentUpdateView,
 )
@@ -16,6 +17,7 @@ app_name = 'students'
 
 urlpatterns = [
     path("list/", StudentListView.as_view(), name="student-list"),
+    path("list/data/", StudentListData.as_view(), name="student-list-data"),
     path("<int:pk>/", StudentDetailView.as_view(), name="student-detail"),
     path("create/", StudentCreateView.as_view(), name="student-create"),
     path("<int:pk>/update/", StudentUpdateView.as_view(), name="student-update"),
@@ -4,19 +4,57 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.messages.views import SuccessMessageMixin
 from django.forms import widgets
 from django.http import HttpResponse
-from django.urls import reverse_lazy
-from django.views.generic import DetailView, ListView, View
+from django.urls import reverse, reverse_lazy
+from django.views.generic import DetailView, TemplateView, View
 from django.views.generic.edit import CreateView, DeleteView, UpdateView
 
+from apps.corecode import images
+from apps.corecode.datatables import Column, ListEndpoint
+from apps.corecode.models import StudentClass
 from apps.finance.models import Invoice
 
 from .models import Student, StudentBulkUpload
 
 
-class StudentListView(LoginRequiredMixin, ListView):
-    model = Student
+class StudentListView(LoginRequiredMixin, TemplateView):
+    """The student table; rows come a page at a time from StudentListData"""
     template_name = "students/student_list.html"
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["classes"] = StudentClass.objects.all()
+        return context
+
+
+class StudentListData(ListEndpoint):
+    columns = [
+        Column("name", sort=("surname", "firstname"), search=(
+            "surname__icontains", "firstname__icontains", "other_name__icontains",
+        )),
+        Column("registration_number", sort="registration_number", search=("registration_number__icontains",)),
+        Column("current_class", sort="current_class__name", filter="current_class_id"),
+        Column("gender", sort="gender", filter="gender"),
+        Column("mobile", sort="parent_mobile_number", search=("parent_mobile_number__icontains",)),
+        Column("status", sort="current_status", filter="current_status"),
+    ]
+    default_order = ("surname", "firstname")
+
+    def get_queryset(self):
+        return Student.objects.select_related("current_class")
+
+    def row(self, student):
+        return {
+            "id": student.pk,
+            "url": reverse("students:student-detail", args=[student.pk]),
+            "name": " ".join(filter(None, (student.surname, student.firstname, student.other_name))),
+            "registration_number": student.registration_number,
+            "current_class": str(student.current_class or ""),
+            "gender": student.get_gender_display(),
+            "mobile": student.parent_mobile_number,
+            "status": student.current_status,
+            "passport": images.url(student.passport, "xs"),
+        }
+
 
 class StudentDetailView(LoginRequiredMixin, DetailView):
     model = Student
@@ -91,8 +129,15 @@ class StudentBulkUploadView(LoginRequiredMixin, SuccessMessageMixin, CreateView)
     model = StudentBulkUpload
     template_name = "students/students_upload.html"
     fields = ["csv_file"]
-    success_url = "/students/list/"
-    success_message = "Successfully uploaded students"
+    success_message = "Upload received; students are being imported"
+
+    def form_valid(self, form):
+        # The post_save signal queues the import job as this user
+        form.instance.uploaded_by = self.request.user
+        return super().form_valid(form)
+
+    def get_success_url(self):
+        return self.object.import_job.get_absolute_url()
 
 
 class DownloadCSVViewdownloadcsv(LoginRequiredMixin, View):
@@ -91,115 +91,115 @@ class SyncData(View):
             print(f"Traceback: {traceback.format_exc()}")
             return None
     
-def process_teacher_attendance_change(self, operation, data, device_id):
-    print(f"🔄 Processing teacher_attendance {operation}: {data}")
-    
-    if operation == 'create':
-        # Check if already exists by sync_id
-        if TeacherAttendance.objects.filter(sync_id=data['sync_id']).exists():
-            print(f"⚠️ Already exists by sync_id: {data['sync_id']}")
-            return None
-        
-        # Get teacher - for testing, use first available teacher
-        try:
-            teacher = Staff.objects.first()
-            if not teacher:
-                print("❌ No teachers found in database")
+    def process_teacher_attendance_change(self, operation, data, device_id):
+        print(f"🔄 Processing teacher_attendance {operation}: {data}")
+
+        if operation == 'create':
+            # Check if already exists by sync_id
+            if TeacherAttendance.objects.filter(sync_id=data['sync_id']).exists():
+                print(f"⚠️ Already exists by sync_id: {data['sync_id']}")
                 return None
-            
-            # Handle time fields - convert string to time object if needed
-            time_in = data.get('time_in')
-            time_out = data.get('time_out')
-            
-            # If time_in/time_out are strings, parse them
-            if time_in and isinstance(time_in, str):
-                time_in = parse_time(time_in)
-            if time_out and isinstance(time_out, str):
-                time_out = parse_time(time_out)
-            
+
+            # Get teacher - for testing, use first available teacher
             try:
-                # Try to create the attendance record
-                attendance = TeacherAttendance.objects.create(
-                    teacher=teacher,
-                    date=data['date'],
-                    status=data['status'],
-                    time_in=time_in,
-                    time_out=time_out,
-                    notes=data.get('notes', ''),
-                    sync_id=data['sync_id'],
-                    sync_status='synced',
-                    device_id=device_id
-                )
-                print(f"✅ Created teacher attendance: {attendance}")
-                return self.serialize_teacher_attendance(attendance, 'create')
-                
-            except IntegrityError:
-                # Handle unique constraint violation - update existing record instead
-                print(f"⚠️ Attendance already exists for {teacher} on {data['date']}, updating instead")
-                
-                # Get the existing record
-                existing_attendance = TeacherAttendance.objects.get(
-                    teacher=teacher, 
-                    date=data['date']
-                )
-                
-                # Update the existing record
-                existing_attendance.status = data['status']
-                existing_attendance.time_in = time_in
-                existing_attendance.time_out = time_out
-                existing_attendance.notes = data.get('notes', existing_attendance.notes)
-                existing_attendance.sync_id = data['sync_id']  # Update sync_id to new one
-                existing_attendance.sync_status = 'synced'
-                existing_attendance.device_id = device_id
-                existing_attendance.save()
-                
-                print(f"✅ Updated existing teacher attendance: {existing_attendance}")
-                return self.serialize_teacher_attendance(existing_attendance, 'update')
-                
-        except TeacherAttendance.DoesNotExist:
-            print(f"❌ Existing attendance not found for update")
-            return None
-        except Exception as e:
-            print(f"❌ Error processing teacher attendance: {e}")
-            import traceback
-            print(f"Traceback: {traceback.format_exc()}")
-            return None
-    
-    elif operation == 'update':
-        try:
-            attendance = TeacherAttendance.objects.get(sync_id=data['sync_id'])
-            attendance.date = data.get('date', attendance.date)
-            attendance.status = data.get('status', attendance.status)
-            
-            # Handle time fields
-            time_in = data.get('time_in')
-            time_out = data.get('time_out')
-            if time_in and isinstance(time_in, str):
-                attendance.time_in = parse_time(time_in)
-            elif time_in is not None:
-                attendance.time_in = time_in
-                
-            if time_out and isinstance(time_out, str):
-                attendance.time_out = parse_time(time_out)
-            elif time_out is not None:
-                attendance.time_out = time_out
-            
-            attendance.notes = data.get('notes', attendance.notes)
-            attendance.sync_status = 'synced'
-            attendance.save()
-            
-            print(f"✅ Updated teacher attendance: {attendance}")
-            return self.serialize_teacher_attendance(attendance, 'update')
-            
-        except TeacherAttendance.DoesNotExist:
-            print(f"❌ TeacherAttendance not found: {data['sync_id']}")
-            return None
-        except Exception as e:
-            print(f"❌ Error updating teacher attendance: {e}")
+                teacher = Staff.objects.first()
+                if not teacher:
+                    print("❌ No teachers found in database")
+                    return None
+
+                # Handle time fields - convert string to time object if needed
+                time_in = data.get('time_in')
+                time_out = data.get('time_out')
+
+                # If time_in/time_out are strings, parse them
+                if time_in and isinstance(time_in, str):
+                    time_in = parse_time(time_in)
+                if time_out and isinstance(time_out, str):
+                    time_out = parse_time(time_out)
+
+                try:
+                    # Try to create the attendance record
+                    attendance = TeacherAttendance.objects.create(
+                        teacher=teacher,
+                        date=data['date'],
+                        status=data['status'],
+                        time_in=time_in,
+                        time_out=time_out,
+                        notes=data.get('notes', ''),
+                        sync_id=data['sync_id'],
+                        sync_status='synced',
+                        device_id=device_id
+                    )
+                    print(f"✅ Created teacher attendance: {attendance}")
+                    return self.serialize_teacher_attendance(attendance, 'create')
+
+                except IntegrityError:
+                    # Handle unique constraint violation - update existing record instead
+                    print(f"⚠️ Attendance already exists for {teacher} on {data['date']}, updating instead")
+
+                    # Get the existing record
+                    existing_attendance = TeacherAttendance.objects.get(
+                        teacher=teacher, 
+                        date=data['date']
+                    )
+
+                    # Update the existing record
+                    existing_attendance.status = data['status']
+                    existing_attendance.time_in = time_in
+                    existing_attendance.time_out = time_out
+                    existing_attendance.notes = data.get('notes', existing_attendance.notes)
+                    existing_attendance.sync_id = data['sync_id']  # Update sync_id to new one
+                    existing_attendance.sync_status = 'synced'
+                    existing_attendance.device_id = device_id
+                    existing_attendance.save()
+
+                    print(f"✅ Updated existing teacher attendance: {existing_attendance}")
+                    return self.serialize_teacher_attendance(existing_attendance, 'update')
+
+            except TeacherAttendance.DoesNotExist:
+                print(f"❌ Existing attendance not found for update")
+                return None
+            except Exception as e:
+                print(f"❌ Error processing teacher attendance: {e}")
+                import traceback
+                print(f"Traceback: {traceback.format_exc()}")
+                return None
+
+        elif operation == 'update':
+            try:
+                attendance = TeacherAttendance.objects.get(sync_id=data['sync_id'])
+                attendance.date = data.get('date', attendance.date)
+                attendance.status = data.get('status', attendance.status)
+
+                # Handle time fields
+                time_in = data.get('time_in')
+                time_out = data.get('time_out')
+                if time_in and isinstance(time_in, str):
+                    attendance.time_in = parse_time(time_in)
+                elif time_in is not None:
+                    attendance.time_in = time_in
+
+                if time_out and isinstance(time_out, str):
+                    attendance.time_out = parse_time(time_out)
+                elif time_out is not None:
+                    attendance.time_out = time_out
+
+                attendance.notes = data.get('notes', attendance.notes)
+                attendance.sync_status = 'synced'
+                attendance.save()
+
+                print(f"✅ Updated teacher attendance: {attendance}")
+                return self.serialize_teacher_attendance(attendance, 'update')
+
+            except TeacherAttendance.DoesNotExist:
+                print(f"❌ TeacherAttendance not found: {data['sync_id']}")
+                return None
+            except Exception as e:
+                print(f"❌ Error updating teacher attendance: {e}")
+                return None
+        else:
+            print(f"⚠️ Unknown operation: {operation}")
             return None
-    else:
-        print(f"⚠️ Unknown operation: {operation}")
-        return None
 
     def process_staff_change(self, operation, data, device_id):
         print(f"Processing staff {operation}: {data}")
@@ -251,7 +251,9 @@ def process_teacher_attendance_change(self, operation, data, device_id):
         
         # Get teacher attendance changes
         try:
-            attendances = TeacherAttendance.objects.filter(last_modified__gt=last_sync_dt)
+            attendances = TeacherAttendance.objects.filter(
+                last_modified__gt=last_sync_dt
+            ).select_related('teacher')
             for attendance in attendances:
                 changes.append(self.serialize_teacher_attendance(attendance, 'update'))
             print(f"📤 Found {len(attendances)} server changes since {last_sync}")
@@ -0,0 +1,24 @@
+from django.contrib import admin
+
+from .models import AbsenceAlert, DailyAttendanceConfig, Holiday
+
+
+@admin.register(Holiday)
+class HolidayAdmin(admin.ModelAdmin):
+    list_display = ("date", "name")
+    date_hierarchy = "date"
+    search_fields = ("name",)
+
+
+@admin.register(DailyAttendanceConfig)
+class DailyAttendanceConfigAdmin(admin.ModelAdmin):
+    list_display = ("student_class", "auto_create", "notify_absent", "absent_threshold")
+    list_editable = ("auto_create", "notify_absent", "absent_threshold")
+
+
+@admin.register(AbsenceAlert)
+class AbsenceAlertAdmin(admin.ModelAdmin):
+    list_display = ("student", "days", "started_on", "created_at", "sent_at", "cancelled", "error")
+    list_filter = ("cancelled", "sent_at")
+    search_fields = ("student__surname", "student__firstname", "student__registration_number")
+    raw_id_fields = ("student",)
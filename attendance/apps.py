@@ -3,4 +3,8 @@ from django.apps import AppConfig
 
 class AttendanceConfig(AppConfig):
     name = 'attendance'
-    verbose_name = 'Attendance'
\ No newline at end of file
+    verbose_name = 'Attendance'
+
+    def ready(self):
+        # Import signals so receivers are registered
+        from . import signals  # noqa: F401
@@ -41,6 +41,9 @@ class BulkRegisterForm(forms.Form):
     end_date = forms.DateField(widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}))
     student_class = forms.ModelChoiceField(
         queryset=None,  # Will set in __init__
+        required=False,
+        empty_label='All classes',
+        help_text='Leave as "All classes" to open registers for the whole school',
         widget=forms.Select(attrs={'class': 'form-control'})
     )
     term = forms.ModelChoiceField(
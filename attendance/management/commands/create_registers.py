@@ -0,0 +1,54 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.corecode.models import AcademicSession, AcademicTerm, StudentClass
+from attendance.registers import create_registers
+
+
+class Command(BaseCommand):
+    help = 'Create the missing attendance registers for a date range, skipping weekends and holidays'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--from', dest='start', type=datetime.date.fromisoformat,
+            help='First date, YYYY-MM-DD (default: today)'
+        )
+        parser.add_argument(
+            '--to', dest='end', type=datetime.date.fromisoformat,
+            help='Last date, YYYY-MM-DD (default: the first date; never past today)'
+        )
+        parser.add_argument(
+            '--class', dest='classes', action='append', default=[], metavar='NAME',
+            help='Class name, repeatable (default: every class with auto-create on)'
+        )
+        parser.add_argument('--term', help='Term name (default: the current term)')
+        parser.add_argument('--session', help='Session name (default: the current session)')
+
+    def handle(self, *args, **options):
+        start = options['start'] or timezone.localdate()
+        end = options['end'] or start
+        if start > end:
+            raise CommandError('--from is after --to')
+
+        try:
+            term = AcademicTerm.objects.get(name=options['term']) if options['term'] \
+                else AcademicTerm.objects.get(current=True)
+            session = AcademicSession.objects.get(name=options['session']) if options['session'] \
+                else AcademicSession.objects.get(current=True)
+        except (AcademicTerm.DoesNotExist, AcademicSession.DoesNotExist) as exc:
+            raise CommandError(exc)
+
+        class_ids = None
+        if options['classes']:
+            found = dict(StudentClass.objects.filter(name__in=options['classes']).values_list('name', 'pk'))
+            unknown = set(options['classes']) - set(found)
+            if unknown:
+                raise CommandError(f"Unknown classes: {', '.join(sorted(unknown))}")
+            class_ids = list(found.values())
+
+        created = create_registers(start, end, term, session, class_ids=class_ids)
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {created} register(s) for {start} to {end} ({term} {session})'
+        ))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.corecode.models import AcademicSession, AcademicTerm
+from attendance.streaks import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute students' consecutive-absence streaks from a term's registers (no alerts are sent)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--term', help='Term name (default: the current term)')
+        parser.add_argument('--session', help='Session name (default: the current session)')
+
+    def handle(self, *args, **options):
+        try:
+            term = AcademicTerm.objects.get(name=options['term']) if options['term'] \
+                else AcademicTerm.objects.get(current=True)
+            session = AcademicSession.objects.get(name=options['session']) if options['session'] \
+                else AcademicSession.objects.get(current=True)
+        except (AcademicTerm.DoesNotExist, AcademicSession.DoesNotExist) as exc:
+            raise CommandError(exc)
+
+        count = rebuild(term, session)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} absence streak(s) for {term} {session}'))
@@ -0,0 +1,173 @@
+"""
+A class's term attendance as a compact students x school days matrix.
+
+``load()`` reads every entry of the class's registers for a term in one
+query into a ``bytearray`` with one byte per cell: 0 where nothing was
+marked, otherwise the status's position in ``AttendanceEntry.STATUS_CHOICES``
+plus one. Rows are students (active members of the class plus anyone with
+entries in its registers), columns the dates that have a register. Counts
+and rates are ``bytes.count`` over row and column slices.
+
+``get_matrix()`` keeps recent matrices in this process, keyed by class,
+term and session and checked against a version number in the shared cache.
+Writes bump that version: ``take_attendance`` and ``create_registers``
+directly (bulk writes send no signals), single saves and deletes through
+``attendance.signals``.
+"""
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from apps.students.models import Student
+
+from .models import AttendanceEntry, AttendanceRegister
+
+StudentRow = namedtuple('StudentRow', 'id name registration_number')
+
+STATUSES = [status for status, _ in AttendanceEntry.STATUS_CHOICES]
+CODES = {status: code for code, status in enumerate(STATUSES, start=1)}
+# bytes.translate table from cell codes to status letters, '-' for unmarked
+LETTERS = bytes([ord('-')] + [ord(status) for status in STATUSES] + [ord('?')] * (255 - len(STATUSES)))
+
+
+def rate(counts):
+    """Present share of the marked present/absent/late days, as on report cards"""
+    present = counts.get(AttendanceEntry.STATUS_PRESENT, 0)
+    total = present + counts.get(AttendanceEntry.STATUS_ABSENT, 0) + counts.get(AttendanceEntry.STATUS_LATE, 0)
+    return round(present / total * 100, 1) if total else None
+
+
+def _counts(cells):
+    return {status: cells.count(code) for status, code in CODES.items()}
+
+
+class AttendanceMatrix:
+    def __init__(self, students, days, cells):
+        self.students = students
+        self.days = days
+        self.cells = cells
+        self._rows = {student.id: index for index, student in enumerate(students)}
+        self._columns = {day: index for index, day in enumerate(days)}
+
+    def __repr__(self):
+        return f"<AttendanceMatrix {len(self.students)} students x {len(self.days)} days>"
+
+    def row(self, student_id):
+        """The student's cells, one byte per day"""
+        width = len(self.days)
+        start = self._rows[student_id] * width
+        return bytes(self.cells[start:start + width])
+
+    def column(self, day):
+        """Every student's cell on ``day``"""
+        return bytes(self.cells[self._columns[day]::len(self.days)])
+
+    def status(self, student_id, day):
+        """The status letter marked for the student on ``day``, or None"""
+        code = self.cells[self._rows[student_id] * len(self.days) + self._columns[day]]
+        return STATUSES[code - 1] if code else None
+
+    def letters(self, student_id):
+        """The student's row as a string of status letters, '-' where unmarked"""
+        return self.row(student_id).translate(LETTERS).decode()
+
+    def slice(self, start=None, end=None, student_ids=None):
+        """A new matrix for the days from ``start`` to ``end`` and the given students"""
+        first = 0 if start is None else bisect_left(self.days, start)
+        last = len(self.days) if end is None else bisect_right(self.days, end)
+        if student_ids is None:
+            students = self.students
+        else:
+            wanted = set(student_ids)
+            students = [student for student in self.students if student.id in wanted]
+        cells = bytearray()
+        for student in students:
+            offset = self._rows[student.id] * len(self.days)
+            cells += self.cells[offset + first:offset + last]
+        return AttendanceMatrix(students, self.days[first:last], cells)
+
+    def student_counts(self):
+        """student_id -> {status: days}"""
+        return {student.id: _counts(self.row(student.id)) for student in self.students}
+
+    def day_counts(self):
+        """day -> {status: students}"""
+        return {day: _counts(self.column(day)) for day in self.days}
+
+    def day_rates(self):
+        """day -> present rate (None when nobody was marked)"""
+        return {day: rate(counts) for day, counts in self.day_counts().items()}
+
+
+def load(class_id, term_id, session_id):
+    """Build the matrix from the database (three queries)"""
+    days = list(
+        AttendanceRegister.objects.filter(student_class_id=class_id, term_id=term_id, session_id=session_id)
+        .order_by('date').values_list('date', flat=True).distinct()
+    )
+    entries = list(
+        AttendanceEntry.objects.filter(
+            register__student_class_id=class_id, register__term_id=term_id, register__session_id=session_id
+        )
+        .order_by()
+        .values_list('student_id', 'register__date', 'status')
+    )
+    marked = {student_id for student_id, _, _ in entries}
+    students = [
+        StudentRow(pk, ' '.join(filter(None, (surname, firstname, other_name))), registration_number)
+        for pk, surname, firstname, other_name, registration_number in (
+            Student.objects.filter(Q(pk__in=marked) | Q(current_class_id=class_id, current_status='active'))
+            .order_by('surname', 'firstname', 'pk')
+            .values_list('pk', 'surname', 'firstname', 'other_name', 'registration_number')
+        )
+    ]
+
+    width = len(days)
+    rows = {student.id: index for index, student in enumerate(students)}
+    columns = {day: index for index, day in enumerate(days)}
+    cells = bytearray(len(students) * width)
+    for student_id, day, status in entries:
+        cells[rows[student_id] * width + columns[day]] = CODES.get(status, 0)
+    return AttendanceMatrix(students, days, cells)
+
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+def _version_key(class_id, term_id, session_id):
+    return f"attendance:matrix:{class_id}:{term_id}:{session_id}"
+
+
+def bump(class_id, term_id, session_id):
+    """Mark the class's term matrix stale in every process"""
+    key = _version_key(class_id, term_id, session_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def get_matrix(class_id, term_id, session_id):
+    """The current matrix, from this process's cache when no write has happened since"""
+    key = (int(class_id), int(term_id), int(session_id))
+    # Versions start from the clock, so one evicted from the cache never comes back as an old number
+    version = cache.get_or_set(_version_key(*key), time.time_ns, None)
+    with _lock:
+        hit = _cache.get(key)
+        if hit is not None and hit[0] == version:
+            _cache.move_to_end(key)
+            return hit[1]
+
+    matrix = load(*key)
+    with _lock:
+        _cache[key] = (version, matrix)
+        _cache.move_to_end(key)
+        while len(_cache) > getattr(settings, 'ATTENDANCE_MATRIX_CACHE_SIZE', 32):
+            _cache.popitem(last=False)
+    return matrix
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-19 06:57
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0002_alter_attendanceentry_options_and_more'),
+        ('corecode', '0007_profile'),
+        ('students', '0004_student_device_id_student_last_modified_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendanceentry',
+            index=models.Index(fields=['student', 'register'], name='attendance_entry_student_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendanceregister',
+            index=models.Index(fields=['student_class', 'session', 'term', 'date'], name='attendance_reg_class_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0004_holiday'),
+        ('students', '0005_hot_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AbsenceStreak',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('current', models.PositiveIntegerField(default=0)),
+                ('previous', models.PositiveIntegerField(default=0)),
+                ('started_on', models.DateField(blank=True, null=True)),
+                ('last_date', models.DateField(blank=True, null=True)),
+                ('alerted', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='absence_streak', to='students.student')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AbsenceAlert',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('days', models.PositiveIntegerField()),
+                ('started_on', models.DateField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('cancelled', models.BooleanField(default=False)),
+                ('error', models.CharField(blank=True, default='', max_length=255)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='absence_alerts', to='students.student')),
+            ],
+            options={
+                'ordering': ('-created_at',),
+                'indexes': [models.Index(condition=models.Q(('cancelled', False), ('sent_at__isnull', True)), fields=['created_at'], name='absence_alert_pending_idx')],
+            },
+        ),
+    ]
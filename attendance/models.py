@@ -22,6 +22,11 @@ class AttendanceRegister(models.Model):
     class Meta:
         unique_together = ('date', 'student_class', 'term', 'session')
         ordering = ('-date',)
+        indexes = [
+            models.Index(
+                fields=['student_class', 'session', 'term', 'date'], name='attendance_reg_class_idx'
+            ),
+        ]
         permissions = [
             ('can_lock_register', 'Can lock attendance register'),
             ('can_bulk_create', 'Can bulk create registers'),
@@ -83,6 +88,10 @@ class AttendanceEntry(models.Model):
 
     class Meta:
         unique_together = ('register', 'student')
+        indexes = [
+            # unique_together leads with register; this serves per-student history
+            models.Index(fields=['student', 'register'], name='attendance_entry_student_idx'),
+        ]
         ordering = ('student__surname', 'student__firstname')
         verbose_name_plural = 'Attendance entries'
 
@@ -101,6 +110,59 @@ class DailyAttendanceConfig(models.Model):
         return f"Config for {self.student_class}"
 
 
+class AbsenceStreak(models.Model):
+    """
+    A student's run of consecutive absences, kept up to date as registers
+    are taken (see attendance.streaks) instead of re-read from the entries.
+    """
+    student = models.OneToOneField(Student, on_delete=models.CASCADE, related_name='absence_streak')
+    current = models.PositiveIntegerField(default=0)
+    # The run before last_date's entry, so re-taking that register can redo it
+    previous = models.PositiveIntegerField(default=0)
+    started_on = models.DateField(null=True, blank=True)
+    last_date = models.DateField(null=True, blank=True)
+    alerted = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.student}: {self.current} absence(s)"
+
+
+class AbsenceAlert(models.Model):
+    """A streak that reached its class's threshold; texted to the parent in batches"""
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='absence_alerts')
+    days = models.PositiveIntegerField()
+    started_on = models.DateField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    cancelled = models.BooleanField(default=False)
+    error = models.CharField(max_length=255, blank=True, default='')
+
+    class Meta:
+        ordering = ('-created_at',)
+        indexes = [
+            models.Index(
+                fields=['created_at'], name='absence_alert_pending_idx',
+                condition=models.Q(sent_at__isnull=True, cancelled=False),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.student} absent {self.days} day(s) since {self.started_on}"
+
+
+class Holiday(models.Model):
+    """A weekday the school is closed; no registers are created for it"""
+    date = models.DateField(unique=True)
+    name = models.CharField(max_length=100)
+
+    class Meta:
+        ordering = ('date',)
+
+    def __str__(self):
+        return f"{self.name} ({self.date})"
+
+
 class AttendanceSummary(models.Model):
     student = models.ForeignKey(Student, on_delete=models.CASCADE)
     term = models.ForeignKey(AcademicTerm, on_delete=models.CASCADE)
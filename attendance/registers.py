@@ -0,0 +1,95 @@
+"""
+Bulk creation of attendance registers.
+
+``create_registers`` opens a register for every school day in a date range
+and every class in one pass: one query for the holidays, one for the
+registers that already exist, a single ``bulk_create``, then a count of
+what it actually inserted. The classes are locked for the run, so
+concurrent runs (the scheduler and a teacher on the bulk form) take turns
+and each reports only its own registers. Weekends and
+``Holiday`` dates are skipped, and the unique ``(date, class, term,
+session)`` constraint keeps registers opened by hand meanwhile from being
+duplicated.
+"""
+import datetime
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.corecode.models import StudentClass
+
+from . import matrix
+from .models import AttendanceRegister, DailyAttendanceConfig, Holiday
+
+
+def auto_create_classes():
+    """Classes that get registers automatically: all but those opted out in their config"""
+    opted_out = DailyAttendanceConfig.objects.filter(auto_create=False).values('student_class')
+    return StudentClass.objects.exclude(pk__in=opted_out)
+
+
+def school_days(start, end):
+    """Weekdays from ``start`` to ``end`` inclusive that are not holidays"""
+    holidays = set(Holiday.objects.filter(date__range=(start, end)).values_list('date', flat=True))
+    day = start
+    while day <= end:
+        if day.weekday() < 5 and day not in holidays:
+            yield day
+        day += datetime.timedelta(days=1)
+
+
+def _registers(start, end, class_ids, term, session):
+    return AttendanceRegister.objects.filter(
+        date__range=(start, end), student_class_id__in=class_ids, term=term, session=session
+    )
+
+
+def _existing(start, end, class_ids, term, session):
+    return set(_registers(start, end, class_ids, term, session).values_list('date', 'student_class_id'))
+
+
+def missing_registers(start, end, class_ids, term, session, existing=None):
+    """(date, class_id) pairs in the range that have no register yet"""
+    if existing is None:
+        existing = _existing(start, end, class_ids, term, session)
+    return [
+        (day, class_id)
+        for day in school_days(start, end)
+        for class_id in class_ids
+        if (day, class_id) not in existing
+    ]
+
+
+def create_registers(start, end, term, session, class_ids=None, user=None,
+                     notes='Auto-created register', batch_size=500):
+    """
+    Create the missing registers from ``start`` to ``end`` (never past today)
+    for ``class_ids``, by default every class with auto-create on.
+    Returns the number of registers created.
+    """
+    end = min(end, timezone.localdate())
+    if start > end:
+        return 0
+    if class_ids is None:
+        class_ids = auto_create_classes().values_list('pk', flat=True)
+    class_ids = list(class_ids)
+
+    with transaction.atomic():
+        # Runs over the same classes take turns, so the count below is this run's alone
+        list(StudentClass.objects.select_for_update().filter(pk__in=class_ids).order_by('pk').values_list('pk'))
+        existing = _existing(start, end, class_ids, term, session)
+        registers = [
+            AttendanceRegister(
+                date=day, student_class_id=class_id, term=term, session=session,
+                taken_by=user, auto_created=True, notes=notes,
+            )
+            for day, class_id in missing_registers(start, end, class_ids, term, session, existing)
+        ]
+        if not registers:
+            return 0
+        AttendanceRegister.objects.bulk_create(registers, batch_size=batch_size, ignore_conflicts=True)
+        # Registers opened one at a time meanwhile are skipped by the insert
+        created = _registers(start, end, class_ids, term, session).count() - len(existing)
+    for class_id in {register.student_class_id for register in registers}:
+        matrix.bump(class_id, term.pk, session.pk)
+    return created
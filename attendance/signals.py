@@ -0,0 +1,31 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import matrix, streaks
+from .models import AttendanceEntry, AttendanceRegister
+
+
+@receiver(post_save, sender=AttendanceRegister, dispatch_uid='matrix-register-save')
+@receiver(post_delete, sender=AttendanceRegister, dispatch_uid='matrix-register-delete')
+def register_changed(sender, instance, **kwargs):
+    matrix.bump(instance.student_class_id, instance.term_id, instance.session_id)
+
+
+@receiver(post_save, sender=AttendanceEntry, dispatch_uid='matrix-entry-save')
+@receiver(post_delete, sender=AttendanceEntry, dispatch_uid='matrix-entry-delete')
+def entry_changed(sender, instance, **kwargs):
+    # The register may be going too; its own signal covers that
+    for key in AttendanceRegister.objects.filter(pk=instance.register_id).values_list(
+        'student_class_id', 'term_id', 'session_id'
+    ):
+        matrix.bump(*key)
+
+
+@receiver(post_save, sender=AttendanceEntry, dispatch_uid='streak-entry-save')
+def entry_saved(sender, instance, raw=False, **kwargs):
+    # take_attendance saves in bulk (no signal) and records its entries itself
+    if raw:
+        return
+    if streaks.record(instance.register, [instance]):
+        transaction.on_commit(streaks.queue_alert_texts)
@@ -0,0 +1,165 @@
+"""
+Consecutive-absence tracking.
+
+Every student has one ``AbsenceStreak`` row, moved on by ``record()`` each
+time a register is taken: an absence extends the streak, any other status
+ends it. ``take_attendance`` writes a register's entries in bulk and records
+them itself; entries saved one at a time (the admin, imports, scripts) are
+recorded by a ``post_save`` receiver in ``signals``. Other bulk writers
+must call ``record()`` and ``queue_alert_texts()`` the same way.
+
+Re-taking the same register redoes that day from ``previous``; editing an
+older register recounts the affected students from the term's entries
+instead, and a recount that takes a streak to its threshold raises the
+alert like any other register.
+
+When a streak reaches the class's ``absent_threshold`` (and
+``notify_absent`` is on) one ``AbsenceAlert`` is raised for it. Alerts are
+texted in batches by the ``attendance.send_absence_alerts`` job, which the
+first alert of a morning enqueues ``ATTENDANCE_ALERT_DELAY_SECONDS`` ahead.
+
+``rebuild()`` recomputes a term's streaks in one ordered pass over its
+entries (``manage.py rebuild_absence_streaks``).
+"""
+from itertools import groupby
+from operator import itemgetter
+
+from django.conf import settings
+from django.utils import timezone
+
+from apps.jobs.queue import enqueue
+
+from .models import AbsenceAlert, AbsenceStreak, AttendanceEntry, DailyAttendanceConfig
+
+STREAK_FIELDS = ['current', 'previous', 'started_on', 'last_date', 'alerted', 'updated_at']
+
+
+def class_config(class_id):
+    """The class's latest DailyAttendanceConfig, or an unsaved one with the defaults"""
+    config = DailyAttendanceConfig.objects.filter(student_class_id=class_id).order_by('-created_at').first()
+    return config or DailyAttendanceConfig(student_class_id=class_id)
+
+
+def queue_alert_texts():
+    """Text the pending alerts soon; registers taken meanwhile join the same batch"""
+    enqueue(
+        'attendance.send_absence_alerts', unique=True,
+        delay=getattr(settings, 'ATTENDANCE_ALERT_DELAY_SECONDS', 600),
+    )
+
+
+def advance(streak, day, status):
+    """Apply ``status`` on ``day`` to ``streak``; ``day`` is never before ``streak.last_date``"""
+    base = streak.previous if day == streak.last_date else streak.current
+    streak.previous = base
+    if status == AttendanceEntry.STATUS_ABSENT:
+        if base == 0:
+            streak.started_on = day
+            streak.alerted = False
+        streak.current = base + 1
+    else:
+        # started_on and alerted are kept so a same-day correction back to absent restores them
+        streak.current = 0
+    streak.last_date = day
+
+
+def record(register, entries):
+    """
+    Advance the streaks of the students in ``entries`` (saved entries of
+    ``register``). Returns the alerts raised.
+    """
+    day = register.date
+    streaks = {
+        streak.student_id: streak
+        for streak in AbsenceStreak.objects.filter(student_id__in=[entry.student_id for entry in entries])
+    }
+    # An older register was edited: those streaks can only be recounted
+    stale = {student_id for student_id, streak in streaks.items() if streak.last_date and streak.last_date > day}
+    recounted = []
+    if stale:
+        rebuild(register.term, register.session, student_ids=stale)
+        recounted = list(AbsenceStreak.objects.filter(student_id__in=stale))
+
+    now = timezone.now()
+    new, changed = [], []
+    for entry in entries:
+        if entry.student_id in stale:
+            continue
+        streak = streaks.get(entry.student_id)
+        if streak is None:
+            streak = AbsenceStreak(student_id=entry.student_id)
+            new.append(streak)
+        else:
+            changed.append(streak)
+        advance(streak, day, entry.status)
+        streak.updated_at = now
+
+    alerts = []
+    config = class_config(register.student_class_id)
+    if config.notify_absent:
+        for streak in new + changed + recounted:
+            if streak.current >= config.absent_threshold and not streak.alerted:
+                streak.alerted = True
+                alerts.append(AbsenceAlert(
+                    student_id=streak.student_id, days=streak.current, started_on=streak.started_on
+                ))
+
+    AbsenceStreak.objects.bulk_create(new)
+    AbsenceStreak.objects.bulk_update(changed, STREAK_FIELDS)
+    AbsenceStreak.objects.bulk_update([streak for streak in recounted if streak.alerted], ['alerted'])
+    return AbsenceAlert.objects.bulk_create(alerts)
+
+
+def rebuild(term, session, student_ids=None):
+    """
+    Recompute the streaks of everyone with entries in ``term``/``session``
+    (or just ``student_ids``) from those entries; returns how many.
+
+    A recounted streak keeps its ``alerted`` flag while it is the same run
+    of absences and still at its threshold, so an edit does not text a
+    parent twice or hold back a text the streak has not had yet. Students
+    without a streak yet count as alerted once at their threshold, so a
+    backfill texts nobody.
+    """
+    thresholds = {}
+    for config in DailyAttendanceConfig.objects.order_by('created_at'):
+        thresholds[config.student_class_id] = config.absent_threshold if config.notify_absent else None
+    default = DailyAttendanceConfig._meta.get_field('absent_threshold').default
+
+    entries = AttendanceEntry.objects.filter(register__term=term, register__session=session)
+    existing = AbsenceStreak.objects.all()
+    if student_ids is not None:
+        entries = entries.filter(student_id__in=student_ids)
+        existing = existing.filter(student_id__in=student_ids)
+    existing = {
+        student_id: (started_on, alerted)
+        for student_id, started_on, alerted in existing.values_list('student_id', 'started_on', 'alerted')
+    }
+    rows = (
+        entries.order_by('student_id', 'register__date')
+        .values_list('student_id', 'register__date', 'status', 'register__student_class_id')
+        .iterator(chunk_size=2000)
+    )
+
+    streaks = []
+    for student_id, student_rows in groupby(rows, key=itemgetter(0)):
+        streak = AbsenceStreak(student_id=student_id)
+        for _, day, status, class_id in student_rows:
+            advance(streak, day, status)
+        threshold = thresholds.get(class_id, default)
+        at_threshold = threshold is None or streak.current >= threshold
+        if student_id in existing:
+            started_on, alerted = existing[student_id]
+            streak.alerted = at_threshold and alerted and started_on == streak.started_on
+        else:
+            streak.alerted = at_threshold
+        streaks.append(streak)
+
+    AbsenceStreak.objects.bulk_create(
+        streaks,
+        batch_size=500,
+        update_conflicts=True,
+        unique_fields=['student'],
+        update_fields=STREAK_FIELDS,
+    )
+    return len(streaks)
@@ -0,0 +1,120 @@
+import datetime
+from collections import defaultdict
+
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from apps.corecode.models import AcademicSession, AcademicTerm
+from apps.jobs.queue import task
+
+from .models import AbsenceAlert, AttendanceEntry, AttendanceSummary
+from .registers import create_registers
+
+
+@task('attendance.create_daily_registers', queue='maintenance', priority=5, max_attempts=3)
+def create_daily_registers(job, date=None, end_date=None, class_ids=None):
+    """Open the registers for a day (today by default) or a range, skipping weekends and holidays"""
+    start = datetime.date.fromisoformat(date) if date else timezone.localdate()
+    end = datetime.date.fromisoformat(end_date) if end_date else start
+    session = AcademicSession.objects.get(current=True)
+    term = AcademicTerm.objects.get(current=True)
+
+    created = create_registers(start, end, term, session, class_ids=class_ids)
+    job.report_progress(100, message=f"Created {created} register(s) for {start} to {end}")
+    return {'created': created}
+
+
+@task('attendance.rebuild_summaries', queue='maintenance', max_attempts=2)
+def rebuild_summaries(job, session_id=None, term_id=None):
+    """Recount AttendanceSummary rows for a term (the current one by default) in one pass"""
+    session = AcademicSession.objects.get(pk=session_id) if session_id else AcademicSession.objects.get(current=True)
+    term = AcademicTerm.objects.get(pk=term_id) if term_id else AcademicTerm.objects.get(current=True)
+
+    rows = (
+        AttendanceEntry.objects.filter(register__session=session, register__term=term)
+        .values('student_id')
+        .annotate(
+            total=Count('id'),
+            present=Count('id', filter=Q(status=AttendanceEntry.STATUS_PRESENT)),
+            absent=Count('id', filter=Q(status=AttendanceEntry.STATUS_ABSENT)),
+            late=Count('id', filter=Q(status=AttendanceEntry.STATUS_LATE)),
+        )
+        .order_by()
+    )
+    summaries = [
+        AttendanceSummary(
+            student_id=row['student_id'],
+            session=session,
+            term=term,
+            total_days=row['total'],
+            days_present=row['present'],
+            days_absent=row['absent'],
+            days_late=row['late'],
+            attendance_rate=round(row['present'] / row['total'] * 100, 1) if row['total'] else 0.0,
+        )
+        for row in rows
+    ]
+    AttendanceSummary.objects.bulk_create(
+        summaries,
+        batch_size=500,
+        update_conflicts=True,
+        unique_fields=['student', 'term', 'session'],
+        update_fields=['total_days', 'days_present', 'days_absent', 'days_late', 'attendance_rate', 'last_updated'],
+    )
+    job.report_progress(100, message=f"Rebuilt {len(summaries)} summaries for {term} {session}")
+    return {'summaries': len(summaries)}
+
+
+def format_absence_message(students):
+    """One SMS for a parent, covering each of their children on a streak"""
+    lines = [
+        f"{student.get_short_name()} ({student.registration_number}) has missed {days} school day(s) "
+        f"in a row since {started_on:%d %b}."
+        for student, days, started_on in students
+    ]
+    return "Green Bells Academy\n" + "\n".join(lines) + "\nPlease contact the school."
+
+
+# Not retried, like result SMS: unsent alerts wait for the next run instead
+@task('attendance.send_absence_alerts', queue='sms', priority=5, concurrency=1)
+def send_absence_alerts(job):
+    """Text parents every pending absence alert, one message per phone number"""
+    from apps.result.sms import AfricasTalkingSMS
+
+    pending = AbsenceAlert.objects.filter(sent_at__isnull=True, cancelled=False).select_related(
+        'student', 'student__absence_streak'
+    )
+    by_phone, cancelled = defaultdict(list), []
+    for alert in pending:
+        student = alert.student
+        streak = getattr(student, 'absence_streak', None)
+        phone = AfricasTalkingSMS.format_phone_number(student.parent_mobile_number or student.guardian_phone)
+        if streak is None or streak.started_on != alert.started_on or streak.current < alert.days:
+            alert.error = 'Corrected before it was sent'
+        elif not phone:
+            alert.error = 'No phone number'
+        else:
+            by_phone[phone].append(alert)
+            continue
+        alert.cancelled = True
+        cancelled.append(alert)
+    AbsenceAlert.objects.bulk_update(cancelled, ['cancelled', 'error'])
+
+    sms_client = AfricasTalkingSMS() if by_phone else None
+    sent, failed, errors = [], [], []
+    for done, (phone, alerts) in enumerate(by_phone.items(), start=1):
+        message = format_absence_message([(alert.student, alert.days, alert.started_on) for alert in alerts])
+        result = sms_client.send_sms(phone, message)
+        for alert in alerts:
+            if result['success']:
+                alert.sent_at, alert.error = timezone.now(), ''
+                sent.append(alert)
+            else:
+                alert.error = result['message'][:255]
+                failed.append(alert)
+                errors.append(f"{alert.student.get_short_name()}: {result['message']}")
+        job.report_progress(done, len(by_phone), f"Texted {done} of {len(by_phone)} parent(s)")
+    AbsenceAlert.objects.bulk_update(sent + failed, ['sent_at', 'error'])
+
+    job.report_progress(100, message=f"Sent {len(sent)} absence alert(s). {len(failed)} failed.")
+    return {'sent': len(sent), 'failed': len(failed), 'cancelled': len(cancelled), 'errors': errors}
@@ -0,0 +1,262 @@
+import datetime
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from apps.corecode.models import AcademicSession, AcademicTerm, StudentClass
+from apps.jobs.models import Job
+from apps.jobs.queue import enqueue
+from apps.result.sms import AfricasTalkingSMS
+from apps.students.models import Student
+
+from . import matrix, streaks
+from .models import AbsenceAlert, AbsenceStreak, AttendanceEntry, AttendanceRegister, DailyAttendanceConfig, Holiday
+from .registers import create_registers
+
+# Monday 5 to Friday 16 October 2026
+MONDAY = datetime.date(2026, 10, 5)
+LAST_FRIDAY = datetime.date(2026, 10, 16)
+
+
+@mock.patch('attendance.registers.timezone.localdate', return_value=datetime.date(2026, 10, 19))
+class BulkRegisterTest(TestCase):
+    def setUp(self):
+        self.term = AcademicTerm.objects.get(current=True)
+        self.session = AcademicSession.objects.get(current=True)
+        self.form_one = StudentClass.objects.create(name='Form 1')
+        self.form_two = StudentClass.objects.create(name='Form 2')
+        Holiday.objects.create(date=datetime.date(2026, 10, 10), name='Huduma Day')  # a Saturday
+        Holiday.objects.create(date=datetime.date(2026, 10, 13), name='Half term')
+
+    def dates(self, student_class):
+        return list(
+            AttendanceRegister.objects.filter(student_class=student_class).order_by('date').values_list('date', flat=True)
+        )
+
+    def test_school_days_only_once(self, localdate):
+        AttendanceRegister.objects.create(
+            date=MONDAY, student_class=self.form_one, term=self.term, session=self.session
+        )
+        DailyAttendanceConfig.objects.create(student_class=self.form_two, auto_create=False)
+        others = StudentClass.objects.exclude(pk__in=[self.form_one.pk, self.form_two.pk]).count()
+
+        # classes, then in a savepoint (two queries): the class lock, holidays
+        # and existing registers, one insert and the count of what it added
+        with self.assertNumQueries(8):
+            created = create_registers(MONDAY, LAST_FRIDAY, self.term, self.session)
+        self.assertEqual(created, 8 + 9 * others)
+        self.assertEqual(len(self.dates(self.form_one)), 9)
+        self.assertNotIn(datetime.date(2026, 10, 13), self.dates(self.form_one))
+        self.assertEqual(self.dates(self.form_two), [])
+
+        self.assertEqual(create_registers(MONDAY, LAST_FRIDAY, self.term, self.session), 0)
+
+    def test_future_dates_are_left_alone(self, localdate):
+        created = create_registers(
+            LAST_FRIDAY, LAST_FRIDAY + datetime.timedelta(days=7), self.term, self.session,
+            class_ids=[self.form_one.pk],
+        )
+        self.assertEqual(created, 2)  # Friday and the Monday that is "today"
+
+    def test_bulk_form(self, localdate):
+        user = get_user_model().objects.create_user('bulk-teacher', password='pw')
+        self.client.force_login(user)
+        self.assertEqual(self.client.get(reverse('attendance:bulk_register_create'), secure=True).status_code, 200)
+        response = self.client.post(reverse('attendance:bulk_register_create'), {
+            'start_date': MONDAY, 'end_date': LAST_FRIDAY, 'student_class': self.form_two.pk,
+            'term': self.term.pk, 'session': self.session.pk,
+        }, secure=True)
+        self.assertRedirects(response, reverse('attendance:register_list'), fetch_redirect_response=False)
+        self.assertEqual(len(self.dates(self.form_two)), 9)
+        self.assertEqual(AttendanceRegister.objects.filter(taken_by=user).count(), 9)
+
+
+class AbsenceStreakTest(TestCase):
+    def setUp(self):
+        self.term = AcademicTerm.objects.get(current=True)
+        self.session = AcademicSession.objects.get(current=True)
+        self.form_one = StudentClass.objects.create(name='Form 1')
+        DailyAttendanceConfig.objects.create(student_class=self.form_one, absent_threshold=3)
+        self.amina = Student.objects.create(
+            registration_number='ABS-1', surname='Otieno', firstname='Amina',
+            current_class=self.form_one, parent_mobile_number='0712345678',
+        )
+        self.brian = Student.objects.create(
+            registration_number='ABS-2', surname='Kamau', firstname='Brian', current_class=self.form_one,
+        )
+
+    def take(self, day, statuses):
+        """Save a register the way take_attendance does and record it"""
+        register, _ = AttendanceRegister.objects.get_or_create(
+            date=day, student_class=self.form_one, term=self.term, session=self.session
+        )
+        existing = {entry.student_id: entry for entry in AttendanceEntry.objects.filter(register=register)}
+        to_create, to_update = [], []
+        for student, status in zip((self.amina, self.brian), statuses):
+            entry = existing.get(student.pk)
+            if entry is None:
+                entry = AttendanceEntry(register=register, student=student)
+                to_create.append(entry)
+            else:
+                to_update.append(entry)
+            entry.status = status
+        AttendanceEntry.objects.bulk_create(to_create)
+        AttendanceEntry.objects.bulk_update(to_update, ['status'])
+        return streaks.record(register, to_create + to_update)
+
+    def streak(self, student):
+        return AbsenceStreak.objects.get(student=student)
+
+    def test_alert_once_when_threshold_is_reached(self):
+        for offset in range(2):
+            self.assertEqual(self.take(MONDAY + datetime.timedelta(days=offset), 'AP'), [])
+        wednesday = MONDAY + datetime.timedelta(days=2)
+        alerts = self.take(wednesday, 'AP')
+        self.assertEqual(
+            [(alert.student, alert.days, alert.started_on) for alert in alerts], [(self.amina, 3, MONDAY)]
+        )
+        self.assertEqual(self.streak(self.brian).current, 0)
+
+        # Corrected to present, then back to absent: the same streak, no second alert
+        self.assertEqual(self.take(wednesday, 'PP'), [])
+        self.assertEqual(self.streak(self.amina).current, 0)
+        self.assertEqual(self.take(wednesday, 'AP'), [])
+        self.assertEqual((self.streak(self.amina).current, self.streak(self.amina).started_on), (3, MONDAY))
+
+        # Editing an older register recounts from the entries
+        self.take(MONDAY + datetime.timedelta(days=1), 'PP')
+        self.assertEqual((self.streak(self.amina).current, self.streak(self.amina).started_on), (1, wednesday))
+
+    def test_recount_that_reaches_the_threshold_alerts(self):
+        for offset, statuses in enumerate(['AP', 'PP', 'AP', 'AP']):
+            self.take(MONDAY + datetime.timedelta(days=offset), statuses)
+        self.assertEqual(self.streak(self.amina).current, 2)
+
+        # Tuesday corrected to absent: Monday to Thursday is now one streak
+        alerts = self.take(MONDAY + datetime.timedelta(days=1), 'AP')
+        self.assertEqual(
+            [(alert.student, alert.days, alert.started_on) for alert in alerts], [(self.amina, 4, MONDAY)]
+        )
+        self.assertTrue(self.streak(self.amina).alerted)
+
+        # Recounting the same streak again does not text twice
+        self.assertEqual(self.take(MONDAY, 'AP'), [])
+        self.assertTrue(self.streak(self.amina).alerted)
+
+    def test_rebuild_matches_incremental(self):
+        for offset, statuses in enumerate(['AA', 'AP', 'AA', 'PA']):
+            self.take(MONDAY + datetime.timedelta(days=offset), statuses)
+        incremental = list(AbsenceStreak.objects.order_by('student').values_list('current', 'started_on', 'last_date'))
+        AbsenceStreak.objects.all().delete()
+
+        with self.assertNumQueries(4):  # configs, existing streaks, entries, upsert
+            self.assertEqual(streaks.rebuild(self.term, self.session), 2)
+        rebuilt = AbsenceStreak.objects.order_by('student')
+        self.assertEqual(list(rebuilt.values_list('current', 'started_on', 'last_date')), incremental)
+        self.assertEqual(list(rebuilt.values_list('alerted', flat=True)), [False, False])
+
+    @mock.patch.object(AfricasTalkingSMS, '__init__', return_value=None)
+    @mock.patch.object(AfricasTalkingSMS, 'send_sms', return_value={'success': True, 'message': 'sent', 'data': None})
+    def test_alerts_are_texted_in_a_batch(self, send_sms, init):
+        for offset in range(3):
+            self.take(MONDAY + datetime.timedelta(days=offset), 'AA')
+        self.assertEqual(AbsenceAlert.objects.count(), 2)
+
+        with self.settings(JOBS_EAGER=True):
+            job = enqueue('attendance.send_absence_alerts')
+        job.refresh_from_db()
+        self.assertEqual(job.result['sent'], 1)
+        self.assertEqual(job.result['cancelled'], 1)  # Brian has no phone number
+        phone, message = send_sms.call_args.args
+        self.assertEqual(phone, '+254712345678')
+        self.assertIn('Amina', message)
+        self.assertFalse(AbsenceAlert.objects.filter(sent_at__isnull=True, cancelled=False).exists())
+
+    def test_taking_attendance_queues_the_texts(self):
+        for offset in range(2):
+            self.take(MONDAY + datetime.timedelta(days=offset), 'AP')
+        register = AttendanceRegister.objects.create(
+            date=MONDAY + datetime.timedelta(days=2), student_class=self.form_one, term=self.term, session=self.session
+        )
+        self.client.force_login(get_user_model().objects.create_user('streak-teacher', password='pw'))
+        self.client.post(reverse('attendance:take_attendance', args=[register.pk]), {
+            f'status_{self.amina.pk}': 'A', f'status_{self.brian.pk}': 'P',
+        }, secure=True)
+        self.assertEqual(self.streak(self.amina).current, 3)
+        self.assertTrue(Job.objects.filter(name='attendance.send_absence_alerts', status=Job.QUEUED).exists())
+
+    def test_entries_saved_one_at_a_time_advance_streaks(self):
+        for offset in range(2):
+            self.take(MONDAY + datetime.timedelta(days=offset), 'AP')
+        register = AttendanceRegister.objects.create(
+            date=MONDAY + datetime.timedelta(days=2), student_class=self.form_one, term=self.term, session=self.session
+        )
+        # As the admin or an import would save it
+        with self.captureOnCommitCallbacks(execute=True):
+            AttendanceEntry.objects.create(register=register, student=self.amina, status='A')
+        self.assertEqual(self.streak(self.amina).current, 3)
+        self.assertEqual(AbsenceAlert.objects.get().student, self.amina)
+        self.assertTrue(Job.objects.filter(name='attendance.send_absence_alerts', status=Job.QUEUED).exists())
+
+
+class AttendanceMatrixTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        matrix._cache.clear()
+        self.term = AcademicTerm.objects.get(current=True)
+        self.session = AcademicSession.objects.get(current=True)
+        self.form_one = StudentClass.objects.create(name='Form 1')
+        self.amina = Student.objects.create(registration_number='MX-1', surname='Otieno', firstname='Amina',
+                                            current_class=self.form_one)
+        self.brian = Student.objects.create(registration_number='MX-2', surname='Kamau', firstname='Brian',
+                                            current_class=self.form_one)
+        self.days = [MONDAY + datetime.timedelta(days=offset) for offset in range(3)]
+        for day, statuses in zip(self.days, ['PA', 'LA', 'P']):
+            register = AttendanceRegister.objects.create(
+                date=day, student_class=self.form_one, term=self.term, session=self.session
+            )
+            AttendanceEntry.objects.bulk_create(
+                AttendanceEntry(register=register, student=student, status=status)
+                for student, status in zip((self.amina, self.brian), statuses)
+            )
+
+    def get(self):
+        return matrix.get_matrix(self.form_one.pk, self.term.pk, self.session.pk)
+
+    def test_matrix(self):
+        with self.assertNumQueries(3):
+            term_matrix = self.get()
+        self.assertEqual([student.id for student in term_matrix.students], [self.brian.pk, self.amina.pk])
+        self.assertEqual(term_matrix.days, self.days)
+        self.assertEqual(len(term_matrix.cells), 6)
+        self.assertEqual(term_matrix.letters(self.amina.pk), 'PLP')
+        self.assertEqual(term_matrix.letters(self.brian.pk), 'AA-')
+        self.assertEqual(term_matrix.status(self.brian.pk, self.days[2]), None)
+        self.assertEqual(term_matrix.student_counts()[self.amina.pk]['L'], 1)
+        self.assertEqual(list(term_matrix.day_rates().values()), [50.0, 0.0, 100.0])
+
+        later = term_matrix.slice(start=self.days[1], student_ids=[self.amina.pk])
+        self.assertEqual((later.days, later.letters(self.amina.pk)), (self.days[1:], 'LP'))
+
+    def test_cached_until_an_entry_changes(self):
+        first = self.get()
+        with self.assertNumQueries(0):
+            self.assertIs(self.get(), first)
+
+        entry = AttendanceEntry.objects.get(student=self.brian, register__date=self.days[0])
+        entry.status = AttendanceEntry.STATUS_PRESENT
+        entry.save()
+        self.assertEqual(self.get().letters(self.brian.pk), 'PA-')
+
+    def test_heatmap_and_csv(self):
+        self.client.force_login(get_user_model().objects.create_user('matrix-teacher', password='pw'))
+        query = {'class': self.form_one.pk}
+        response = self.client.get(reverse('attendance:class_matrix'), query, secure=True)
+        self.assertContains(response, '<td class="heat-cell heat-A">A</td>', count=2)
+        response = self.client.get(reverse('attendance:class_matrix_csv'), query, secure=True)
+        rows = response.content.decode().splitlines()
+        self.assertEqual(rows[1], 'MX-2,Kamau Brian,A,A,,0,2,0,0,0,0.0')
+        self.assertEqual(rows[-1], ',Attendance %,50.0,0.0,100.0,,,,,,')
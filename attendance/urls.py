@@ -18,4 +18,6 @@ urlpatterns = [
     path('api/summary-data/', views.attendance_summary_data, name='attendance_summary_data'),
     path('dashboard/', views.DailyAttendanceDashboard.as_view(), name='daily_dashboard'),
     path('history/', views.AttendanceHistoryView.as_view(), name='history'),
+    path('matrix/', views.class_attendance_matrix, name='class_matrix'),
+    path('matrix/csv/', views.class_attendance_matrix_csv, name='class_matrix_csv'),
 ]
\ No newline at end of file
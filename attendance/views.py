@@ -1,13 +1,15 @@
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db import transaction
 from django.db.models import Count, Q
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse_lazy
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from django.views.generic import ListView, CreateView, DetailView, UpdateView, DeleteView, View
-from django.http import JsonResponse, HttpResponse
-from datetime import datetime, timedelta
+from django.http import Http404, JsonResponse, HttpResponse
+from datetime import datetime
 import csv
 
 from apps.corecode.models import StudentClass, AcademicTerm, AcademicSession
@@ -17,6 +19,8 @@ from django.core.paginator import Paginator
 
 from .forms import AttendanceRegisterForm, AttendanceEntryForm, BulkRegisterForm, DailyAttendanceConfigForm
 from .models import AttendanceRegister, AttendanceEntry, AttendanceSummary, DailyAttendanceConfig
+from . import matrix, streaks
+from .registers import create_registers
 
 
 class AttendanceRegisterListView(LoginRequiredMixin, ListView):
@@ -121,39 +125,17 @@ class BulkRegisterCreateView(LoginRequiredMixin, View):
     def post(self, request):
         form = BulkRegisterForm(request.POST)
         if form.is_valid():
-            start_date = form.cleaned_data['start_date']
-            end_date = form.cleaned_data['end_date']
             student_class = form.cleaned_data['student_class']
-            term = form.cleaned_data['term']
-            session = form.cleaned_data['session']
-
-            current_date = start_date
-            registers_created = 0
-            
-            while current_date <= end_date:
-                # Skip weekends (optional - you can remove this)
-                if current_date.weekday() < 5:  # 0-4 = Monday-Friday
-                    # Check if register already exists
-                    exists = AttendanceRegister.objects.filter(
-                        date=current_date,
-                        student_class=student_class,
-                        term=term,
-                        session=session
-                    ).exists()
-                    
-                    if not exists:
-                        AttendanceRegister.objects.create(
-                            date=current_date,
-                            student_class=student_class,
-                            term=term,
-                            session=session,
-                            taken_by=request.user,
-                            auto_created=True,
-                            notes=f'Auto-created bulk register'
-                        )
-                        registers_created += 1
-                
-                current_date += timedelta(days=1)
+            # One pass for the whole range; weekends, holidays and existing registers are skipped
+            registers_created = create_registers(
+                form.cleaned_data['start_date'],
+                form.cleaned_data['end_date'],
+                form.cleaned_data['term'],
+                form.cleaned_data['session'],
+                class_ids=[student_class.pk] if student_class else None,
+                user=request.user,
+                notes='Auto-created bulk register',
+            )
             
             messages.success(request, f'Successfully created {registers_created} attendance registers.')
             return redirect('attendance:register_list')
@@ -176,21 +158,32 @@ def take_attendance(request, pk):
     ).order_by('surname', 'firstname')
 
     if request.method == 'POST':
+        existing = {e.student_id: e for e in AttendanceEntry.objects.filter(register=register)}
+        now = timezone.now()
+        to_create, to_update = [], []
         for student in students:
-            status = request.POST.get(f'status_{student.id}', AttendanceEntry.STATUS_PRESENT)
-            remarks = request.POST.get(f'remarks_{student.id}', '')
-            time_in = request.POST.get(f'time_in_{student.id}', '')
-            time_out = request.POST.get(f'time_out_{student.id}', '')
-            
-            entry, created = AttendanceEntry.objects.get_or_create(
-                register=register, 
-                student=student
+            entry = existing.get(student.id)
+            if entry is None:
+                entry = AttendanceEntry(register=register, student=student, created_at=now)
+                to_create.append(entry)
+            else:
+                to_update.append(entry)
+            entry.status = request.POST.get(f'status_{student.id}', AttendanceEntry.STATUS_PRESENT)
+            entry.remarks = request.POST.get(f'remarks_{student.id}', '')
+            entry.time_in = request.POST.get(f'time_in_{student.id}') or None
+            entry.time_out = request.POST.get(f'time_out_{student.id}') or None
+            entry.updated_at = now
+
+        # One insert and one update for the whole class
+        with transaction.atomic():
+            AttendanceEntry.objects.bulk_create(to_create)
+            AttendanceEntry.objects.bulk_update(
+                to_update, ['status', 'remarks', 'time_in', 'time_out', 'updated_at']
             )
-            entry.status = status
-            entry.remarks = remarks
-            entry.time_in = time_in if time_in else None
-            entry.time_out = time_out if time_out else None
-            entry.save()
+            alerts = streaks.record(register, to_create + to_update)
+        matrix.bump(register.student_class_id, register.term_id, register.session_id)
+        if alerts:
+            streaks.queue_alert_texts()
         
         messages.success(request, 'Attendance saved successfully!')
         return redirect('attendance:register_detail', pk=register.pk)
@@ -263,21 +256,30 @@ def attendance_summary_data(request):
     if session_id:
         registers = registers.filter(session_id=session_id)
     
-    total_registers = registers.count()
+    # Aggregate per class instead of counting each register separately
+    registers_per_class = dict(
+        registers.order_by().values_list('student_class_id').annotate(count=Count('id'))
+    )
+    total_registers = sum(registers_per_class.values())
     if total_registers == 0:
         return JsonResponse({'error': 'No data found for the selected filters'})
-    
-    # Calculate averages
-    total_students = 0
-    total_present = 0
-    total_absent = 0
-    total_late = 0
-    
-    for register in registers:
-        total_students += register.total_students
-        total_present += register.present_count
-        total_absent += register.absent_count
-        total_late += register.late_count
+
+    # Like AttendanceRegister.total_students, registers count the class's active students
+    class_sizes = dict(
+        Student.objects.filter(current_class_id__in=registers_per_class, current_status='active')
+        .order_by().values_list('current_class_id').annotate(count=Count('id'))
+    )
+    total_students = sum(
+        count * class_sizes.get(class_id, 0) for class_id, count in registers_per_class.items()
+    )
+    totals = AttendanceEntry.objects.filter(register__in=registers).aggregate(
+        present=Count('id', filter=Q(status=AttendanceEntry.STATUS_PRESENT)),
+        absent=Count('id', filter=Q(status=AttendanceEntry.STATUS_ABSENT)),
+        late=Count('id', filter=Q(status=AttendanceEntry.STATUS_LATE)),
+    )
+    total_present = totals['present']
+    total_absent = totals['absent']
+    total_late = totals['late']
     
     avg_attendance_rate = round((total_present / total_students) * 100, 2) if total_students > 0 else 0
     
@@ -381,4 +383,98 @@ class AttendanceHistoryView(LoginRequiredMixin, View):
                 's_locked': s_locked,
             }
         }
-        return render(request, self.template_name, context)
\ No newline at end of file
+        return render(request, self.template_name, context)
+
+def _pick(objects, pk):
+    """The object with ``pk`` from ``objects``, or the current one when no pk is given"""
+    if not pk:
+        return next((obj for obj in objects if obj.current), None)
+    found = next((obj for obj in objects if str(obj.pk) == pk), None)
+    if found is None:
+        raise Http404
+    return found
+
+
+def _matrix_filters(request):
+    """The class, term, session and day range picked on the heatmap page"""
+    class_id = request.GET.get('class')
+    # Both lists fill the page's selects too
+    terms, sessions = list(AcademicTerm.objects.all()), list(AcademicSession.objects.all())
+    return {
+        'student_class': get_object_or_404(StudentClass, pk=class_id) if class_id else None,
+        'term': _pick(terms, request.GET.get('term')),
+        'session': _pick(sessions, request.GET.get('session')),
+        'date_from': parse_date(request.GET.get('date_from') or ''),
+        'date_to': parse_date(request.GET.get('date_to') or ''),
+        'terms': terms,
+        'sessions': sessions,
+    }
+
+
+def _filtered_matrix(filters):
+    term_matrix = matrix.get_matrix(filters['student_class'].pk, filters['term'].pk, filters['session'].pk)
+    if filters['date_from'] or filters['date_to']:
+        return term_matrix.slice(filters['date_from'], filters['date_to'])
+    return term_matrix
+
+
+@login_required
+def class_attendance_matrix(request):
+    """Heatmap of a class's term: one row per student, one cell per school day"""
+    filters = _matrix_filters(request)
+    context = {
+        'filters': filters,
+        'classes': StudentClass.objects.all(),
+        'terms': filters['terms'],
+        'sessions': filters['sessions'],
+        'status_choices': AttendanceEntry.STATUS_CHOICES,
+    }
+    if filters['student_class'] and filters['term'] and filters['session']:
+        class_matrix = _filtered_matrix(filters)
+        counts = class_matrix.student_counts()
+        context.update({
+            'matrix': class_matrix,
+            'rows': [
+                {
+                    'student': student,
+                    'letters': class_matrix.letters(student.id),
+                    'counts': counts[student.id],
+                    'rate': matrix.rate(counts[student.id]),
+                }
+                for student in class_matrix.students
+            ],
+            'columns': list(class_matrix.day_rates().items()),
+        })
+    return render(request, 'attendance/class_matrix.html', context)
+
+
+@login_required
+def class_attendance_matrix_csv(request):
+    filters = _matrix_filters(request)
+    if not (filters['student_class'] and filters['term'] and filters['session']):
+        return redirect('attendance:class_matrix')
+    class_matrix = _filtered_matrix(filters)
+
+    filename = f"attendance_{filters['student_class']}_{filters['term']}_{filters['session']}.csv".replace(' ', '_')
+    response = HttpResponse(content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    writer = csv.writer(response)
+    status_names = [name for _, name in AttendanceEntry.STATUS_CHOICES]
+    writer.writerow(
+        ['Registration Number', 'Name'] + [day.isoformat() for day in class_matrix.days]
+        + status_names + ['Attendance %']
+    )
+    counts = class_matrix.student_counts()
+    for student in class_matrix.students:
+        student_counts = counts[student.id]
+        writer.writerow(
+            [student.registration_number, student.name]
+            + [letter if letter != '-' else '' for letter in class_matrix.letters(student.id)]
+            + [student_counts[status] for status, _ in AttendanceEntry.STATUS_CHOICES]
+            + [matrix.rate(student_counts)]
+        )
+    writer.writerow(
+        ['', 'Attendance %'] + list(class_matrix.day_rates().values())
+        + [''] * len(status_names) + ['']
+    )
+    return response
@@ -6,13 +6,19 @@ from datetime import datetime
 from django.core import serializers
 from django.apps import apps
 from backup_manager.models import BackupLog
+from apps.corecode.replicas import read_from_replica
 
 class Command(BaseCommand):
     help = 'Backup all school management data to JSON files'
     
     def add_arguments(self, parser):
         parser.add_argument('--model', type=str, help='Specific model to backup')
+        parser.add_argument(
+            '--type', dest='backup_type', default='manual', choices=['manual', 'auto'],
+            help='Logged backup type (scheduled backups use auto)'
+        )
     
+    @read_from_replica
     def handle(self, *args, **options):
         timestamp = datetime.now().strftime("%Y-%m-%d-%H-%M-%S")
         backup_dir = f"backups/{timestamp}"
@@ -69,7 +75,7 @@ class Command(BaseCommand):
             # Log the backup
             file_size = f"{os.path.getsize(backup_file) / 1024 / 1024:.2f} MB"
             BackupLog.objects.create(
-                backup_type='manual',
+                backup_type=options['backup_type'],
                 file_path=backup_file,
                 file_size=file_size,
                 status='success',
@@ -82,7 +88,7 @@ class Command(BaseCommand):
             
         except Exception as e:
             BackupLog.objects.create(
-                backup_type='manual',
+                backup_type=options['backup_type'],
                 file_path='',
                 file_size='0',
                 status='failed',
@@ -0,0 +1,100 @@
+# backup_manager/tasks.py
+import io
+import os
+import zipfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.core.management import call_command
+
+from apps.jobs.queue import task
+from .models import BackupLog
+from .utils import export_utils
+
+# Excel export per kind: (export function name, download file name)
+EXCEL_EXPORTS = {
+    'students': ('export_students_excel', 'students_data.xlsx'),
+    'teachers': ('export_teachers_excel', 'teachers_staff_data.xlsx'),
+    'finance': ('export_finance_excel', 'financial_data.xlsx'),
+    'academic': ('export_academic_data', 'academic_data.xlsx'),
+    'results': ('export_results_excel', 'results_data.xlsx'),
+    'attendance': ('export_attendance_excel', 'attendance_data.xlsx'),
+    'idcards': ('export_idcards_excel', 'id_cards_data.xlsx'),
+    'portfolio': ('export_portfolio_excel', 'portfolio_data.xlsx'),
+}
+
+
+@task('backup.export_excel', queue='exports', priority=10, max_attempts=2, replica=True)
+def export_excel(job, kind):
+    function, filename = EXCEL_EXPORTS[kind]
+    job.report_progress(10, message=f"Exporting {kind} data...")
+    excel_file = getattr(export_utils, function)()
+    job.save_artifact(filename, excel_file.getvalue())
+    job.report_progress(100, message="Export ready")
+    return {'file': filename}
+
+
+@task('backup.export_all', queue='exports', concurrency=1, replica=True)
+def export_all(job):
+    job.report_progress(5, message="Exporting all data...")
+    export_dir, success, export_results = export_utils.export_all_data()
+    if not success:
+        raise RuntimeError(export_dir)
+
+    # One download with every sheet, as well as the copy under exports/
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for path in sorted(Path(export_dir).iterdir()):
+            zf.write(path, path.name)
+    job.save_artifact(f"{Path(export_dir).name}_export.zip", archive.getvalue())
+    job.report_progress(100, message=f"All data exported to: {export_dir}")
+    return {
+        'export_path': export_dir,
+        'results': export_results,
+        'errors': [f"{name}: {status}" for name, status in export_results.items() if status != 'Success'],
+    }
+
+
+def _backup_recipients(user_email):
+    # Recipients priority: custom setting, ADMINS, requesting user's email
+    backup_to = getattr(settings, 'BACKUP_EMAIL_TO', None)
+    if backup_to:
+        return backup_to if isinstance(backup_to, (list, tuple)) else [backup_to]
+    if getattr(settings, 'ADMINS', None):
+        return [addr for _, addr in settings.ADMINS]
+    return [user_email] if user_email else []
+
+
+@task('backup.create', queue='exports', concurrency=1)
+def create_backup(job, user_email=None, backup_type='manual'):
+    job.report_progress(5, message="Backing up data...")
+    call_command('backup_data', backup_type=backup_type)
+
+    # backup_data logs failures instead of raising them
+    log = BackupLog.objects.filter(backup_type=backup_type).first()
+    if log is None or log.status != 'success':
+        raise RuntimeError(log.notes if log else "Backup did not run")
+    latest_file = Path(log.file_path)
+    job.report_progress(80, message="Backup written; emailing it...")
+
+    # Email the backup if possible
+    emailed = False
+    recipients = _backup_recipients(user_email)
+    if recipients:
+        email = EmailMessage(
+            subject=f"School Data Backup - {latest_file.parent.name}",
+            body="This email contains the latest school data backup as an attachment.",
+            from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', None) or None,
+            to=recipients,
+        )
+        with open(latest_file, 'rb') as fp:
+            email.attach(latest_file.name, fp.read(), 'application/json')
+        try:
+            email.send(fail_silently=False)
+            emailed = True
+        except Exception:
+            emailed = False
+
+    job.report_progress(100, message="Backup created successfully" + (" and emailed" if emailed else ""))
+    return {'file': os.fspath(latest_file), 'emailed': emailed}
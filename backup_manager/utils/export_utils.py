@@ -1,10 +1,13 @@
 # backup_manager/utils/export_utils.py
-import pandas as pd
 from io import BytesIO
 import os
 from datetime import datetime
 from django.apps import apps
 
+from apps.corecode.lazy import lazy_import
+
+pd = lazy_import('pandas')
+
 def get_model(app_label, model_name):
     """Safely get model class"""
     try:
@@ -203,10 +206,11 @@ def export_results_excel():
         return create_error_excel("Result app not found")
     
     try:
-        results = Result.objects.all().values(
+        # Totals and grades are computed in SQL from the grade scales
+        results = Result.objects.with_grades().values(
             'student__surname', 'student__firstname', 'session__name',
             'term__name', 'subject__name', 'test_score', 'exam_score',
-            'total_score', 'grade'
+            'total', 'grade_label'
         )
         
         df = pd.DataFrame(list(results))
@@ -218,7 +222,8 @@ def export_results_excel():
             'subject__name': 'Subject',
             'test_score': 'Test Score',
             'exam_score': 'Exam Score', 
-            'total_score': 'Total Score'
+            'total': 'Total Score',
+            'grade_label': 'Grade'
         }, inplace=True)
         
         return create_excel_file(df, 'Results')
@@ -236,25 +241,26 @@ def export_attendance_excel():
     try:
         # Attendance Registers
         registers = AttendanceRegister.objects.all().values(
-            'name', 'class__name', 'session__name', 'term__name', 'date'
+            'date', 'student_class__name', 'session__name', 'term__name'
         )
         
         df_registers = pd.DataFrame(list(registers))
         df_registers.rename(columns={
-            'class__name': 'Class',
+            'student_class__name': 'Class',
             'session__name': 'Academic Session',
             'term__name': 'Academic Term'
         }, inplace=True)
         
         # Attendance Entries
         entries = AttendanceEntry.objects.all().values(
-            'register__name', 'student__surname', 'student__firstname',
-            'status', 'date'
+            'register__date', 'register__student_class__name', 'student__surname',
+            'student__firstname', 'status'
         )
         
         df_entries = pd.DataFrame(list(entries))
         df_entries.rename(columns={
-            'register__name': 'Register Name',
+            'register__date': 'Date',
+            'register__student_class__name': 'Class',
             'student__surname': 'Student Surname',
             'student__firstname': 'Student First Name'
         }, inplace=True)
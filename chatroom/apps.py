@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ChatroomConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'chatroom'
+
+    def ready(self):
+        # Import signals so receivers are registered
+        from . import signals  # noqa: F401
@@ -0,0 +1,153 @@
+import asyncio
+import atexit
+import logging
+import threading
+from collections import defaultdict
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.db import DataError, IntegrityError, transaction
+
+from .models import Message
+
+logger = logging.getLogger(__name__)
+
+
+def write_behind_enabled():
+    return getattr(settings, 'CHAT_WRITE_BEHIND', False)
+
+
+class MessageBuffer:
+    """
+    Per-process write-behind buffer for chat messages.
+
+    Consumers broadcast a message first and then ``add`` it here. Buffered
+    messages are written with a single ``bulk_create`` per flush when a room
+    reaches ``batch_size`` pending messages, when the periodic timer fires,
+    when a consumer disconnects, and finally at interpreter exit. Each
+    message carries its client-generated ``client_id`` (unique in the
+    database), so retrying a flush after a partial failure cannot create
+    duplicates.
+
+    Rooms are flushed separately, so one room's bad rows cannot hold up the
+    others. When a room's batch fails its messages are saved one by one:
+    rows the database rejects (e.g. for a room deleted meanwhile) are
+    dropped and logged with their content, and when the database itself is
+    failing the rest stay queued for up to ``max_attempts`` flushes.
+    """
+
+    def __init__(self, batch_size=None, flush_interval=None, max_attempts=None):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self.pending = defaultdict(list)
+        self.lock = threading.Lock()
+        self._timer = None
+
+    def get_batch_size(self):
+        return self.batch_size or getattr(settings, 'CHAT_WRITE_BEHIND_BATCH_SIZE', 50)
+
+    def get_flush_interval(self):
+        return self.flush_interval or getattr(settings, 'CHAT_WRITE_BEHIND_INTERVAL', 1.0)
+
+    def get_max_attempts(self):
+        return self.max_attempts or getattr(settings, 'CHAT_WRITE_BEHIND_MAX_ATTEMPTS', 5)
+
+    def add(self, message):
+        """Queue ``message``; return True when its room should flush now."""
+        with self.lock:
+            room_messages = self.pending[message.room_id]
+            room_messages.append(message)
+            return len(room_messages) >= self.get_batch_size()
+
+    def pending_count(self):
+        with self.lock:
+            return sum(len(messages) for messages in self.pending.values())
+
+    def _drain(self, room_id):
+        with self.lock:
+            return self.pending.pop(room_id, [])
+
+    def _requeue(self, room_id, messages):
+        """Put ``messages`` back at the front of the room's queue."""
+        with self.lock:
+            self.pending[room_id][:0] = messages
+
+    def flush(self, room_id=None):
+        """Write pending messages for one room (or all rooms) to the database."""
+        if room_id is None:
+            with self.lock:
+                rooms = list(self.pending)
+        else:
+            rooms = [room_id]
+        return sum(self._flush_room(room) for room in rooms)
+
+    def _flush_room(self, room_id):
+        messages = self._drain(room_id)
+        if not messages:
+            return 0
+        try:
+            Message.objects.bulk_create(messages, ignore_conflicts=True)
+            return len(messages)
+        except Exception:
+            logger.warning(
+                'Failed to flush %d chat messages for room %s, saving them one by one',
+                len(messages), room_id, exc_info=True,
+            )
+
+        saved, unsaved = 0, []
+        for index, message in enumerate(messages):
+            try:
+                with transaction.atomic():
+                    Message.objects.bulk_create([message], ignore_conflicts=True)
+            except (IntegrityError, DataError):
+                self._drop(message)
+            except Exception:
+                # The database itself is failing: keep this and the rest for later
+                unsaved = messages[index:]
+                break
+            else:
+                saved += 1
+
+        retry = []
+        for message in unsaved:
+            message.flush_attempts = getattr(message, 'flush_attempts', 0) + 1
+            if message.flush_attempts >= self.get_max_attempts():
+                self._drop(message)
+            else:
+                retry.append(message)
+        if retry:
+            self._requeue(room_id, retry)
+        return saved
+
+    def _drop(self, message):
+        logger.error(
+            'Dropped chat message %s for room %s from user %s: %r',
+            message.client_id, message.room_id, message.sender_id, message.content,
+        )
+
+    async def aflush(self, room_id=None):
+        return await database_sync_to_async(self.flush)(room_id)
+
+    def ensure_timer(self):
+        """Start the periodic flush task on the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._timer is None or self._timer.done() or self._timer.get_loop() is not loop:
+            self._timer = loop.create_task(self._run_timer())
+
+    async def _run_timer(self):
+        while True:
+            await asyncio.sleep(self.get_flush_interval())
+            if self.pending_count():
+                await self.aflush()
+
+
+message_buffer = MessageBuffer()
+
+
+@atexit.register
+def _flush_on_exit():
+    # Workers exit through SystemExit on graceful shutdown, which runs
+    # atexit handlers after the event loop has stopped.
+    if message_buffer.pending_count():
+        message_buffer.flush()
@@ -1,43 +1,60 @@
 import json
+import uuid
+from asgiref.sync import sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.contrib.auth.models import AnonymousUser
-from .models import ChatRoom, Message, RoomParticipant
+from django.db import IntegrityError
+from .buffer import message_buffer, write_behind_enabled
+from .fanout import fanout
+from .membership import can_access_room
+from .models import Message
+from .presence import presence
 
 class ChatConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         self.room_id = self.scope['url_route']['kwargs']['room_id']
         self.room_group_name = f'chat_{self.room_id}'
-        
+        self.joined = False
+
+        user = self.scope['user']
+        if not user.is_authenticated:
+            await self.close(code=4001)
+            return
+
+        # Membership is cached, so this only touches the database on a miss
+        can_access = await self.check_room_access(user, self.room_id)
+        if not can_access:
+            await self.close(code=4001)
+            return
+
         # Join room group
         await self.channel_layer.group_add(
             self.room_group_name,
             self.channel_name
         )
-        
-        user = self.scope['user']
-        if user.is_authenticated:
-            # Check if user can access the room
-            can_access = await self.check_room_access(user, self.room_id)
-            if can_access:
-                await self.accept()
-                await self.send_user_list()
-                await self.notify_user_joined(user)
-            else:
-                await self.close(code=4001)
-        else:
-            await self.close(code=4001)
+        await self.accept()
+
+        diff = await sync_to_async(presence.join)(self.room_id, self.channel_name, user)
+        self.joined = True
+        await self.send_user_list()
+        await self.broadcast_presence(diff)
 
     async def disconnect(self, close_code):
+        if not getattr(self, 'joined', False):
+            return
+
         # Leave room group
         await self.channel_layer.group_discard(
             self.room_group_name,
             self.channel_name
         )
-        
-        user = self.scope['user']
-        if user.is_authenticated:
-            await self.notify_user_left(user)
+
+        if write_behind_enabled():
+            await message_buffer.aflush(self.room_id)
+
+        diff = await sync_to_async(presence.leave)(self.room_id, self.channel_name)
+        await self.broadcast_presence(diff)
 
     async def receive(self, text_data):
         data = json.loads(text_data)
@@ -45,116 +62,105 @@ class ChatConsumer(AsyncWebsocketConsumer):
         user = self.scope['user']
         
         if message_type == 'chat_message':
-            message = data.get('message', '').strip()
-            if message and user.is_authenticated:
-                # Save message to database
-                saved_message = await self.save_message(user, self.room_id, message)
-                
-                # Send message to room group
-                await self.channel_layer.group_send(
-                    self.room_group_name,
-                    {
-                        'type': 'chat_message',
-                        'message_id': saved_message.id,
-                        'sender_id': user.id,
-                        'sender_username': user.username,
-                        'message': message,
-                        'timestamp': saved_message.timestamp.isoformat(),
-                    }
+            content = data.get('message', '').strip()
+            if content and user.is_authenticated:
+                message = Message(
+                    room_id=self.room_id,
+                    sender=user,
+                    content=content,
+                    client_id=self.parse_client_id(data.get('client_id')),
                 )
-        
-        elif message_type == 'typing':
+                if write_behind_enabled():
+                    # Broadcast first; the buffer persists it shortly after
+                    await self.broadcast_message(user, message)
+                    message_buffer.ensure_timer()
+                    if message_buffer.add(message):
+                        await message_buffer.aflush(self.room_id)
+                elif await self.save_message(message):
+                    await self.broadcast_message(user, message)
+
+        elif message_type == 'heartbeat':
             if user.is_authenticated:
-                await self.channel_layer.group_send(
-                    self.room_group_name,
-                    {
-                        'type': 'user_typing',
-                        'user_id': user.id,
-                        'username': user.username,
-                        'is_typing': data.get('is_typing', False)
-                    }
+                diff = await sync_to_async(presence.heartbeat)(
+                    self.room_id, self.channel_name, user
                 )
+                await self.broadcast_presence(diff)
+
+        elif message_type == 'typing':
+            if user.is_authenticated:
+                # Debounced and broadcast with the next room snapshot
+                fanout.typing(self.room_id, user, bool(data.get('is_typing', False)))
+                fanout.ensure_task(self.room_id, self.room_group_name)
 
     async def chat_message(self, event):
         await self.send(text_data=json.dumps({
             'type': 'message',
             'message_id': event['message_id'],
+            'client_id': event['client_id'],
             'sender_id': event['sender_id'],
             'sender_username': event['sender_username'],
             'message': event['message'],
             'timestamp': event['timestamp'],
         }))
 
-    async def user_typing(self, event):
-        await self.send(text_data=json.dumps({
-            'type': 'typing',
-            'user_id': event['user_id'],
-            'username': event['username'],
-            'is_typing': event['is_typing']
-        }))
-
-    async def user_joined(self, event):
+    async def room_snapshot(self, event):
+        fanout.metrics['frames_delivered'] += 1
         await self.send(text_data=json.dumps({
-            'type': 'user_joined',
-            'user_id': event['user_id'],
-            'username': event['username']
-        }))
-
-    async def user_left(self, event):
-        await self.send(text_data=json.dumps({
-            'type': 'user_left',
-            'user_id': event['user_id'],
-            'username': event['username']
+            'type': 'snapshot',
+            'source': event['source'],
+            'typing': event['typing'],
+            'typing_count': event['typing_count'],
+            'joined': event['joined'],
+            'left': event['left'],
         }))
 
     # Helper methods
     @database_sync_to_async
     def check_room_access(self, user, room_id):
+        return can_access_room(user, room_id)
+
+    @database_sync_to_async
+    def save_message(self, message):
         try:
-            room = ChatRoom.objects.get(id=room_id, is_active=True)
-            return room.participants.filter(id=user.id).exists() or user.is_staff
-        except ChatRoom.DoesNotExist:
+            message.save()
+        except IntegrityError:
+            # Duplicate client_id: the client re-sent a message we already have
             return False
+        return True
 
-    @database_sync_to_async
-    def save_message(self, user, room_id, content):
-        room = ChatRoom.objects.get(id=room_id)
-        message = Message.objects.create(
-            room=room,
-            sender=user,
-            content=content
+    @staticmethod
+    def parse_client_id(value):
+        try:
+            return uuid.UUID(str(value))
+        except ValueError:
+            return uuid.uuid4()
+
+    async def broadcast_message(self, user, message):
+        # message_id is None until a write-behind message has been flushed;
+        # clients key on client_id instead.
+        await self.channel_layer.group_send(
+            self.room_group_name,
+            {
+                'type': 'chat_message',
+                'message_id': message.id,
+                'client_id': str(message.client_id),
+                'sender_id': user.id,
+                'sender_username': user.username,
+                'message': message.content,
+                'timestamp': message.timestamp.isoformat(),
+            }
         )
-        return message
 
     async def send_user_list(self):
-        users = await self.get_online_users(self.room_id)
+        users = await sync_to_async(presence.online_users)(self.room_id)
         await self.send(text_data=json.dumps({
             'type': 'user_list',
             'users': users
         }))
 
-    @database_sync_to_async
-    def get_online_users(self, room_id):
-        room = ChatRoom.objects.get(id=room_id)
-        participants = room.participants.all()
-        return [{'id': p.id, 'username': p.username} for p in participants]
-
-    async def notify_user_joined(self, user):
-        await self.channel_layer.group_send(
-            self.room_group_name,
-            {
-                'type': 'user_joined',
-                'user_id': user.id,
-                'username': user.username
-            }
-        )
-
-    async def notify_user_left(self, user):
-        await self.channel_layer.group_send(
-            self.room_group_name,
-            {
-                'type': 'user_left',
-                'user_id': user.id,
-                'username': user.username
-            }
-        )
\ No newline at end of file
+    async def broadcast_presence(self, diff):
+        """Queue online/offline changes for the next room snapshot."""
+        if not diff['joined'] and not diff['left']:
+            return
+        fanout.presence(self.room_id, diff)
+        fanout.ensure_task(self.room_id, self.room_group_name)
@@ -0,0 +1,146 @@
+import asyncio
+import time
+import uuid
+from collections import Counter
+
+from channels.layers import get_channel_layer
+from django.conf import settings
+
+# Identifies this worker process in snapshots. Each process only knows about
+# its own connections, so clients merge the typing lists per source.
+SOURCE = uuid.uuid4().hex[:12]
+
+
+class _RoomState:
+    def __init__(self):
+        self.typing = {}
+        self.joined = {}
+        self.left = {}
+        self.dirty = False
+        self.last_sent = 0.0
+
+
+class RoomFanout:
+    """
+    Coalesce typing and presence events into periodic per-room snapshots.
+
+    Instead of one ``group_send`` per keystroke or connect, consumers record
+    state here and a single task per room broadcasts at most one snapshot
+    every ``interval`` seconds, and only when something changed. Typing
+    state is debounced per user: repeated "still typing" frames just extend
+    the user's expiry. Join/leave diffs accumulated within one interval are
+    merged, so a reconnect inside the window costs nothing.
+    """
+
+    def __init__(self, interval=None, typing_ttl=None, max_typing=None):
+        self.interval = interval or getattr(settings, 'CHAT_SNAPSHOT_INTERVAL', 0.5)
+        self.typing_ttl = typing_ttl or getattr(settings, 'CHAT_TYPING_TTL', 5)
+        self.max_typing = max_typing or getattr(settings, 'CHAT_TYPING_MAX_USERS', 5)
+        self.rooms = {}
+        self.tasks = {}
+        self.metrics = Counter()
+
+    def typing(self, room_id, user, is_typing):
+        self.metrics['typing_received'] += 1
+        state = self.rooms.setdefault(room_id, _RoomState())
+        now = time.time()
+        entry = state.typing.get(user.id)
+        was_typing = entry is not None and entry[1] > now
+
+        if is_typing:
+            state.typing[user.id] = [user.username, now + self.typing_ttl]
+        else:
+            state.typing.pop(user.id, None)
+
+        if was_typing == bool(is_typing):
+            self.metrics['typing_coalesced'] += 1
+        else:
+            state.dirty = True
+
+    def presence(self, room_id, diff):
+        if not diff['joined'] and not diff['left']:
+            return
+        self.metrics['presence_received'] += 1
+        state = self.rooms.setdefault(room_id, _RoomState())
+        for user in diff['joined']:
+            if state.left.pop(user['id'], None) is None:
+                state.joined[user['id']] = user
+            else:
+                self.metrics['presence_coalesced'] += 1
+        for user in diff['left']:
+            state.typing.pop(user['id'], None)
+            if state.joined.pop(user['id'], None) is None:
+                state.left[user['id']] = user
+            else:
+                self.metrics['presence_coalesced'] += 1
+
+    def snapshot(self, room_id):
+        """Return the event to broadcast for ``room_id`` now, or None."""
+        state = self.rooms.get(room_id)
+        if state is None:
+            return None
+        now = time.time()
+
+        expired = [uid for uid, entry in state.typing.items() if entry[1] <= now]
+        for user_id in expired:
+            del state.typing[user_id]
+        # Re-send a non-empty typing list now and then so clients, which
+        # expire sources they stop hearing from, keep showing it.
+        refresh = state.typing and now - state.last_sent >= self.typing_ttl / 2
+        if not (state.dirty or expired or refresh or state.joined or state.left):
+            return None
+
+        typing = [
+            {'id': user_id, 'username': entry[0]}
+            for user_id, entry in state.typing.items()
+        ]
+        event = {
+            'type': 'room_snapshot',
+            'source': SOURCE,
+            'typing': typing[:self.max_typing],
+            'typing_count': len(typing),
+            'joined': list(state.joined.values()),
+            'left': list(state.left.values()),
+        }
+        state.joined, state.left = {}, {}
+        state.dirty = False
+        state.last_sent = now
+        self.metrics['snapshots_sent'] += 1
+        return event
+
+    def is_idle(self, room_id):
+        state = self.rooms.get(room_id)
+        return state is None or not (
+            state.typing or state.joined or state.left or state.dirty
+        )
+
+    def ensure_task(self, room_id, group_name):
+        """Start the snapshot loop for a room if it isn't already running."""
+        loop = asyncio.get_running_loop()
+        task = self.tasks.get(room_id)
+        if task is None or task.done() or task.get_loop() is not loop:
+            self.tasks[room_id] = loop.create_task(self._run(room_id, group_name))
+
+    async def _run(self, room_id, group_name):
+        channel_layer = get_channel_layer()
+        while True:
+            await asyncio.sleep(self.interval)
+            event = self.snapshot(room_id)
+            if event is not None:
+                await channel_layer.group_send(group_name, event)
+            if self.is_idle(room_id):
+                self.rooms.pop(room_id, None)
+                self.tasks.pop(room_id, None)
+                return
+
+    def stats(self):
+        stats = dict(self.metrics)
+        stats['active_rooms'] = len(self.rooms)
+        received = stats.get('typing_received', 0)
+        stats['typing_drop_rate'] = (
+            round(stats.get('typing_coalesced', 0) / received, 3) if received else 0
+        )
+        return stats
+
+
+fanout = RoomFanout()
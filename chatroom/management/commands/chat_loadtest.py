@@ -0,0 +1,208 @@
+import asyncio
+import json
+import statistics
+import time
+import uuid
+
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from apps.perf.connections import ConnectionMonitor
+
+from chatroom.buffer import message_buffer
+from chatroom.consumers import ChatConsumer
+from chatroom.fanout import fanout
+from chatroom.models import ChatRoom, Message
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-test ChatConsumer message throughput on the in-memory channel '
+        'layer, with and without write-behind persistence, and check that '
+        'database connections stay bounded'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=40, help='Concurrent connections in the room')
+        parser.add_argument('--messages', type=int, default=10, help='Messages sent by each client')
+        parser.add_argument(
+            '--mode', choices=['sync', 'write-behind', 'both'], default='both',
+            help='Persistence mode(s) to measure'
+        )
+        parser.add_argument(
+            '--typing', type=int, default=0,
+            help='Typing frames each client sends before every message'
+        )
+        parser.add_argument('--timeout', type=float, default=30, help='Seconds to wait for each frame')
+        parser.add_argument('--keep', action='store_true', help='Keep the generated room, users and messages')
+        parser.add_argument(
+            '--max-connections', type=int,
+            help='Fail if more database connections are open at once (default: the pool size, if pooled)'
+        )
+
+    def handle(self, *args, **options):
+        modes = ['sync', 'write-behind'] if options['mode'] == 'both' else [options['mode']]
+        prefix = f'loadtest-{uuid.uuid4().hex[:8]}'
+        users = User.objects.bulk_create([
+            User(username=f'{prefix}-{i}') for i in range(options['clients'])
+        ])
+        # bulk_create does not return primary keys on every backend
+        users = list(User.objects.filter(username__startswith=prefix).order_by('id'))
+
+        try:
+            for mode in modes:
+                room = ChatRoom.objects.create(
+                    name=f'{prefix} {mode}', room_type='general', created_by=users[0]
+                )
+                room.participants.add(*users)
+                # Every client receives every message, so size the per-channel
+                # queues to hold a full run without dropping frames.
+                capacity = options['clients'] * options['messages'] * 2 + 100
+                with override_settings(
+                    CHANNEL_LAYERS={'default': {
+                        'BACKEND': 'channels.layers.InMemoryChannelLayer',
+                        'CONFIG': {'capacity': capacity},
+                    }},
+                    CHAT_WRITE_BEHIND=(mode == 'write-behind'),
+                ), ConnectionMonitor() as monitor:
+                    report = async_to_sync(self.run_room)(room, users, options)
+                report['persisted'] = Message.objects.filter(room=room).count()
+                report['connections'] = monitor.report()
+                self.print_report(mode, report, options)
+                self.check_connections(report['connections'], options)
+        finally:
+            if not options['keep']:
+                ChatRoom.objects.filter(name__startswith=prefix).delete()
+                User.objects.filter(username__startswith=prefix).delete()
+
+    async def connect(self, room, user, timeout):
+        communicator = ApplicationCommunicator(ChatConsumer.as_asgi(), {
+            'type': 'websocket',
+            'path': f'/ws/chatroom/{room.id}/',
+            'headers': [],
+            'subprotocols': [],
+            'user': user,
+            'url_route': {'args': (), 'kwargs': {'room_id': room.id}},
+        })
+        await communicator.send_input({'type': 'websocket.connect'})
+        response = await communicator.receive_output(timeout)
+        if response['type'] != 'websocket.accept':
+            raise RuntimeError(f'{user.username} was refused: {response}')
+        return communicator
+
+    async def run_client(self, communicator, expected, sent_at, latencies, timeout):
+        """Read frames until every broadcast message has arrived."""
+        received = 0
+        while received < expected:
+            frame = await communicator.receive_output(timeout)
+            if frame['type'] != 'websocket.send':
+                continue
+            data = json.loads(frame['text'])
+            if data['type'] != 'message':
+                continue
+            received += 1
+            started = sent_at.pop((id(communicator), data['client_id']), None)
+            if started is not None:
+                latencies.append(time.perf_counter() - started)
+
+    async def send_messages(self, communicator, count, typing, sent_at):
+        for i in range(count):
+            for _ in range(typing):
+                await communicator.send_input({
+                    'type': 'websocket.receive',
+                    'text': json.dumps({'type': 'typing', 'is_typing': True}),
+                })
+            client_id = str(uuid.uuid4())
+            sent_at[(id(communicator), client_id)] = time.perf_counter()
+            await communicator.send_input({
+                'type': 'websocket.receive',
+                'text': json.dumps({
+                    'type': 'chat_message',
+                    'message': f'load test message {i}',
+                    'client_id': client_id,
+                }),
+            })
+
+    async def run_room(self, room, users, options):
+        timeout = options['timeout']
+        communicators = [await self.connect(room, user, timeout) for user in users]
+        expected = len(communicators) * options['messages']
+        sent_at = {}
+        latencies = []
+
+        started = time.perf_counter()
+        readers = [
+            asyncio.ensure_future(
+                self.run_client(c, expected, sent_at, latencies, timeout)
+            )
+            for c in communicators
+        ]
+        await asyncio.gather(*[
+            self.send_messages(c, options['messages'], options['typing'], sent_at)
+            for c in communicators
+        ])
+        await asyncio.gather(*readers)
+        elapsed = time.perf_counter() - started
+        if options['typing']:
+            # Let the room snapshot loop run before everyone disconnects
+            await asyncio.sleep(fanout.interval * 2)
+
+        for communicator in communicators:
+            await communicator.send_input({'type': 'websocket.disconnect', 'code': 1000})
+            await communicator.wait(timeout)
+        # Disconnects flush their rooms; this catches anything left over
+        await message_buffer.aflush()
+
+        return {
+            'messages': expected,
+            'elapsed': elapsed,
+            'latencies': sorted(latencies),
+        }
+
+    def print_report(self, mode, report, options):
+        latencies = report['latencies']
+        p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0
+        self.stdout.write(self.style.MIGRATE_HEADING(f'Mode: {mode}'))
+        self.stdout.write(
+            f"  {options['clients']} clients x {options['messages']} messages "
+            f"= {report['messages']} messages in {report['elapsed']:.2f}s "
+            f"({report['messages'] / report['elapsed']:.0f} msg/s)"
+        )
+        if latencies:
+            self.stdout.write(
+                f'  broadcast latency: median {statistics.median(latencies) * 1000:.1f}ms, '
+                f'p95 {p95 * 1000:.1f}ms'
+            )
+        stats = fanout.stats()
+        self.stdout.write(
+            f"  typing frames: {stats.get('typing_received', 0)} received, "
+            f"{stats.get('typing_coalesced', 0)} coalesced; "
+            f"{stats.get('snapshots_sent', 0)} snapshots, "
+            f"{stats.get('frames_delivered', 0)} snapshot frames delivered"
+        )
+        fanout.metrics.clear()
+        style = self.style.SUCCESS if report['persisted'] == report['messages'] else self.style.ERROR
+        self.stdout.write(style(f"  persisted {report['persisted']}/{report['messages']} messages"))
+        connections = report['connections']
+        line = (
+            f"  db connections: {connections['created']} opened, "
+            f"peak {connections['peak_held']} held at once"
+        )
+        if connections['peak_pool'] is not None:
+            line += f", pool peak {connections['peak_pool']}/{connections['bound']}"
+        if connections['peak_server'] is not None:
+            line += f", server peak {connections['peak_server']}"
+        self.stdout.write(line)
+
+    def check_connections(self, connections, options):
+        limit = options['max_connections'] or connections['bound']
+        if limit is None:
+            return
+        peaks = [connections['peak_held'], connections['peak_pool'] or 0]
+        if max(peaks) > limit:
+            raise CommandError(f'{max(peaks)} database connections open at once; the limit is {limit}')
@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import ChatRoom
+
+MEMBERSHIP_CACHE_TIMEOUT = getattr(settings, 'CHAT_MEMBERSHIP_CACHE_TIMEOUT', 300)
+
+
+def _membership_key(room_id):
+    return f'chat:room:{room_id}:membership'
+
+
+def get_room_membership(room_id):
+    """
+    Return ``{'active': bool, 'members': frozenset(user_ids)}`` for a room.
+
+    The result is cached and dropped by the signals in ``chatroom.signals``
+    whenever the room or its participant list changes, so websocket connects
+    normally avoid the database entirely.
+    """
+    key = _membership_key(room_id)
+    membership = cache.get(key)
+    if membership is None:
+        room = ChatRoom.objects.filter(id=room_id).values('is_active').first()
+        if room is None:
+            membership = {'active': False, 'members': frozenset()}
+        else:
+            members = ChatRoom.participants.through.objects.filter(
+                chatroom_id=room_id
+            ).values_list('user_id', flat=True)
+            membership = {'active': room['is_active'], 'members': frozenset(members)}
+        cache.set(key, membership, MEMBERSHIP_CACHE_TIMEOUT)
+    return membership
+
+
+def can_access_room(user, room_id):
+    membership = get_room_membership(room_id)
+    if not membership['active']:
+        return False
+    return user.is_staff or user.id in membership['members']
+
+
+def invalidate_room_membership(*room_ids):
+    cache.delete_many([_membership_key(room_id) for room_id in room_ids])
@@ -0,0 +1,179 @@
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.redis import RedisCache
+
+PRESENCE_TTL = getattr(settings, 'CHAT_PRESENCE_TTL', 90)
+
+
+def _live(connections):
+    now = time.time()
+    return {
+        channel: entry for channel, entry in connections.items()
+        if entry[2] > now
+    }
+
+
+class LocalStore:
+    """
+    Room maps as single cache values, read and written under a process lock.
+    Only safe with a per-process cache (local memory), where the lock covers
+    every writer.
+    """
+    lock = threading.Lock()
+
+    def __init__(self, backend):
+        self.cache = backend
+
+    def get(self, key):
+        return self.cache.get(key) or {}
+
+    def update(self, key, channel_name, entry, timeout):
+        with self.lock:
+            previous = self.get(key)
+            connections = _live(previous)
+            if entry is None:
+                connections.pop(channel_name, None)
+            else:
+                connections[channel_name] = entry
+            if connections:
+                self.cache.set(key, connections, timeout)
+            else:
+                self.cache.delete(key)
+        return previous
+
+
+class RedisStore:
+    """
+    Room maps as Redis hashes (one field per connection), each update done
+    by one Lua script so concurrent workers cannot overwrite each other.
+    """
+
+    # Returns the room's previous connections, then prunes expired ones,
+    # sets or deletes this connection and renews the hash's expiry.
+    SCRIPT = """
+    local previous = redis.call('HGETALL', KEYS[1])
+    local now = tonumber(ARGV[1])
+    for i = 1, #previous, 2 do
+        if cjson.decode(previous[i + 1])[3] <= now then
+            redis.call('HDEL', KEYS[1], previous[i])
+        end
+    end
+    if ARGV[3] == '' then
+        redis.call('HDEL', KEYS[1], ARGV[2])
+    else
+        redis.call('HSET', KEYS[1], ARGV[2], ARGV[3])
+    end
+    if redis.call('EXISTS', KEYS[1]) == 1 then
+        redis.call('EXPIRE', KEYS[1], ARGV[4])
+    end
+    return previous
+    """
+
+    def __init__(self, backend):
+        self.cache = backend
+
+    def _client(self, key):
+        return self.cache._cache.get_client(key, write=True)
+
+    @staticmethod
+    def _decode(fields):
+        if isinstance(fields, dict):
+            fields = [item for pair in fields.items() for item in pair]
+        return {
+            fields[i].decode(): json.loads(fields[i + 1])
+            for i in range(0, len(fields), 2)
+        }
+
+    def get(self, key):
+        key = self.cache.make_and_validate_key(key)
+        return self._decode(self._client(key).hgetall(key))
+
+    def update(self, key, channel_name, entry, timeout):
+        key = self.cache.make_and_validate_key(key)
+        previous = self._client(key).eval(
+            self.SCRIPT, 1, key, time.time(), channel_name,
+            '' if entry is None else json.dumps(entry), int(timeout),
+        )
+        return self._decode(previous)
+
+
+class PresenceTracker:
+    """
+    Track live websocket connections per chat room.
+
+    Each room keeps a map of ``channel_name -> [user_id, username, expires_at]``
+    in the Django cache: a Redis hash updated atomically when ``REDIS_URL``
+    is set (``RedisStore``), a value guarded by a process lock otherwise
+    (``LocalStore``). A connection stays online as long as its consumer keeps
+    sending heartbeats; connections that miss them are pruned on the next
+    update, so a crashed worker cannot leave users online forever.
+
+    Every mutating call returns a diff ``{'joined': [...], 'left': [...]}``
+    describing users whose online state actually changed. A user with two
+    tabs open only "leaves" when the last connection goes away.
+    """
+
+    def __init__(self, ttl=PRESENCE_TTL, backend=None):
+        self.ttl = ttl
+        self.backend = backend
+
+    @property
+    def store(self):
+        # Cache connections are per thread, so resolve the backend on each use
+        backend = self.backend or caches['default']
+        return RedisStore(backend) if isinstance(backend, RedisCache) else LocalStore(backend)
+
+    def _key(self, room_id):
+        return f'chat:room:{room_id}:presence'
+
+    @staticmethod
+    def _online(connections):
+        return {entry[0]: entry[1] for entry in connections.values()}
+
+    def _diff(self, before, after):
+        return {
+            'joined': [
+                {'id': user_id, 'username': username}
+                for user_id, username in after.items() if user_id not in before
+            ],
+            'left': [
+                {'id': user_id, 'username': username}
+                for user_id, username in before.items() if user_id not in after
+            ],
+        }
+
+    def _update(self, room_id, channel_name, user=None):
+        entry = None if user is None else [user.id, user.username, time.time() + self.ttl]
+        # Keep the room alive a little longer than any entry in it.
+        previous = self.store.update(self._key(room_id), channel_name, entry, self.ttl * 2)
+        # Expired connections drop out here and are reported as "left".
+        connections = _live(previous)
+        if entry is None:
+            connections.pop(channel_name, None)
+        else:
+            connections[channel_name] = entry
+        return self._diff(self._online(previous), self._online(connections))
+
+    def join(self, room_id, channel_name, user):
+        return self._update(room_id, channel_name, user)
+
+    def heartbeat(self, room_id, channel_name, user):
+        return self._update(room_id, channel_name, user)
+
+    def leave(self, room_id, channel_name):
+        return self._update(room_id, channel_name)
+
+    def online_users(self, room_id):
+        return [
+            {'id': user_id, 'username': username}
+            for user_id, username in self._online(
+                _live(self.store.get(self._key(room_id)))
+            ).items()
+        ]
+
+
+presence = PresenceTracker()
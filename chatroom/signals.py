@@ -0,0 +1,27 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .membership import invalidate_room_membership
+from .models import ChatRoom
+
+
+@receiver(m2m_changed, sender=ChatRoom.participants.through)
+def participants_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Drop cached membership when users are added to or removed from rooms."""
+    if action not in ('post_add', 'post_remove', 'post_clear', 'pre_clear'):
+        return
+    if not reverse:
+        invalidate_room_membership(instance.pk)
+    elif pk_set:
+        invalidate_room_membership(*pk_set)
+    else:
+        # user.chatrooms.clear() does not report which rooms were affected
+        invalidate_room_membership(
+            *instance.chatrooms.values_list('pk', flat=True)
+        )
+
+
+@receiver(post_save, sender=ChatRoom)
+@receiver(post_delete, sender=ChatRoom)
+def room_changed(sender, instance, **kwargs):
+    invalidate_room_membership(instance.pk)
@@ -1,3 +1,231 @@
+import io
+import json
+import threading
+import time
+import uuid
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.backends.redis import RedisCache
+from django.core.management import call_command
+from django.db import IntegrityError, OperationalError
 from django.test import TestCase
 
-# Create your tests here.
+from .buffer import MessageBuffer
+from .fanout import RoomFanout
+from .membership import can_access_room
+from .models import ChatRoom, Message
+from .presence import PresenceTracker
+
+User = get_user_model()
+
+
+class PresenceTrackerTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tracker = PresenceTracker(ttl=60)
+        self.alice = User.objects.create_user(username='alice', password='x')
+
+    def test_user_leaves_only_when_last_connection_closes(self):
+        diff = self.tracker.join(1, 'chan-a', self.alice)
+        self.assertEqual(diff['joined'], [{'id': self.alice.id, 'username': 'alice'}])
+
+        diff = self.tracker.join(1, 'chan-b', self.alice)
+        self.assertEqual(diff, {'joined': [], 'left': []})
+
+        self.assertEqual(self.tracker.leave(1, 'chan-a'), {'joined': [], 'left': []})
+        diff = self.tracker.leave(1, 'chan-b')
+        self.assertEqual(diff['left'], [{'id': self.alice.id, 'username': 'alice'}])
+        self.assertEqual(self.tracker.online_users(1), [])
+
+    def test_expired_connections_are_reported_as_left(self):
+        bob = User.objects.create_user(username='bob', password='x')
+        self.tracker.join(1, 'chan-a', self.alice)
+
+        later = time.time() + 61
+        with mock.patch('chatroom.presence.time.time', return_value=later):
+            diff = self.tracker.heartbeat(1, 'chan-b', bob)
+
+        self.assertEqual(diff['joined'], [{'id': bob.id, 'username': 'bob'}])
+        self.assertEqual(diff['left'], [{'id': self.alice.id, 'username': 'alice'}])
+
+    def test_concurrent_joins_are_all_kept(self):
+        users = [User.objects.create_user(username=f'user{i}', password='x') for i in range(8)]
+        threads = [
+            threading.Thread(target=self.tracker.join, args=(1, f'chan-{user.id}', user))
+            for user in users
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(self.tracker.online_users(1)), 8)
+
+    def test_redis_store_sends_one_atomic_script(self):
+        client = mock.Mock()
+        client.eval.return_value = [b'chan-a', b'[999, "ghost", 0]']
+        backend = mock.Mock(spec=RedisCache)
+        backend.make_and_validate_key.side_effect = lambda key: f':1:{key}'
+        backend._cache.get_client.return_value = client
+
+        diff = PresenceTracker(ttl=60, backend=backend).join(1, 'chan-b', self.alice)
+
+        args = client.eval.call_args.args
+        self.assertEqual(args[1:5], (1, ':1:chat:room:1:presence', mock.ANY, 'chan-b'))
+        self.assertEqual(json.loads(args[5])[:2], [self.alice.id, 'alice'])
+        self.assertEqual(diff['left'], [{'id': 999, 'username': 'ghost'}])  # expired
+        self.assertEqual(diff['joined'], [{'id': self.alice.id, 'username': 'alice'}])
+
+
+class RoomMembershipCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username='owner', password='x')
+        self.student = User.objects.create_user(username='student', password='x')
+        self.room = ChatRoom.objects.create(name='Form 1', created_by=self.owner)
+        self.room.participants.add(self.owner)
+
+    def test_access_is_cached(self):
+        self.assertTrue(can_access_room(self.owner, self.room.id))
+        with self.assertNumQueries(0):
+            self.assertTrue(can_access_room(self.owner, self.room.id))
+            self.assertFalse(can_access_room(self.student, self.room.id))
+
+    def test_participant_changes_invalidate_cache(self):
+        self.assertFalse(can_access_room(self.student, self.room.id))
+        self.room.participants.add(self.student)
+        self.assertTrue(can_access_room(self.student, self.room.id))
+        self.student.chatrooms.remove(self.room)
+        self.assertFalse(can_access_room(self.student, self.room.id))
+
+    def test_inactive_room_denies_access(self):
+        self.assertTrue(can_access_room(self.owner, self.room.id))
+        self.room.is_active = False
+        self.room.save()
+        self.assertFalse(can_access_room(self.owner, self.room.id))
+
+
+class MessageBufferTest(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username='owner', password='x')
+        self.room = ChatRoom.objects.create(name='Form 1', created_by=self.owner)
+        self.buffer = MessageBuffer(batch_size=3)
+
+    def make_message(self, client_id=None):
+        return Message(
+            room_id=self.room.id,
+            sender=self.owner,
+            content='hello',
+            client_id=client_id or uuid.uuid4(),
+        )
+
+    def test_add_reports_when_batch_is_full(self):
+        self.assertFalse(self.buffer.add(self.make_message()))
+        self.assertFalse(self.buffer.add(self.make_message()))
+        self.assertTrue(self.buffer.add(self.make_message()))
+
+    def test_flush_writes_in_one_query_and_skips_duplicates(self):
+        client_id = uuid.uuid4()
+        self.make_message(client_id).save()
+        self.buffer.add(self.make_message(client_id))
+        self.buffer.add(self.make_message())
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.buffer.flush(), 2)
+
+        self.assertEqual(self.buffer.pending_count(), 0)
+        self.assertEqual(Message.objects.filter(room=self.room).count(), 2)
+
+    def test_rejected_row_is_dropped_without_holding_up_other_rooms(self):
+        other = ChatRoom.objects.create(name='Form 2', created_by=self.owner)
+        bulk_create = Message.objects.bulk_create
+
+        def reject_poison(messages, **kwargs):
+            if any(message.content == 'poison' for message in messages):
+                raise IntegrityError('violates foreign key constraint')
+            return bulk_create(messages, **kwargs)
+
+        self.buffer.add(self.make_message())
+        self.buffer.add(Message(room_id=other.id, sender=self.owner, content='poison', client_id=uuid.uuid4()))
+        self.buffer.add(Message(room_id=other.id, sender=self.owner, content='fine', client_id=uuid.uuid4()))
+        with mock.patch.object(Message.objects, 'bulk_create', side_effect=reject_poison), \
+                self.assertLogs('chatroom.buffer', 'ERROR'):
+            self.assertEqual(self.buffer.flush(), 2)
+
+        self.assertEqual(self.buffer.pending_count(), 0)
+        self.assertEqual(
+            sorted(Message.objects.values_list('content', flat=True)), ['fine', 'hello']
+        )
+
+    def test_messages_are_dropped_after_max_attempts(self):
+        buffer = MessageBuffer(max_attempts=2)
+        buffer.add(self.make_message())
+        buffer.add(self.make_message())
+        with mock.patch.object(Message.objects, 'bulk_create', side_effect=OperationalError('gone away')), \
+                self.assertLogs('chatroom.buffer'):
+            self.assertEqual(buffer.flush(), 0)
+            self.assertEqual(buffer.pending_count(), 2)
+            self.assertEqual(buffer.flush(), 0)
+        self.assertEqual(buffer.pending_count(), 0)
+
+
+class RoomFanoutTest(TestCase):
+    def setUp(self):
+        self.fanout = RoomFanout(interval=0.5, typing_ttl=5, max_typing=2)
+        self.users = [
+            User.objects.create_user(username=f'student{i}', password='x')
+            for i in range(3)
+        ]
+
+    def test_repeated_typing_frames_are_coalesced(self):
+        for _ in range(10):
+            self.fanout.typing(1, self.users[0], True)
+
+        snapshot = self.fanout.snapshot(1)
+        self.assertEqual(snapshot['typing'], [{'id': self.users[0].id, 'username': 'student0'}])
+        self.assertEqual(self.fanout.metrics['typing_coalesced'], 9)
+        # Nothing changed since the last snapshot
+        self.assertIsNone(self.fanout.snapshot(1))
+
+    def test_snapshot_caps_named_typists(self):
+        for user in self.users:
+            self.fanout.typing(1, user, True)
+
+        snapshot = self.fanout.snapshot(1)
+        self.assertEqual(len(snapshot['typing']), 2)
+        self.assertEqual(snapshot['typing_count'], 3)
+
+    def test_join_and_leave_within_interval_cancel_out(self):
+        user = {'id': self.users[0].id, 'username': 'student0'}
+        self.fanout.presence(1, {'joined': [user], 'left': []})
+        self.fanout.presence(1, {'joined': [], 'left': [user]})
+
+        self.assertIsNone(self.fanout.snapshot(1))
+        self.assertTrue(self.fanout.is_idle(1))
+
+
+class ChatConnectionsTest(TestCase):
+    def test_burst_holds_bounded_connections(self):
+        out = io.StringIO()
+        call_command(
+            'chat_loadtest', clients=6, messages=4, mode='both', max_connections=2, stdout=out
+        )
+        self.assertEqual(out.getvalue().count('persisted 24/24 messages'), 2)
+        self.assertIn('db connections:', out.getvalue())
+
+    def test_asgi_application_routes_websockets(self):
+        from school_app.asgi import application
+
+        async def connect():
+            communicator = WebsocketCommunicator(
+                application, '/ws/chatroom/1/', headers=[(b'origin', b'https://localhost')]
+            )
+            connected, code = await communicator.connect()
+            await communicator.disconnect()
+            return connected, code
+
+        # Routed to ChatConsumer, which turns away anonymous users
+        self.assertEqual(async_to_sync(connect)(), (False, 4001))
@@ -6,6 +6,7 @@ app_name = 'chatroom'
 urlpatterns = [
     path('', views.chat_home, name='chat_home'),
     path('create/', views.create_room, name='create_room'),
+    path('metrics/', views.chat_metrics, name='chat_metrics'),
     path('<int:room_id>/', views.chat_room, name='chat_room'),
     path('<int:room_id>/messages/', views.get_messages, name='get_messages'),
     path('<int:room_id>/add_user/', views.add_user_to_room, name='add_user_to_room'),
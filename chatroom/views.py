@@ -4,6 +4,8 @@ from django.contrib import messages
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
 from django.db.models import Q
+from .buffer import message_buffer
+from .fanout import fanout
 from .models import ChatRoom, Message, RoomParticipant
 from django.contrib.auth import get_user_model
 import json
@@ -102,17 +104,20 @@ def get_messages(request, room_id):
         last_message_id = 0
     
     # Get new messages
-    new_messages = room.messages.filter(id__gt=last_message_id).order_by('timestamp')
+    new_messages = (
+        room.messages.filter(id__gt=last_message_id).select_related('sender').order_by('timestamp')
+    )
     
     messages_data = []
     for msg in new_messages:
         messages_data.append({
             'id': msg.id,
-            'sender_id': msg.sender.id,
+            'client_id': str(msg.client_id) if msg.client_id else None,
+            'sender_id': msg.sender_id,
             'sender_username': msg.sender.username,
             'content': msg.content,
             'timestamp': msg.timestamp.isoformat(),
-            'is_own': msg.sender.id == request.user.id
+            'is_own': msg.sender_id == request.user.id
         })
     
     return JsonResponse({'messages': messages_data})
@@ -171,4 +176,15 @@ def delete_room(request, room_id):
     room.save()
     
     messages.success(request, f"Chat room '{room.name}' has been deleted")
-    return redirect('chatroom:chat_home')
\ No newline at end of file
+    return redirect('chatroom:chat_home')
+
+@login_required
+def chat_metrics(request):
+    # Counters are per worker process
+    if not request.user.is_staff:
+        return JsonResponse({'error': 'Permission denied'}, status=403)
+
+    return JsonResponse({
+        'fanout': fanout.stats(),
+        'pending_messages': message_buffer.pending_count(),
+    })
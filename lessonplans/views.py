@@ -8,10 +8,24 @@ from django.contrib import messages
 from django.core.exceptions import PermissionDenied
 from django.http import JsonResponse
 
+from apps.search.backends import search as search_index
+
 from .models import LessonPlan, Subject, ClassLevel, LessonPlanAttachment, LessonPlanComment
 from .forms import LessonPlanForm, LessonPlanFilterForm, LessonPlanAttachmentForm, LessonPlanCommentForm
 
 
+def visible_lessonplans(user):
+    """Lesson plans ``user`` may see in listings and search results"""
+    queryset = LessonPlan.objects.all()
+    # For non-staff users, show only their own or visible lesson plans
+    if not user.is_staff:
+        queryset = queryset.filter(
+            Q(teacher=user) |
+            Q(visibility__in=['teachers', 'admin', 'students', 'parents', 'public'])
+        )
+    return queryset
+
+
 class LessonPlanListView(LoginRequiredMixin, ListView):
     """View for listing lesson plans with filtering"""
     model = LessonPlan
@@ -20,14 +34,9 @@ class LessonPlanListView(LoginRequiredMixin, ListView):
     paginate_by = 10
     
     def get_queryset(self):
-        queryset = LessonPlan.objects.all()
-        
-        # For non-staff users, show only their own or visible lesson plans
-        if not self.request.user.is_staff:
-            queryset = queryset.filter(
-                Q(teacher=self.request.user) |
-                Q(visibility__in=['teachers', 'admin', 'students', 'parents', 'public'])
-            )
+        queryset = visible_lessonplans(self.request.user)
+        # Ids of the plans a search matched, best first, once every filter applied
+        self.ranking = None
         
         # Apply filters
         form = LessonPlanFilterForm(self.request.GET)
@@ -48,20 +57,29 @@ class LessonPlanListView(LoginRequiredMixin, ListView):
                 queryset = queryset.filter(status=status)
             if visibility:
                 queryset = queryset.filter(visibility=visibility)
-            if search:
-                queryset = queryset.filter(
-                    Q(title__icontains=search) |
-                    Q(objectives__icontains=search) |
-                    Q(content__icontains=search) |
-                    Q(tags__icontains=search)
-                )
             if date_from:
                 queryset = queryset.filter(created_at__date__gte=date_from)
             if date_to:
                 queryset = queryset.filter(created_at__date__lte=date_to)
+            if search:
+                # Ranked, prefix and typo-tolerant matches from the search index;
+                # every hit, so the other filters cannot empty a capped list
+                ids = [hit.object_id for hit in search_index(search, kinds=['lessonplan'], limit=None)]
+                matching = set(queryset.filter(pk__in=ids).values_list('pk', flat=True))
+                self.ranking = [pk for pk in ids if pk in matching]
+                queryset = queryset.filter(pk__in=self.ranking)
         
         return queryset.select_related('teacher', 'subject', 'class_level')
     
+    def paginate_queryset(self, queryset, page_size):
+        if self.ranking is None:
+            return super().paginate_queryset(queryset, page_size)
+        # Page through the ranked ids, then load only the page's plans
+        paginator, page, ids, is_paginated = super().paginate_queryset(self.ranking, page_size)
+        plans = queryset.in_bulk(ids)
+        page.object_list = [plans[pk] for pk in ids if pk in plans]
+        return paginator, page, page.object_list, is_paginated
+    
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['filter_form'] = LessonPlanFilterForm(self.request.GET)
@@ -1,16 +1,31 @@
 """
-ASGI config for newapp project.
+ASGI config for school_app project.
 
-It exposes the ASGI callable as a module-level variable named ``application``.
+HTTP requests go to Django and WebSocket connections to the Channels
+consumers (chat), authenticated from the Django session.
 
 For more information on this file, see
-https://docs.djangoproject.com/en/3.0/howto/deployment/asgi/
+https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
 
 import os
 
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault("DJANGO_SETTINGS_MODULE", "newapp.settings")
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "school_app.settings")
 
-application = get_asgi_application()
+# Set up Django before importing consumers, which import models
+django_asgi_app = get_asgi_application()
+
+from channels.auth import AuthMiddlewareStack  # noqa: E402
+from channels.routing import ProtocolTypeRouter, URLRouter  # noqa: E402
+from channels.security.websocket import AllowedHostsOriginValidator  # noqa: E402
+
+from chatroom.routing import websocket_urlpatterns  # noqa: E402
+
+application = ProtocolTypeRouter({
+    "http": django_asgi_app,
+    "websocket": AllowedHostsOriginValidator(
+        AuthMiddlewareStack(URLRouter(websocket_urlpatterns))
+    ),
+})
@@ -3,6 +3,7 @@ Django settings for school_app project.
 Optimized for Railway PostgreSQL + Render hosting.
 """
 
+import importlib.util
 import os
 import sys
 from dotenv import load_dotenv
@@ -11,6 +12,16 @@ import dj_database_url
 # Load environment variables
 load_dotenv()
 
+# Settings load in every worker and management command; only describe the
+# resolved configuration when asked to
+SETTINGS_VERBOSE = os.getenv('SETTINGS_VERBOSE', 'False').lower() == 'true'
+
+
+def _report(message, error=False):
+    if error or SETTINGS_VERBOSE:
+        print(message, file=sys.stderr)
+
+
 # Build paths
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -31,7 +42,7 @@ RENDER_EXTERNAL_HOSTNAME = os.environ.get('RENDER_EXTERNAL_HOSTNAME')
 if RENDER_EXTERNAL_HOSTNAME and RENDER_EXTERNAL_HOSTNAME.strip():
     ALLOWED_HOSTS.append(RENDER_EXTERNAL_HOSTNAME.strip())
 
-print(f"🌐 ALLOWED_HOSTS: {ALLOWED_HOSTS}")
+_report(f"🌐 ALLOWED_HOSTS: {ALLOWED_HOSTS}")
 
 # Application definition
 INSTALLED_APPS = [
@@ -62,9 +73,14 @@ INSTALLED_APPS = [
     'apps.books',
     'apps.transport',
     'lessonplans.apps.LessonplansConfig',
+    'apps.search',
+    'apps.perf',
+    'apps.jobs',
 ]
 
 MIDDLEWARE = [
+    "apps.corecode.middleware.RequestInstrumentation",
+    "apps.corecode.middleware.ReplicaRouting",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -96,10 +112,51 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "school_app.wsgi.application"
+ASGI_APPLICATION = "school_app.asgi.application"
 
 # ============================================
 # DATABASE CONFIGURATION - RAILWAY POSTGRESQL
 # ============================================
+def get_pool_options(db_config):
+    """
+    Pool PostgreSQL connections per process with psycopg 3 (Django 5.1+).
+
+    ASGI consumers reach the database from a changing set of executor
+    threads. Persistent per-thread connections (CONN_MAX_AGE) therefore
+    churn or pile up. A pool caps each process at pool max_size
+    connections. That max defaults to the DB threads per process
+    (DATABASE_POOL_THREADS, else GUNICORN_THREADS / ASGI_THREADS) plus two
+    for the async executor. Keep WEB_CONCURRENCY x max_size under the
+    server's max_connections.
+
+    pool_min_size, pool_max_size and pool_timeout may also be given as
+    query parameters on the database URL.
+    """
+    options = db_config.setdefault('OPTIONS', {})
+    from_url = {key[len('pool_'):]: options.pop(key) for key in list(options) if key.startswith('pool_')}
+    if os.getenv('DATABASE_POOL', 'True').lower() != 'true':
+        return None
+    if importlib.util.find_spec('psycopg_pool') is None:
+        _report("⚠️  psycopg_pool is not installed; using persistent connections", error=True)
+        return None
+
+    threads = int(
+        os.getenv('DATABASE_POOL_THREADS')
+        or os.getenv('GUNICORN_THREADS')
+        or os.getenv('ASGI_THREADS')
+        or 4
+    )
+    max_size = int(from_url.get('max_size') or os.getenv('DATABASE_POOL_MAX_SIZE') or threads + 2)
+    pool = {
+        'min_size': min(max_size, int(from_url.get('min_size') or os.getenv('DATABASE_POOL_MIN_SIZE') or 2)),
+        'max_size': max_size,
+        'timeout': float(from_url.get('timeout') or os.getenv('DATABASE_POOL_TIMEOUT') or 10),
+    }
+    workers = int(os.getenv('WEB_CONCURRENCY', 1))
+    _report(f"🏊 Connection pool: {pool['min_size']}-{max_size} per process, up to {workers * max_size} total")
+    return pool
+
+
 def get_database_config():
     """
     Railway PostgreSQL configuration
@@ -107,7 +164,7 @@ def get_database_config():
     db_url = os.getenv('DATABASE_URL')
     
     if db_url and db_url.strip():
-        print(f"🚂 DATABASE_URL found! Connecting to Railway PostgreSQL...")
+        _report("🚂 DATABASE_URL found! Connecting to Railway PostgreSQL...")
         
         try:
             # Parse database URL
@@ -124,21 +181,27 @@ def get_database_config():
             # Add SSL requirement
             db_config.setdefault('OPTIONS', {})
             db_config['OPTIONS']['sslmode'] = 'require'
+
+            pool = get_pool_options(db_config)
+            if pool:
+                db_config['OPTIONS']['pool'] = pool
+                # Pooled connections are returned to the pool, not kept per thread
+                db_config['CONN_MAX_AGE'] = 0
             
             # Show connection info (without password)
             safe_url = db_url.replace(db_url.split('@')[0].split(':')[2], '***')
-            print(f"✅ Configured for: {safe_url}")
+            _report(f"✅ Configured for: {safe_url}")
             
             return {'default': db_config}
             
         except Exception as e:
-            print(f"❌ Error parsing DATABASE_URL: {e}")
-            print("📁 Falling back to SQLite")
+            _report(f"❌ Error parsing DATABASE_URL: {e}", error=True)
+            _report("📁 Falling back to SQLite", error=True)
     else:
-        print("⚠️  DATABASE_URL not found or empty")
+        _report("⚠️  DATABASE_URL not found or empty")
     
     # Fallback to SQLite
-    print("📁 Using SQLite for local development")
+    _report("📁 Using SQLite for local development")
     return {
         "default": {
             "ENGINE": "django.db.backends.sqlite3",
@@ -148,6 +211,44 @@ def get_database_config():
 
 DATABASES = get_database_config()
 
+
+def get_replica_config():
+    """
+    Optional read replica, e.g. a PostgreSQL standby. Any URL works, so two
+    SQLite files can stand in for primary and replica locally.
+    """
+    replica_url = os.getenv('DATABASE_REPLICA_URL', '').strip()
+    if not replica_url:
+        return None
+    try:
+        db_config = dj_database_url.parse(replica_url, conn_max_age=600, conn_health_checks=True)
+    except Exception as e:
+        _report(f"❌ Error parsing DATABASE_REPLICA_URL: {e}", error=True)
+        return None
+    if db_config['ENGINE'] == 'django.db.backends.postgresql':
+        db_config.setdefault('OPTIONS', {})['sslmode'] = 'require'
+        pool = get_pool_options(db_config)
+        if pool:
+            db_config['OPTIONS']['pool'] = pool
+            db_config['CONN_MAX_AGE'] = 0
+    # Tests run against the primary's test database
+    db_config['TEST'] = {'MIRROR': 'default'}
+    _report("📖 Read replica configured")
+    return db_config
+
+
+_replica_config = get_replica_config()
+if _replica_config:
+    DATABASES['replica'] = _replica_config
+DATABASE_REPLICA_ALIAS = 'replica' if _replica_config else None
+DATABASE_ROUTERS = ['apps.corecode.replicas.ReplicaRouter']
+
+# Reads stay on the primary this long after a client writes, and while the
+# replica lags more than REPLICA_MAX_LAG_SECONDS (0 disables the check)
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', 15))
+REPLICA_MAX_LAG_SECONDS = float(os.getenv('REPLICA_MAX_LAG_SECONDS', 30))
+REPLICA_LAG_CHECK_SECONDS = float(os.getenv('REPLICA_LAG_CHECK_SECONDS', 5))
+
 # ============================================
 # CSRF CONFIGURATION - FIXED FOR DJANGO 4.0+
 # ============================================
@@ -162,7 +263,7 @@ if csrf_origins_str and csrf_origins_str.strip():
         if origin.startswith('http://') or origin.startswith('https://'):
             valid_origins.append(origin)
         else:
-            print(f"⚠️  Skipping invalid CSRF origin (must start with http:// or https://): '{origin}'")
+            _report(f"⚠️  Skipping invalid CSRF origin (must start with http:// or https://): '{origin}'", error=True)
     CSRF_TRUSTED_ORIGINS = valid_origins
 
 # Add default Render/Railway origins
@@ -173,7 +274,7 @@ CSRF_TRUSTED_ORIGINS.extend([
 
 # Remove duplicates
 CSRF_TRUSTED_ORIGINS = list(set(CSRF_TRUSTED_ORIGINS))
-print(f"🔒 CSRF Trusted Origins: {CSRF_TRUSTED_ORIGINS}")
+_report(f"🔒 CSRF Trusted Origins: {CSRF_TRUSTED_ORIGINS}")
 
 # ============================================
 # REST OF YOUR SETTINGS...
@@ -246,6 +347,64 @@ else:
         }
     }
 
+# Cache configuration (chat presence, room membership)
+if REDIS_URL and REDIS_URL.strip():
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'school-app',
+        }
+    }
+
+# Chat presence: clients heartbeat every 30 seconds (static/js/chat.js) and
+# are dropped from the online list after CHAT_PRESENCE_TTL seconds of silence.
+CHAT_PRESENCE_TTL = int(os.getenv('CHAT_PRESENCE_TTL', 90))
+CHAT_MEMBERSHIP_CACHE_TIMEOUT = int(os.getenv('CHAT_MEMBERSHIP_CACHE_TIMEOUT', 300))
+
+# Chat write-behind: broadcast messages immediately and persist them in
+# batches of CHAT_WRITE_BEHIND_BATCH_SIZE or every
+# CHAT_WRITE_BEHIND_INTERVAL seconds, whichever comes first. Messages still
+# unsaved after CHAT_WRITE_BEHIND_MAX_ATTEMPTS flushes are logged and dropped.
+CHAT_WRITE_BEHIND = os.getenv('CHAT_WRITE_BEHIND', 'False').lower() == 'true'
+CHAT_WRITE_BEHIND_BATCH_SIZE = int(os.getenv('CHAT_WRITE_BEHIND_BATCH_SIZE', 50))
+CHAT_WRITE_BEHIND_INTERVAL = float(os.getenv('CHAT_WRITE_BEHIND_INTERVAL', 1.0))
+CHAT_WRITE_BEHIND_MAX_ATTEMPTS = int(os.getenv('CHAT_WRITE_BEHIND_MAX_ATTEMPTS', 5))
+
+# Typing and presence events are coalesced into at most one room snapshot
+# every CHAT_SNAPSHOT_INTERVAL seconds. Typing state expires after
+# CHAT_TYPING_TTL seconds and snapshots name at most CHAT_TYPING_MAX_USERS.
+CHAT_SNAPSHOT_INTERVAL = float(os.getenv('CHAT_SNAPSHOT_INTERVAL', 0.5))
+CHAT_TYPING_TTL = float(os.getenv('CHAT_TYPING_TTL', 5))
+CHAT_TYPING_MAX_USERS = int(os.getenv('CHAT_TYPING_MAX_USERS', 5))
+
+# Background jobs (apps.jobs): `manage.py run_worker` runs JOBS_CONCURRENCY
+# jobs at a time, polling every JOBS_POLL_SECONDS when idle. A running job
+# without a heartbeat for JOBS_STALE_SECONDS is requeued; finished jobs are
+# kept for JOBS_RETENTION_DAYS. JOBS_EAGER runs jobs inside the request
+# instead, for development without a worker.
+JOBS_EAGER = os.getenv('JOBS_EAGER', 'False').lower() == 'true'
+JOBS_CONCURRENCY = int(os.getenv('JOBS_CONCURRENCY', 2))
+JOBS_POLL_SECONDS = float(os.getenv('JOBS_POLL_SECONDS', 1.0))
+JOBS_STALE_SECONDS = int(os.getenv('JOBS_STALE_SECONDS', 300))
+JOBS_RETENTION_DAYS = int(os.getenv('JOBS_RETENTION_DAYS', 7))
+
+# Periodic jobs (apps.jobs.scheduler): cron expressions in the Schedule table
+# are read in SCHEDULE_TIME_ZONE. The scheduler ticks every
+# JOBS_SCHEDULER_INTERVAL seconds; runs missed by more than
+# JOBS_SCHEDULE_GRACE_SECONDS are caught up, outside JOBS_PEAK_HOURS
+# ("start-end", school days) for off-peak schedules.
+SCHEDULE_TIME_ZONE = os.getenv('SCHEDULE_TIME_ZONE', 'Africa/Nairobi')
+JOBS_SCHEDULER_INTERVAL = int(os.getenv('JOBS_SCHEDULER_INTERVAL', 30))
+JOBS_SCHEDULE_GRACE_SECONDS = int(os.getenv('JOBS_SCHEDULE_GRACE_SECONDS', 300))
+JOBS_PEAK_HOURS = os.getenv('JOBS_PEAK_HOURS', '7-17')
+
 # Email configuration
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = os.getenv('EMAIL_HOST', '')
@@ -266,6 +425,58 @@ AFRICASTALKING_USERNAME = os.getenv('AFRICASTALKING_USERNAME', '')
 AFRICASTALKING_API_KEY = os.getenv('AFRICASTALKING_API_KEY', '')
 AFRICASTALKING_SENDER_ID = os.getenv('AFRICASTALKING_SENDER_ID', '')
 
+# Attendance: seconds between the first absence alert of a batch and the
+# SMS job that texts parents, so registers taken meanwhile share it
+ATTENDANCE_ALERT_DELAY_SECONDS = int(os.getenv('ATTENDANCE_ALERT_DELAY_SECONDS', 600))
+
+# Attendance: class/term matrices each process keeps for the heatmap and
+# its CSV (entry writes make them stale everywhere)
+ATTENDANCE_MATRIX_CACHE_SIZE = int(os.getenv('ATTENDANCE_MATRIX_CACHE_SIZE', 32))
+
+# ID cards: processes used to render barcodes/QR codes in bulk
+# (defaults to one per CPU)
+IDCARD_CODE_WORKERS = int(os.getenv('IDCARD_CODE_WORKERS', 0)) or None
+
+# Photos (apps.corecode.images): processes that resize uploads in bulk
+# (defaults to one per CPU), WebP/JPEG quality of the resized copies, and
+# the media subdirectory they are stored in
+IMAGE_DERIVATIVE_WORKERS = int(os.getenv('IMAGE_DERIVATIVE_WORKERS', 0)) or None
+IMAGE_DERIVATIVE_QUALITY = int(os.getenv('IMAGE_DERIVATIVE_QUALITY', 80))
+IMAGE_DERIVATIVE_DIR = os.getenv('IMAGE_DERIVATIVE_DIR', 'derivatives')
+
+# Parent portal: seconds a student's fees/performance snapshot is cached
+# (writes through the ORM invalidate it sooner)
+PARENT_SNAPSHOT_TIMEOUT = int(os.getenv('PARENT_SNAPSHOT_TIMEOUT', 300))
+
+# Results: seconds each process keeps grade scales in memory before
+# re-reading them (edits made in the same process apply immediately)
+GRADE_SCALE_CACHE_TIMEOUT = int(os.getenv('GRADE_SCALE_CACHE_TIMEOUT', 300))
+
+# Results: seconds class/term analytics stay cached (result edits drop them)
+RESULT_ANALYTICS_TIMEOUT = int(os.getenv('RESULT_ANALYTICS_TIMEOUT', 600))
+
+# Request instrumentation (apps.corecode.instrumentation): Server-Timing
+# headers, one JSON log line per request on the "school_app.performance"
+# logger, and the admin slow-endpoints table. Requests slower than
+# INSTRUMENTATION_SLOW_MS are logged as warnings.
+INSTRUMENTATION_ENABLED = os.getenv('INSTRUMENTATION_ENABLED', 'False').lower() == 'true'
+INSTRUMENTATION_SLOW_MS = int(os.getenv('INSTRUMENTATION_SLOW_MS', 1000))
+
+# Where run_benchmarks stores its JSON results
+BENCHMARK_DIR = os.getenv('BENCHMARK_DIR', os.path.join(BASE_DIR, 'benchmarks'))
+
+# Global search: typo tolerance of the SQLite fallback (PostgreSQL uses
+# pg_trgm's word_similarity_threshold instead)
+SEARCH_FUZZY_MIN_LENGTH = int(os.getenv('SEARCH_FUZZY_MIN_LENGTH', 4))
+SEARCH_FUZZY_THRESHOLD = float(os.getenv('SEARCH_FUZZY_THRESHOLD', 0.75))
+
+# Server-side lists (apps.corecode.datatables): most rows per page, seconds
+# a list's row counts are reused while paging, and the PostgreSQL planner
+# estimate above which rows are estimated rather than counted
+LIST_MAX_PAGE_SIZE = int(os.getenv('LIST_MAX_PAGE_SIZE', 100))
+LIST_COUNT_CACHE_SECONDS = int(os.getenv('LIST_COUNT_CACHE_SECONDS', 60))
+LIST_COUNT_ESTIMATE_THRESHOLD = int(os.getenv('LIST_COUNT_ESTIMATE_THRESHOLD', 50000))
+
 # Crispy Forms
 CRISPY_TEMPLATE_PACK = "bootstrap4"
 
@@ -294,11 +505,20 @@ LOGGING = {
             "level": "INFO",
             "propagate": True,
         },
+        "school_app.performance": {
+            "handlers": ["console"],
+            "level": "INFO",
+            "propagate": False,
+        },
+        "apps.jobs": {
+            "handlers": ["console"],
+            "level": "INFO",
+            "propagate": False,
+        },
     },
 }
 
 # Data upload limits
 DATA_UPLOAD_MAX_NUMBER_FIELDS = 10240
 
-# Remove the database test that causes the warning
-print(f"🚀 Django configured. DEBUG={DEBUG}")
+_report(f"🚀 Django configured. DEBUG={DEBUG}")
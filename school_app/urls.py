@@ -64,6 +64,7 @@ urlpatterns = [
     path('chat/', include('chatroom.urls', namespace='chatroom')),
     path('test-db/', test_database, name='test_db'),
     path('lesson-plans/', include('lessonplans.urls')),
+    path('jobs/', include('apps.jobs.urls')),
 
 ]
 
@@ -1,7 +1,14 @@
 // WebSocket connection
 let chatSocket = null;
 let typingTimeout = null;
+let typingSentAt = 0;
 let usersTyping = new Set();
+let typingSources = new Map();
+const TYPING_REFRESH_MS = 2000;
+const TYPING_SOURCE_EXPIRY_MS = 6000;
+let heartbeatInterval = null;
+let onlineUsers = new Map();
+const HEARTBEAT_MS = 30000;
 
 function connect() {
     const roomId = document.getElementById('room-id').value;
@@ -13,10 +20,13 @@ function connect() {
     chatSocket.onopen = function(e) {
         console.log('WebSocket connection established');
         loadPreviousMessages();
+        clearInterval(heartbeatInterval);
+        heartbeatInterval = setInterval(sendHeartbeat, HEARTBEAT_MS);
     };
     
     chatSocket.onclose = function(e) {
         console.log('WebSocket connection closed');
+        clearInterval(heartbeatInterval);
         setTimeout(function() {
             connect();
         }, 2000);
@@ -46,22 +56,21 @@ function handleMessage(data) {
             updateUserList(data.users);
             break;
             
-        case 'user_joined':
-            showNotification(`${data.username} joined the chat`);
+        case 'snapshot':
+            data.joined.forEach(user => {
+                onlineUsers.set(user.id, user.username);
+                showNotification(`${user.username} joined the chat`);
+            });
+            data.left.forEach(user => {
+                onlineUsers.delete(user.id);
+                showNotification(`${user.username} left the chat`);
+            });
             updateOnlineCount();
-            break;
-            
-        case 'user_left':
-            showNotification(`${data.username} left the chat`);
-            updateOnlineCount();
-            break;
-            
-        case 'typing':
-            if (data.is_typing) {
-                usersTyping.add(data.username);
-            } else {
-                usersTyping.delete(data.username);
-            }
+            typingSources.set(data.source, {
+                users: data.typing,
+                count: data.typing_count,
+                at: Date.now()
+            });
             updateTypingIndicator();
             break;
     }
@@ -72,9 +81,20 @@ function addMessage(data) {
     const userId = document.getElementById('user-id').value;
     const isOwn = parseInt(data.sender_id) === parseInt(userId);
     
+    // Write-behind messages arrive before they have a database id, and may
+    // arrive again from loadPreviousMessages once they do.
+    if (data.client_id && document.querySelector(`[data-client-id="${data.client_id}"]`)) {
+        return;
+    }
+    
     const messageElement = document.createElement('div');
     messageElement.className = `message ${isOwn ? 'message-own' : 'message-other'}`;
-    messageElement.id = `message-${data.message_id}`;
+    if (data.message_id) {
+        messageElement.id = `message-${data.message_id}`;
+    }
+    if (data.client_id) {
+        messageElement.dataset.clientId = data.client_id;
+    }
     
     const time = new Date(data.timestamp);
     const timeString = time.toLocaleTimeString([], {hour: '2-digit', minute:'2-digit'});
@@ -95,19 +115,35 @@ function sendMessage() {
     if (message && chatSocket.readyState === WebSocket.OPEN) {
         chatSocket.send(JSON.stringify({
             'type': 'chat_message',
-            'message': message
+            'message': message,
+            'client_id': generateClientId()
         }));
         messageInput.value = '';
         stopTyping();
     }
 }
 
+function generateClientId() {
+    if (window.crypto && crypto.randomUUID) {
+        return crypto.randomUUID();
+    }
+    return 'xxxxxxxx-xxxx-4xxx-yxxx-xxxxxxxxxxxx'.replace(/[xy]/g, function(c) {
+        const r = Math.random() * 16 | 0;
+        return (c === 'x' ? r : (r & 0x3 | 0x8)).toString(16);
+    });
+}
+
 function startTyping() {
     if (chatSocket.readyState === WebSocket.OPEN) {
-        chatSocket.send(JSON.stringify({
-            'type': 'typing',
-            'is_typing': true
-        }));
+        // The server keeps typing state alive for a few seconds, so only
+        // refresh it every TYPING_REFRESH_MS rather than on every keystroke.
+        if (Date.now() - typingSentAt > TYPING_REFRESH_MS) {
+            chatSocket.send(JSON.stringify({
+                'type': 'typing',
+                'is_typing': true
+            }));
+            typingSentAt = Date.now();
+        }
         
         clearTimeout(typingTimeout);
         typingTimeout = setTimeout(stopTyping, 2000);
@@ -115,26 +151,44 @@ function startTyping() {
 }
 
 function stopTyping() {
-    if (chatSocket.readyState === WebSocket.OPEN) {
+    if (typingSentAt && chatSocket.readyState === WebSocket.OPEN) {
         chatSocket.send(JSON.stringify({
             'type': 'typing',
             'is_typing': false
         }));
     }
+    typingSentAt = 0;
     clearTimeout(typingTimeout);
 }
 
 function updateTypingIndicator() {
     const indicator = document.getElementById('typing-indicator');
-    if (usersTyping.size > 0) {
+    const userId = parseInt(document.getElementById('user-id').value);
+    let total = 0;
+    usersTyping = new Set();
+    // Each server process reports its own connections; merge them and drop
+    // processes that have gone quiet.
+    typingSources.forEach((snapshot, source) => {
+        if (Date.now() - snapshot.at > TYPING_SOURCE_EXPIRY_MS) {
+            typingSources.delete(source);
+            return;
+        }
+        snapshot.users.forEach(user => {
+            if (user.id !== userId) {
+                usersTyping.add(user.username);
+            }
+        });
+        total += snapshot.count - snapshot.users.filter(user => user.id === userId).length;
+    });
+    if (total > 0) {
         const names = Array.from(usersTyping);
         let text = '';
-        if (names.length === 1) {
+        if (total === 1 && names.length === 1) {
             text = `${names[0]} is typing...`;
-        } else if (names.length === 2) {
+        } else if (total === 2 && names.length === 2) {
             text = `${names[0]} and ${names[1]} are typing...`;
         } else {
-            text = `${names.length} people are typing...`;
+            text = `${total} people are typing...`;
         }
         indicator.textContent = text;
         indicator.style.display = 'block';
@@ -143,22 +197,33 @@ function updateTypingIndicator() {
     }
 }
 
+function sendHeartbeat() {
+    if (chatSocket && chatSocket.readyState === WebSocket.OPEN) {
+        chatSocket.send(JSON.stringify({'type': 'heartbeat'}));
+    }
+}
+
 function updateUserList(users) {
-    const userList = document.getElementById('user-list');
-    const userId = document.getElementById('user-id').value;
-    
-    // Simple implementation - update as needed
-    console.log('Users online:', users);
-    document.getElementById('online-count').textContent = `${users.length} online`;
+    onlineUsers = new Map(users.map(user => [user.id, user.username]));
+    updateOnlineCount();
 }
 
 function updateOnlineCount() {
-    // You can implement more sophisticated online tracking here
+    document.getElementById('online-count').textContent = `${onlineUsers.size} online`;
+    document.querySelectorAll('#user-list [id^="user-"]').forEach(element => {
+        const icon = element.querySelector('i');
+        const isOnline = onlineUsers.has(parseInt(element.id.replace('user-', '')));
+        if (icon) {
+            icon.classList.toggle('text-success', isOnline);
+            icon.classList.toggle('text-secondary', !isOnline);
+        }
+    });
 }
 
 function loadPreviousMessages() {
     const roomId = document.getElementById('room-id').value;
-    const lastMessage = document.querySelector('.message');
+    const savedMessages = document.querySelectorAll('.message[id^="message-"]');
+    const lastMessage = savedMessages[savedMessages.length - 1];
     const lastMessageId = lastMessage ? lastMessage.id.replace('message-', '') : 0;
     
     fetch(`/chatroom/${roomId}/messages/`, {
@@ -174,6 +239,7 @@ function loadPreviousMessages() {
         if (data.messages) {
             data.messages.forEach(msg => addMessage({
                 message_id: msg.id,
+                client_id: msg.client_id,
                 sender_id: msg.sender_id,
                 sender_username: msg.sender_username,
                 message: msg.content,
@@ -238,6 +304,9 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     });
     
+    // Expire typing snapshots from processes that stopped reporting
+    setInterval(updateTypingIndicator, TYPING_SOURCE_EXPIRY_MS);
+    
     // Auto-scroll to bottom
     scrollToBottom();
 });
\ No newline at end of file
@@ -0,0 +1,41 @@
+// static/js/server-table.js - DataTables in server-processing mode against a
+// ListEndpoint (apps/corecode/datatables.py). The cursor returned with each
+// page is sent back with the next request, so paging forward is read by
+// keyset instead of OFFSET; the server ignores it for any other request.
+(function ($) {
+  function serverTable(selector, url, options) {
+    var cursor = '';
+    var settings = $.extend({
+      serverSide: true,
+      processing: true,
+      searchDelay: 400,
+      pageLength: 25,
+      lengthMenu: [10, 25, 50, 100],
+      ajax: {
+        url: url,
+        data: function (params) {
+          params.cursor = cursor;
+        },
+        dataSrc: function (json) {
+          cursor = json.next || '';
+          return json.data;
+        }
+      }
+    }, options || {});
+    return $(selector).DataTable(settings);
+  }
+
+  // Escape text (and attribute values) for cells built as HTML in render functions
+  serverTable.escape = function (value) {
+    return $('<div>').text(value == null ? '' : String(value)).html().replace(/"/g, '&quot;');
+  };
+
+  // Filter column `index` on the server whenever `control` changes
+  serverTable.bindFilter = function (table, control, index) {
+    $(control).on('change', function () {
+      table.column(index).search($(this).val()).draw();
+    });
+  };
+
+  window.serverTable = serverTable;
+})(jQuery);
@@ -1,6 +1,7 @@
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.urls import reverse_lazy
+from apps.corecode import images
 from .models import PortfolioItem, PortfolioCategory
 from .forms import PortfolioItemForm
 
@@ -56,4 +57,11 @@ class PublicPortfolioView(DetailView):
     context_object_name = 'item'
     
     def get_queryset(self):
-        return PortfolioItem.objects.filter(is_published=True)
\ No newline at end of file
+        return PortfolioItem.objects.filter(is_published=True)
+
+    def get_object(self, queryset=None):
+        item = super().get_object(queryset)
+        # Visitors are anonymous and cannot reach the on-demand resize view
+        if item.image_file:
+            images.ensure(item.image_file.name, 'md', 'webp')
+        return item